@@ -0,0 +1,42 @@
+"""
+Model Routes
+
+This module defines the API routes for model endpoints and residency.
+"""
+
+import logging
+from typing import Any, Dict, List
+from fastapi import APIRouter, Request
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get("/endpoints", response_model=Dict[str, List[Dict[str, Any]]])
+async def get_endpoint_status(request: Request):
+    """
+    Get the routing state of every model endpoint.
+    
+    Args:
+        request: Request object
+        
+    Returns:
+        Endpoint statuses per provider
+    """
+    model_router = request.app.state.model_router
+    
+    return model_router.get_endpoint_status()
+
+@router.get("/residency", response_model=Dict[str, Dict[str, Any]])
+async def get_residency_stats(request: Request):
+    """
+    Get model load and generation times per provider and model.
+    
+    Args:
+        request: Request object
+        
+    Returns:
+        Residency statistics per provider
+    """
+    model_router = request.app.state.model_router
+    
+    return model_router.get_residency_stats()
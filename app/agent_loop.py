@@ -19,6 +19,8 @@ from sqlalchemy.future import select
 from .database import async_session, Task
 from .task_management import ContextScaffold, ContextRefresher, TaskManager
 from .providers.factory import get_model_provider
+from .providers.limiter import Priority, set_request_priority
+from .db.query_stats import set_query_caller
 from .tools import FileOperations, ShellCommands, SearchTools
 
 # Configure logging
@@ -630,29 +632,30 @@ async def process_agent_response(db: AsyncSession, agent_id: str, task_id: str,
     await ContextScaffold.add_task_update(db, task_id, agent_id, response)
     logger.info(f"Agent {agent_id} provided an update for task {task_id}")
 
-async def process_new_task(db: AsyncSession, agent_id: str, agent_model: str, agent_role: str, task: Dict[str, Any], context: Dict[str, Any]) -> None:
+async def process_new_task(agent_id: str, agent_model: str, agent_role: str, task: Dict[str, Any], context: Dict[str, Any]) -> None:
     """Process a new task"""
-    # Update task status
-    stmt = select(Task).where(Task.id == task["id"])
-    result = await db.execute(stmt)
-    db_task = result.scalars().first()
-
-    if db_task:
-        db_task.status = "in_progress"
-        await db.commit()
-
-    # Add update
-    await ContextScaffold.add_task_update(
-        db,
-        task["id"],
-        agent_id,
-        "Started working on task"
-    )
+    async with async_session() as db:
+        # Update task status
+        stmt = select(Task).where(Task.id == task["id"])
+        result = await db.execute(stmt)
+        db_task = result.scalars().first()
+
+        if db_task:
+            db_task.status = "in_progress"
+            await db.commit()
+
+        # Add update
+        await ContextScaffold.add_task_update(
+            db,
+            task["id"],
+            agent_id,
+            "Started working on task"
+        )
 
     # Create prompt for the agent
     prompt = create_agent_task_prompt(agent_role, task, context)
 
-    # Get response from the model
+    # Get response from the model; no database connection is held meanwhile
     provider = get_model_provider(model_name=agent_model)
     response = await provider.generate_completion(
         system_prompt=f"You are an AI assistant with the role: {agent_role}. You are working on a delegated task.",
@@ -660,9 +663,10 @@ async def process_new_task(db: AsyncSession, agent_id: str, agent_model: str, ag
     )
 
     # Process the response
-    await process_agent_response(db, agent_id, task["id"], response)
+    async with async_session() as db:
+        await process_agent_response(db, agent_id, task["id"], response)
 
-async def continue_task(db: AsyncSession, agent_id: str, agent_model: str, agent_role: str, task: Dict[str, Any], context: Dict[str, Any]) -> None:
+async def continue_task(agent_id: str, agent_model: str, agent_role: str, task: Dict[str, Any], context: Dict[str, Any]) -> None:
     """Continue working on a task"""
     # Check if there are any new updates since last check
     last_update_time = None
@@ -678,7 +682,7 @@ async def continue_task(db: AsyncSession, agent_id: str, agent_model: str, agent
     # Create prompt for the agent to continue the task
     prompt = create_agent_continue_prompt(agent_role, task, context)
 
-    # Get response from the model
+    # Get response from the model; no database connection is held meanwhile
     provider = get_model_provider(model_name=agent_model)
     response = await provider.generate_completion(
         system_prompt=f"You are an AI assistant with the role: {agent_role}. You are continuing work on a delegated task.",
@@ -686,37 +690,44 @@ async def continue_task(db: AsyncSession, agent_id: str, agent_model: str, agent
     )
 
     # Process the response
-    await process_agent_response(db, agent_id, task["id"], response)
+    async with async_session() as db:
+        await process_agent_response(db, agent_id, task["id"], response)
 
 async def agent_task_loop(agent_id: str, agent_model: str, agent_role: str) -> None:
     """Main processing loop for an agent"""
+    # Model calls from this loop queue behind interactive requests
+    set_request_priority(Priority.BACKGROUND)
+    # SQL statistics attribute its statements to this agent
+    set_query_caller(f"agent {agent_id}")
     logger.info(f"Starting agent task loop for agent {agent_id} with role {agent_role}")
 
     while True:
         try:
+            # Sessions are only held for database work, never across a sleep or
+            # a model call, so idle agents do not pin the engine's connections
             async with async_session() as db:
                 # Refresh context
                 context = await ContextRefresher.refresh_agent_context(db, agent_id)
 
-                # Check if there are any active tasks
-                if not context["active_tasks"]:
-                    # No active tasks, sleep and check again later
-                    await asyncio.sleep(60)  # Check every minute
-                    continue
-
-                # Get the current task
-                current_task = context["current_task"]["task"]
-
-                # Process the task
-                if current_task["status"] == "pending":
-                    # Task is new, start working on it
-                    await process_new_task(db, agent_id, agent_model, agent_role, current_task, context["current_task"])
-                elif current_task["status"] == "in_progress":
-                    # Task is in progress, continue working
-                    await continue_task(db, agent_id, agent_model, agent_role, current_task, context["current_task"])
-
-                # Sleep before checking again
-                await asyncio.sleep(30)  # Check every 30 seconds
+            # Check if there are any active tasks
+            if not context["active_tasks"]:
+                # No active tasks, sleep and check again later
+                await asyncio.sleep(60)  # Check every minute
+                continue
+
+            # Get the current task
+            current_task = context["current_task"]["task"]
+
+            # Process the task
+            if current_task["status"] == "pending":
+                # Task is new, start working on it
+                await process_new_task(agent_id, agent_model, agent_role, current_task, context["current_task"])
+            elif current_task["status"] == "in_progress":
+                # Task is in progress, continue working
+                await continue_task(agent_id, agent_model, agent_role, current_task, context["current_task"])
+
+            # Sleep before checking again
+            await asyncio.sleep(30)  # Check every 30 seconds
         except Exception as e:
             logger.error(f"Error in agent task loop for {agent_id}: {e}")
             await asyncio.sleep(60)  # Wait a minute before retrying
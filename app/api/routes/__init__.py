@@ -2,7 +2,8 @@
 API routes package.
 """
 from fastapi import APIRouter
-from app.api.routes import tasks, agents, workspaces, discussions, ui
+from app.api.routes import tasks, agents, workspaces, discussions, ui, metrics, debug
+from app.db.query_stats import SQL_STATS_ENABLED
 
 # Create API router
 api_router = APIRouter()
@@ -13,5 +14,8 @@ api_router.include_router(agents.router, prefix="/agents", tags=["agents"])
 api_router.include_router(workspaces.router, prefix="/workspaces", tags=["workspaces"])
 api_router.include_router(discussions.router, prefix="/discussions", tags=["discussions"])
 api_router.include_router(ui.router, tags=["ui"])
+api_router.include_router(metrics.router, tags=["metrics"])
+if SQL_STATS_ENABLED:
+    api_router.include_router(debug.router, tags=["debug"])
 
 __all__ = ["api_router"]
@@ -0,0 +1,25 @@
+"""
+Debug routes.
+
+Only registered when SQL_STATS_ENABLED is set.
+"""
+from fastapi import APIRouter
+
+from app.db.query_stats import query_stats
+
+router = APIRouter()
+
+@router.get("/debug/sql")
+async def get_sql_stats(limit: int = 50, order_by: str = "total_ms"):
+    """
+    Get calls, time, rows and callers of the most expensive SQL statement fingerprints.
+    """
+    return query_stats.get_stats(limit=limit, order_by=order_by)
+
+@router.delete("/debug/sql")
+async def reset_sql_stats():
+    """
+    Forget the SQL statement statistics recorded so far.
+    """
+    query_stats.reset()
+    return {"status": "reset"}
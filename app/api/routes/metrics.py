@@ -0,0 +1,26 @@
+"""
+Metrics routes.
+"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+from app.db.sqlite import get_pool
+from app.task_metrics import render_prometheus
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Get task pipeline metrics in the Prometheus text format.
+
+    The metrics tables are created at application startup.
+    """
+    pool = get_pool(make_url(settings.DATABASE_URL).database)
+    with pool.reader() as conn:
+        body = render_prometheus(conn)
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
@@ -23,6 +23,8 @@ from sqlalchemy import or_, and_, func, desc
 
 from .database import get_db, Session, Agent, Task, TaskContext, TaskUpdate
 from .providers.factory import get_model_provider
+from .providers.limiter import Priority, set_request_priority
+from .db.query_stats import set_query_caller
 from .utils.feedback_parser import extract_structured_feedback
 from .coding_agent import CodingAgent
 
@@ -71,6 +73,10 @@ class AutonomousAgent:
 
     async def _task_loop(self):
         """Task processing loop that runs in the background."""
+        # Model calls from this loop queue behind interactive requests
+        set_request_priority(Priority.BACKGROUND)
+        # SQL statistics attribute its statements to this agent
+        set_query_caller(f"agent {self.name}")
         while self.running:
             if self.status == "running" or self.status == "idle":
                 # Look for a task to work on
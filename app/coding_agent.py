@@ -22,6 +22,8 @@ from sqlalchemy import or_, and_, func, desc
 
 from .database import Task, TaskContext, TaskUpdate, async_session, get_db
 from .providers.factory import get_model_provider
+from .providers.limiter import Priority, set_request_priority
+from .db.query_stats import set_query_caller
 from .tools import FileOperations, ShellCommands
 from .task_management import ContextScaffold
 
@@ -69,32 +71,35 @@ class CodingAgent:
 
     async def _task_loop(self):
         """Task processing loop that runs in the background."""
+        # Model calls from this loop queue behind interactive requests
+        set_request_priority(Priority.BACKGROUND)
+        # SQL statistics attribute its statements to this agent
+        set_query_caller(f"agent {self.name}")
         while self.running:
             if self.status == "running" or self.status == "idle":
                 try:
-                    # Look for a task to work on
-                    db_gen = get_db()
-                    db = await anext(db_gen)
+                    # Look for a task to work on; the session is closed before sleeping
+                    async with async_session() as db:
+                        # Find pending tasks that match agent skills and are assigned to this agent
+                        query = select(Task).where(
+                            Task.status == "in_progress",
+                            Task.assigned_to == self.agent_id
+                        )
 
-                    # Find pending tasks that match agent skills and are assigned to this agent
-                    query = select(Task).where(
-                        Task.status == "in_progress",
-                        Task.assigned_to == self.agent_id
-                    )
+                        result = await db.execute(query)
+                        task = result.scalars().first()
 
-                    result = await db.execute(query)
-                    task = result.scalars().first()
+                        if task:
+                            self.status = "working"
+                            logger.info(f"Agent {self.name} ({self.agent_id}) working on task {task.id}")
 
-                    if task:
-                        self.status = "working"
-                        logger.info(f"Agent {self.name} ({self.agent_id}) working on task {task.id}")
+                            # Process the task
+                            await self.process_coding_task(db, task.id, task.description)
 
-                        # Process the task
-                        await self.process_coding_task(db, task.id, task.description)
+                            # Reset status after processing
+                            self.status = "running"
 
-                        # Reset status after processing
-                        self.status = "running"
-                    else:
+                    if not task:
                         # No tasks assigned, wait before checking again
                         await asyncio.sleep(5)
                 except Exception as e:
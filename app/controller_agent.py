@@ -24,6 +24,8 @@ from sqlalchemy import or_, and_, func, desc, text
 
 from .database import Task, Agent, TaskContext, TaskUpdate, async_session, get_db
 from .providers.factory import get_model_provider
+from .providers.limiter import Priority, set_request_priority
+from .db.query_stats import set_query_caller
 from .tools import FileOperations, ShellCommands
 from .task_management import ContextScaffold
 
@@ -80,23 +82,25 @@ class ControllerAgent:
 
     async def _project_loop(self):
         """Monitor projects and coordinate tasks"""
+        # Model calls from this loop queue behind interactive requests
+        set_request_priority(Priority.BACKGROUND)
+        # SQL statistics attribute its statements to this agent
+        set_query_caller(f"agent {self.name}")
         while self.running:
             try:
-                # Get database session
-                db_gen = get_db()
-                db = await anext(db_gen)
+                # Get a database session for this pass; it is closed before sleeping
+                async with async_session() as db:
+                    # Look for new projects without a plan
+                    await self._process_new_projects(db)
 
-                # Look for new projects without a plan
-                await self._process_new_projects(db)
+                    # Check for completed tasks and handle next steps
+                    await self._process_completed_tasks(db)
 
-                # Check for completed tasks and handle next steps
-                await self._process_completed_tasks(db)
+                    # Check for blocked tasks
+                    await self._process_blocked_tasks(db)
 
-                # Check for blocked tasks
-                await self._process_blocked_tasks(db)
-
-                # Check for completed projects
-                await self._check_completed_projects(db)
+                    # Check for completed projects
+                    await self._check_completed_projects(db)
 
                 # Sleep before next check
                 await asyncio.sleep(30)
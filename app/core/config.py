@@ -2,9 +2,14 @@
 Configuration settings for the application.
 """
 import os
-from pydantic import BaseSettings
 from typing import List, Optional
 
+try:
+    from pydantic import BaseSettings
+except ImportError:
+    # pydantic 2 (requirements.txt) moved BaseSettings out; its v1 API still ships with it
+    from pydantic.v1 import BaseSettings
+
 class Settings(BaseSettings):
     """
     Application settings.
@@ -6,18 +6,21 @@ including session management, message storage, and feedback storage.
 """
 
 import os
+import json
 from datetime import datetime, timezone
 from typing import List, Optional, Dict, Any
 
 from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float, MetaData
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship, backref
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.future import select
 
 from dotenv import load_dotenv
 
+from app.db.sqlite import create_engine, create_writer_engine, create_session_factory
+
 # Load environment variables
 load_dotenv()
 
@@ -25,8 +28,13 @@ load_dotenv()
 SQLITE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "ai2ai_feedback.db")
 print(f"Using SQLite database at: {SQLITE_DB_PATH}")
 
-# Create SQLite engine
-engine = create_async_engine(
+# Create SQLite engines: a bounded reader pool and the single writer connection
+engine = create_engine(
+    f"sqlite+aiosqlite:///{SQLITE_DB_PATH}",
+    echo=os.getenv("DEBUG", "False").lower() == "true",
+    connect_args={"check_same_thread": False}
+)
+writer_engine = create_writer_engine(
     f"sqlite+aiosqlite:///{SQLITE_DB_PATH}",
     echo=os.getenv("DEBUG", "False").lower() == "true",
     connect_args={"check_same_thread": False}
@@ -36,7 +44,7 @@ engine = create_async_engine(
 metadata = MetaData()
 
 # Create async session
-async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+async_session = create_session_factory(engine, writer_engine)
 
 # Create base class for models with our schema
 Base = declarative_base(metadata=metadata)
@@ -442,3 +450,53 @@ async def cleanup_old_sessions(db: AsyncSession, hours: int = 24) -> int:
         await db.rollback()
         print(f"Error cleaning up sessions: {e}")
         return 0
+
+# Text embedded for each table with an embedding column
+EMBEDDING_SOURCES = {
+    Memory: lambda row: row.content,
+    CodeSnippet: lambda row: "\n".join(part for part in (row.title, row.description, row.code) if part),
+    Reference: lambda row: f"{row.title}\n{row.content}",
+}
+
+async def backfill_embeddings(db: AsyncSession, provider, model: Optional[str] = None, batch_size: int = 256) -> Dict[str, int]:
+    """
+    Fill in the missing embeddings of memories, code snippets and references
+
+    Rows are read and embedded batch_size at a time, and each batch is
+    committed, so an interrupted backfill resumes where it stopped.
+
+    Args:
+        db: Database session
+        provider: Provider with an embed() method
+        model: Embedding model (defaults to the provider's)
+        batch_size: Rows embedded per batch
+
+    Returns:
+        Dict[str, int]: Number of rows embedded per table
+    """
+    counts = {}
+    for table, text_of in EMBEDDING_SOURCES.items():
+        counts[table.__tablename__] = 0
+        last_id = 0
+        while True:
+            stmt = (
+                select(table)
+                .where(table.embedding.is_(None), table.id > last_id)
+                .order_by(table.id)
+                .limit(batch_size)
+            )
+            result = await db.execute(stmt)
+            rows = result.scalars().all()
+            if not rows:
+                break
+
+            vectors = await provider.embed([text_of(row) for row in rows], model=model)
+            for row, vector in zip(rows, vectors):
+                row.embedding = json.dumps(vector)
+            await db.commit()
+
+            last_id = rows[-1].id
+            counts[table.__tablename__] += len(rows)
+            print(f"Embedded {counts[table.__tablename__]} {table.__tablename__}")
+
+    return counts
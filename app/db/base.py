@@ -1,26 +1,29 @@
 """
 Database base module.
 """
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 import os
 
+from app.db.sqlite import create_engine, create_writer_engine, create_session_factory
+
 # Use SQLite database
 DATABASE_URL = "sqlite+aiosqlite:///ai2ai_feedback.db"
 
-# Create async engine
-engine = create_async_engine(
+# Create async engines: a bounded reader pool and the single writer connection
+engine = create_engine(
     DATABASE_URL,
-    echo=True,
+    echo=os.getenv("DEBUG", "False").lower() == "true",
     future=True,
 )
-
-# Create async session factory
-async_session = sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False
+writer_engine = create_writer_engine(
+    DATABASE_URL,
+    echo=os.getenv("DEBUG", "False").lower() == "true",
+    future=True,
 )
 
+# Create async session factory; writes go through writer_engine
+async_session = create_session_factory(engine, writer_engine)
+
 # Create declarative base
 Base = declarative_base()
 
@@ -0,0 +1,252 @@
+"""
+SQL statement statistics
+
+Optional timing of every statement run through the async engines:
+1. Statements are grouped by fingerprint: literals and bound values become
+   "?", IN lists collapse to one entry, whitespace is normalized
+2. Each fingerprint accumulates calls, time, rows changed and the callers
+   (API route or agent) that ran it
+3. Statements slower than SQL_SLOW_QUERY_MS go to the "slow-query" log
+
+Nothing is hooked into the engines unless SQL_STATS_ENABLED is set, so a
+disabled deployment pays no per-statement cost.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+import contextvars
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Union
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+SQL_STATS_ENABLED = os.getenv("SQL_STATS_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Statements taking at least this long are logged as slow
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "250"))
+
+# Optional file the slow-query log is also written to
+SQL_SLOW_QUERY_LOG = os.getenv("SQL_SLOW_QUERY_LOG")
+
+# Distinct fingerprints tracked; statements of further fingerprints are only counted
+SQL_STATS_MAX_FINGERPRINTS = int(os.getenv("SQL_STATS_MAX_FINGERPRINTS", "1000"))
+
+slow_query_logger = logging.getLogger("slow-query")
+if SQL_SLOW_QUERY_LOG:
+    _handler = logging.FileHandler(SQL_SLOW_QUERY_LOG)
+    _handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s"))
+    slow_query_logger.addHandler(_handler)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_query_caller: contextvars.ContextVar = contextvars.ContextVar("query_caller", default=None)
+
+
+def set_query_caller(caller: Union[str, Callable[[], str], None]) -> None:
+    """
+    Set who the statements run from the current task are attributed to
+
+    Background loops call this once at the top of their task; API requests
+    get their route from the middleware. A callable is resolved when a
+    statement finishes, for callers only known later (e.g. the matched route).
+
+    Args:
+        caller: Caller name, or a function returning it
+    """
+    _query_caller.set(caller)
+
+
+def current_caller() -> Optional[str]:
+    """
+    Get the caller of the current task
+
+    Returns:
+        Optional[str]: Caller name, or None if unknown
+    """
+    caller = _query_caller.get()
+    if callable(caller):
+        return caller()
+    return caller
+
+
+def route_caller(scope: Dict[str, Any]) -> str:
+    """
+    Name an HTTP request by its route template, e.g. "GET /api/tasks/{task_id}"
+
+    Args:
+        scope: ASGI scope of the request
+
+    Returns:
+        str: Method and route path (the raw path if no route matched)
+    """
+    path = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}"
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(statement: str) -> str:
+    """
+    Normalize a statement so executions with different values group together
+
+    Args:
+        statement: SQL statement
+
+    Returns:
+        str: Statement with literals replaced by "?"
+    """
+    text = _STRING_LITERAL.sub("?", statement)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _PLACEHOLDER_LIST.sub("(?...)", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def cursor_rows(cursor: Any) -> Optional[int]:
+    """
+    Get the rows a statement changed
+
+    SQLite reports no row count for queries, so only INSERT, UPDATE and
+    DELETE statements are counted.
+
+    Args:
+        cursor: DB-API cursor after execute
+
+    Returns:
+        Optional[int]: Row count, or None if the driver does not report it
+    """
+    return cursor.rowcount if cursor.rowcount >= 0 else None
+
+
+class QueryStats:
+    """Per-fingerprint statement statistics"""
+
+    def __init__(self, slow_query_ms: float = SQL_SLOW_QUERY_MS, max_fingerprints: int = SQL_STATS_MAX_FINGERPRINTS):
+        """
+        Initialize the statistics
+
+        Args:
+            slow_query_ms: Duration from which a statement is logged as slow
+            max_fingerprints: Distinct fingerprints tracked
+        """
+        self.slow_query_ms = slow_query_ms
+        self.max_fingerprints = max_fingerprints
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.statements = 0
+        self.untracked = 0
+
+    def record(self, statement: str, duration_ms: float, rows: Optional[int], caller: Optional[str]) -> None:
+        """
+        Record one statement execution
+
+        Args:
+            statement: SQL statement
+            duration_ms: Execution time in milliseconds
+            rows: Rows changed
+            caller: Route or agent that ran it
+        """
+        key = fingerprint(statement)
+        slow = duration_ms >= self.slow_query_ms
+        if slow:
+            slow_query_logger.warning("%.1f ms, %s rows, caller %s: %s", duration_ms, rows, caller or "unknown", key)
+
+        with self._lock:
+            self.statements += 1
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_fingerprints:
+                    self.untracked += 1
+                    return
+                entry = self._entries[key] = {
+                    "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0, "slow": 0, "callers": Counter()
+                }
+            entry["calls"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["rows"] += rows or 0
+            entry["slow"] += slow
+            entry["callers"][caller or "unknown"] += 1
+
+    def reset(self) -> None:
+        """Forget everything recorded so far"""
+        with self._lock:
+            self._entries.clear()
+            self.statements = 0
+            self.untracked = 0
+
+    def get_stats(self, limit: int = 50, order_by: str = "total_ms") -> Dict[str, Any]:
+        """
+        Get the statistics of the most expensive fingerprints
+
+        Args:
+            limit: Fingerprints returned
+            order_by: Field to sort by (total_ms, max_ms, mean_ms, calls, rows or slow)
+
+        Returns:
+            Dict[str, Any]: Totals and per-fingerprint calls, times, rows and top callers
+        """
+        with self._lock:
+            fingerprints = [
+                {
+                    "fingerprint": key,
+                    "calls": entry["calls"],
+                    "total_ms": round(entry["total_ms"], 3),
+                    "mean_ms": round(entry["total_ms"] / entry["calls"], 3),
+                    "max_ms": round(entry["max_ms"], 3),
+                    "rows": entry["rows"],
+                    "slow": entry["slow"],
+                    "callers": dict(entry["callers"].most_common(5)),
+                }
+                for key, entry in self._entries.items()
+            ]
+            statements, untracked = self.statements, self.untracked
+
+        fingerprints.sort(key=lambda item: item.get(order_by, 0), reverse=True)
+        return {
+            "enabled": SQL_STATS_ENABLED,
+            "slow_query_ms": self.slow_query_ms,
+            "statements": statements,
+            "untracked_statements": untracked,
+            "fingerprints": fingerprints[:limit],
+        }
+
+
+query_stats = QueryStats()
+
+
+def instrument_engine(engine: AsyncEngine, stats: Optional[QueryStats] = None, enabled: Optional[bool] = None) -> None:
+    """
+    Time every statement an engine runs, if SQL statistics are enabled
+
+    Args:
+        engine: Engine to instrument
+        stats: Statistics to record into (defaults to the process-wide query_stats)
+        enabled: Override of SQL_STATS_ENABLED
+    """
+    if not (SQL_STATS_ENABLED if enabled is None else enabled):
+        return
+    stats = stats or query_stats
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        stats.record(statement, duration_ms, cursor_rows(cursor), current_caller())
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _failed(exception_context):
+        # A failed statement never reaches after_cursor_execute
+        starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
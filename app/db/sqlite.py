@@ -0,0 +1,391 @@
+"""
+Shared SQLite connection factory
+
+Every entry point that opens ai2ai_feedback.db goes through this module, so
+all connections run with the same settings:
+1. WAL journal: readers do not block the writer and the writer does not
+   block readers
+2. synchronous=NORMAL: in WAL mode a commit no longer waits for an fsync;
+   the database stays consistent, a power loss may only lose the last commits
+3. busy_timeout: a connection waits for a lock instead of failing at once
+4. A larger page cache and memory-mapped reads
+
+SQLitePool keeps a bounded set of read-only connections for readers and a
+single writer connection whose transactions are serialized by a lock. The
+async engines follow the same split: sessions read through a bounded pool and
+flush their writes through a one-connection writer engine.
+"""
+
+import os
+import queue
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+
+from app.db.query_stats import instrument_engine
+
+logger = logging.getLogger(__name__)
+
+# Milliseconds a connection waits for a lock held by another connection
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "30000"))
+
+# Page cache of each connection, in KiB
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+
+# Bytes of the database file read through a memory map
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+# Reader connections per pool (and connections each engine keeps open)
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "4"))
+
+# Extra connections an engine may open when all kept ones are checked out;
+# extra connections are closed when returned
+SQLITE_MAX_OVERFLOW = int(os.getenv("SQLITE_MAX_OVERFLOW", "8"))
+
+# Seconds a session waits for the writer connection before failing
+SQLITE_WRITER_TIMEOUT = float(os.getenv("SQLITE_WRITER_TIMEOUT", str(SQLITE_BUSY_TIMEOUT_MS / 1000)))
+
+# First keywords of textual statements that take the write lock
+WRITE_KEYWORDS = {"INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER"}
+
+
+def pragma_statements(read_only: bool = False) -> List[str]:
+    """
+    Get the PRAGMA statements run on every new connection
+
+    Args:
+        read_only: Whether the connection only reads
+
+    Returns:
+        List[str]: PRAGMA statements
+    """
+    statements = [
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    if read_only:
+        statements.append("PRAGMA query_only=ON")
+    return statements
+
+
+def tune_connection(conn: Any, read_only: bool = False) -> None:
+    """
+    Apply the shared settings to a DB-API connection
+
+    Works for sqlite3 connections and for the aiosqlite connections
+    SQLAlchemy hands to its connect event.
+
+    Args:
+        conn: DB-API connection
+        read_only: Whether the connection only reads
+    """
+    cursor = conn.cursor()
+    try:
+        for statement in pragma_statements(read_only):
+            cursor.execute(statement)
+    finally:
+        cursor.close()
+
+
+async def tune_async_connection(conn: Any, read_only: bool = False) -> None:
+    """
+    Apply the shared settings to an aiosqlite connection
+
+    Args:
+        conn: aiosqlite connection
+        read_only: Whether the connection only reads
+    """
+    for statement in pragma_statements(read_only):
+        await conn.execute(statement)
+
+
+def connect(db_path: str, read_only: bool = False, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    Open a tuned sqlite3 connection
+
+    Args:
+        db_path: Path of the SQLite database
+        read_only: Whether the connection only reads
+        check_same_thread: Whether only the opening thread may use it
+
+    Returns:
+        sqlite3.Connection: Connection with sqlite3.Row rows
+    """
+    conn = sqlite3.connect(db_path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000, check_same_thread=check_same_thread)
+    conn.row_factory = sqlite3.Row
+    tune_connection(conn, read_only)
+    return conn
+
+
+def create_engine(database_url: str,
+                  pool_size: int = SQLITE_POOL_SIZE,
+                  max_overflow: int = SQLITE_MAX_OVERFLOW,
+                  **kwargs: Any) -> AsyncEngine:
+    """
+    Create an async SQLAlchemy engine whose connections are tuned
+
+    The aiosqlite dialect defaults to NullPool, which opens (and tunes) a
+    connection for every session; the engine keeps pool_size open instead and
+    opens at most max_overflow more under load. When SQL_STATS_ENABLED is
+    set, its statements are timed (see query_stats).
+
+    Args:
+        database_url: sqlite+aiosqlite URL
+        pool_size: Connections kept by the engine
+        max_overflow: Extra connections opened on demand
+        **kwargs: Other create_async_engine arguments
+
+    Returns:
+        AsyncEngine: Engine
+    """
+    engine = create_async_engine(
+        database_url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        **kwargs
+    )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _tune(dbapi_connection, connection_record):
+        tune_connection(dbapi_connection)
+
+    instrument_engine(engine)
+    return engine
+
+
+
+def create_writer_engine(database_url: str, **kwargs: Any) -> AsyncEngine:
+    """
+    Create the engine that owns an async database's single writer connection
+
+    Sessions that write check this connection out until they commit, so
+    writers of the process wait for each other here instead of contending
+    for the SQLite write lock.
+
+    Args:
+        database_url: sqlite+aiosqlite URL
+        **kwargs: Other create_async_engine arguments
+
+    Returns:
+        AsyncEngine: Engine with one connection and no overflow
+    """
+    kwargs.setdefault("pool_timeout", SQLITE_WRITER_TIMEOUT)
+    return create_engine(database_url, pool_size=1, max_overflow=0, **kwargs)
+
+
+def is_write(clause: Any) -> bool:
+    """
+    Check whether a statement takes the write lock
+
+    Args:
+        clause: Statement passed to Session.execute
+
+    Returns:
+        bool: True for INSERT, UPDATE, DELETE and DDL statements
+    """
+    if isinstance(clause, UpdateBase):
+        return True
+    if isinstance(clause, TextClause):
+        words = clause.text.split(None, 1)
+        return bool(words) and words[0].upper() in WRITE_KEYWORDS
+    return False
+
+
+class WriterRoutingSession(Session):
+    """Session that reads through the reader engine and writes through the writer"""
+
+    WRITER_KEY = "sqlite_writer"
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        """Initialize the session; it starts on the reader engine"""
+        super().__init__(*args, **kwargs)
+        self._writing = False
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        """
+        Get the engine a statement runs on
+
+        Flushes and write statements go to the writer. The rest of the
+        transaction stays on the writer, so it sees its own uncommitted rows.
+        """
+        writer = self.info.get(self.WRITER_KEY)
+        if writer is not None and (self._writing or self._flushing or is_write(clause)):
+            self._writing = True
+            return writer
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+@event.listens_for(WriterRoutingSession, "after_transaction_end")
+def _release_writer(session: WriterRoutingSession, transaction: Any) -> None:
+    """Route the next transaction of a session to the reader engine again"""
+    if transaction.parent is None:
+        session._writing = False
+
+
+def create_session_factory(engine: AsyncEngine, writer_engine: AsyncEngine) -> sessionmaker:
+    """
+    Create the AsyncSession factory of a reader engine and its writer engine
+
+    Args:
+        engine: Engine created by create_engine
+        writer_engine: Engine created by create_writer_engine
+
+    Returns:
+        sessionmaker: Factory of sessions that route writes to the writer
+    """
+    return sessionmaker(
+        engine,
+        class_=AsyncSession,
+        sync_session_class=WriterRoutingSession,
+        expire_on_commit=False,
+        info={WriterRoutingSession.WRITER_KEY: writer_engine.sync_engine}
+    )
+
+
+class SQLitePool:
+    """Bounded pool of reader connections and a single serialized writer"""
+
+    def __init__(self, db_path: str, readers: int = SQLITE_POOL_SIZE):
+        """
+        Initialize the pool; connections are opened on first use
+
+        Args:
+            db_path: Path of the SQLite database
+            readers: Maximum reader connections
+        """
+        self.db_path = db_path
+        self.max_readers = readers
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._open_lock = threading.Lock()
+        self._writer = None
+        self._write_lock = threading.RLock()
+        self.reads = 0
+        self.writes = 0
+        self.reader_waits = 0
+
+    def _acquire_reader(self) -> sqlite3.Connection:
+        """Take an idle reader, open a new one, or wait for one to be returned"""
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._open_lock:
+            if self._opened < self.max_readers:
+                self._opened += 1
+                try:
+                    return connect(self.db_path, read_only=True, check_same_thread=False)
+                except Exception:
+                    self._opened -= 1
+                    raise
+
+        self.reader_waits += 1
+        return self._readers.get()
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrow a read-only connection
+
+        Yields:
+            sqlite3.Connection: Reader connection
+        """
+        conn = self._acquire_reader()
+        self.reads += 1
+        try:
+            yield conn
+        finally:
+            # End the read transaction so the WAL can be checkpointed
+            conn.rollback()
+            self._readers.put(conn)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run a transaction on the writer connection
+
+        Only one thread writes at a time. The transaction is committed when
+        the block exits and rolled back if it raises.
+
+        Yields:
+            sqlite3.Connection: Writer connection
+        """
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = connect(self.db_path, check_same_thread=False)
+            self.writes += 1
+            try:
+                yield self._writer
+            except BaseException:
+                self._writer.rollback()
+                raise
+            else:
+                self._writer.commit()
+
+    def close(self) -> None:
+        """Close every connection of the pool"""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._open_lock:
+            self._opened = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool statistics
+
+        Returns:
+            Dict[str, Any]: Connection counts, reads, writes and reader waits
+        """
+        return {
+            "db_path": self.db_path,
+            "readers_open": self._opened,
+            "readers_idle": self._readers.qsize(),
+            "max_readers": self.max_readers,
+            "reads": self.reads,
+            "writes": self.writes,
+            "reader_waits": self.reader_waits,
+        }
+
+
+_pools: Dict[str, SQLitePool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str) -> SQLitePool:
+    """
+    Get the process-wide pool of a database
+
+    Args:
+        db_path: Path of the SQLite database
+
+    Returns:
+        SQLitePool: Pool shared by every caller in the process
+    """
+    key = os.path.abspath(db_path)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = SQLitePool(db_path)
+        return pool
@@ -0,0 +1,344 @@
+"""
+HTML text extraction for research pages
+
+The research phase only keeps the first few thousand characters of each
+page, so extraction is bounded at every step:
+1. At most HTML_EXTRACT_MAX_BYTES of markup are parsed
+2. Boilerplate (scripts, navigation, page headers, footers, sidebars,
+   cookie banners, ...) is dropped before any text is collected; headers
+   inside an article or main element hold its title and are kept
+3. Collection stops as soon as HTML_EXTRACT_MAX_CHARS characters are found
+4. Text inside pre elements keeps its line breaks and indentation
+
+Two interchangeable backends implement this: a C-backed one on lxml, used
+when lxml is installed, and a streaming one on the standard library's
+html.parser. HTML_EXTRACTOR selects one explicitly.
+"""
+
+import os
+import re
+import logging
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple, Type
+
+try:
+    import lxml.html
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+logger = logging.getLogger("html-extractor")
+
+# Defaults, overridable from the environment
+HTML_EXTRACTOR = os.getenv("HTML_EXTRACTOR", "")
+HTML_EXTRACT_MAX_BYTES = int(os.getenv("HTML_EXTRACT_MAX_BYTES", str(512 * 1024)))
+HTML_EXTRACT_MAX_CHARS = int(os.getenv("HTML_EXTRACT_MAX_CHARS", "8000"))
+
+# Elements whose whole subtree is never page content
+SKIP_TAGS = frozenset([
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "head", "nav", "footer", "aside", "form", "button", "select",
+])
+
+# class/id values marking layout and boilerplate containers
+BOILERPLATE_PATTERN = re.compile(
+    r"(^|[\s_-])(nav|navbar|menu|footer|sidebar|breadcrumbs?|cookies?|consent|banner|"
+    r"share|social|related|comments?|advert|ads?|promo|newsletter|subscribe|popup|modal)($|[\s_-])",
+    re.IGNORECASE
+)
+
+# Page headers are boilerplate, but inside these elements a header (e.g.
+# <header class="entry-header">) holds the content's own title
+CONTENT_TAGS = frozenset(["article", "main"])
+HEADER_PATTERN = re.compile(r"(^|[\s_-])(header|masthead)($|[\s_-])", re.IGNORECASE)
+
+# Elements that start a new line of text
+BLOCK_TAGS = frozenset([
+    "address", "article", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hr", "li", "main", "ol", "p", "pre",
+    "section", "table", "td", "th", "tr", "ul",
+])
+
+# Elements without an end tag
+VOID_TAGS = frozenset([
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr",
+])
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def is_boilerplate(tag: str, attrs: Dict[str, Optional[str]], in_content: bool = False) -> bool:
+    """
+    Check whether an element holds boilerplate rather than page content
+
+    Args:
+        tag: Lower-case tag name
+        attrs: Element attributes
+        in_content: Whether the element is inside an article or main element
+
+    Returns:
+        bool: True if the element's subtree should be skipped
+    """
+    if tag in SKIP_TAGS:
+        return True
+    if "hidden" in attrs or attrs.get("aria-hidden") == "true":
+        return True
+    if attrs.get("role") in ("navigation", "banner", "contentinfo"):
+        return True
+    marker = f"{attrs.get('class') or ''} {attrs.get('id') or ''}"
+    if tag == "header" or HEADER_PATTERN.search(marker):
+        return not in_content
+    return bool(BOILERPLATE_PATTERN.search(marker))
+
+
+class TextCollector:
+    """Accumulates visible text line by line up to a character budget"""
+
+    def __init__(self, max_chars: int):
+        """
+        Initialize the collector
+
+        Args:
+            max_chars: Number of characters after which collection stops
+        """
+        self.max_chars = max_chars
+        self.lines: List[str] = []
+        self.current: List[str] = []
+        self.size = 0
+        # Depth of open pre elements, whose whitespace is kept
+        self.preformatted = 0
+
+    @property
+    def done(self) -> bool:
+        """Whether enough text has been collected"""
+        return self.size >= self.max_chars
+
+    def text(self, data: str) -> None:
+        """Add a run of text"""
+        if not data or self.done:
+            return
+        if self.preformatted:
+            # Keep the line breaks and indentation of code
+            first, *rest = data.split("\n")
+            self.current.append(first)
+            for line in rest:
+                self.newline()
+                self.current.append(line)
+            self.size += len(data)
+            return
+        data = WHITESPACE.sub(" ", data)
+        if data.strip():
+            self.current.append(data)
+            self.size += len(data)
+
+    def newline(self) -> None:
+        """End the current line"""
+        if self.current:
+            line = "".join(self.current)
+            line = line.rstrip() if self.preformatted else line.strip()
+            if line:
+                self.lines.append(line)
+            self.current = []
+
+    def start_block(self, tag: str) -> None:
+        """Start a block element"""
+        self.newline()
+        if tag == "pre":
+            self.preformatted += 1
+
+    def end_block(self, tag: str) -> None:
+        """End a block element"""
+        self.newline()
+        if tag == "pre" and self.preformatted:
+            self.preformatted -= 1
+
+    def result(self) -> str:
+        """Get the collected text, one line per block"""
+        self.newline()
+        return "\n".join(self.lines)[:self.max_chars]
+
+
+class HTMLExtractor(ABC):
+    """Base class for text extraction backends"""
+
+    name = ""
+
+    def __init__(self, max_bytes: int = HTML_EXTRACT_MAX_BYTES, max_chars: int = HTML_EXTRACT_MAX_CHARS):
+        """
+        Initialize the extractor
+
+        Args:
+            max_bytes: Maximum number of characters of markup parsed
+            max_chars: Maximum number of characters of text returned
+        """
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+
+    @abstractmethod
+    def extract(self, html: str) -> str:
+        """
+        Extract the visible, non-boilerplate text of a page
+
+        Args:
+            html: Page markup
+
+        Returns:
+            str: Text with one line per block element
+        """
+        pass
+
+
+class _StreamingParser(HTMLParser):
+    """html.parser handler feeding a TextCollector while skipping boilerplate"""
+
+    def __init__(self, collector: TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+        # Tag of the boilerplate element being skipped, and its nesting depth
+        self.skip_tag: Optional[str] = None
+        self.skip_depth = 0
+        # Depth of open article and main elements
+        self.content_depth = 0
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth += 1
+            return
+        if tag not in VOID_TAGS and is_boilerplate(tag, dict(attrs), self.content_depth > 0):
+            self.skip_tag = tag
+            self.skip_depth = 1
+            return
+        if tag in CONTENT_TAGS:
+            self.content_depth += 1
+        if tag in BLOCK_TAGS:
+            self.collector.start_block(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth -= 1
+                if self.skip_depth == 0:
+                    self.skip_tag = None
+            return
+        if tag in CONTENT_TAGS and self.content_depth:
+            self.content_depth -= 1
+        if tag in BLOCK_TAGS:
+            self.collector.end_block(tag)
+
+    def handle_data(self, data: str) -> None:
+        if not self.skip_tag:
+            self.collector.text(data)
+
+
+class StreamingExtractor(HTMLExtractor):
+    """Pure-Python backend: streams the page through html.parser in slices"""
+
+    name = "html.parser"
+    slice_size = 16384
+
+    def extract(self, html: str) -> str:
+        collector = TextCollector(self.max_chars)
+        parser = _StreamingParser(collector)
+        html = html[:self.max_bytes]
+
+        for start in range(0, len(html), self.slice_size):
+            parser.feed(html[start:start + self.slice_size])
+            if collector.done:
+                break
+        else:
+            parser.close()
+        return collector.result()
+
+
+class LxmlExtractor(HTMLExtractor):
+    """C-backed backend: parses with libxml2 and walks the tree past boilerplate"""
+
+    name = "lxml"
+
+    def extract(self, html: str) -> str:
+        html = html[:self.max_bytes]
+        if not html.strip():
+            return ""
+
+        try:
+            try:
+                root = lxml.html.document_fromstring(html)
+            except ValueError:
+                # str input may not carry an XML encoding declaration
+                root = lxml.html.document_fromstring(html.encode("utf-8", errors="replace"))
+        except etree.ParserError:
+            # Nothing libxml2 can make a document of, e.g. only comments
+            return ""
+
+        collector = TextCollector(self.max_chars)
+        walker = etree.iterwalk(root, events=("start", "end", "comment", "pi"))
+        skipping = None
+        # Depth of open article and main elements
+        content_depth = 0
+        for event, element in walker:
+            if element is skipping:
+                # End of a skipped subtree: only the text after it counts
+                skipping = None
+                collector.text(element.tail)
+            elif event in ("comment", "pi"):
+                # Comments and processing instructions only contribute their tail
+                collector.text(element.tail)
+            elif event == "start":
+                if (element.tag not in VOID_TAGS and element is not root
+                        and is_boilerplate(element.tag, element.attrib, content_depth > 0)):
+                    skipping = element
+                    walker.skip_subtree()
+                    continue
+                if element.tag in CONTENT_TAGS:
+                    content_depth += 1
+                if element.tag in BLOCK_TAGS:
+                    collector.start_block(element.tag)
+                collector.text(element.text)
+            else:
+                if element.tag in CONTENT_TAGS:
+                    content_depth -= 1
+                if element.tag in BLOCK_TAGS:
+                    collector.end_block(element.tag)
+                collector.text(element.tail)
+            if collector.done:
+                break
+        return collector.result()
+
+
+EXTRACTORS: Dict[str, Type[HTMLExtractor]] = {StreamingExtractor.name: StreamingExtractor}
+if LXML_AVAILABLE:
+    EXTRACTORS[LxmlExtractor.name] = LxmlExtractor
+
+
+def get_extractor(name: Optional[str] = None, **kwargs) -> HTMLExtractor:
+    """
+    Get a text extractor
+
+    Args:
+        name: Backend name ("lxml" or "html.parser"); defaults to HTML_EXTRACTOR,
+            then to the fastest installed backend
+        **kwargs: Limits passed to the extractor (max_bytes, max_chars)
+
+    Returns:
+        HTMLExtractor: Extractor instance
+    """
+    name = name or HTML_EXTRACTOR or ("lxml" if LXML_AVAILABLE else "html.parser")
+    extractor_class = EXTRACTORS.get(name)
+    if extractor_class is None:
+        logger.warning(f"HTML extractor {name} is not available, using html.parser")
+        extractor_class = StreamingExtractor
+    return extractor_class(**kwargs)
+
+
+def soup_parser() -> str:
+    """
+    Get the fastest parser BeautifulSoup can use here
+
+    Returns:
+        str: "lxml" when installed, otherwise "html.parser"
+    """
+    return "lxml" if LXML_AVAILABLE else "html.parser"
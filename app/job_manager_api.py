@@ -8,11 +8,12 @@ import json
 import os
 from datetime import datetime
 from typing import List, Dict, Any, Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import and_, or_, select
 
 from .database import get_db, Agent, Task, TaskUpdate
+from .pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_conditions, parse_fields
 
 # Configure logging
 logger = logging.getLogger("job-manager-api")
@@ -20,6 +21,25 @@ logger = logging.getLogger("job-manager-api")
 # Create router
 router = APIRouter()
 
+# Fields of GET /api/tasks, as the columns or SQL expressions they are read from
+TASK_LIST_FIELDS = {
+    "id": Task.id,
+    "title": Task.title,
+    "description": Task.description,
+    "status": Task.status,
+    "created_at": Task.created_at,
+    "updated_at": Task.updated_at,
+    "required_skills": Task.required_skills,
+    "task_type": Task.task_type,
+    "assigned_to": Task.assigned_to,
+    "estimated_effort": Task.estimated_effort,
+    "progress": Task.progress,
+    "project_id": Task.project_id,
+    "priority": Task.priority,
+    # Computed in SQL, so the result text is never sent to Python
+    "has_result": and_(Task.result.isnot(None), Task.result != "").label("has_result"),
+}
+
 @router.get("/api/agents", response_model=List[Dict[str, Any]])
 async def get_agents(db: AsyncSession = Depends(get_db)):
     """
@@ -182,40 +202,77 @@ async def get_project_tasks(project_id: str, db: AsyncSession = Depends(get_db))
         raise HTTPException(status_code=500, detail=f"Error getting tasks: {str(e)}")
 
 @router.get("/api/tasks", response_model=List[Dict[str, Any]])
-async def get_all_tasks(db: AsyncSession = Depends(get_db)):
+async def get_all_tasks(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    project_id: Optional[List[str]] = Query(None),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Get all tasks
+    Get tasks, most recently updated first
+
+    Without limit or cursor every task is returned. Otherwise pages are
+    keyed on (updated_at, id): when a page is full, the X-Next-Cursor
+    response header holds the cursor of the next one.
+
+    Args:
+        limit: Maximum number of tasks to return (100 when only a cursor is given)
+        cursor: Cursor of the page to return (from X-Next-Cursor)
+        fields: Comma-separated fields to return (defaults to all)
+        project_id: Only return tasks of these projects (may be repeated)
 
     Returns:
         List[Dict[str, Any]]: List of tasks
     """
     try:
-        # Get all tasks
-        query = select(Task).where(Task.task_type != "project")
-        result = await db.execute(query)
-        tasks = result.scalars().all()
+        selected = parse_fields(fields, list(TASK_LIST_FIELDS))
+        if cursor and not limit:
+            limit = 100
+
+        # The page key is always read, whether or not it was selected
+        columns = [TASK_LIST_FIELDS[field] for field in selected if field not in ("id", "updated_at")]
+        query = (
+            select(Task.id, Task.updated_at, *columns)
+            .where(or_(Task.task_type.is_(None), Task.task_type != "project"))
+            .order_by(Task.updated_at.desc(), Task.id.desc())
+        )
+        if project_id:
+            query = query.where(Task.project_id.in_(project_id))
+
+        rows = []
+        for condition in keyset_conditions(Task.updated_at, Task.id, cursor, descending=True):
+            page_query = query if condition is None else query.where(condition)
+            if limit:
+                page_query = page_query.limit(limit - len(rows))
+            result = await db.execute(page_query)
+            rows.extend(result.all())
+            if limit and len(rows) >= limit:
+                break
 
         # Convert to dict
         tasks_list = []
-        for task in tasks:
-            task_dict = {
-                "id": task.id,
-                "title": task.title,
-                "description": task.description,
-                "status": task.status,
-                "created_at": task.created_at.isoformat() if task.created_at else None,
-                "updated_at": task.updated_at.isoformat() if task.updated_at else None,
-                "required_skills": task.required_skills.split(",") if task.required_skills else [],
-                "task_type": task.task_type,
-                "assigned_to": task.assigned_to,
-                "estimated_effort": task.estimated_effort,
-                "progress": task.progress,
-                "project_id": task.project_id,
-                "has_result": task.result is not None and len(task.result) > 0
-            }
+        for row in rows:
+            task_dict = {}
+            for field in selected:
+                value = getattr(row, field)
+                if field in ("created_at", "updated_at"):
+                    value = value.isoformat() if value else None
+                elif field == "required_skills":
+                    value = value.split(",") if value else []
+                elif field == "has_result":
+                    value = bool(value)
+                task_dict[field] = value
             tasks_list.append(task_dict)
 
+        if limit and len(rows) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].updated_at, rows[-1].id)
+
         return tasks_list
+    except HTTPException:
+        # Re-raise HTTP exceptions
+        raise
     except Exception as e:
         logger.error(f"Error getting all tasks: {e}")
         raise HTTPException(status_code=500, detail=f"Error getting tasks: {str(e)}")
@@ -17,7 +17,7 @@ from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from pathlib import Path
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -36,7 +36,12 @@ from .models import (
     SessionEndRequest, SessionEndResponse,
     UnifiedDiscussionCreateRequest, UnifiedDiscussionMessageRequest
 )
-from .providers.factory import get_model_provider
+from .providers.factory import get_model_provider, close_model_providers
+from .providers.completion_cache import get_completion_cache
+from .providers.single_flight import single_flight_stats
+from .providers.limiter import render_prometheus as render_limiter_metrics
+from .db.query_stats import SQL_STATS_ENABLED, route_caller, set_query_caller
+from .api.routes.debug import router as debug_router
 from .utils.feedback_parser import extract_structured_feedback, StreamingFeedbackParser
 
 # Configure logging
@@ -71,9 +76,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
-    expose_headers=["Content-Type", "X-Requested-With", "Authorization"],
+    expose_headers=["Content-Type", "X-Requested-With", "Authorization", "X-Next-Cursor"],
 )
 
+# Attribute SQL statements to the route that ran them
+if SQL_STATS_ENABLED:
+    @app.middleware("http")
+    async def sql_caller_middleware(request: Request, call_next):
+        set_query_caller(lambda: route_caller(request.scope))
+        return await call_next(request)
+
 # Include routers
 app.include_router(multi_agent_router)
 app.include_router(realtime_discussion_router)
@@ -81,6 +93,8 @@ app.include_router(unified_discussion_router)
 app.include_router(autonomous_router)
 app.include_router(project_router, prefix="/projects", tags=["projects"])
 app.include_router(job_manager_router, tags=["job-manager"])
+if SQL_STATS_ENABLED:
+    app.include_router(debug_router, tags=["debug"])
 
 # Mount static files directory
 static_dir = Path(__file__).parent.parent / "static"
@@ -140,6 +154,10 @@ async def shutdown_event():
     else:
         logger.warning("Failed to stop worker agents")
 
+    # Close the providers' pooled HTTP connections
+    logger.info("Closing model provider clients...")
+    await close_model_providers()
+
 # Root endpoint - API information
 @app.get("/", response_class=HTMLResponse)
 async def root():
@@ -228,6 +246,31 @@ async def get_models():
         logger.error(f"Error getting models: {e}")
         raise HTTPException(status_code=500, detail=f"Error getting models: {str(e)}")
 
+# Get completion cache statistics
+@app.get("/models/cache")
+async def get_completion_cache_stats():
+    """
+    Get hit-rate statistics of the completion cache.
+    """
+    return get_completion_cache().get_stats()
+
+# Get request coalescing statistics
+@app.get("/models/coalescing")
+async def get_coalescing_stats():
+    """
+    Get how many model calls were saved by sharing identical in-flight requests.
+    """
+    return single_flight_stats.get_stats()
+
+# Get concurrency limiter metrics
+@app.get("/metrics/limiter", response_class=PlainTextResponse)
+async def get_limiter_metrics():
+    """
+    Get the model concurrency limits, queue depth and wait time per priority lane
+    in the Prometheus text format.
+    """
+    return PlainTextResponse(render_limiter_metrics(), media_type="text/plain; version=0.0.4")
+
 # Get direct feedback
 @app.post("/feedback", response_model=FeedbackResponse)
 async def get_feedback(request: FeedbackRequest, background_tasks: BackgroundTasks = None):
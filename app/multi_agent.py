@@ -380,6 +380,11 @@ async def get_session_responses(
         result = await db.execute(stmt)
         tasks = result.scalars().all()
 
+        # Get the session's agents once, by index
+        stmt = select(Agent).where(Agent.session_id == session_id)
+        result = await db.execute(stmt)
+        agents = {agent.agent_index: agent for agent in result.scalars().all()}
+
         # Format responses
         responses = []
         for task in tasks:
@@ -389,12 +394,7 @@ async def get_session_responses(
 
             agent_info = {}
             if agent_index is not None:
-                stmt = select(Agent).where(
-                    Agent.session_id == session_id,
-                    Agent.agent_index == agent_index
-                )
-                agent_result = await db.execute(stmt)
-                agent = agent_result.scalars().first()
+                agent = agents.get(agent_index)
 
                 if agent:
                     agent_info = {
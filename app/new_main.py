@@ -2,14 +2,19 @@
 Main application module for the Autonomous Agent System.
 """
 import logging
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy.engine import make_url
 import os
 
 from app.core.config import settings
 from app.db.base import init_db
+from app.db.sqlite import get_pool
 from app.api.routes import api_router
+from app.providers.factory import close_model_providers
+from app.db.query_stats import SQL_STATS_ENABLED, route_caller, set_query_caller
+from app.task_metrics import ensure_metrics_table
 
 # Configure logging
 logging.basicConfig(
@@ -33,6 +38,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Attribute SQL statements to the route that ran them
+if SQL_STATS_ENABLED:
+    @app.middleware("http")
+    async def sql_caller_middleware(request: Request, call_next):
+        set_query_caller(lambda: route_caller(request.scope))
+        return await call_next(request)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
@@ -50,6 +62,10 @@ async def startup_event():
     # Initialize database
     await init_db()
 
+    # Create the task metrics tables once, not on every scrape
+    with get_pool(make_url(settings.DATABASE_URL).database).writer() as conn:
+        ensure_metrics_table(conn)
+
     # Create agent workspaces directory if it doesn't exist
     os.makedirs(settings.AGENT_WORKSPACE_ROOT, exist_ok=True)
 
@@ -63,6 +79,9 @@ async def shutdown_event():
     """
     logger.info("Shutting down application")
 
+    # Close the providers' pooled HTTP connections
+    await close_model_providers()
+
 # Create root endpoint
 @app.get("/")
 async def root():
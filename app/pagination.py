@@ -0,0 +1,113 @@
+"""
+Keyset pagination helpers for AI-to-AI Feedback API
+
+List endpoints page through rows ordered by (timestamp, id) and hand the
+client an opaque cursor holding the last row's key. The next page starts
+after that key through the index, instead of counting past an OFFSET, so a
+page costs the same however much history there is.
+
+Rows whose timestamp is NULL sort after all others in descending order and
+before them in ascending order (as SQLite does); they are paged by id.
+"""
+
+import json
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, tuple_
+
+# Header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(timestamp: Optional[datetime], row_id: Any) -> str:
+    """
+    Encode the key of the last row of a page
+
+    Args:
+        timestamp: Row timestamp
+        row_id: Row ID
+
+    Returns:
+        str: Opaque cursor
+    """
+    key = [timestamp.isoformat() if timestamp else None, row_id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], Any]:
+    """
+    Decode a cursor made by encode_cursor
+
+    Args:
+        cursor: Opaque cursor
+
+    Returns:
+        Tuple[Optional[datetime], Any]: Timestamp (None if the row had none)
+        and ID of the last row of the previous page
+
+    Raises:
+        HTTPException: 400 if the cursor is malformed
+    """
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return (datetime.fromisoformat(timestamp) if timestamp is not None else None), row_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_conditions(timestamp_column: Any, id_column: Any, cursor: Optional[str], descending: bool) -> List[Any]:
+    """
+    Get the conditions selecting the rows after a cursor
+
+    A tuple comparison never matches a NULL timestamp, so the rows after a
+    cursor are read in up to two index ranges: the caller runs one query per
+    condition, in order, until its page is full.
+
+    Args:
+        timestamp_column: Timestamp column of the page key
+        id_column: ID column of the page key
+        cursor: Cursor of the page to return, or None for the first page
+        descending: Whether rows are ordered newest first
+
+    Returns:
+        List[Any]: Conditions, or [None] for the first page (no condition)
+    """
+    if not cursor:
+        return [None]
+
+    timestamp, row_id = decode_cursor(cursor)
+    if descending:
+        if timestamp is None:
+            return [and_(timestamp_column.is_(None), id_column < row_id)]
+        return [tuple_(timestamp_column, id_column) < (timestamp, row_id), timestamp_column.is_(None)]
+
+    if timestamp is None:
+        return [and_(timestamp_column.is_(None), id_column > row_id), timestamp_column.isnot(None)]
+    return [tuple_(timestamp_column, id_column) > (timestamp, row_id)]
+
+
+def parse_fields(fields: Optional[str], allowed: List[str]) -> List[str]:
+    """
+    Parse a comma-separated field selection
+
+    Args:
+        fields: Requested fields, or None for all
+        allowed: Fields that can be selected
+
+    Returns:
+        List[str]: Selected fields, in the order of allowed
+
+    Raises:
+        HTTPException: 400 if an unknown field is requested
+    """
+    if not fields:
+        return list(allowed)
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(sorted(unknown))}")
+    return [field for field in allowed if field in requested]
+
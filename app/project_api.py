@@ -12,12 +12,14 @@ import uuid
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
+from sqlalchemy import or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from .database import Task, Agent, TaskUpdate, get_db
+from .pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_conditions
 from .task_management import ContextScaffold
 
 # Configure logging
@@ -226,7 +228,7 @@ class TaskUpdateResponse(BaseModel):
     """Model for task update response"""
     agent_id: str
     content: str
-    timestamp: datetime
+    timestamp: Optional[datetime] = None
 
 @router.post("/tasks/{task_id}/assign", response_model=TaskResponse)
 async def assign_task(
@@ -335,47 +337,55 @@ async def get_task_updates(
 @router.get("/{project_id}/updates", response_model=List[TaskUpdateResponse])
 async def get_project_updates(
     project_id: str,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get all updates for a project and its tasks"""
+    """
+    Get the updates of a project and its tasks, oldest first
+
+    Without limit or cursor every update is returned. Otherwise pages are
+    keyed on (timestamp, id) and the X-Next-Cursor response header holds
+    the cursor after the last update returned, so a dashboard polling with
+    its last cursor only reads new updates.
+    """
     try:
         # Get project
-        query = select(Task).where(
+        query = select(Task.id).where(
             Task.id == project_id,
             Task.task_type == "project"
         )
         result = await db.execute(query)
-        project = result.scalars().first()
-
-        if not project:
+        if result.scalar() is None:
             raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
 
-        # Get project updates
-        query = select(TaskUpdate).where(
-            TaskUpdate.task_id == project_id
-        )
-        result = await db.execute(query)
-        project_updates = result.scalars().all()
+        if cursor and not limit:
+            limit = 200
 
-        # Get all tasks for this project
-        query = select(Task).where(
-            Task.project_id == project_id
+        # Updates of the project and of all its tasks, in one query per page range
+        project_tasks = select(Task.id).where(Task.project_id == project_id)
+        query = (
+            select(TaskUpdate.id, TaskUpdate.agent_id, TaskUpdate.content, TaskUpdate.timestamp)
+            .where(or_(TaskUpdate.task_id == project_id, TaskUpdate.task_id.in_(project_tasks)))
+            .order_by(TaskUpdate.timestamp, TaskUpdate.id)
         )
-        result = await db.execute(query)
-        tasks = result.scalars().all()
 
-        # Get updates for all tasks
-        all_updates = project_updates
-        for task in tasks:
-            query = select(TaskUpdate).where(
-                TaskUpdate.task_id == task.id
-            )
-            result = await db.execute(query)
-            task_updates = result.scalars().all()
-            all_updates.extend(task_updates)
-
-        # Sort updates by timestamp
-        all_updates.sort(key=lambda x: x.timestamp)
+        updates = []
+        for condition in keyset_conditions(TaskUpdate.timestamp, TaskUpdate.id, cursor, descending=False):
+            page_query = query if condition is None else query.where(condition)
+            if limit:
+                page_query = page_query.limit(limit - len(updates))
+            result = await db.execute(page_query)
+            updates.extend(result.all())
+            if limit and len(updates) >= limit:
+                break
+
+        if updates and limit:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(updates[-1].timestamp, updates[-1].id)
+        elif cursor:
+            # Nothing new yet; poll again from the same place
+            response.headers[NEXT_CURSOR_HEADER] = cursor
 
         return [
             TaskUpdateResponse(
@@ -383,7 +393,7 @@ async def get_project_updates(
                 content=update.content,
                 timestamp=update.timestamp
             )
-            for update in all_updates
+            for update in updates
         ]
     except HTTPException:
         raise
@@ -0,0 +1,318 @@
+"""
+Prompt token budgeting
+
+Keeps task prompts inside the model's context window and the task's
+max_token_usage:
+1. Tokens are estimated per model from a characters-per-token ratio,
+   calibrated against the prompt_eval_count Ollama reports for each call
+2. A prompt is described as named sections with priorities; when it does
+   not fit, the lowest-priority sections are trimmed first
+3. TaskTokenBudget charges every call's prompt and output tokens against
+   the task's max_token_usage and clamps later calls to what is left
+4. Budgeted task calls send num_ctx = context_window of the model they
+   call, always the same per model since Ollama reloads the model whenever
+   it changes; other calls leave num_ctx to Ollama's default
+"""
+
+import os
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("prompt-budget")
+
+# Largest context window a model is loaded with; Ollama's memory use grows
+# with num_ctx, so this stays below the models' maximum
+LLM_CONTEXT_TOKENS = int(os.getenv("LLM_CONTEXT_TOKENS", "16384"))
+
+
+def parse_model_sizes(value: str) -> Dict[str, int]:
+    """
+    Parse a "model=tokens,model=tokens" setting
+
+    Args:
+        value: Setting value
+
+    Returns:
+        Dict[str, int]: Tokens by model name
+    """
+    sizes = {}
+    for item in value.split(","):
+        model, _, tokens = item.strip().rpartition("=")
+        if model and tokens.strip().isdigit():
+            sizes[model.strip()] = int(tokens)
+    return sizes
+
+
+# Context window to load particular models with, e.g. "gemma3:1b=8192";
+# overrides the LLM_CONTEXT_TOKENS cap for those models
+LLM_MODEL_CONTEXT_TOKENS = parse_model_sizes(os.getenv("LLM_MODEL_CONTEXT_TOKENS", ""))
+
+# Maximum context window of the models we run
+MODEL_CONTEXT_TOKENS = {
+    "gemma3:1b": 32768,
+    "gemma3:4b": 131072,
+    "deepseek-coder-v2:16b": 163840,
+}
+
+# Starting characters-per-token ratios by model family, before calibration
+DEFAULT_CHARS_PER_TOKEN = 4.0
+FAMILY_CHARS_PER_TOKEN = {
+    "deepseek-coder": 3.4,
+    "gemma": 3.8,
+    "llama": 3.8,
+}
+
+# Tokens of chat template and separators added around every prompt
+PROMPT_OVERHEAD_TOKENS = 32
+
+TRIM_MARKER = "\n[... {chars} characters trimmed to fit the token budget ...]\n"
+
+
+class TokenBudgetExceeded(Exception):
+    """Raised when a task has used up its max_token_usage"""
+
+
+class TokenEstimator:
+    """Per-model token estimates, calibrated from observed prompt token counts"""
+
+    def __init__(self):
+        self._ratios: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def chars_per_token(self, model: str) -> float:
+        """
+        Get the current characters-per-token ratio of a model
+
+        Args:
+            model: Model name
+
+        Returns:
+            float: Characters per token
+        """
+        with self._lock:
+            ratio = self._ratios.get(model)
+        if ratio is not None:
+            return ratio
+        for family, family_ratio in FAMILY_CHARS_PER_TOKEN.items():
+            if model.startswith(family):
+                return family_ratio
+        return DEFAULT_CHARS_PER_TOKEN
+
+    def estimate(self, text: str, model: str) -> int:
+        """
+        Estimate the number of tokens of a text
+
+        Args:
+            text: Text to measure
+            model: Model name
+
+        Returns:
+            int: Estimated tokens
+        """
+        if not text:
+            return 0
+        return int(len(text) / self.chars_per_token(model)) + 1
+
+    def calibrate(self, model: str, chars: int, tokens: int) -> None:
+        """
+        Update a model's ratio from a prompt whose real token count is known
+
+        Args:
+            model: Model name
+            chars: Characters sent
+            tokens: Prompt tokens the model reported
+        """
+        if chars < 200 or tokens <= PROMPT_OVERHEAD_TOKENS:
+            return
+        observed = chars / (tokens - PROMPT_OVERHEAD_TOKENS)
+        current = self.chars_per_token(model)
+        if not current / 2 <= observed <= current * 2:
+            # Ollama only counts prompt tokens it did not have cached
+            return
+        with self._lock:
+            current = self._ratios.get(model)
+            # Lean towards the observed value; a few calls settle the ratio
+            self._ratios[model] = observed if current is None else current * 0.7 + observed * 0.3
+
+
+estimator = TokenEstimator()
+
+
+def context_window(model: str) -> int:
+    """
+    Get the num_ctx budgeted task calls to a model are sent with
+
+    Ollama reloads a model whenever num_ctx changes, so each model is always
+    run with this one size and task prompts are budgeted against it.
+
+    Args:
+        model: Model name
+
+    Returns:
+        int: Context window in tokens
+    """
+    if model in LLM_MODEL_CONTEXT_TOKENS:
+        return LLM_MODEL_CONTEXT_TOKENS[model]
+    return min(MODEL_CONTEXT_TOKENS.get(model, LLM_CONTEXT_TOKENS), LLM_CONTEXT_TOKENS)
+
+
+class PromptSection:
+    """A variable part of a prompt"""
+
+    def __init__(self, name: str, text: str, priority: int, min_chars: int = 0):
+        """
+        Initialize the section
+
+        Args:
+            name: Section name, the key the prompt builder reads it from
+            text: Section content
+            priority: Higher priorities are trimmed last
+            min_chars: Characters the section keeps however tight the budget
+        """
+        self.name = name
+        self.text = text or ""
+        self.priority = priority
+        self.min_chars = min_chars
+
+
+def trim_text(text: str, max_chars: int) -> str:
+    """
+    Shorten a text to about max_chars, keeping its beginning
+
+    The cut is moved back to the last line break when one is close, and a
+    marker notes how much was dropped.
+
+    Args:
+        text: Text to shorten
+        max_chars: Characters to keep
+
+    Returns:
+        str: Shortened text
+    """
+    if len(text) <= max_chars:
+        return text
+    cut = max(max_chars, 0)
+    newline = text.rfind("\n", 0, cut)
+    if newline > cut * 0.8:
+        cut = newline
+    return text[:cut] + TRIM_MARKER.format(chars=len(text) - cut)
+
+
+def fit_prompt(build: Callable[[Dict[str, str]], str],
+               sections: List[PromptSection],
+               model: str,
+               budget_tokens: int) -> Tuple[str, List[Tuple[str, int, int]]]:
+    """
+    Build a prompt, shrinking its sections until it fits a token budget
+
+    Args:
+        build: Function that renders the prompt from section texts by name
+        sections: Variable sections of the prompt
+        model: Model the prompt is for
+        budget_tokens: Tokens the rendered prompt may use
+
+    Returns:
+        Tuple[str, List[Tuple[str, int, int]]]: The prompt, and the
+        (name, tokens before, tokens after) of every section that was cut
+    """
+    texts = {section.name: section.text for section in sections}
+    prompt = build(texts)
+    total = estimator.estimate(prompt, model)
+    if total <= budget_tokens:
+        return prompt, []
+
+    ratio = estimator.chars_per_token(model)
+    # Characters of a section's budget taken by the marker of a trimmed section
+    marker_chars = len(TRIM_MARKER) + 8
+    trimmed = []
+    for section in sorted(sections, key=lambda s: s.priority):
+        excess = total - budget_tokens
+        if excess <= 0:
+            break
+
+        text = texts[section.name]
+        before = estimator.estimate(text, model)
+        floor = estimator.estimate(text[:section.min_chars], model)
+        target = max(before - excess, floor)
+        if target >= before:
+            continue
+
+        new_text = trim_text(text, max(int(target * ratio) - marker_chars, section.min_chars))
+
+        texts[section.name] = new_text
+        after = estimator.estimate(new_text, model)
+        total -= before - after
+        trimmed.append((section.name, before, after))
+
+    prompt = build(texts)
+    return prompt, trimmed
+
+
+class TaskTokenBudget:
+    """Token usage of one task against its max_token_usage"""
+
+    def __init__(self, limit: Optional[int]):
+        """
+        Initialize the budget
+
+        Args:
+            limit: The task's max_token_usage (None or 0 for unlimited)
+        """
+        self.limit = limit or None
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+
+    @property
+    def used(self) -> int:
+        return self.prompt_tokens + self.output_tokens
+
+    @property
+    def remaining(self) -> Optional[int]:
+        if self.limit is None:
+            return None
+        return max(self.limit - self.used, 0)
+
+    def charge(self, prompt_tokens: int, output_tokens: int) -> None:
+        """
+        Record the tokens of one call
+
+        Args:
+            prompt_tokens: Prompt tokens processed
+            output_tokens: Tokens generated
+        """
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.output_tokens += output_tokens
+
+    def allocate(self, model: str, system_prompt: Optional[str], max_tokens: int) -> Tuple[int, int]:
+        """
+        Split the tokens available to one call between prompt and output
+
+        The call gets the model's context window, further limited by what
+        is left of the task budget. Output keeps up to max_tokens but gives
+        way to the prompt when the task budget is nearly spent.
+
+        Args:
+            model: Model name
+            system_prompt: System prompt of the call
+            max_tokens: Output tokens requested
+
+        Returns:
+            Tuple[int, int]: (tokens available to the user prompt, output tokens)
+
+        Raises:
+            TokenBudgetExceeded: If the task has no tokens left
+        """
+        window = context_window(model)
+        system_tokens = estimator.estimate(system_prompt or "", model) + PROMPT_OVERHEAD_TOKENS
+        total = window
+        if self.remaining is not None:
+            if self.remaining <= system_tokens:
+                raise TokenBudgetExceeded(f"Token budget of {self.limit} used up ({self.used} tokens)")
+            total = min(total, self.remaining)
+
+        # Keep at least a quarter of the call for the prompt
+        output_tokens = min(max_tokens, int((total - system_tokens) * 0.75))
+        return total - system_tokens - output_tokens, output_tokens
@@ -57,32 +57,32 @@ class AnthropicProvider(ModelProvider):
             str: Generated text
         """
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    "https://api.anthropic.com/v1/messages",
-                    headers={
-                        "x-api-key": self.api_key,
-                        "anthropic-version": "2023-06-01",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": self.model,
-                        "system": system_prompt,
-                        "messages": [
-                            {"role": "user", "content": user_prompt}
-                        ],
-                        "temperature": 0.3,  # Lower temperature for more focused feedback
-                        "max_tokens": 4000
-                    }
-                )
-                
-                response.raise_for_status()
-                response_data = response.json()
-                
-                if not response_data.get("content") or len(response_data["content"]) == 0:
-                    raise ValueError("No content returned from Anthropic API")
-                
-                return response_data["content"][0]["text"]
+            client = self.get_client()
+            response = await client.post(
+                "https://api.anthropic.com/v1/messages",
+                headers={
+                    "x-api-key": self.api_key,
+                    "anthropic-version": "2023-06-01",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": self.model,
+                    "system": system_prompt,
+                    "messages": [
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    "temperature": self.temperature,  # Lower temperature for more focused feedback
+                    "max_tokens": 4000
+                }
+            )
+            
+            response.raise_for_status()
+            response_data = response.json()
+            
+            if not response_data.get("content") or len(response_data["content"]) == 0:
+                raise ValueError("No content returned from Anthropic API")
+            
+            return response_data["content"][0]["text"]
         except Exception as e:
             print(f"Error generating completion with Anthropic: {e}")
             raise
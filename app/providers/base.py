@@ -2,12 +2,100 @@
 Base provider interface for AI-to-AI Feedback API
 """
 
+import os
+import asyncio
+import logging
 from abc import ABC, abstractmethod
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+import httpx
+
+from utils.concurrency import pipelined
+from .embeddings import EMBEDDING_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Connection pool limits of each provider's HTTP client
+PROVIDER_MAX_CONNECTIONS = int(os.getenv("PROVIDER_MAX_CONNECTIONS", "20"))
+PROVIDER_MAX_KEEPALIVE = int(os.getenv("PROVIDER_MAX_KEEPALIVE", "10"))
+PROVIDER_KEEPALIVE_EXPIRY = float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY", "60"))
+
+# Sampling temperature of completions, unless a provider is given its own
+DEFAULT_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.3"))
+
+# Requests of one generate_many batch in flight at once
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
 
 class ModelProvider(ABC):
     """Base class for model providers"""
 
+    # Default timeout, in seconds, of requests made with the pooled client
+    request_timeout: float = 60.0
+
+    # Sampling temperature of completions
+    temperature: float = DEFAULT_TEMPERATURE
+
+    # Pooled HTTP client of each event loop the provider is used from
+    _clients: Optional[Dict[asyncio.AbstractEventLoop, httpx.AsyncClient]] = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        """
+        Get the provider's long-lived, pooled HTTP client
+
+        The client keeps connections alive between calls, so requests after
+        the first skip TCP and TLS setup. Connections belong to the event
+        loop that opened them, so each loop gets its own client; clients of
+        loops that have since closed are dropped.
+
+        Returns:
+            httpx.AsyncClient: Pooled client
+        """
+        loop = asyncio.get_running_loop()
+        if self._clients is None:
+            self._clients = {}
+        for closed_loop in [other for other in self._clients if other.is_closed()]:
+            # Its connections went with the loop; nothing is left to close
+            del self._clients[closed_loop]
+
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = self._clients[loop] = httpx.AsyncClient(
+                timeout=self.request_timeout,
+                limits=httpx.Limits(
+                    max_connections=PROVIDER_MAX_CONNECTIONS,
+                    max_keepalive_connections=PROVIDER_MAX_KEEPALIVE,
+                    keepalive_expiry=PROVIDER_KEEPALIVE_EXPIRY
+                )
+            )
+        return client
+
+    async def aclose(self) -> None:
+        """
+        Close the provider's HTTP clients and their pooled connections
+
+        The current loop's client is closed directly and a client of another
+        running loop is closed on that loop. A client of a stopped loop cannot
+        be closed from here and is dropped.
+        """
+        clients, self._clients = self._clients or {}, None
+        loop = asyncio.get_running_loop()
+        for client_loop, client in clients.items():
+            if client.is_closed:
+                continue
+            if client_loop is loop:
+                await client.aclose()
+            elif client_loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.aclose(), client_loop))
+
+    def get_sampling_params(self) -> Dict[str, Any]:
+        """
+        Get the sampling parameters sent with each completion
+
+        Returns:
+            Dict[str, Any]: Sampling parameters
+        """
+        return {"temperature": self.temperature}
+
     @abstractmethod
     def get_provider_name(self) -> str:
         """
@@ -55,3 +143,106 @@ class ModelProvider(ABC):
             str: Generated text chunks
         """
         pass
+
+    async def embed(self, texts: List[str], model: Optional[str] = None, batch_size: int = EMBEDDING_BATCH_SIZE) -> List[List[float]]:
+        """
+        Embed texts
+
+        Providers with an embeddings endpoint override this.
+
+        Args:
+            texts: Texts to embed
+            model: Embedding model (defaults to EMBEDDING_MODEL)
+            batch_size: Texts per request
+
+        Returns:
+            List[List[float]]: One vector per text, in the order of texts
+
+        Raises:
+            NotImplementedError: If the provider cannot embed texts
+        """
+        raise NotImplementedError(f"The {self.get_provider_name()} provider does not support embeddings")
+
+    async def generate_many(self,
+                            requests: List[Tuple[str, str]],
+                            max_concurrency: int = BATCH_MAX_CONCURRENCY
+                            ) -> AsyncGenerator[Tuple[int, Optional[str], Optional[Exception]], None]:
+        """
+        Generate completions for many independent prompts
+
+        Up to max_concurrency requests are in flight at once, each going
+        through generate_completion, and results are yielded as they finish
+        rather than in request order. A failed request yields its error
+        instead of failing the batch. Providers with a native batch endpoint
+        override this.
+
+        Args:
+            requests: (system_prompt, user_prompt) pairs
+            max_concurrency: Requests in flight at once
+
+        Yields:
+            Tuple[int, Optional[str], Optional[Exception]]: Index of the
+            request, and its generated text or its error
+        """
+        results = pipelined(
+            lambda request: self.generate_completion(*request),
+            requests,
+            max_concurrency,
+            f"a {self.get_provider_name()} batch"
+        )
+        try:
+            async for result in results:
+                yield result
+        finally:
+            await results.aclose()
+
+
+class ProviderWrapper(ModelProvider):
+    """Base class for providers that add behaviour around another provider"""
+
+    def __init__(self, provider: ModelProvider):
+        """
+        Initialize the wrapper
+
+        Args:
+            provider: Wrapped provider
+        """
+        self.provider = provider
+
+    def __getattr__(self, name: str) -> Any:
+        # Everything else (endpoint, list_models, ...) comes from the wrapped provider
+        return getattr(self.provider, name)
+
+    @property
+    def temperature(self) -> float:
+        return self.provider.temperature
+
+    def get_client(self) -> httpx.AsyncClient:
+        return self.provider.get_client()
+
+    async def aclose(self) -> None:
+        await self.provider.aclose()
+
+    def get_sampling_params(self) -> Dict[str, Any]:
+        return self.provider.get_sampling_params()
+
+    def get_provider_name(self) -> str:
+        return self.provider.get_provider_name()
+
+    def get_model_name(self) -> str:
+        return self.provider.get_model_name()
+
+    async def embed(self, texts: List[str], model: Optional[str] = None, batch_size: int = EMBEDDING_BATCH_SIZE) -> List[List[float]]:
+        return await self.provider.embed(texts, model=model, batch_size=batch_size)
+
+    async def generate_text(self, prompt: str) -> str:
+        """
+        Generate text from the model with a single prompt
+
+        Args:
+            prompt: The prompt to send to the model
+
+        Returns:
+            str: Generated text
+        """
+        return await self.generate_completion("You are a helpful AI assistant.", prompt)
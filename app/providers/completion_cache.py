@@ -0,0 +1,363 @@
+"""
+Completion cache for AI-to-AI Feedback API
+
+Content-addressed cache of model completions. Entries are keyed by a hash
+of the provider, model, prompts and sampling parameters, and kept in two
+tiers:
+1. An in-memory LRU for repeated prompts within one process
+2. A SQLite table with a TTL, shared across restarts and processes
+
+Completions sampled at a high temperature are expected to differ between
+calls, so they bypass the cache.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, Dict, Optional, Tuple
+
+from .base import ModelProvider, ProviderWrapper
+
+logger = logging.getLogger(__name__)
+
+COMPLETION_CACHE_ENABLED = os.getenv("COMPLETION_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+COMPLETION_CACHE_DB = os.getenv("COMPLETION_CACHE_DB", "completion_cache.db")
+COMPLETION_CACHE_MEMORY_SIZE = int(os.getenv("COMPLETION_CACHE_MEMORY_SIZE", "512"))
+COMPLETION_CACHE_TTL = float(os.getenv("COMPLETION_CACHE_TTL", str(7 * 24 * 3600)))
+# Completions sampled above this temperature are never cached
+COMPLETION_CACHE_MAX_TEMPERATURE = float(os.getenv("COMPLETION_CACHE_MAX_TEMPERATURE", "0.5"))
+
+# Expired disk entries are purged after this many stores
+PURGE_INTERVAL = 256
+
+CACHE_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS completion_cache (
+        key TEXT PRIMARY KEY,
+        provider TEXT NOT NULL,
+        model TEXT NOT NULL,
+        response TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        expires_at REAL NOT NULL
+    )
+'''
+
+CACHE_INDEX_SQL = 'CREATE INDEX IF NOT EXISTS idx_completion_cache_expires ON completion_cache (expires_at)'
+
+
+def completion_key(provider: str, model: str, system_prompt: str, user_prompt: str, params: Dict[str, Any]) -> str:
+    """
+    Hash a completion request
+
+    Args:
+        provider: Provider name
+        model: Model name
+        system_prompt: System prompt
+        user_prompt: User prompt
+        params: Sampling parameters
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    payload = json.dumps(
+        {
+            "provider": provider,
+            "model": model,
+            "system": system_prompt,
+            "user": user_prompt,
+            "params": params,
+        },
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CompletionCache:
+    """Two-tier (memory LRU and SQLite) completion cache"""
+
+    def __init__(self, db_path: Optional[str] = COMPLETION_CACHE_DB,
+                 memory_size: int = COMPLETION_CACHE_MEMORY_SIZE,
+                 ttl: float = COMPLETION_CACHE_TTL,
+                 max_temperature: float = COMPLETION_CACHE_MAX_TEMPERATURE):
+        """
+        Initialize the cache
+
+        Args:
+            db_path: SQLite file of the disk tier (None for memory only)
+            memory_size: Maximum number of entries in the memory tier
+            ttl: Lifetime of an entry, in seconds
+            max_temperature: Highest temperature whose completions are cached
+        """
+        self.db_path = db_path
+        self.memory_size = memory_size
+        self.ttl = ttl
+        self.max_temperature = max_temperature
+
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._stores_since_purge = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.stores = 0
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the disk tier on first use (call with the lock held)"""
+        if self._conn is None and self.db_path:
+            try:
+                conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute(CACHE_TABLE_SQL)
+                conn.execute(CACHE_INDEX_SQL)
+                conn.execute('DELETE FROM completion_cache WHERE expires_at <= ?', (time.time(),))
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error as e:
+                logger.error(f"Error opening completion cache {self.db_path}, using memory only: {e}")
+                self.db_path = None
+        return self._conn
+
+    def cacheable(self, params: Dict[str, Any]) -> bool:
+        """
+        Check whether completions with these sampling parameters may be cached
+
+        Args:
+            params: Sampling parameters
+
+        Returns:
+            bool: False for temperatures above the threshold
+        """
+        return float(params.get("temperature", 0.0)) <= self.max_temperature
+
+    def _remember(self, key: str, response: str, expires_at: float) -> None:
+        """Put an entry in the memory tier (call with the lock held)"""
+        self._memory[key] = (response, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a completion
+
+        Args:
+            key: Completion key
+
+        Returns:
+            Optional[str]: Cached completion, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return entry[0]
+                del self._memory[key]
+
+            conn = self._connect()
+            if conn is not None:
+                try:
+                    row = conn.execute(
+                        'SELECT response, expires_at FROM completion_cache WHERE key = ? AND expires_at > ?',
+                        (key, now)
+                    ).fetchone()
+                except sqlite3.Error as e:
+                    logger.error(f"Error reading completion cache: {e}")
+                    row = None
+                if row is not None:
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, provider: str, model: str, response: str) -> None:
+        """
+        Store a completion in both tiers
+
+        Args:
+            key: Completion key
+            provider: Provider name
+            model: Model name
+            response: Completion text
+        """
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, response, expires_at)
+            self.stores += 1
+
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    'INSERT OR REPLACE INTO completion_cache (key, provider, model, response, created_at, expires_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (key, provider, model, response, now, expires_at)
+                )
+                self._stores_since_purge += 1
+                if self._stores_since_purge >= PURGE_INTERVAL:
+                    conn.execute('DELETE FROM completion_cache WHERE expires_at <= ?', (now,))
+                    self._stores_since_purge = 0
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Error writing completion cache: {e}")
+
+    def record_bypass(self) -> None:
+        """Count a request that skipped the cache"""
+        with self._lock:
+            self.bypasses += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get hit-rate statistics
+
+        Returns:
+            Dict[str, Any]: Counters and the overall hit rate
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "enabled": COMPLETION_CACHE_ENABLED,
+                "memory_entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "stores": self.stores,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def close(self) -> None:
+        """
+        Close the disk tier
+        """
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_completion_cache: Optional[CompletionCache] = None
+
+
+def get_completion_cache() -> CompletionCache:
+    """
+    Get the process-wide completion cache
+
+    Returns:
+        CompletionCache: Shared cache
+    """
+    global _completion_cache
+    if _completion_cache is None:
+        _completion_cache = CompletionCache()
+    return _completion_cache
+
+
+class CachedProvider(ProviderWrapper):
+    """Model provider wrapper that serves repeated completions from a cache"""
+
+    def __init__(self, provider: ModelProvider, cache: Optional[CompletionCache] = None):
+        """
+        Initialize the wrapper
+
+        Args:
+            provider: Provider that generates cache misses
+            cache: Completion cache (defaults to the process-wide cache)
+        """
+        super().__init__(provider)
+        self.cache = cache or get_completion_cache()
+
+    def _key(self, system_prompt: str, user_prompt: str) -> Optional[str]:
+        """Get the cache key of a request, or None if it bypasses the cache"""
+        params = self.provider.get_sampling_params()
+        if not self.cache.cacheable(params):
+            self.cache.record_bypass()
+            return None
+        return completion_key(
+            self.provider.get_provider_name(),
+            self.provider.get_model_name(),
+            system_prompt,
+            user_prompt,
+            params
+        )
+
+    async def _get(self, key: str) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.cache.get, key)
+
+    async def _put(self, key: str, response: str) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None, self.cache.put, key,
+            self.provider.get_provider_name(), self.provider.get_model_name(), response
+        )
+
+    async def generate_completion(self, system_prompt: str, user_prompt: str) -> str:
+        """
+        Generate a completion, or return the cached one
+
+        Args:
+            system_prompt: System prompt
+            user_prompt: User prompt
+
+        Returns:
+            str: Generated text
+        """
+        key = self._key(system_prompt, user_prompt)
+        if key is None:
+            return await self.provider.generate_completion(system_prompt, user_prompt)
+
+        cached = await self._get(key)
+        if cached is not None:
+            return cached
+
+        response = await self.provider.generate_completion(system_prompt, user_prompt)
+        await self._put(key, response)
+        return response
+
+    async def generate_completion_stream(self, system_prompt: str, user_prompt: str) -> AsyncGenerator[str, None]:
+        """
+        Generate a streaming completion, or replay the cached one
+
+        A cached completion is yielded as a single chunk. A streamed
+        completion is only stored once the stream has finished.
+
+        Args:
+            system_prompt: System prompt
+            user_prompt: User prompt
+
+        Yields:
+            str: Generated text chunks
+        """
+        key = self._key(system_prompt, user_prompt)
+        if key is None:
+            async for chunk in self.provider.generate_completion_stream(system_prompt, user_prompt):
+                yield chunk
+            return
+
+        cached = await self._get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        async for chunk in self.provider.generate_completion_stream(system_prompt, user_prompt):
+            chunks.append(chunk)
+            yield chunk
+        if chunks:
+            await self._put(key, "".join(chunks))
@@ -0,0 +1,139 @@
+"""
+Embedding support for AI-to-AI Feedback API
+
+Shared state of the providers' embed() methods:
+1. A content-hash cache, so a text embedded once (e.g. a memory that is
+   re-saved or a snippet stored twice) is not sent to the model again
+2. The dimension of each embedding model; every vector of a model must
+   have it, since vectors of different sizes cannot be compared
+"""
+
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Model used when embed() is not given one
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+
+# Texts sent to the embeddings endpoint per request
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+
+# Embeddings kept in memory
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+
+
+def embedding_key(model: str, text: str) -> str:
+    """
+    Build the cache key of a text's embedding
+
+    Args:
+        model: Embedding model
+        text: Embedded text
+
+    Returns:
+        str: Hex digest of the model and text
+    """
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """LRU cache of embeddings keyed by content hash, plus the dimension of each model"""
+
+    def __init__(self, max_entries: int = EMBEDDING_CACHE_SIZE):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Embeddings kept in memory
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._dimensions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """
+        Get a cached embedding
+
+        Args:
+            key: Embedding key
+
+        Returns:
+            Optional[List[float]]: The embedding, or None if not cached
+        """
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key: str, vector: List[float]) -> None:
+        """
+        Cache an embedding
+
+        Args:
+            key: Embedding key
+            vector: The embedding
+        """
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def check_dimension(self, model: str, vector: List[float]) -> None:
+        """
+        Check a vector against its model's dimension, fixing it on first use
+
+        Args:
+            model: Embedding model
+            vector: Vector the model returned
+
+        Raises:
+            ValueError: If the vector's size differs from the model's dimension
+        """
+        with self._lock:
+            dimension = self._dimensions.setdefault(model, len(vector))
+        if len(vector) != dimension:
+            raise ValueError(f"Embedding model {model} returned {len(vector)} dimensions, expected {dimension}")
+
+    def dimension(self, model: str) -> Optional[int]:
+        """
+        Get the dimension of a model's embeddings
+
+        Args:
+            model: Embedding model
+
+        Returns:
+            Optional[int]: Dimension, or None if the model was not used yet
+        """
+        return self._dimensions.get(model)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache statistics
+
+        Returns:
+            Dict[str, Any]: Entries, hits, misses and model dimensions
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "dimensions": dict(self._dimensions),
+        }
+
+
+embedding_cache = EmbeddingCache()
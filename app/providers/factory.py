@@ -4,23 +4,33 @@ Provider factory for AI-to-AI Feedback API
 
 import os
 from typing import Dict, Optional
-from .base import ModelProvider
+from .base import DEFAULT_TEMPERATURE, ModelProvider
 from .openrouter import OpenRouterProvider
 from .anthropic import AnthropicProvider
 from .openai import OpenAIProvider
 from .ollama import OllamaProvider
 from .google import GoogleProvider
+from .completion_cache import COMPLETION_CACHE_ENABLED, CachedProvider, get_completion_cache
+from .single_flight import SINGLE_FLIGHT_ENABLED, SingleFlightProvider
+from .limiter import LIMITER_ENABLED, LimitedProvider
 
 # Cache for providers
 provider_cache: Dict[str, ModelProvider] = {}
 
-def get_model_provider(provider_name: Optional[str] = None, model_name: Optional[str] = None) -> ModelProvider:
+def get_model_provider(provider_name: Optional[str] = None, model_name: Optional[str] = None,
+                       cache: Optional[bool] = None, temperature: Optional[float] = None) -> ModelProvider:
     """
     Get a model provider instance
 
     Args:
         provider_name: Provider name (defaults to environment variable)
         model_name: Model name (defaults to environment variable)
+        cache: Serve repeated completions from the completion cache
+            (defaults to the COMPLETION_CACHE_ENABLED environment variable)
+        temperature: Sampling temperature of the provider's completions
+            (defaults to the <PROVIDER>_TEMPERATURE environment variable, e.g.
+            OLLAMA_TEMPERATURE, then LLM_TEMPERATURE); completions above
+            COMPLETION_CACHE_MAX_TEMPERATURE bypass the cache
 
     Returns:
         ModelProvider: Model provider instance
@@ -29,8 +39,15 @@ def get_model_provider(provider_name: Optional[str] = None, model_name: Optional
     if not provider_name:
         provider_name = os.getenv("DEFAULT_PROVIDER", "ollama")
 
+    if cache is None:
+        cache = COMPLETION_CACHE_ENABLED
+
+    if temperature is None:
+        provider_temperature = os.getenv(f"{provider_name.split('/')[0].upper()}_TEMPERATURE")
+        temperature = float(provider_temperature) if provider_temperature else DEFAULT_TEMPERATURE
+
     # Check if provider is already cached
-    cache_key = f"{provider_name}:{model_name or ''}"
+    cache_key = f"{provider_name}:{model_name or ''}:{temperature}{':cached' if cache else ''}"
     if cache_key in provider_cache:
         return provider_cache[cache_key]
 
@@ -49,8 +66,34 @@ def get_model_provider(provider_name: Optional[str] = None, model_name: Optional
         provider = GoogleProvider(model=model_name)
     else:
         raise ValueError(f"Unknown provider: {provider_name}")
+    provider.temperature = temperature
+
+    # Generations against one endpoint and model are adaptively limited
+    if LIMITER_ENABLED:
+        provider = LimitedProvider(provider)
+
+    # Concurrent identical requests share one upstream call
+    if SINGLE_FLIGHT_ENABLED:
+        provider = SingleFlightProvider(provider)
+
+    if cache:
+        provider = CachedProvider(provider)
 
     # Cache provider
     provider_cache[cache_key] = provider
 
     return provider
+
+
+async def close_model_providers() -> None:
+    """
+    Close the pooled HTTP clients of every cached provider
+
+    Called from the application shutdown hook.
+    """
+    for provider in list(provider_cache.values()):
+        try:
+            await provider.aclose()
+        except Exception as e:
+            print(f"Error closing {provider.get_provider_name()} provider: {e}")
+    get_completion_cache().close()
@@ -60,31 +60,31 @@ class GoogleProvider(ModelProvider):
                 {"role": "user", "content": user_prompt}
             ]
             
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent",
-                    headers={
-                        "Content-Type": "application/json",
-                        "x-goog-api-key": self.api_key
-                    },
-                    json={
-                        "contents": messages,
-                        "generationConfig": {
-                            "temperature": 0.3,
-                            "topP": 0.8,
-                            "topK": 40,
-                            "maxOutputTokens": 8192
-                        }
+            client = self.get_client()
+            response = await client.post(
+                f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent",
+                headers={
+                    "Content-Type": "application/json",
+                    "x-goog-api-key": self.api_key
+                },
+                json={
+                    "contents": messages,
+                    "generationConfig": {
+                        "temperature": self.temperature,
+                        "topP": 0.8,
+                        "topK": 40,
+                        "maxOutputTokens": 8192
                     }
-                )
-                
-                response.raise_for_status()
-                response_data = response.json()
-                
-                if not response_data.get("candidates") or not response_data["candidates"][0].get("content"):
-                    raise ValueError("No response returned from Google API")
-                
-                return response_data["candidates"][0]["content"]["parts"][0]["text"]
+                }
+            )
+            
+            response.raise_for_status()
+            response_data = response.json()
+            
+            if not response_data.get("candidates") or not response_data["candidates"][0].get("content"):
+                raise ValueError("No response returned from Google API")
+            
+            return response_data["candidates"][0]["content"]["parts"][0]["text"]
         except Exception as e:
             print(f"Error generating completion with Google: {e}")
             raise
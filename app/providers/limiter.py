@@ -0,0 +1,420 @@
+"""
+Adaptive concurrency limiting for AI-to-AI Feedback API
+
+Each endpoint and model pair gets an AIMD (additive increase,
+multiplicative decrease) limiter on the number of generations in flight:
+1. While latency stays near the best observed latency, the limit grows
+   by about one slot per round trip
+2. When latency climbs past LIMITER_LATENCY_TOLERANCE times that
+   baseline, or a call fails, the limit is cut by LIMITER_BACKOFF
+
+Requests that do not fit wait in priority lanes. A lane is picked from
+the caller's context (see request_priority), so interactive API requests
+are let through before queued background agent work.
+"""
+
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import contextvars
+from contextlib import asynccontextmanager, contextmanager
+from enum import IntEnum
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from .base import ModelProvider, ProviderWrapper
+from .embeddings import EMBEDDING_BATCH_SIZE, EMBEDDING_MODEL
+
+LIMITER_ENABLED = os.getenv("LIMITER_ENABLED", "true").lower() in ("1", "true", "yes")
+LIMITER_INITIAL_LIMIT = float(os.getenv("LIMITER_INITIAL_LIMIT", "2"))
+LIMITER_MIN_LIMIT = float(os.getenv("LIMITER_MIN_LIMIT", "1"))
+LIMITER_MAX_LIMIT = float(os.getenv("LIMITER_MAX_LIMIT", "16"))
+LIMITER_LATENCY_TOLERANCE = float(os.getenv("LIMITER_LATENCY_TOLERANCE", "2.0"))
+LIMITER_BACKOFF = float(os.getenv("LIMITER_BACKOFF", "0.7"))
+
+
+class Priority(IntEnum):
+    """Priority lanes, most urgent first"""
+    INTERACTIVE = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+_request_priority: contextvars.ContextVar = contextvars.ContextVar("request_priority", default=Priority.INTERACTIVE)
+
+
+def set_request_priority(priority: Priority) -> None:
+    """
+    Set the priority lane of model calls made from the current task
+
+    Background loops call this once at the top of their task; anything that
+    does not set a priority (e.g. API request handlers) is interactive.
+
+    Args:
+        priority: Priority lane
+    """
+    _request_priority.set(priority)
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """
+    Use a priority lane for model calls made inside the block
+
+    Args:
+        priority: Priority lane
+    """
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+def current_priority() -> Priority:
+    """
+    Get the priority lane of the current context
+
+    Returns:
+        Priority: Priority lane
+    """
+    return _request_priority.get()
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limiter with priority lanes"""
+
+    def __init__(self, name: str,
+                 initial_limit: float = LIMITER_INITIAL_LIMIT,
+                 min_limit: float = LIMITER_MIN_LIMIT,
+                 max_limit: float = LIMITER_MAX_LIMIT,
+                 latency_tolerance: float = LIMITER_LATENCY_TOLERANCE,
+                 backoff: float = LIMITER_BACKOFF):
+        """
+        Initialize the limiter
+
+        Args:
+            name: Limiter name, used as a metric label
+            initial_limit: Concurrency limit to start with
+            min_limit: Lowest limit
+            max_limit: Highest limit
+            latency_tolerance: Latency, as a multiple of the baseline, that counts as overload
+            backoff: Factor applied to the limit on overload
+        """
+        self.name = name
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self.last_decrease = 0.0
+
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+        self.completed = 0
+        self.errors = 0
+        self.decreases = 0
+        self.queued: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self.wait_count: Dict[Priority, int] = {priority: 0 for priority in Priority}
+        self.wait_seconds: Dict[Priority, float] = {priority: 0.0 for priority in Priority}
+        self.max_wait_seconds: Dict[Priority, float] = {priority: 0.0 for priority in Priority}
+
+    def _has_room(self) -> bool:
+        return self.in_flight < max(1, int(self.limit))
+
+    def _wake(self) -> None:
+        """Hand free slots to the most urgent waiters"""
+        while self._waiters and self._has_room():
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    async def acquire(self, priority: Priority) -> float:
+        """
+        Wait for a slot
+
+        Args:
+            priority: Priority lane of the request
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        started = time.monotonic()
+        if not self._waiters and self._has_room():
+            self.in_flight += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (int(priority), next(self._sequence), future))
+            self.queued[priority] += 1
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # The slot was handed over just before the cancellation
+                    self.in_flight -= 1
+                    self._wake()
+                raise
+            finally:
+                self.queued[priority] -= 1
+
+        waited = time.monotonic() - started
+        self.wait_count[priority] += 1
+        self.wait_seconds[priority] += waited
+        self.max_wait_seconds[priority] = max(self.max_wait_seconds[priority], waited)
+        return waited
+
+    def release(self, latency: Optional[float], success: bool) -> None:
+        """
+        Free a slot and adjust the limit
+
+        Args:
+            latency: Latency signal of the call (None if it is unknown)
+            success: Whether the call succeeded
+        """
+        self.in_flight -= 1
+        self.completed += 1
+        now = time.monotonic()
+
+        if not success:
+            self.errors += 1
+            self._decrease(now)
+        elif latency is not None:
+            if self.baseline is None or latency < self.baseline:
+                self.baseline = latency
+            else:
+                # Let the baseline drift up slowly so one lucky call does not pin it
+                self.baseline += (latency - self.baseline) * 0.01
+
+            if latency > self.baseline * self.latency_tolerance:
+                self._decrease(now)
+            elif self.in_flight + 1 >= int(self.limit):
+                # Only grow while the limit is actually the bottleneck
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+        self._wake()
+
+    def _decrease(self, now: float) -> None:
+        """
+        Cut the limit, then ignore further overload signals for a while
+
+        Calls that were in flight when the limit was cut report the same
+        overload as they finish. The cooldown is the baseline latency taken
+        as seconds: for calls returning about 1000 characters that is their
+        best duration, a rough stand-in for how long those calls last.
+        """
+        if now - self.last_decrease < (self.baseline or 0):
+            return
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self.last_decrease = now
+        self.decreases += 1
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[Priority] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Hold a slot for the duration of a call
+
+        The yielded dictionary carries the queue wait; set its "latency"
+        key to override the latency signal (by default the time the slot
+        was held). The call is counted as failed if the block raises.
+
+        Args:
+            priority: Priority lane (defaults to the context's lane)
+
+        Yields:
+            Dict[str, Any]: Call details
+        """
+        details: Dict[str, Any] = {"wait": await self.acquire(current_priority() if priority is None else priority)}
+        started = time.monotonic()
+        success = False
+        try:
+            yield details
+            success = True
+        except (asyncio.CancelledError, GeneratorExit):
+            # An abandoned call says nothing about the endpoint's load
+            details["latency"] = None
+            success = True
+            raise
+        finally:
+            self.release(details.get("latency", time.monotonic() - started), success)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the limiter's state and counters
+
+        Returns:
+            Dict[str, Any]: Limit, load, and queue depth and wait per lane
+        """
+        return {
+            "limit": round(self.limit, 3),
+            "in_flight": self.in_flight,
+            "baseline_latency": self.baseline,
+            "completed": self.completed,
+            "errors": self.errors,
+            "decreases": self.decreases,
+            "lanes": {
+                priority.name.lower(): {
+                    "queued": self.queued[priority],
+                    "waits": self.wait_count[priority],
+                    "wait_seconds": round(self.wait_seconds[priority], 6),
+                    "max_wait_seconds": round(self.max_wait_seconds[priority], 6),
+                }
+                for priority in Priority
+            },
+        }
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+
+
+def get_limiter(endpoint: str, model: str) -> AdaptiveLimiter:
+    """
+    Get the process-wide limiter of an endpoint and model
+
+    Args:
+        endpoint: Endpoint URL or provider name
+        model: Model name
+
+    Returns:
+        AdaptiveLimiter: Shared limiter
+    """
+    name = f"{endpoint}|{model}"
+    limiter = _limiters.get(name)
+    if limiter is None:
+        limiter = _limiters[name] = AdaptiveLimiter(name)
+    return limiter
+
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the state of every limiter
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Limiter stats by name
+    """
+    return {name: limiter.get_stats() for name, limiter in _limiters.items()}
+
+
+def _escape(value: Any) -> str:
+    """Escape a Prometheus label value"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: Any) -> str:
+    """Format a Prometheus label set"""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def render_prometheus() -> str:
+    """
+    Render the limiters in the Prometheus text exposition format
+
+    Returns:
+        str: Metrics page
+    """
+    lines = [
+        "# HELP ai2ai_limiter_limit Current concurrency limit",
+        "# TYPE ai2ai_limiter_limit gauge",
+    ]
+    for name, limiter in _limiters.items():
+        lines.append(f"ai2ai_limiter_limit{_labels(limiter=name)} {limiter.limit:.3f}")
+
+    lines += ["# HELP ai2ai_limiter_in_flight Calls holding a slot", "# TYPE ai2ai_limiter_in_flight gauge"]
+    for name, limiter in _limiters.items():
+        lines.append(f"ai2ai_limiter_in_flight{_labels(limiter=name)} {limiter.in_flight}")
+
+    lines += ["# HELP ai2ai_limiter_errors_total Calls that failed", "# TYPE ai2ai_limiter_errors_total counter"]
+    for name, limiter in _limiters.items():
+        lines.append(f"ai2ai_limiter_errors_total{_labels(limiter=name)} {limiter.errors}")
+
+    lane_metrics = [
+        ("ai2ai_limiter_queue_depth", "gauge", "Calls waiting for a slot", lambda l, p: l.queued[p]),
+        ("ai2ai_limiter_waits_total", "counter", "Calls that were given a slot", lambda l, p: l.wait_count[p]),
+        ("ai2ai_limiter_wait_seconds_total", "counter", "Time calls waited for a slot", lambda l, p: l.wait_seconds[p]),
+        ("ai2ai_limiter_max_wait_seconds", "gauge", "Longest wait for a slot", lambda l, p: l.max_wait_seconds[p]),
+    ]
+    for metric, metric_type, help_text, value in lane_metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {metric_type}")
+        for name, limiter in _limiters.items():
+            for priority in Priority:
+                lines.append(f"{metric}{_labels(limiter=name, lane=priority.name.lower())} {value(limiter, priority):.6g}")
+
+    return "\n".join(lines) + "\n"
+
+
+class LimitedProvider(ProviderWrapper):
+    """Model provider wrapper that holds a limiter slot for every generation"""
+
+    def __init__(self, provider: ModelProvider):
+        """
+        Initialize the wrapper
+
+        Args:
+            provider: Provider that makes the calls
+        """
+        super().__init__(provider)
+        self.limiter_endpoint = getattr(provider, "endpoint", None) or provider.get_provider_name()
+        self.limiter = get_limiter(self.limiter_endpoint, provider.get_model_name())
+
+    async def generate_completion(self, system_prompt: str, user_prompt: str) -> str:
+        """
+        Generate a completion once a slot is free
+
+        Args:
+            system_prompt: System prompt
+            user_prompt: User prompt
+
+        Returns:
+            str: Generated text
+        """
+        async with self.limiter.slot() as call:
+            started = time.monotonic()
+            response = await self.provider.generate_completion(system_prompt, user_prompt)
+            # Seconds per (roughly) 1000 output characters, so long answers are not mistaken for overload
+            call["latency"] = (time.monotonic() - started) / (1 + len(response) / 1000)
+            return response
+
+    async def generate_completion_stream(self, system_prompt: str, user_prompt: str) -> AsyncGenerator[str, None]:
+        """
+        Generate a streaming completion once a slot is free
+
+        Args:
+            system_prompt: System prompt
+            user_prompt: User prompt
+
+        Yields:
+            str: Generated text chunks
+        """
+        async with self.limiter.slot() as call:
+            started = time.monotonic()
+            chars = 0
+            async for chunk in self.provider.generate_completion_stream(system_prompt, user_prompt):
+                chars += len(chunk)
+                yield chunk
+            call["latency"] = (time.monotonic() - started) / (1 + chars / 1000)
+
+    async def embed(self, texts: List[str], model: Optional[str] = None, batch_size: int = EMBEDDING_BATCH_SIZE) -> List[List[float]]:
+        """
+        Embed texts once a slot of the embedding model's limiter is free
+
+        Embedding latency says little about generation load, so only errors
+        adjust that limiter.
+
+        Args:
+            texts: Texts to embed
+            model: Embedding model (defaults to EMBEDDING_MODEL)
+            batch_size: Texts per request
+
+        Returns:
+            List[List[float]]: One vector per text, in the order of texts
+        """
+        limiter = get_limiter(self.limiter_endpoint, model or EMBEDDING_MODEL)
+        async with limiter.slot() as call:
+            call["latency"] = None
+            return await self.provider.embed(texts, model=model, batch_size=batch_size)
@@ -5,12 +5,16 @@ Ollama provider for AI-to-AI Feedback API
 import os
 import json
 import httpx
-from typing import List
+from typing import AsyncGenerator, Dict, List, Optional
 from .base import ModelProvider
+from .embeddings import EMBEDDING_BATCH_SIZE, EMBEDDING_MODEL, embedding_cache, embedding_key
 
 class OllamaProvider(ModelProvider):
     """Ollama model provider"""
 
+    # Longer timeout for local models
+    request_timeout = 120.0
+
     def __init__(self, endpoint: str = None, model: str = None):
         """
         Initialize Ollama provider
@@ -85,74 +89,146 @@ class OllamaProvider(ModelProvider):
             # Combine system prompt and user prompt for Ollama
             prompt = f"{system_prompt}\n\n{user_prompt}"
 
-            async with httpx.AsyncClient(timeout=120.0) as client:  # Longer timeout for local models
-                response = await client.post(
-                    f"{self.endpoint}/api/generate",
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "system": system_prompt,
-                        "temperature": 0.3,  # Lower temperature for more focused feedback
-                        "stream": False
-                    }
-                )
-
-                response.raise_for_status()
-                response_data = response.json()
-
-                if not response_data.get("response"):
-                    raise ValueError("No response returned from Ollama API")
-
-                return response_data["response"]
+            client = self.get_client()
+            response = await client.post(
+                f"{self.endpoint}/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    "system": system_prompt,
+                    # Ollama only reads sampling parameters under "options"
+                    "options": {"temperature": self.temperature},
+                    "stream": False
+                }
+            )
+
+            response.raise_for_status()
+            response_data = response.json()
+
+            if not response_data.get("response"):
+                raise ValueError("No response returned from Ollama API")
+
+            return response_data["response"]
         except Exception as e:
             print(f"Error generating completion with Ollama: {e}")
             raise
 
-    async def generate_completion_stream(self, system_prompt: str, user_prompt: str) -> str:
+    async def generate_completion_stream(self, system_prompt: str, user_prompt: str) -> AsyncGenerator[str, None]:
         """
         Generate a streaming completion from the model
 
+        Each fragment is yielded as soon as Ollama sends it. If the consumer
+        stops iterating (e.g. the SSE client disconnected and its task was
+        cancelled), the response is closed, which drops the connection and
+        makes Ollama stop generating.
+
         Args:
             system_prompt: System prompt
             user_prompt: User prompt
 
-        Returns:
-            str: Generated text
+        Yields:
+            str: Generated text chunks
         """
         try:
             # Combine system prompt and user prompt for Ollama
             prompt = f"{system_prompt}\n\n{user_prompt}"
 
-            async with httpx.AsyncClient(timeout=120.0) as client:  # Longer timeout for local models
-                response = await client.post(
-                    f"{self.endpoint}/api/generate",
-                    json={
-                        "model": self.model,
-                        "prompt": prompt,
-                        "system": system_prompt,
-                        "temperature": 0.3,  # Lower temperature for more focused feedback
-                        "stream": True
-                    }
-                )
-
+            client = self.get_client()
+            async with client.stream(
+                "POST",
+                f"{self.endpoint}/api/generate",
+                json={
+                    "model": self.model,
+                    "prompt": prompt,
+                    "system": system_prompt,
+                    # Ollama only reads sampling parameters under "options"
+                    "options": {"temperature": self.temperature},
+                    "stream": True
+                }
+            ) as response:
                 response.raise_for_status()
 
-                # For non-streaming, just return the full response
-                full_response = ""
+                # Ollama sends one JSON object per line
                 async for line in response.aiter_lines():
-                    if line.strip():
-                        try:
-                            data = json.loads(line)
-                            if "response" in data:
-                                full_response += data["response"]
-                        except json.JSONDecodeError:
-                            pass
-
-                return full_response
+                    if not line.strip():
+                        continue
+
+                    try:
+                        data = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+
+                    if data.get("error"):
+                        raise ValueError(f"Ollama API error: {data['error']}")
+
+                    if data.get("response"):
+                        yield data["response"]
+
+                    if data.get("done"):
+                        break
         except Exception as e:
             print(f"Error generating streaming completion with Ollama: {e}")
             raise
 
+    async def embed(self, texts: List[str], model: Optional[str] = None, batch_size: int = EMBEDDING_BATCH_SIZE) -> List[List[float]]:
+        """
+        Embed texts with Ollama's batch embeddings endpoint
+
+        Texts already in the embedding cache and duplicates within the call
+        are only embedded once; the rest are sent batch_size at a time over
+        the pooled client.
+
+        Args:
+            texts: Texts to embed
+            model: Embedding model (defaults to EMBEDDING_MODEL)
+            batch_size: Texts per request
+
+        Returns:
+            List[List[float]]: One vector per text, in the order of texts
+        """
+        model = model or EMBEDDING_MODEL
+        keys = [embedding_key(model, text) for text in texts]
+
+        vectors: Dict[str, List[float]] = {}
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in vectors or key in missing:
+                continue
+            vector = embedding_cache.get(key)
+            if vector is None:
+                missing[key] = text
+            else:
+                vectors[key] = vector
+
+        pending = list(missing.items())
+        client = self.get_client()
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            try:
+                response = await client.post(
+                    f"{self.endpoint}/api/embed",
+                    json={
+                        "model": model,
+                        "input": [text for _, text in batch],
+                        "truncate": True
+                    }
+                )
+                response.raise_for_status()
+                embeddings = response.json().get("embeddings") or []
+            except Exception as e:
+                print(f"Error embedding texts with Ollama: {e}")
+                raise
+
+            if len(embeddings) != len(batch):
+                raise ValueError(f"Ollama returned {len(embeddings)} embeddings for {len(batch)} texts")
+
+            for (key, _), vector in zip(batch, embeddings):
+                embedding_cache.check_dimension(model, vector)
+                embedding_cache.put(key, vector)
+                vectors[key] = vector
+
+        return [vectors[key] for key in keys]
+
     async def list_models(self) -> List[str]:
         """
         List available models from Ollama
@@ -161,16 +237,16 @@ class OllamaProvider(ModelProvider):
             List[str]: List of available models
         """
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(f"{self.endpoint}/api/tags")
+            client = self.get_client()
+            response = await client.get(f"{self.endpoint}/api/tags", timeout=10.0)
 
-                response.raise_for_status()
-                response_data = response.json()
+            response.raise_for_status()
+            response_data = response.json()
 
-                if not response_data.get("models"):
-                    return []
+            if not response_data.get("models"):
+                return []
 
-                return [model["name"] for model in response_data["models"]]
+            return [model["name"] for model in response_data["models"]]
         except Exception as e:
             print(f"Error listing Ollama models: {e}")
             return []
@@ -57,31 +57,31 @@ class OpenAIProvider(ModelProvider):
             str: Generated text
         """
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    "https://api.openai.com/v1/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {self.api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": self.model,
-                        "messages": [
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt}
-                        ],
-                        "temperature": 0.3,  # Lower temperature for more focused feedback
-                        "max_tokens": 4000
-                    }
-                )
-                
-                response.raise_for_status()
-                response_data = response.json()
-                
-                if not response_data.get("choices") or len(response_data["choices"]) == 0:
-                    raise ValueError("No choices returned from OpenAI API")
-                
-                return response_data["choices"][0]["message"]["content"]
+            client = self.get_client()
+            response = await client.post(
+                "https://api.openai.com/v1/chat/completions",
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    "temperature": self.temperature,  # Lower temperature for more focused feedback
+                    "max_tokens": 4000
+                }
+            )
+            
+            response.raise_for_status()
+            response_data = response.json()
+            
+            if not response_data.get("choices") or len(response_data["choices"]) == 0:
+                raise ValueError("No choices returned from OpenAI API")
+            
+            return response_data["choices"][0]["message"]["content"]
         except Exception as e:
             print(f"Error generating completion with OpenAI: {e}")
             raise
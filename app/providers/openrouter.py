@@ -56,29 +56,29 @@ class OpenRouterProvider(ModelProvider):
             str: Generated text
         """
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    "http://192.168.0.77:111434/v1/chat/completions",
-                    headers={
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": self.model,
-                        "messages": [
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt}
-                        ],
-                        "temperature": 0.3  # Lower temperature for more focused feedback
-                    }
-                )
-
-                response.raise_for_status()
-                response_data = response.json()
-
-                if not response_data.get("choices") or len(response_data["choices"]) == 0:
-                    raise ValueError("No choices returned from OpenRouter API")
-
-                return response_data["choices"][0]["message"]["content"]
+            client = self.get_client()
+            response = await client.post(
+                "http://192.168.0.77:111434/v1/chat/completions",
+                headers={
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    "temperature": self.temperature  # Lower temperature for more focused feedback
+                }
+            )
+
+            response.raise_for_status()
+            response_data = response.json()
+
+            if not response_data.get("choices") or len(response_data["choices"]) == 0:
+                raise ValueError("No choices returned from OpenRouter API")
+
+            return response_data["choices"][0]["message"]["content"]
         except Exception as e:
             print(f"Error generating completion with OpenRouter: {e}")
             raise
@@ -95,52 +95,52 @@ class OpenRouterProvider(ModelProvider):
             str: Generated text chunks
         """
         try:
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                async with client.stream(
-                    "POST",
-                    "http://192.168.0.77:111434/v1/chat/completions",
-                    headers={
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": self.model,
-                        "messages": [
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": user_prompt}
-                        ],
-                        "temperature": 0.3,  # Lower temperature for more focused feedback
-                        "stream": True  # Enable streaming
-                    },
-                    timeout=120.0
-                ) as response:
-                    response.raise_for_status()
-
-                    # Process the streaming response
-                    async for line in response.aiter_lines():
-                        # Skip empty lines and "data: [DONE]" messages
-                        if not line or line == "data: [DONE]":
-                            continue
-
-                        # Remove "data: " prefix if present
-                        if line.startswith("data: "):
-                            line = line[6:]
-
-                        try:
-                            # Parse the JSON data
-                            data = json.loads(line)
-
-                            # Extract the content delta
-                            if (
-                                data.get("choices")
-                                and len(data["choices"]) > 0
-                                and data["choices"][0].get("delta")
-                                and data["choices"][0]["delta"].get("content")
-                            ):
-                                content = data["choices"][0]["delta"]["content"]
-                                yield content
-                        except json.JSONDecodeError:
-                            # Skip invalid JSON
-                            continue
+            client = self.get_client()
+            async with client.stream(
+                "POST",
+                "http://192.168.0.77:111434/v1/chat/completions",
+                headers={
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    "temperature": self.temperature,  # Lower temperature for more focused feedback
+                    "stream": True  # Enable streaming
+                },
+                timeout=120.0
+            ) as response:
+                response.raise_for_status()
+
+                # Process the streaming response
+                async for line in response.aiter_lines():
+                    # Skip empty lines and "data: [DONE]" messages
+                    if not line or line == "data: [DONE]":
+                        continue
+
+                    # Remove "data: " prefix if present
+                    if line.startswith("data: "):
+                        line = line[6:]
+
+                    try:
+                        # Parse the JSON data
+                        data = json.loads(line)
+
+                        # Extract the content delta
+                        if (
+                            data.get("choices")
+                            and len(data["choices"]) > 0
+                            and data["choices"][0].get("delta")
+                            and data["choices"][0]["delta"].get("content")
+                        ):
+                            content = data["choices"][0]["delta"]["content"]
+                            yield content
+                    except json.JSONDecodeError:
+                        # Skip invalid JSON
+                        continue
         except Exception as e:
             print(f"Error generating streaming completion with OpenRouter: {e}")
             raise
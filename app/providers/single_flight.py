@@ -0,0 +1,208 @@
+"""
+Single-flight request coalescing for AI-to-AI Feedback API
+
+Concurrent identical requests to the same provider and model share one
+upstream call:
+1. generate_completion callers wait on the same in-flight request
+2. generate_completion_stream subscribers receive the same chunks; a
+   subscriber that joins late first gets the chunks already streamed
+
+A request is only shared while it is in flight, so a call that starts
+after the previous one finished goes upstream again. The upstream call is
+cancelled once every caller has gone away.
+"""
+
+import os
+import asyncio
+import logging
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from .base import ModelProvider, ProviderWrapper
+from .completion_cache import completion_key
+
+logger = logging.getLogger(__name__)
+
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+class SingleFlightStats:
+    """Process-wide coalescing counters"""
+
+    def __init__(self):
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+        self.upstream_streams = 0
+        self.coalesced_streams = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get the coalescing counters
+
+        Returns:
+            Dict[str, Any]: Upstream and coalesced request counts
+        """
+        return {
+            "enabled": SINGLE_FLIGHT_ENABLED,
+            "upstream_calls": self.upstream_calls,
+            "coalesced_calls": self.coalesced_calls,
+            "upstream_streams": self.upstream_streams,
+            "coalesced_streams": self.coalesced_streams,
+            "calls_saved": self.coalesced_calls + self.coalesced_streams,
+        }
+
+
+single_flight_stats = SingleFlightStats()
+
+
+class _Call:
+    """One in-flight generate_completion request"""
+
+    def __init__(self, task: "asyncio.Task[str]"):
+        self.task = task
+        self.waiters = 0
+
+
+class _Broadcast:
+    """One in-flight stream and the chunks it has produced so far"""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Condition()
+        self.subscribers = 0
+        self.task: Optional[asyncio.Task] = None
+
+    async def pump(self, stream: AsyncGenerator[str, None]) -> None:
+        """Read the upstream stream and wake the subscribers on each chunk"""
+        try:
+            async for chunk in stream:
+                async with self.changed:
+                    self.chunks.append(chunk)
+                    self.changed.notify_all()
+        except asyncio.CancelledError:
+            self.error = asyncio.CancelledError()
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            await stream.aclose()
+            async with self.changed:
+                self.done = True
+                self.changed.notify_all()
+
+    async def subscribe(self) -> AsyncGenerator[str, None]:
+        """Yield every chunk of the stream, starting from the first"""
+        position = 0
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: self.done or len(self.chunks) > position)
+                chunks = self.chunks[position:]
+                done = self.done
+            position += len(chunks)
+            for chunk in chunks:
+                yield chunk
+            if done and position >= len(self.chunks):
+                break
+        if self.error is not None:
+            raise self.error
+
+
+class SingleFlightProvider(ProviderWrapper):
+    """Model provider wrapper that coalesces concurrent identical requests"""
+
+    def __init__(self, provider: ModelProvider):
+        """
+        Initialize the wrapper
+
+        Args:
+            provider: Provider that makes the upstream calls
+        """
+        super().__init__(provider)
+        self._calls: Dict[Tuple[int, str], _Call] = {}
+        self._streams: Dict[Tuple[int, str], _Broadcast] = {}
+
+    def _key(self, system_prompt: str, user_prompt: str) -> Tuple[int, str]:
+        """Key a request; in-flight requests are only shared within one event loop"""
+        return (
+            id(asyncio.get_running_loop()),
+            completion_key(
+                self.provider.get_provider_name(),
+                self.provider.get_model_name(),
+                system_prompt,
+                user_prompt,
+                self.provider.get_sampling_params()
+            )
+        )
+
+    @staticmethod
+    def _forget(flights: Dict[Tuple[int, str], Any], key: Tuple[int, str], flight: Any) -> None:
+        """Stop sharing a request, unless a newer one already took its key"""
+        if flights.get(key) is flight:
+            del flights[key]
+
+    async def generate_completion(self, system_prompt: str, user_prompt: str) -> str:
+        """
+        Generate a completion, sharing an identical in-flight request
+
+        Args:
+            system_prompt: System prompt
+            user_prompt: User prompt
+
+        Returns:
+            str: Generated text
+        """
+        key = self._key(system_prompt, user_prompt)
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.ensure_future(self.provider.generate_completion(system_prompt, user_prompt))
+            call = self._calls[key] = _Call(task)
+            task.add_done_callback(lambda _: self._forget(self._calls, key, call))
+            single_flight_stats.upstream_calls += 1
+        else:
+            single_flight_stats.coalesced_calls += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                self._forget(self._calls, key, call)
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    async def generate_completion_stream(self, system_prompt: str, user_prompt: str) -> AsyncGenerator[str, None]:
+        """
+        Generate a streaming completion, sharing an identical in-flight stream
+
+        Args:
+            system_prompt: System prompt
+            user_prompt: User prompt
+
+        Yields:
+            str: Generated text chunks
+        """
+        key = self._key(system_prompt, user_prompt)
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = self._streams[key] = _Broadcast()
+            broadcast.task = asyncio.ensure_future(
+                broadcast.pump(self.provider.generate_completion_stream(system_prompt, user_prompt))
+            )
+            broadcast.task.add_done_callback(lambda _: self._forget(self._streams, key, broadcast))
+            single_flight_stats.upstream_streams += 1
+        else:
+            single_flight_stats.coalesced_streams += 1
+
+        broadcast.subscribers += 1
+        try:
+            async for chunk in broadcast.subscribe():
+                yield chunk
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.task.done():
+                # Every subscriber went away: stop the upstream generation
+                self._forget(self._streams, key, broadcast)
+                broadcast.task.cancel()
@@ -0,0 +1,311 @@
+"""
+Research cache for the task processor
+
+A persistent, disk-backed cache for research searches and page fetches:
+1. Bodies live as files under the cache directory, indexed by SQLite
+2. Every entry has a TTL; expired entries are revalidated with their
+   ETag / Last-Modified validators instead of being downloaded again
+3. Both the raw HTML and the extracted text of a page are stored
+4. Total size is capped, evicting the least recently used entries first
+"""
+
+import os
+import time
+import json
+import hashlib
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("research-cache")
+
+# Defaults, overridable from the environment
+# The cache lives in the user's cache directory, not in the working tree
+RESEARCH_CACHE_DIR = os.getenv(
+    "RESEARCH_CACHE_DIR",
+    os.path.join(os.getenv("XDG_CACHE_HOME", os.path.expanduser("~/.cache")), "ai2ai-feedback", "research")
+)
+RESEARCH_CACHE_MAX_BYTES = int(os.getenv("RESEARCH_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", str(7 * 24 * 3600)))
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters for one task's research"""
+
+    def __init__(self):
+        """Initialize the counters"""
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str) -> None:
+        """
+        Count one cache lookup
+
+        Args:
+            outcome: One of "hits", "revalidated" or "misses"
+        """
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def as_dict(self) -> Dict[str, int]:
+        """
+        Get the counters as a dictionary
+
+        Returns:
+            Dict[str, int]: Counter values
+        """
+        with self._lock:
+            return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses}
+
+
+class ResearchCache:
+    """Disk-backed HTTP content cache with a SQLite index"""
+
+    def __init__(self, cache_dir: str = RESEARCH_CACHE_DIR, max_bytes: int = RESEARCH_CACHE_MAX_BYTES):
+        """
+        Initialize the research cache
+
+        Args:
+            cache_dir: Directory holding the index and cached bodies
+            max_bytes: Maximum total size of cached bodies
+        """
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.max_bytes = max_bytes
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(cache_dir, "index.db"), timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL DEFAULT 0,
+                has_text INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access)')
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build the cache key for a request
+
+        Args:
+            url: Request URL
+            params: Optional query parameters
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        raw = url if not params else f"{url}?{json.dumps(params, sort_keys=True)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> str:
+        """Get the file path for one body of an entry"""
+        return os.path.join(self.objects_dir, key[:2], f"{key}.{suffix}")
+
+    def _read(self, key: str, suffix: str) -> Optional[str]:
+        """Read a cached body, or None if the file has gone missing"""
+        try:
+            with open(self._path(key, suffix), 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write(self, key: str, suffix: str, content: str) -> int:
+        """Write a cached body and return its size in bytes"""
+        path = self._path(key, suffix)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = content.encode("utf-8")
+        tmp_path = f"{path}.tmp{threading.get_ident()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return len(data)
+
+    def lookup(self, url: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up the raw body of a request
+
+        Args:
+            url: Request URL
+            params: Optional query parameters
+
+        Returns:
+            Optional[Dict[str, Any]]: Entry with "raw", "fresh", "etag" and
+            "last_modified" keys, or None if nothing usable is cached
+        """
+        key = self.make_key(url, params)
+        with self._lock:
+            row = self.conn.execute('SELECT * FROM entries WHERE key = ?', (key,)).fetchone()
+            if not row:
+                return None
+            self.conn.execute('UPDATE entries SET last_access = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+
+        raw = self._read(key, "html")
+        if raw is None:
+            return None
+
+        return {
+            "key": key,
+            "raw": raw,
+            "fresh": row["expires_at"] > time.time(),
+            "etag": row["etag"],
+            "last_modified": row["last_modified"],
+        }
+
+    def get_text(self, url: str) -> Optional[str]:
+        """
+        Get the extracted text of a page if a fresh copy is cached
+
+        Args:
+            url: Page URL
+
+        Returns:
+            Optional[str]: Extracted text, or None on a miss
+        """
+        key = self.make_key(url)
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT expires_at, has_text FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+            if not row or not row["has_text"] or row["expires_at"] <= time.time():
+                return None
+            self.conn.execute('UPDATE entries SET last_access = ? WHERE key = ?', (time.time(), key))
+            self.conn.commit()
+
+        return self._read(key, "txt")
+
+    def store(
+        self,
+        url: str,
+        raw: str,
+        ttl: int,
+        params: Optional[Dict[str, Any]] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> None:
+        """
+        Store the raw body of a request, replacing any previous entry
+
+        Args:
+            url: Request URL
+            raw: Response body
+            ttl: Seconds the entry stays fresh
+            params: Optional query parameters
+            etag: ETag response header, if any
+            last_modified: Last-Modified response header, if any
+        """
+        key = self.make_key(url, params)
+        try:
+            size = self._write(key, "html", raw)
+        except OSError as e:
+            logger.warning(f"Could not cache {url}: {e}")
+            return
+
+        # A new body invalidates any text extracted from the old one
+        try:
+            os.unlink(self._path(key, "txt"))
+        except OSError:
+            pass
+
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO entries (key, url, etag, last_modified, fetched_at, expires_at, last_access, size, has_text) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)',
+                (key, url, etag, last_modified, now, now + ttl, now, size)
+            )
+            self.conn.commit()
+        self.evict()
+
+    def store_text(self, url: str, text: str) -> None:
+        """
+        Store the extracted text of a cached page
+
+        Args:
+            url: Page URL
+            text: Extracted text
+        """
+        key = self.make_key(url)
+        try:
+            size = self._write(key, "txt", text)
+        except OSError as e:
+            logger.warning(f"Could not cache text of {url}: {e}")
+            return
+
+        # The entry's size is both bodies; storing text again replaces the old one
+        try:
+            size += os.path.getsize(self._path(key, "html"))
+        except OSError:
+            pass
+
+        with self._lock:
+            self.conn.execute(
+                'UPDATE entries SET has_text = 1, size = ? WHERE key = ?',
+                (size, key)
+            )
+            self.conn.commit()
+
+    def refresh(self, url: str, ttl: int, params: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Extend an entry's freshness after a 304 Not Modified revalidation
+
+        Args:
+            url: Request URL
+            ttl: Seconds the entry stays fresh
+            params: Optional query parameters
+        """
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                'UPDATE entries SET expires_at = ?, last_access = ? WHERE key = ?',
+                (now + ttl, now, self.make_key(url, params))
+            )
+            self.conn.commit()
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until the cache fits its size cap
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self._lock:
+            total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+
+            removed = []
+            for row in self.conn.execute('SELECT key, size FROM entries ORDER BY last_access ASC'):
+                if total <= self.max_bytes:
+                    break
+                removed.append(row["key"])
+                total -= row["size"]
+
+            self.conn.executemany('DELETE FROM entries WHERE key = ?', [(key,) for key in removed])
+            self.conn.commit()
+
+        for key in removed:
+            for suffix in ("html", "txt"):
+                try:
+                    os.unlink(self._path(key, suffix))
+                except OSError:
+                    pass
+
+        logger.info(f"Evicted {len(removed)} research cache entries")
+        return len(removed)
@@ -0,0 +1,274 @@
+"""
+Research fetcher for the task processor
+
+This module provides the HTTP layer used by the research phase:
+1. A shared requests.Session with a keep-alive connection pool
+2. Bounded concurrency through a shared thread pool
+3. A per-host limit so one site is never hit by every worker at once
+4. Per-request timeouts and a byte cap, plus a phase-wide deadline after
+   which unfinished requests are dropped instead of stalling the task
+5. An optional persistent ResearchCache consulted before the network
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from typing import Any, Callable, Dict, Iterable, Iterator, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.research_cache import ResearchCache, CacheStats, PAGE_CACHE_TTL
+
+logger = logging.getLogger("research-fetcher")
+
+# Defaults, overridable from the environment
+RESEARCH_MAX_WORKERS = int(os.getenv("RESEARCH_MAX_WORKERS", "8"))
+RESEARCH_PER_HOST_LIMIT = int(os.getenv("RESEARCH_PER_HOST_LIMIT", "2"))
+RESEARCH_CONNECT_TIMEOUT = float(os.getenv("RESEARCH_CONNECT_TIMEOUT", "5"))
+RESEARCH_REQUEST_TIMEOUT = float(os.getenv("RESEARCH_REQUEST_TIMEOUT", "15"))
+RESEARCH_PHASE_DEADLINE = float(os.getenv("RESEARCH_PHASE_DEADLINE", "120"))
+RESEARCH_MAX_BYTES = int(os.getenv("RESEARCH_MAX_BYTES", str(2 * 1024 * 1024)))
+
+USER_AGENT = 'Mozilla/5.0'
+
+
+class ResearchFetcher:
+    """Pooled, bounded-concurrency HTTP fetcher for research requests"""
+
+    def __init__(
+        self,
+        max_workers: int = RESEARCH_MAX_WORKERS,
+        per_host_limit: int = RESEARCH_PER_HOST_LIMIT,
+        connect_timeout: float = RESEARCH_CONNECT_TIMEOUT,
+        request_timeout: float = RESEARCH_REQUEST_TIMEOUT,
+        max_bytes: int = RESEARCH_MAX_BYTES,
+        cache: Optional[ResearchCache] = None
+    ):
+        """
+        Initialize the research fetcher
+
+        Args:
+            max_workers: Maximum number of requests in flight
+            per_host_limit: Maximum number of concurrent requests to one host
+            connect_timeout: Seconds allowed to establish a connection
+            request_timeout: Seconds allowed for one whole request, body included
+            max_bytes: Maximum number of body bytes read from one response
+            cache: Optional persistent cache for response bodies
+        """
+        self.per_host_limit = per_host_limit
+        self.connect_timeout = connect_timeout
+        self.request_timeout = request_timeout
+        self.max_bytes = max_bytes
+        self.cache = cache
+
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': USER_AGENT})
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=max_workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="research-fetch")
+
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._host_lock = threading.Lock()
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """Get the semaphore limiting concurrent requests to the URL's host"""
+        host = urlsplit(url).netloc.lower()
+        with self._host_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+
+    def fetch_text(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        ttl: int = PAGE_CACHE_TTL,
+        stats: Optional[CacheStats] = None
+    ) -> Optional[str]:
+        """
+        Fetch a URL and return its decoded body, using the cache when possible
+
+        Fresh cache entries are returned without touching the network. Expired
+        entries are revalidated with If-None-Match / If-Modified-Since, and a
+        304 response serves the cached body again.
+
+        Args:
+            url: URL to fetch
+            params: Optional query parameters
+            ttl: Seconds a newly fetched body stays fresh in the cache
+            stats: Optional counters to record the cache outcome in
+
+        Returns:
+            Optional[str]: Response body, or None on error, timeout or non-200 status
+        """
+        entry = self.cache.lookup(url, params) if self.cache else None
+        if entry and entry["fresh"]:
+            if stats:
+                stats.record("hits")
+            return entry["raw"]
+
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers['If-None-Match'] = entry["etag"]
+            if entry["last_modified"]:
+                headers['If-Modified-Since'] = entry["last_modified"]
+
+        status, body, response_headers = self._get(url, params, headers)
+
+        if status == 304 and entry:
+            self.cache.refresh(url, ttl, params)
+            if stats:
+                stats.record("revalidated")
+            return entry["raw"]
+
+        if stats:
+            stats.record("misses")
+
+        if status != 200 or body is None:
+            if entry and status is None:
+                # Serve the stale copy rather than nothing when the site is unreachable
+                logger.info(f"Serving stale cached copy of {url}")
+                return entry["raw"]
+            return None
+
+        if self.cache:
+            self.cache.store(
+                url, body, ttl, params,
+                etag=response_headers.get('ETag'),
+                last_modified=response_headers.get('Last-Modified')
+            )
+        return body
+
+    def _get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[Optional[int], Optional[str], Mapping[str, str]]:
+        """
+        Perform one GET request within the per-host limit and time budget
+
+        The request is abandoned once it has taken longer than request_timeout
+        in total, so a server trickling bytes cannot hold a worker forever.
+
+        Args:
+            url: URL to fetch
+            params: Optional query parameters
+            headers: Optional extra request headers
+
+        Returns:
+            Tuple[Optional[int], Optional[str], Mapping[str, str]]: Status code
+            (None on error), decoded body (200 only) and response headers
+        """
+        started = time.monotonic()
+        slot = self._host_slot(url)
+
+        if not slot.acquire(timeout=self.request_timeout):
+            logger.warning(f"Gave up waiting for a connection slot for {url}")
+            return None, None, {}
+
+        try:
+            remaining = self.request_timeout - (time.monotonic() - started)
+            with self.session.get(
+                url,
+                params=params,
+                headers=headers,
+                timeout=(self.connect_timeout, max(remaining, 1)),
+                stream=True
+            ) as response:
+                if response.status_code == 304:
+                    return 304, None, response.headers
+
+                if response.status_code != 200:
+                    logger.error(f"Fetch of {url} failed with status code {response.status_code}")
+                    return response.status_code, None, {}
+
+                chunks = []
+                received = 0
+                for chunk in response.iter_content(chunk_size=16384):
+                    chunks.append(chunk)
+                    received += len(chunk)
+                    if received >= self.max_bytes:
+                        logger.info(f"Truncated {url} at {received} bytes")
+                        break
+                    if time.monotonic() - started > self.request_timeout:
+                        logger.warning(f"Dropped slow page {url} after {self.request_timeout}s")
+                        return None, None, {}
+
+                encoding = response.encoding or 'utf-8'
+                return 200, b''.join(chunks).decode(encoding, errors='replace'), response.headers
+        except requests.exceptions.Timeout:
+            logger.warning(f"Fetch of {url} timed out")
+            return None, None, {}
+        except Exception as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return None, None, {}
+        finally:
+            slot.release()
+
+    def map(
+        self,
+        func: Callable[[Any], Any],
+        items: Iterable[Any],
+        deadline: Optional[float] = None
+    ) -> Iterator[Tuple[Any, Any]]:
+        """
+        Run func over items on the shared pool, yielding results as they complete
+
+        Args:
+            func: Function to call with each item (must not touch the task database)
+            items: Items to process
+            deadline: time.monotonic() value after which unfinished items are dropped
+
+        Yields:
+            Tuple[Any, Any]: (item, result) pairs in completion order
+        """
+        futures = {self.executor.submit(func, item): item for item in items}
+        timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+        pending = set(futures)
+
+        try:
+            for future in as_completed(futures, timeout=timeout):
+                pending.discard(future)
+                item = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Research request for {item} failed: {e}")
+                    continue
+                yield item, result
+        except FuturesTimeout:
+            logger.warning(f"Research deadline reached, dropping {len(pending)} unfinished request(s)")
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+_shared_fetcher: Optional[ResearchFetcher] = None
+_shared_lock = threading.Lock()
+
+
+def get_research_fetcher() -> ResearchFetcher:
+    """
+    Get the process-wide research fetcher
+
+    Every TaskProcessor in the process shares it, so concurrent tasks reuse
+    the same connection pool and stay within one global concurrency limit.
+
+    Returns:
+        ResearchFetcher: Shared fetcher instance
+    """
+    global _shared_fetcher
+    with _shared_lock:
+        if _shared_fetcher is None:
+            _shared_fetcher = ResearchFetcher(cache=ResearchCache())
+        return _shared_fetcher
@@ -0,0 +1,287 @@
+"""
+Map-reduce summarizer for the research phase
+
+Summarizing research used to be one LLM call per query, strictly in
+sequence, followed by one large combined call. This module runs it as a
+map-reduce instead:
+1. Map: every input is summarized concurrently. Inputs longer than the
+   content budget are split into chunks and each chunk is summarized
+   separately.
+2. Reduce: partial summaries are merged hierarchically, in batches that
+   fit the content budget, until a single prompt fits the model's context.
+
+The content budget of a call is what is left of the model's context window
+(prompt_budget.context_window) after the response, the system prompt and
+the prompt template, converted to characters with the model's estimated
+characters per token.
+
+Calls against one endpoint are capped process-wide by endpoint_slot(),
+which the LLM function is expected to hold while it talks to the model.
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from app.prompt_budget import PROMPT_OVERHEAD_TOKENS, context_window, estimator
+
+logger = logging.getLogger("research-summarizer")
+
+# Tokens reserved for a summarization prompt's headings and instructions
+SUMMARY_TEMPLATE_TOKENS = int(os.getenv("SUMMARY_TEMPLATE_TOKENS", "400"))
+# Smallest content budget of a call, in characters, however small the window
+SUMMARY_MIN_CONTENT_CHARS = 1000
+# Concurrent LLM calls allowed against one endpoint
+LLM_ENDPOINT_CONCURRENCY = int(os.getenv("LLM_ENDPOINT_CONCURRENCY", "3"))
+
+MERGE_SYSTEM_PROMPT = "You are an expert researcher and information synthesizer. Your job is to merge partial research summaries without losing facts, figures or citations."
+
+MERGE_PROMPT = """
+# Merge Research Summaries
+
+## Partial Summaries
+{content}
+
+## Instructions
+Merge the partial summaries above into one consolidated summary.
+- Keep every distinct fact, statistic and quote
+- Remove repetition across the partial summaries
+- Keep citations in [Source Title](URL) format
+- Use markdown with headings and bullet points
+"""
+
+# Function that queries the model: (prompt, system_prompt, max_tokens) -> text
+LLMFunction = Callable[[str, Optional[str], int], str]
+
+_endpoint_slots: Dict[str, threading.BoundedSemaphore] = {}
+_endpoint_lock = threading.Lock()
+
+
+def endpoint_slot(endpoint: str, limit: int = LLM_ENDPOINT_CONCURRENCY) -> threading.BoundedSemaphore:
+    """
+    Get the process-wide semaphore capping concurrent calls to an endpoint
+
+    Args:
+        endpoint: LLM endpoint URL
+        limit: Maximum concurrent calls (used when the semaphore is created)
+
+    Returns:
+        threading.BoundedSemaphore: Semaphore for the endpoint
+    """
+    with _endpoint_lock:
+        slot = _endpoint_slots.get(endpoint)
+        if slot is None:
+            slot = threading.BoundedSemaphore(limit)
+            _endpoint_slots[endpoint] = slot
+        return slot
+
+
+def chunk_text(text: str, max_chars: int) -> List[str]:
+    """
+    Split text into chunks of at most max_chars, preferring paragraph breaks
+
+    Args:
+        text: Text to split
+        max_chars: Maximum chunk length
+
+    Returns:
+        List[str]: Chunks in their original order
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks = []
+    current = ""
+    for paragraph in text.split("\n\n"):
+        # Hard-split paragraphs that are too long on their own
+        while len(paragraph) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def pack(parts: List[str], max_chars: int) -> List[List[str]]:
+    """
+    Group parts into consecutive batches whose joined length fits max_chars
+
+    Args:
+        parts: Texts to group
+        max_chars: Maximum joined length of one batch
+
+    Returns:
+        List[List[str]]: Batches in their original order
+    """
+    batches = []
+    current = []
+    size = 0
+    for part in parts:
+        if current and size + len(part) + 2 > max_chars:
+            batches.append(current)
+            current = []
+            size = 0
+        current.append(part)
+        size += len(part) + 2
+    if current:
+        batches.append(current)
+    return batches
+
+
+class MapReduceSummarizer:
+    """Concurrent, context-bounded summarization over one LLM function"""
+
+    def __init__(
+        self,
+        llm: LLMFunction,
+        model: str,
+        max_concurrency: int = LLM_ENDPOINT_CONCURRENCY
+    ):
+        """
+        Initialize the summarizer
+
+        Args:
+            llm: Function that queries the model
+            model: Model llm calls, whose context window bounds every prompt
+            max_concurrency: Maximum concurrent calls made by the summarizer
+        """
+        self.llm = llm
+        self.model = model
+        self.max_concurrency = max_concurrency
+
+    def content_chars(self, system_prompt: Optional[str], max_tokens: int) -> int:
+        """
+        Get the characters of variable content one call's prompt may hold
+
+        Args:
+            system_prompt: System prompt of the call
+            max_tokens: Maximum tokens of the response
+
+        Returns:
+            int: Content budget in characters
+        """
+        tokens = (
+            context_window(self.model) - max_tokens - PROMPT_OVERHEAD_TOKENS - SUMMARY_TEMPLATE_TOKENS
+            - estimator.estimate(system_prompt or "", self.model)
+        )
+        return max(int(tokens * estimator.chars_per_token(self.model)), SUMMARY_MIN_CONTENT_CHARS)
+
+    def _call(self, prompt: str, system_prompt: Optional[str], max_tokens: int) -> str:
+        """Query the model, treating a failed call as an empty response"""
+        return self.llm(prompt, system_prompt, max_tokens) or ""
+
+    def _run_all(self, prompts: List[str], system_prompt: Optional[str], max_tokens: int) -> List[str]:
+        """Run prompts concurrently and return the responses in order"""
+        if len(prompts) == 1:
+            return [self._call(prompts[0], system_prompt, max_tokens)]
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(prompts))) as executor:
+            return list(executor.map(lambda p: self._call(p, system_prompt, max_tokens), prompts))
+
+    def map(
+        self,
+        inputs: Dict[str, str],
+        build_prompt: Callable[[str, str], str],
+        system_prompt: Optional[str],
+        max_tokens: int = 2000
+    ) -> Dict[str, str]:
+        """
+        Summarize every input concurrently
+
+        Args:
+            inputs: Content to summarize, by key
+            build_prompt: Builds the prompt from (key, content)
+            system_prompt: System prompt for the map calls
+            max_tokens: Maximum tokens per summary
+
+        Returns:
+            Dict[str, str]: Non-empty summaries, by key, in input order
+        """
+        max_chars = self.content_chars(system_prompt, max_tokens)
+        jobs = []
+        for key, content in inputs.items():
+            for chunk in chunk_text(content, max_chars):
+                jobs.append((key, chunk))
+
+        logger.info(f"Summarizing {len(inputs)} inputs as {len(jobs)} map calls")
+        responses = self._run_all([build_prompt(key, chunk) for key, chunk in jobs], system_prompt, max_tokens)
+
+        partials: Dict[str, List[str]] = {}
+        for (key, _), response in zip(jobs, responses):
+            if response:
+                partials.setdefault(key, []).append(response)
+
+        summaries = {}
+        for key in inputs:
+            parts = partials.get(key)
+            if not parts:
+                continue
+            if len(parts) == 1:
+                summaries[key] = parts[0]
+            else:
+                # A chunked input: merge its partial summaries
+                summaries[key] = self.reduce(parts, lambda content: MERGE_PROMPT.format(content=content), MERGE_SYSTEM_PROMPT, max_tokens)
+        return summaries
+
+    def reduce(
+        self,
+        parts: List[str],
+        build_prompt: Callable[[str], str],
+        system_prompt: Optional[str],
+        max_tokens: int = 4000
+    ) -> str:
+        """
+        Combine parts into one response, merging hierarchically as needed
+
+        While the parts do not fit into one prompt they are packed into
+        batches that do, and each batch is merged concurrently. The final
+        prompt is then built from the remaining parts.
+
+        Args:
+            parts: Partial summaries to combine
+            build_prompt: Builds the final prompt from the joined parts, which
+                are cut to the call's content budget; it must fit any other
+                text it embeds into the prompt budget itself
+            system_prompt: System prompt for the final call
+            max_tokens: Maximum tokens for the final response
+
+        Returns:
+            str: Final response (empty if the model failed)
+        """
+        parts = [part for part in parts if part]
+        level = 0
+        max_chars = self.content_chars(system_prompt, max_tokens)
+        merge_chars = self.content_chars(MERGE_SYSTEM_PROMPT, max_tokens)
+
+        while len(parts) > 1 and sum(len(part) + 2 for part in parts) > max_chars:
+            batches = pack(parts, merge_chars)
+            if len(batches) == len(parts):
+                # Every part is too large to pair up; trim them to fit together
+                share = max_chars // len(parts)
+                parts = [part[:share] for part in parts]
+                break
+
+            level += 1
+            logger.info(f"Reduce level {level}: merging {len(parts)} parts in {len(batches)} batches")
+            merged = self._run_all(
+                [MERGE_PROMPT.format(content="\n\n".join(batch)) for batch in batches],
+                MERGE_SYSTEM_PROMPT,
+                max_tokens
+            )
+            # Keep the original batch text if a merge call failed
+            parts = [response or "\n\n".join(batch) for batch, response in zip(batches, merged)]
+
+        content = "\n\n".join(parts)[:max_chars]
+        return self._call(build_prompt(content), system_prompt, max_tokens)
@@ -135,7 +135,22 @@ class AgentService:
         agents = result.scalars().all()
         total = count_result.scalar()
 
-        # Get current tasks for busy agents
+        # Get the current tasks of all busy agents in one query, newest first
+        current_tasks = {}
+        busy_ids = [agent.id for agent in agents if agent.status == "busy"]
+        if busy_ids:
+            task_query = select(
+                Task.assigned_agent_id, Task.id, Task.title, Task.status,
+                Task.stage_progress, Task.created_at, Task.updated_at
+            ).where(
+                Task.assigned_agent_id.in_(busy_ids),
+                Task.status != "complete"
+            ).order_by(Task.created_at.desc())
+
+            task_result = await self.db.execute(task_query)
+            for task in task_result.all():
+                current_tasks.setdefault(task.assigned_agent_id, task)
+
         agent_dicts = []
         for agent in agents:
             agent_dict = {
@@ -152,25 +167,16 @@ class AgentService:
                 "current_task": None
             }
 
-            # If agent is busy, get the current task
-            if agent.status == "busy":
-                task_query = select(Task).where(
-                    Task.assigned_agent_id == agent.id,
-                    Task.status != "complete"
-                ).order_by(Task.created_at.desc()).limit(1)
-
-                task_result = await self.db.execute(task_query)
-                current_task = task_result.scalars().first()
-
-                if current_task:
-                    agent_dict["current_task"] = {
-                        "id": current_task.id,
-                        "title": current_task.title,
-                        "status": current_task.status,
-                        "stage_progress": current_task.stage_progress,
-                        "created_at": current_task.created_at,
-                        "updated_at": current_task.updated_at
-                    }
+            current_task = current_tasks.get(agent.id)
+            if current_task:
+                agent_dict["current_task"] = {
+                    "id": current_task.id,
+                    "title": current_task.title,
+                    "status": current_task.status,
+                    "stage_progress": current_task.stage_progress,
+                    "created_at": current_task.created_at,
+                    "updated_at": current_task.updated_at
+                }
 
             agent_dicts.append(agent_dict)
 
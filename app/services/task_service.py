@@ -15,6 +15,7 @@ from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv
 
 from app.db.models import Task, TaskUpdate, Agent
+from app.task_notifier import notify_new_task
 
 # Load environment variables
 load_dotenv()
@@ -74,6 +75,9 @@ class TaskService:
         # Try to assign the task to an agent
         await self.assign_task(task.id)
 
+        # Wake any task processor waiting for work
+        notify_new_task(task.id)
+
         return task
 
     async def assign_task(self, task_id: str) -> Optional[str]:
@@ -184,8 +188,8 @@ class TaskService:
         """
         List tasks with optional filtering.
         """
-        # Build query
-        query = select(Task)
+        # Build query; agent names come from the same query
+        query = select(Task, Agent.name).outerjoin(Agent, Agent.id == Task.assigned_agent_id)
         count_query = select(func.count()).select_from(Task)
 
         # Apply filters
@@ -204,12 +208,11 @@ class TaskService:
         result = await self.db.execute(query)
         count_result = await self.db.execute(count_query)
 
-        tasks = result.scalars().all()
+        rows = result.all()
         total = count_result.scalar()
 
-        # Enhance tasks with agent names
         task_dicts = []
-        for task in tasks:
+        for task, agent_name in rows:
             task_dict = {
                 "id": task.id,
                 "title": task.title,
@@ -231,17 +234,8 @@ class TaskService:
                 "max_collaborators": task.max_collaborators,
                 "human_review_required": task.human_review_required,
                 "deadline": task.deadline,
-                "assigned_agent_name": None
+                "assigned_agent_name": agent_name
             }
-
-            # Get agent name if assigned
-            if task.assigned_agent_id:
-                agent_query = select(Agent).where(Agent.id == task.assigned_agent_id)
-                agent_result = await self.db.execute(agent_query)
-                agent = agent_result.scalars().first()
-                if agent:
-                    task_dict["assigned_agent_name"] = agent.name
-
             task_dicts.append(task_dict)
 
         return task_dicts, total
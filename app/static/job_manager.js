@@ -151,14 +151,39 @@ async function fetchProjects() {
     }
 }
 
-// Fetch all tasks for all projects
+// Fields of a task the dashboard renders
+const TASK_LIST_FIELDS = 'id,title,status,progress,project_id,assigned_to,task_type,priority,has_result';
+
+// Fetch the tasks of all loaded projects, a page of /api/tasks at a time
 async function fetchAllTasks() {
     tasks = [];
+    if (projects.length === 0) {
+        return tasks;
+    }
     try {
-        for (const project of projects) {
-            const projectTasks = await fetchTasksForProject(project.id);
-            tasks = tasks.concat(projectTasks);
-        }
+        const params = new URLSearchParams({ limit: '500', fields: TASK_LIST_FIELDS });
+        projects.forEach(project => params.append('project_id', project.id));
+        let cursor = null;
+        do {
+            if (cursor) {
+                params.set('cursor', cursor);
+            }
+            const response = await fetch(`${API_BASE_URL}/api/tasks?${params}`, {
+                method: 'GET',
+                headers: {
+                    'Content-Type': 'application/json',
+                    'Accept': 'application/json'
+                }
+            });
+
+            if (!response.ok) {
+                console.error(`Failed to fetch tasks. Status: ${response.status}, StatusText: ${response.statusText}`);
+                throw new Error('Failed to fetch tasks');
+            }
+
+            tasks = tasks.concat(await response.json());
+            cursor = response.headers.get('X-Next-Cursor');
+        } while (cursor);
         return tasks;
     } catch (error) {
         console.error('Error fetching all tasks:', error);
@@ -0,0 +1,165 @@
+"""
+Phase checkpoints for the task processor
+
+A task runs four LLM phases (planning, research, execution, review), each
+leaving its outputs in task_outputs/<task_id>. This module records which
+phases finished in a manifest next to those outputs, so a task that is
+reset or interrupted continues from its last completed phase instead of
+starting over:
+1. Each completed phase lists its output files with their SHA-256 hashes
+2. A phase counts as done only if every file is still there, unchanged,
+   and every earlier phase is done as well
+3. Re-running a phase drops the checkpoints of every later phase, since
+   their inputs are about to change
+4. A phase that rewrites an earlier phase's file (review revising
+   output.md) updates that phase's hash, so the rewrite is not mistaken
+   for damage
+"""
+
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("task-checkpoint")
+
+MANIFEST_FILE = "checkpoint.json"
+
+# Phases in the order a task runs them
+PHASES = ["planning", "research", "execution", "review"]
+
+
+def file_hash(path: str) -> Optional[str]:
+    """
+    Compute the SHA-256 hash of a file
+
+    Args:
+        path: File path
+
+    Returns:
+        Optional[str]: Hex digest, or None if the file cannot be read
+    """
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(65536), b''):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+
+class PhaseCheckpoint:
+    """Checkpoint manifest for one task's output directory"""
+
+    def __init__(self, output_dir: str):
+        """
+        Initialize the checkpoint and load any existing manifest
+
+        Args:
+            output_dir: Task output directory
+        """
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_FILE)
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """Read the manifest, treating a missing or damaged one as empty"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.phases = json.load(f).get("phases", {})
+        except FileNotFoundError:
+            self.phases = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            self.phases = {}
+
+    def _save(self) -> None:
+        """Write the manifest atomically"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"phases": self.phases}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _is_valid(self, phase: str) -> bool:
+        """Check that a phase completed and its files are unchanged"""
+        entry = self.phases.get(phase)
+        if not entry or entry.get("status") != "complete":
+            return False
+
+        for name, expected in entry.get("files", {}).items():
+            if file_hash(os.path.join(self.output_dir, name)) != expected:
+                logger.info(f"Checkpoint for {phase} phase is stale: {name} is missing or changed")
+                return False
+        return True
+
+    def completed(self, phase: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a phase's checkpoint if it can be resumed past
+
+        Args:
+            phase: Phase name
+
+        Returns:
+            Optional[Dict[str, Any]]: Checkpoint entry, or None if the phase
+            (or any earlier phase) has to run again
+        """
+        for earlier in PHASES[:PHASES.index(phase) + 1]:
+            if not self._is_valid(earlier):
+                return None
+        return self.phases[phase]
+
+    def completed_phases(self) -> List[str]:
+        """
+        Get the phases a restarted task can skip
+
+        Returns:
+            List[str]: Leading run of valid completed phases
+        """
+        return [phase for phase in PHASES if self.completed(phase)]
+
+    def start(self, phase: str) -> None:
+        """
+        Mark a phase as running and drop the checkpoints it invalidates
+
+        Args:
+            phase: Phase name
+        """
+        for later in PHASES[PHASES.index(phase):]:
+            self.phases.pop(later, None)
+        self.phases[phase] = {"status": "in_progress", "started_at": datetime.now().isoformat()}
+        self._save()
+
+    def complete(self, phase: str, files: List[str], result: Any = None) -> None:
+        """
+        Mark a phase as completed
+
+        Args:
+            phase: Phase name
+            files: Output files of the phase, relative to the output directory
+            result: Optional JSON-serializable value needed to resume past the phase
+        """
+        entry = self.phases.get(phase, {})
+        entry.update({
+            "status": "complete",
+            "completed_at": datetime.now().isoformat(),
+            "files": {
+                name: file_hash(os.path.join(self.output_dir, name))
+                for name in files
+                if os.path.exists(os.path.join(self.output_dir, name))
+            },
+        })
+        if result is not None:
+            entry["result"] = result
+        self.phases[phase] = entry
+
+        for earlier in PHASES[:PHASES.index(phase)]:
+            earlier_files = self.phases.get(earlier, {}).get("files", {})
+            for name in earlier_files.keys() & entry["files"].keys():
+                earlier_files[name] = entry["files"][name]
+
+        self._save()
+        logger.info(f"Checkpointed {phase} phase in {self.output_dir}")
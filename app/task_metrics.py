@@ -0,0 +1,309 @@
+"""
+Task pipeline metrics
+
+Timing spans for the task processor, stored in a local table of the task
+database and rendered in the Prometheus text exposition format:
+1. One "phase" span per task phase (planning, research, execution, review)
+2. One "step" span per research step (search, page fetch, summarization)
+3. One "llm" span per query_llm call, with queue wait, time to first
+   byte, model load time, tokens/sec, prompt and output sizes, retries
+   and fallbacks
+
+Spans are written through the processor's write-behind buffer, so
+recording them never adds a commit to the task's critical path. Each span
+also bumps the running totals of its (kind, name, model) series in a
+rollup table, which is what the metrics page is rendered from; the raw
+spans are only kept for TASK_METRICS_RETENTION_DAYS.
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.write_behind import WriteBehindBuffer
+
+logger = logging.getLogger("task-metrics")
+
+METRICS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS task_metrics (
+        id TEXT PRIMARY KEY,
+        task_id TEXT,
+        kind TEXT NOT NULL,
+        name TEXT NOT NULL,
+        model TEXT,
+        success INTEGER NOT NULL DEFAULT 1,
+        duration_ms REAL NOT NULL,
+        queue_wait_ms REAL,
+        first_byte_ms REAL,
+        load_ms REAL,
+        prompt_chars INTEGER,
+        output_chars INTEGER,
+        tokens INTEGER,
+        tokens_per_second REAL,
+        retries INTEGER,
+        fallback INTEGER,
+        created_at TEXT NOT NULL
+    )
+'''
+
+METRICS_INDEX_SQL = 'CREATE INDEX IF NOT EXISTS idx_task_metrics_kind_name ON task_metrics (kind, name)'
+
+METRICS_CREATED_INDEX_SQL = 'CREATE INDEX IF NOT EXISTS idx_task_metrics_created_at ON task_metrics (created_at)'
+
+# Days raw spans are kept; the rollup totals are kept for good
+TASK_METRICS_RETENTION_DAYS = float(os.getenv("TASK_METRICS_RETENTION_DAYS", "7"))
+
+# Seconds between prunes of expired raw spans by a recorder
+METRICS_PRUNE_INTERVAL = 3600
+
+# Upper bounds, in seconds, of the duration histogram buckets
+DURATION_BUCKETS = [0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800]
+
+BUCKET_COLUMNS = [f"bucket_{index}" for index in range(len(DURATION_BUCKETS))]
+
+# Running totals of one series; the column order matches ROLLUP_SQL's values
+ROLLUP_COLUMNS = [
+    "count", "duration_ms", "failures", *BUCKET_COLUMNS, "queue_wait_ms", "first_byte_ms", "load_ms",
+    "prompt_chars", "output_chars", "tokens", "retries", "fallback", "tokens_per_second_sum",
+    "tokens_per_second_count",
+]
+
+ROLLUP_TABLE_SQL = f'''
+    CREATE TABLE IF NOT EXISTS task_metrics_rollup (
+        kind TEXT NOT NULL,
+        name TEXT NOT NULL,
+        model TEXT NOT NULL DEFAULT '',
+        {", ".join(f"{column} REAL NOT NULL DEFAULT 0" for column in ROLLUP_COLUMNS)},
+        PRIMARY KEY (kind, name, model)
+    )
+'''
+
+ROLLUP_SQL = f'''
+    INSERT INTO task_metrics_rollup (kind, name, model, {", ".join(ROLLUP_COLUMNS)})
+    VALUES (?, ?, ?, {", ".join("?" for _ in ROLLUP_COLUMNS)})
+    ON CONFLICT (kind, name, model) DO UPDATE SET
+        {", ".join(f"{column} = {column} + excluded.{column}" for column in ROLLUP_COLUMNS)}
+'''
+
+PRUNE_SQL = 'DELETE FROM task_metrics WHERE created_at < ?'
+
+SPAN_COLUMNS = [
+    "model", "success", "queue_wait_ms", "first_byte_ms", "load_ms", "prompt_chars",
+    "output_chars", "tokens", "tokens_per_second", "retries", "fallback",
+]
+
+
+def prune_cutoff(retention_days: float = TASK_METRICS_RETENTION_DAYS) -> str:
+    """
+    Get the creation time before which raw spans are expired
+
+    Args:
+        retention_days: Days raw spans are kept
+
+    Returns:
+        str: ISO timestamp comparable with created_at
+    """
+    return (datetime.now() - timedelta(days=retention_days)).isoformat()
+
+
+def ensure_metrics_table(conn: sqlite3.Connection) -> None:
+    """
+    Create the metrics tables if they do not exist yet and prune expired spans
+
+    Run once when a process starts, not per request.
+
+    Args:
+        conn: Connection to the task database
+    """
+    conn.execute(METRICS_TABLE_SQL)
+    conn.execute(METRICS_INDEX_SQL)
+    conn.execute(METRICS_CREATED_INDEX_SQL)
+    conn.execute(ROLLUP_TABLE_SQL)
+    conn.execute(PRUNE_SQL, (prune_cutoff(),))
+    conn.commit()
+
+
+class TaskMetrics:
+    """Records timing spans for one task processor"""
+
+    def __init__(self, writer: WriteBehindBuffer):
+        """
+        Initialize the recorder
+
+        Args:
+            writer: Write-behind buffer of the processor's database
+        """
+        self.writer = writer
+        self._last_prune = time.monotonic()
+
+    def record(self, task_id: Optional[str], kind: str, name: str, duration_ms: float, **fields: Any) -> None:
+        """
+        Record one finished span
+
+        Args:
+            task_id: Task the span belongs to
+            kind: Span kind ("phase", "step" or "llm")
+            name: Phase, step or call name
+            duration_ms: Span duration in milliseconds
+            **fields: Optional values for the other columns (see SPAN_COLUMNS)
+        """
+        unknown = set(fields) - set(SPAN_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown metric fields: {', '.join(sorted(unknown))}")
+
+        fields = {key: int(value) if isinstance(value, bool) else value for key, value in fields.items()}
+        columns = ["id", "task_id", "kind", "name", "duration_ms", "created_at"] + list(fields)
+        values = [str(uuid.uuid4()), task_id, kind, name, round(duration_ms, 3), datetime.now().isoformat()]
+        values += list(fields.values())
+        self.writer.write(
+            f'INSERT INTO task_metrics ({", ".join(columns)}) VALUES ({", ".join("?" for _ in columns)})',
+            values
+        )
+        self.writer.write(ROLLUP_SQL, [kind, name, fields.get("model") or "", *rollup_values(duration_ms, fields)])
+
+        if time.monotonic() - self._last_prune >= METRICS_PRUNE_INTERVAL:
+            self._last_prune = time.monotonic()
+            self.writer.write(PRUNE_SQL, (prune_cutoff(),))
+
+    @contextmanager
+    def span(self, task_id: Optional[str], kind: str, name: str) -> Iterator[Dict[str, Any]]:
+        """
+        Time a block of code as one span
+
+        The yielded dictionary can be filled with extra column values; the
+        span is marked unsuccessful if the block raises.
+
+        Args:
+            task_id: Task the span belongs to
+            kind: Span kind ("phase", "step" or "llm")
+            name: Phase, step or call name
+
+        Yields:
+            Dict[str, Any]: Extra fields to record with the span
+        """
+        fields: Dict[str, Any] = {}
+        started = time.monotonic()
+        try:
+            yield fields
+        except BaseException:
+            fields["success"] = False
+            raise
+        finally:
+            self.record(task_id, kind, name, (time.monotonic() - started) * 1000, **fields)
+
+
+def rollup_values(duration_ms: float, fields: Dict[str, Any]) -> List[float]:
+    """
+    Get the increments one span adds to its series' rollup totals
+
+    Args:
+        duration_ms: Span duration in milliseconds
+        fields: Other column values of the span
+
+    Returns:
+        List[float]: One increment per ROLLUP_COLUMNS entry
+    """
+    tokens_per_second = fields.get("tokens_per_second")
+    return [
+        1,
+        duration_ms,
+        0 if fields.get("success", 1) else 1,
+        *(int(duration_ms <= bound * 1000) for bound in DURATION_BUCKETS),
+        *(fields.get(column) or 0 for column in (
+            "queue_wait_ms", "first_byte_ms", "load_ms", "prompt_chars", "output_chars", "tokens", "retries", "fallback",
+        )),
+        tokens_per_second or 0,
+        0 if tokens_per_second is None else 1,
+    ]
+
+
+def _escape(value: Any) -> str:
+    """Escape a Prometheus label value"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels: Any) -> str:
+    """Format a Prometheus label set"""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def render_prometheus(conn: sqlite3.Connection) -> str:
+    """
+    Render the recorded spans in the Prometheus text exposition format
+
+    Reads the rollup totals, so a scrape costs one row per series no matter
+    how many spans were recorded.
+
+    Args:
+        conn: Connection to the task database
+
+    Returns:
+        str: Metrics page
+    """
+    lines: List[str] = []
+    cursor = conn.cursor()
+
+    # Duration histograms per span kind and name
+    bucket_sql = ", ".join(f"SUM({column})" for column in BUCKET_COLUMNS)
+    cursor.execute(f'''
+        SELECT kind, name, SUM(count), SUM(duration_ms), SUM(failures), {bucket_sql}
+        FROM task_metrics_rollup
+        GROUP BY kind, name
+        ORDER BY kind, name
+    ''')
+    rows = cursor.fetchall()
+
+    lines.append("# HELP ai2ai_task_span_duration_seconds Duration of task processor spans")
+    lines.append("# TYPE ai2ai_task_span_duration_seconds histogram")
+    for kind, name, count, total_ms, _failures, *buckets in rows:
+        for bound, bucket_count in zip(DURATION_BUCKETS, buckets):
+            lines.append(f"ai2ai_task_span_duration_seconds_bucket{_labels(kind=kind, name=name, le=bound)} {bucket_count:.0f}")
+        lines.append(f"ai2ai_task_span_duration_seconds_bucket{_labels(kind=kind, name=name, le='+Inf')} {count:.0f}")
+        lines.append(f"ai2ai_task_span_duration_seconds_sum{_labels(kind=kind, name=name)} {total_ms / 1000:.6f}")
+        lines.append(f"ai2ai_task_span_duration_seconds_count{_labels(kind=kind, name=name)} {count:.0f}")
+
+    lines.append("# HELP ai2ai_task_span_failures_total Task processor spans that failed")
+    lines.append("# TYPE ai2ai_task_span_failures_total counter")
+    for kind, name, _count, _total_ms, failures, *_ in rows:
+        lines.append(f"ai2ai_task_span_failures_total{_labels(kind=kind, name=name)} {failures or 0:.0f}")
+
+    # LLM call details per model
+    cursor.execute('''
+        SELECT model, SUM(count),
+               SUM(queue_wait_ms), SUM(first_byte_ms),
+               SUM(prompt_chars), SUM(output_chars),
+               SUM(tokens), SUM(retries), SUM(fallback),
+               COALESCE(SUM(tokens_per_second_sum) / NULLIF(SUM(tokens_per_second_count), 0), 0), SUM(load_ms)
+        FROM task_metrics_rollup
+        WHERE kind = 'llm'
+        GROUP BY model
+        ORDER BY model
+    ''')
+    llm_rows = cursor.fetchall()
+
+    llm_metrics: List[Tuple[str, str, str, int]] = [
+        ("ai2ai_llm_queue_wait_seconds_total", "counter", "Time LLM calls waited for an endpoint slot", 2),
+        ("ai2ai_llm_first_byte_seconds_total", "counter", "Time from request to first streamed byte", 3),
+        ("ai2ai_llm_model_load_seconds_total", "counter", "Time the endpoint spent loading models, part of first byte time", 10),
+        ("ai2ai_llm_prompt_chars_total", "counter", "Characters sent in LLM prompts", 4),
+        ("ai2ai_llm_output_chars_total", "counter", "Characters received from LLM calls", 5),
+        ("ai2ai_llm_tokens_total", "counter", "Tokens generated by LLM calls", 6),
+        ("ai2ai_llm_retries_total", "counter", "LLM attempts beyond the first", 7),
+        ("ai2ai_llm_fallbacks_total", "counter", "LLM calls that fell back to a smaller model", 8),
+        ("ai2ai_llm_tokens_per_second", "gauge", "Mean generation speed of LLM calls", 9),
+    ]
+    for metric, metric_type, help_text, index in llm_metrics:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {metric_type}")
+        for row in llm_rows:
+            value = row[index]
+            if metric.endswith("_seconds_total"):
+                value = value / 1000
+            lines.append(f"{metric}{_labels(model=row[0])} {value:.6g}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,190 @@
+"""
+Task notifier for AI-to-AI Feedback API
+
+This module provides a lightweight wakeup channel between the code that
+inserts tasks (the tasks API, create_task.py) and the task processors that
+consume them. Processors block on the notifier instead of sleeping for a
+fixed interval, so a new task is picked up within milliseconds.
+
+Two transports are used:
+1. An in-process event, for producers and consumers living in one process
+2. Unix datagram sockets in a shared directory, one per waiting processor,
+   so producers in other processes can wake every processor on the box
+"""
+
+import os
+import uuid
+import errno
+import socket
+import select
+import logging
+import threading
+from typing import Optional
+
+logger = logging.getLogger("task-notifier")
+
+# Directory holding one socket file per waiting task processor
+NOTIFY_DIR = os.getenv("TASK_NOTIFY_DIR", os.path.join("/tmp", "ai2ai_task_notify"))
+
+# In-process wakeup event shared by every notifier in this process
+_local_event = threading.Event()
+
+# Sockets bound by notifiers in this process, wherever their directory is
+_local_sock_paths = set()
+
+
+def _has_unix_sockets() -> bool:
+    """
+    Check whether Unix domain sockets are available on this platform
+
+    Returns:
+        bool: True if AF_UNIX datagram sockets can be used
+    """
+    return hasattr(socket, "AF_UNIX")
+
+
+def notify_new_task(task_id: Optional[str] = None) -> int:
+    """
+    Wake every task processor waiting for new work
+
+    Safe to call from any process; failures are logged and never raised, so
+    task creation does not depend on the notifier being reachable.
+
+    Args:
+        task_id: Optional ID of the task that was inserted (for logging)
+
+    Returns:
+        int: Number of listener sockets that were signalled
+    """
+    _local_event.set()
+
+    if not _has_unix_sockets():
+        return 0
+
+    paths = set(_local_sock_paths)
+    try:
+        paths.update(
+            os.path.join(NOTIFY_DIR, name)
+            for name in os.listdir(NOTIFY_DIR)
+            if name.endswith(".sock")
+        )
+    except OSError:
+        # No processor has started listening yet
+        pass
+    if not paths:
+        return 0
+
+    payload = (task_id or "").encode("utf-8")[:256]
+    signalled = 0
+
+    sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sender.setblocking(False)
+    try:
+        for path in paths:
+            try:
+                sender.sendto(payload, path)
+                signalled += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                # The listener exited without cleaning up its socket file
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except OSError as e:
+                # A full receive buffer already means a wakeup is pending
+                if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK, errno.ENOBUFS):
+                    logger.warning(f"Error notifying task listener {path}: {e}")
+    finally:
+        sender.close()
+
+    if task_id:
+        logger.info(f"Notified {signalled} task listener(s) of new task {task_id}")
+    return signalled
+
+
+class TaskNotifier:
+    """Wakeup channel a task processor blocks on between queue checks"""
+
+    def __init__(self, notify_dir: Optional[str] = None):
+        """
+        Initialize the task notifier
+
+        Args:
+            notify_dir: Directory for listener sockets (defaults to NOTIFY_DIR)
+        """
+        self.notify_dir = notify_dir or NOTIFY_DIR
+        self.sock = None
+        self.sock_path = None
+
+    def open(self) -> None:
+        """Bind this processor's listener socket"""
+        if self.sock is not None or not _has_unix_sockets():
+            return
+
+        try:
+            os.makedirs(self.notify_dir, exist_ok=True)
+            self.sock_path = os.path.join(self.notify_dir, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self.sock.setblocking(False)
+            self.sock.bind(self.sock_path)
+            _local_sock_paths.add(self.sock_path)
+            logger.info(f"Listening for task notifications on {self.sock_path}")
+        except OSError as e:
+            logger.warning(f"Task notifications unavailable, falling back to polling: {e}")
+            self.close()
+
+    def close(self) -> None:
+        """Close the listener socket and remove its file"""
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+        if self.sock_path:
+            _local_sock_paths.discard(self.sock_path)
+            try:
+                os.unlink(self.sock_path)
+            except OSError:
+                pass
+            self.sock_path = None
+
+    def _drain(self) -> None:
+        """Discard any queued notifications so one wait consumes them all"""
+        if self.sock is None:
+            return
+        while True:
+            try:
+                self.sock.recv(512)
+            except OSError:
+                # BlockingIOError once the queue is empty
+                return
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Block until a task is announced or the timeout expires
+
+        Args:
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            bool: True if woken by a notification, False on timeout
+        """
+        if _local_event.is_set():
+            _local_event.clear()
+            self._drain()
+            return True
+
+        if self.sock is None:
+            woken = _local_event.wait(timeout)
+            _local_event.clear()
+            return woken
+
+        readable, _, _ = select.select([self.sock], [], [], timeout)
+        self._drain()
+        _local_event.clear()
+        return bool(readable)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -19,11 +19,26 @@ import requests
 from datetime import datetime
 import shutil
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import markdown
 from bs4 import BeautifulSoup
 import re
 from urllib.parse import quote_plus
 
+from app.task_notifier import TaskNotifier, notify_new_task
+from app.research_fetcher import get_research_fetcher, RESEARCH_PHASE_DEADLINE
+from app.research_cache import CacheStats, SEARCH_CACHE_TTL
+from app.write_behind import WriteBehindBuffer
+from app.db.sqlite import connect as connect_sqlite, get_pool
+from app.research_summarizer import MapReduceSummarizer, endpoint_slot
+from app.task_checkpoint import PhaseCheckpoint
+from app.html_extractor import get_extractor, soup_parser
+from app.prompt_budget import (
+    PromptSection, TaskTokenBudget, TokenBudgetExceeded, context_window, estimator, fit_prompt
+)
+from app.task_metrics import TaskMetrics, ensure_metrics_table
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -44,6 +59,53 @@ OLLAMA_ENDPOINT = 'http://ruocco.uk:11434/api/generate'  # Remote server
 # OLLAMA_ENDPOINT = 'http://192.168.0.39:11434/api/generate'  # DeepSeek server
 SEARCH_API_URL = 'https://duckduckgo.com/html/'
 
+# LLM calls stream their output; a call is abandoned only when no tokens
+# have arrived for LLM_STALL_TIMEOUT seconds, however long it runs overall
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+LLM_STALL_TIMEOUT = float(os.getenv("LLM_STALL_TIMEOUT", "60"))
+# How long Ollama keeps a model loaded after a call, so consecutive phases
+# on the same model skip the load
+LLM_KEEP_ALIVE = os.getenv("LLM_KEEP_ALIVE", "30m")
+
+# Concurrency limits for run_concurrent(): tasks in flight across the
+# processor, and tasks one agent may work on at the same time
+MAX_CONCURRENT_TASKS = int(os.getenv("MAX_CONCURRENT_TASKS", "1"))
+MAX_TASKS_PER_AGENT = int(os.getenv("MAX_TASKS_PER_AGENT", "1"))
+
+# Task statuses that count against an agent's concurrency limit
+ACTIVE_TASK_STATUSES = "('design', 'build', 'test', 'review')"
+
+# An agent has capacity while it is fewer than :agent_limit tasks into its work
+AGENT_HAS_CAPACITY_SQL = f'''
+    a.status IN ('available', 'busy') AND (
+        SELECT COUNT(*) FROM tasks r
+        WHERE r.assigned_agent_id = a.id AND r.status IN {ACTIVE_TASK_STATUSES}
+    ) < :agent_limit
+'''
+
+# Frees an agent unless it still has another task in flight; parameters are
+# (now, agent_id, agent_id, task_id of the task it is done with)
+RELEASE_AGENT_SQL = f'''
+    UPDATE agents SET status = 'available', last_active = ? WHERE id = ? AND NOT EXISTS (
+        SELECT 1 FROM tasks WHERE assigned_agent_id = ? AND id != ? AND status IN {ACTIVE_TASK_STATUSES}
+    )
+'''
+
+# Next claimable (task, agent) pair: tasks pre-assigned to an agent with capacity
+# come first, then unassigned tasks matched to any agent covering their complexity
+CLAIM_CANDIDATE_SQL = f'''
+    SELECT t.id AS task_id, a.id AS agent_id
+    FROM tasks t
+    JOIN agents a ON {AGENT_HAS_CAPACITY_SQL} AND (
+        (COALESCE(t.assigned_agent_id, '') != '' AND a.id = t.assigned_agent_id)
+        OR (COALESCE(t.assigned_agent_id, '') = ''
+            AND a.min_complexity <= t.complexity AND a.max_complexity >= t.complexity)
+    )
+    WHERE t.status = 'not_started'
+    ORDER BY COALESCE(t.assigned_agent_id, '') = '', t.priority DESC, t.created_at ASC, a.last_active ASC
+    LIMIT 1
+'''
+
 # Ensure output directories exist
 os.makedirs(OUTPUT_BASE_DIR, exist_ok=True)
 os.makedirs(RESEARCH_DIR, exist_ok=True)
@@ -53,159 +115,238 @@ class TaskProcessor:
         """Initialize the task processor."""
         self.conn = None
         self.cursor = None
+        self.pool = None
+        self.writer = None
+        self.metrics = None
+        # Task and phase being processed, for the metrics of LLM calls
+        self.current_task_id = None
+        self.current_phase = None
+        # Last status written per task, to tell transitions from progress bumps
+        self.task_statuses = {}
+        # Throughput of every LLM call made by this processor
+        self.llm_calls = []
+        # Token usage of the current task against its max_token_usage
+        self.token_budget = TaskTokenBudget(None)
+        self.fetcher = get_research_fetcher()
+        self.extractor = get_extractor()
         self.connect_db()
 
     def connect_db(self):
         """Connect to the SQLite database."""
-        self.conn = sqlite3.connect(DB_PATH)
-        self.conn.row_factory = sqlite3.Row
+        # Reads only: every write goes through the process's shared writer
+        # connection, so the processor never competes with it for the lock
+        self.conn = connect_sqlite(DB_PATH, read_only=True)
         self.cursor = self.conn.cursor()
+        self.pool = get_pool(DB_PATH)
+        # Progress writes are batched onto the shared writer
+        self.writer = WriteBehindBuffer(DB_PATH)
+        with self.pool.writer() as conn:
+            ensure_metrics_table(conn)
+        self.metrics = TaskMetrics(self.writer)
 
     def close_db(self):
         """Close the database connection."""
+        if self.writer:
+            self.writer.close()
         if self.conn:
             self.conn.close()
 
-    def get_next_task(self):
-        """Get the next available task from the queue."""
-        # First, check for tasks with a specific assigned_agent_id
-        self.cursor.execute(
-            'SELECT t.*, a.id as agent_id, a.name as agent_name FROM tasks t JOIN agents a ON t.assigned_agent_id = a.id WHERE t.status = "not_started" AND a.status = "available" ORDER BY t.priority DESC, t.created_at ASC LIMIT 1'
-        )
-        task = self.cursor.fetchone()
+    def claim_next_task(self, max_per_agent=1):
+        """
+        Atomically claim the next runnable task together with an agent.
 
-        if task:
-            logger.info(f"Found task {task['id']} with pre-assigned agent {task['agent_id']} ({task['agent_name']})")
-            return task
+        Picks the highest-priority not_started task that has an agent with
+        spare capacity (its pre-assigned agent, or any agent whose complexity
+        range covers it) and flips both rows inside one IMMEDIATE transaction
+        using conditional UPDATE ... RETURNING statements. If another processor
+        got there first the conditions fail and nothing is claimed, so several
+        processors can safely share one queue.
 
-        # If no tasks with assigned_agent_id, get the next task based on priority and creation time
-        self.cursor.execute(
-            'SELECT * FROM tasks WHERE status = "not_started" AND (assigned_agent_id IS NULL OR assigned_agent_id = "") ORDER BY priority DESC, created_at ASC LIMIT 1'
-        )
-        return self.cursor.fetchone()
+        Args:
+            max_per_agent: How many tasks one agent may work on at the same time
 
-    def get_available_agent(self, task_complexity):
-        """Get an available agent that can handle the task complexity."""
-        self.cursor.execute(
-            'SELECT * FROM agents WHERE status = "available" AND min_complexity <= ? AND max_complexity >= ? LIMIT 1',
-            (task_complexity, task_complexity)
-        )
-        return self.cursor.fetchone()
+        Returns:
+            tuple: (task, agent) rows for the claimed pair, or (None, None)
+        """
+        now = datetime.now().isoformat()
 
-    def assign_task_to_agent(self, task_id, agent_id):
-        """Assign a task to an agent and update statuses."""
         try:
-            # Check if the task already has an assigned agent
-            self.cursor.execute(
-                'SELECT assigned_agent_id FROM tasks WHERE id = ?',
-                (task_id,)
-            )
-            task = self.cursor.fetchone()
+            # The shared writer serializes claims within this process
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                # Take the write lock up front so other processes' claims are serialized too
+                cursor.execute('BEGIN IMMEDIATE')
+
+                cursor.execute(CLAIM_CANDIDATE_SQL, {'agent_limit': max_per_agent})
+                candidate = cursor.fetchone()
+                if not candidate:
+                    conn.rollback()
+                    return None, None
+
+                task_id = candidate['task_id']
+                agent_id = candidate['agent_id']
+
+                # Claim the agent first so its capacity check does not see this task
+                cursor.execute(
+                    "UPDATE agents AS a SET status = 'busy', last_active = :now "
+                    f"WHERE a.id = :agent_id AND {AGENT_HAS_CAPACITY_SQL} RETURNING *",
+                    {'now': now, 'agent_id': agent_id, 'agent_limit': max_per_agent}
+                )
+                agent = cursor.fetchone()
 
-            # If the task already has an assigned agent, use that agent
-            if task and task['assigned_agent_id'] and task['assigned_agent_id'] != agent_id:
-                logger.info(f"Task {task_id} already has an assigned agent: {task['assigned_agent_id']}. Using that agent instead of {agent_id}.")
-                agent_id = task['assigned_agent_id']
+                cursor.execute(
+                    "UPDATE tasks SET assigned_agent_id = ?, status = 'design', updated_at = ? "
+                    "WHERE id = ? AND status = 'not_started' RETURNING *",
+                    (agent_id, now, task_id)
+                )
+                task = cursor.fetchone()
 
-            # Update task
-            self.cursor.execute(
-                'UPDATE tasks SET assigned_agent_id = ?, status = "design", updated_at = ? WHERE id = ?',
-                (agent_id, datetime.now().isoformat(), task_id)
-            )
+                if not task or not agent:
+                    conn.rollback()
+                    logger.info(f"Lost claim race for task {task_id}")
+                    return None, None
 
-            # Update agent
-            self.cursor.execute(
-                'UPDATE agents SET status = "busy", last_active = ? WHERE id = ?',
-                (datetime.now().isoformat(), agent_id)
-            )
+                cursor.execute(
+                    'INSERT INTO task_updates (id, task_id, agent_id, update_type, content, timestamp) VALUES (?, ?, ?, ?, ?, ?)',
+                    (str(uuid.uuid4()), task_id, agent_id, "status_change", f"Task assigned to agent {agent_id} and moved to design stage", now)
+                )
 
-            # Generate a unique ID for the task update
-            update_id = str(uuid.uuid4())
+            logger.info(f"Claimed task {task_id} for agent {agent_id} ({agent['name']})")
+            return task, agent
+        except sqlite3.OperationalError as e:
+            # Another processor holds the write lock; try again on the next wakeup
+            logger.warning(f"Could not claim task: {e}")
+            return None, None
 
-            # Create task update
-            self.cursor.execute(
-                'INSERT INTO task_updates (id, task_id, agent_id, update_type, content, timestamp) VALUES (?, ?, ?, ?, ?, ?)',
-                (update_id, task_id, agent_id, "status_change", f"Task assigned to agent {agent_id} and moved to design stage", datetime.now().isoformat())
-            )
+    def has_pending_tasks(self):
+        """Check whether any task is waiting in the queue."""
+        self.cursor.execute("SELECT 1 FROM tasks WHERE status = 'not_started' LIMIT 1")
+        return self.cursor.fetchone() is not None
 
-            self.conn.commit()
-            logger.info(f"Task {task_id} assigned to agent {agent_id}")
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            logger.error(f"Error assigning task: {e}")
-            return False
+    def reset_stuck_agents(self, max_busy_seconds=1800, running_task_ids=()):
+        """
+        Reset agents that have been busy for too long and requeue their tasks.
 
-    def update_task_status(self, task_id, status, progress, message, agent_id):
-        """Update the status of a task."""
-        try:
-            # Update task
-            self.cursor.execute(
-                'UPDATE tasks SET status = ?, stage_progress = ?, updated_at = ? WHERE id = ?',
-                (status, progress, datetime.now().isoformat(), task_id)
-            )
+        Workers refresh their agent's last_active with every status update,
+        so an agent only goes stale when its tasks stop reporting. Tasks this
+        processor is still running are never requeued, and an agent with one
+        of them keeps its busy status.
 
-            # If task is complete, update completed_at and set agent to available
-            if status == "complete":
-                self.cursor.execute(
-                    'UPDATE tasks SET completed_at = ? WHERE id = ?',
-                    (datetime.now().isoformat(), task_id)
-                )
+        Args:
+            max_busy_seconds: How long an agent may go without activity before it is reset
+            running_task_ids: IDs of the tasks this processor's workers are running
+        """
+        self.cursor.execute(
+            "SELECT * FROM agents WHERE status = 'busy'"
+        )
+        busy_agents = self.cursor.fetchall()
+
+        for busy_agent in busy_agents:
+            # Check when the agent was last active
+            last_active = datetime.fromisoformat(busy_agent['last_active'])
+            now = datetime.now()
+
+            # If the agent has been busy for too long, reset it
+            if (now - last_active).total_seconds() > max_busy_seconds:
+                # Get every task assigned to this agent
                 self.cursor.execute(
-                    'UPDATE agents SET status = "available", last_active = ? WHERE id = ?',
-                    (datetime.now().isoformat(), agent_id)
+                    "SELECT * FROM tasks WHERE assigned_agent_id = ? AND status NOT IN ('not_started', 'complete')",
+                    (busy_agent['id'],)
                 )
+                agent_tasks = self.cursor.fetchall()
+                stuck_tasks = [task for task in agent_tasks if task['id'] not in running_task_ids]
 
-            # Generate a unique ID for the task update
-            update_id = str(uuid.uuid4())
+                if agent_tasks and not stuck_tasks:
+                    # Still working, just not reporting progress
+                    continue
 
-            # Create task update
-            self.cursor.execute(
-                'INSERT INTO task_updates (id, task_id, agent_id, update_type, content, timestamp) VALUES (?, ?, ?, ?, ?, ?)',
-                (update_id, task_id, agent_id, "status_change", message, datetime.now().isoformat())
-            )
+                logger.warning(f"Agent {busy_agent['id']} has been busy for too long, resetting")
 
-            self.conn.commit()
-            logger.info(f"Task {task_id} status updated to {status} ({progress}%)")
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            logger.error(f"Error updating task status: {e}")
-            return False
+                for stuck_task in stuck_tasks:
+                    # Reset the task
+                    self.update_task_status(stuck_task['id'], "not_started", 0, "Task reset due to timeout", busy_agent['id'])
 
-    def create_task_update(self, task_id, agent_id, update_type, content):
-        """Create a task update."""
-        try:
-            # Generate a unique ID for the task update
-            update_id = str(uuid.uuid4())
+                if len(stuck_tasks) == len(agent_tasks):
+                    # Reset the agent
+                    self.writer.write_now([(
+                        "UPDATE agents SET status = 'available', last_active = ? WHERE id = ?",
+                        (datetime.now().isoformat(), busy_agent['id'])
+                    )])
 
-            self.cursor.execute(
-                'INSERT INTO task_updates (id, task_id, agent_id, update_type, content, timestamp) VALUES (?, ?, ?, ?, ?, ?)',
-                (update_id, task_id, agent_id, update_type, content, datetime.now().isoformat())
+    def update_task_status(self, task_id, status, progress, message, agent_id):
+        """
+        Update the status of a task.
+
+        Status transitions are committed synchronously so they are durable
+        before the processor moves on; progress changes within the same
+        status are handed to the write-behind buffer and batched.
+        """
+        now = datetime.now().isoformat()
+        statements = [
+            ('UPDATE tasks SET status = ?, stage_progress = ?, updated_at = ? WHERE id = ?',
+             (status, progress, now, task_id))
+        ]
+
+        # If task is complete, update completed_at and set agent to available
+        if status == "complete":
+            statements.append(
+                ('UPDATE tasks SET completed_at = ? WHERE id = ?', (now, task_id))
             )
-            self.conn.commit()
-            logger.info(f"Created task update for task {task_id}")
-            return True
-        except Exception as e:
-            self.conn.rollback()
-            logger.error(f"Error creating task update: {e}")
-            return False
+            # Only free the agent once it has no other task in flight
+            statements.append((RELEASE_AGENT_SQL, (now, agent_id, agent_id, task_id)))
 
-    def update_task_result_path(self, task_id, result_path):
-        """Update the result path of a task."""
-        try:
-            self.cursor.execute(
-                'UPDATE tasks SET result_path = ? WHERE id = ?',
-                (result_path, task_id)
+        elif status != "not_started":
+            # Heartbeat, so reset_stuck_agents does not requeue a task that is still running
+            statements.append(
+                ('UPDATE agents SET last_active = ? WHERE id = ?', (now, agent_id))
             )
-            self.conn.commit()
-            logger.info(f"Updated result path for task {task_id}: {result_path}")
+
+        # Create task update
+        statements.append((
+            'INSERT INTO task_updates (id, task_id, agent_id, update_type, content, timestamp) VALUES (?, ?, ?, ?, ?, ?)',
+            (str(uuid.uuid4()), task_id, agent_id, "status_change", message, now)
+        ))
+
+        is_transition = self.task_statuses.get(task_id) != status or status in ("complete", "not_started")
+        if not is_transition:
+            for sql, params in statements:
+                self.writer.write(sql, params)
+            logger.info(f"Task {task_id} progress updated to {progress}% (buffered)")
             return True
-        except Exception as e:
-            self.conn.rollback()
-            logger.error(f"Error updating task result path: {e}")
+
+        if not self.writer.write_now(statements):
+            logger.error(f"Error updating task status for task {task_id}")
             return False
 
+        self.task_statuses[task_id] = status
+        if status in ("complete", "not_started"):
+            self.task_statuses.pop(task_id, None)
+        logger.info(f"Task {task_id} status updated to {status} ({progress}%)")
+
+        # A freed agent may let a waiting processor claim work. Requeued
+        # tasks are left for the next regular check so failures back off.
+        if status == "complete":
+            notify_new_task()
+        return True
+
+    def create_task_update(self, task_id, agent_id, update_type, content):
+        """Create a task update (buffered and committed with the next batch)."""
+        self.writer.write(
+            'INSERT INTO task_updates (id, task_id, agent_id, update_type, content, timestamp) VALUES (?, ?, ?, ?, ?, ?)',
+            (str(uuid.uuid4()), task_id, agent_id, update_type, content, datetime.now().isoformat())
+        )
+        logger.info(f"Created task update for task {task_id}")
+        return True
+
+    def update_task_result_path(self, task_id, result_path):
+        """Update the result path of a task (buffered and committed with the next batch)."""
+        self.writer.write(
+            'UPDATE tasks SET result_path = ? WHERE id = ?',
+            (result_path, task_id)
+        )
+        logger.info(f"Updated result path for task {task_id}: {result_path}")
+        return True
+
     def get_agent_model(self, agent_id):
         """Get the model name for an agent."""
         self.cursor.execute(
@@ -223,22 +364,23 @@ class TaskProcessor:
         )
         return self.cursor.fetchone()
 
-    def search_web(self, query, num_results=5):
+    def search_web(self, query, num_results=5, cache_stats=None):
         """Search the web using DuckDuckGo."""
         try:
             encoded_query = quote_plus(query)
-            response = requests.get(
+            html = self.fetcher.fetch_text(
                 SEARCH_API_URL,
                 params={'q': encoded_query},
-                headers={'User-Agent': 'Mozilla/5.0'}
+                ttl=SEARCH_CACHE_TTL,
+                stats=cache_stats
             )
 
-            if response.status_code != 200:
-                logger.error(f"Search request failed with status code {response.status_code}")
+            if html is None:
+                logger.error(f"Search request failed for query: {query}")
                 return []
 
             # Parse the HTML response
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(html, soup_parser())
             results = []
 
             # Extract search results
@@ -271,31 +413,27 @@ class TaskProcessor:
 
 
 
-    def fetch_webpage_content(self, url):
+    def fetch_webpage_content(self, url, cache_stats=None):
         """Fetch and extract content from a webpage."""
         try:
-            response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'})
-
-            if response.status_code != 200:
-                logger.error(f"Web fetch failed with status code {response.status_code}")
-                return ""
+            # Reuse text extracted from a fresh cached copy of the page
+            cache = self.fetcher.cache
+            text = cache.get_text(url) if cache else None
+            if text is not None:
+                if cache_stats:
+                    cache_stats.record("hits")
+                return text
 
-            # Parse the HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
+            html = self.fetcher.fetch_text(url, stats=cache_stats)
 
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.extract()
+            if html is None:
+                return ""
 
-            # Get text
-            text = soup.get_text()
+            # Bounded, boilerplate-free extraction of the page text
+            text = self.extractor.extract(html)
 
-            # Break into lines and remove leading and trailing space
-            lines = (line.strip() for line in text.splitlines())
-            # Break multi-headlines into a line each
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            # Remove blank lines
-            text = '\n'.join(chunk for chunk in chunks if chunk)
+            if cache:
+                cache.store_text(url, text)
 
             logger.info(f"Successfully fetched content from {url}")
             return text
@@ -303,18 +441,31 @@ class TaskProcessor:
             logger.error(f"Error fetching webpage: {e}")
             return ""
 
-    def query_llm(self, model, prompt, system_prompt=None, max_tokens=4000, timeout=60, retries=3, backoff=2):
+    def query_llm(self, model, prompt, system_prompt=None, max_tokens=4000, timeout=LLM_STALL_TIMEOUT, retries=3, backoff=2, partial_path=None):
         """
-        Query the LLM using Ollama API with timeout, retries and backoff.
+        Query the LLM using Ollama API with streaming, retries and backoff.
+
+        The response is streamed, so a long generation is never cut off by a
+        total timeout; an attempt fails only when no tokens arrive for
+        `timeout` seconds. If every attempt fails, an empty string is
+        returned and the longest partial response is only kept in
+        partial_path, so callers never mistake it for a complete answer.
 
         Args:
             model: The model to use
             prompt: The prompt to send
             system_prompt: Optional system prompt
             max_tokens: Maximum tokens to generate
-            timeout: Timeout in seconds for the request
+            timeout: Seconds without a new token before an attempt is abandoned
             retries: Number of retries if the request fails
             backoff: Backoff multiplier for retries
+            partial_path: Optional file the output is written to as it arrives
+
+        Returns:
+            str: The complete response, or an empty string if no attempt completed
+
+        Raises:
+            TokenBudgetExceeded: If the task has used up its max_token_usage
         """
         # Try with a smaller model if the original model is too large
         fallback_models = {
@@ -334,34 +485,48 @@ class TaskProcessor:
                 # Add explicit instructions to the prompt
                 prompt += "\n\nIMPORTANT: Your response should be actual HTML, CSS, and JavaScript code, not just descriptions or explanations. Generate fully functional code that can be directly used in a web page."
 
+        # Fit the output into the context window and what is left of the task budget
+        prompt_budget, max_tokens = self.token_budget.allocate(model, system_prompt, max_tokens)
+        prompt_tokens = estimator.estimate(prompt, model)
+        logger.info(
+            f"Prompt for {model}: ~{prompt_tokens} of {prompt_budget} prompt tokens, up to {max_tokens} output tokens "
+            f"(task used {self.token_budget.used} of {self.token_budget.limit or 'unlimited'})"
+        )
+        if prompt_tokens > prompt_budget:
+            logger.warning(f"Prompt for {model} is over its budget by ~{prompt_tokens - prompt_budget} tokens")
+
         payload = {
             "model": model,
             "prompt": prompt,
-            "stream": False,
+            "stream": True,
+            "keep_alive": LLM_KEEP_ALIVE,
             "options": {
-                "num_predict": max_tokens
+                "num_predict": max_tokens,
+                # The window the prompt was budgeted against; always the same
+                # per model, so calls never make Ollama reload it
+                "num_ctx": context_window(model)
             }
         }
 
         if system_prompt:
             payload["system"] = system_prompt
 
+        started = time.monotonic()
+        attempts = []
+        best_partial = ""
+
         # Try with the requested model first
         for attempt in range(retries):
-            try:
-                logger.info(f"Querying LLM with model {model}, attempt {attempt+1}/{retries}")
-                response = requests.post(OLLAMA_ENDPOINT, json=payload, timeout=timeout)
+            logger.info(f"Querying LLM with model {model}, attempt {attempt+1}/{retries}")
+            text, done, call = self.stream_llm(payload, timeout, partial_path)
+            attempts.append(call)
 
-                if response.status_code == 200:
-                    result = response.json()
-                    logger.info(f"LLM query successful with model {model}")
-                    return result.get('response', '')
-                else:
-                    logger.warning(f"LLM query failed with status code {response.status_code}, attempt {attempt+1}/{retries}")
-            except requests.exceptions.Timeout:
-                logger.warning(f"LLM query timed out after {timeout} seconds, attempt {attempt+1}/{retries}")
-            except Exception as e:
-                logger.warning(f"Error querying LLM: {e}, attempt {attempt+1}/{retries}")
+            if done:
+                logger.info(f"LLM query successful with model {model}")
+                return self.record_llm_metrics(started, model, prompt, attempts, text, True)
+            if len(text) > len(best_partial):
+                best_partial = text
+            logger.warning(f"LLM query with model {model} did not complete, attempt {attempt+1}/{retries}")
 
             # Wait before retrying with exponential backoff
             if attempt < retries - 1:
@@ -374,23 +539,216 @@ class TaskProcessor:
         if fallback_model:
             logger.info(f"Trying fallback model {fallback_model}")
             payload["model"] = fallback_model
-
-            try:
-                response = requests.post(OLLAMA_ENDPOINT, json=payload, timeout=timeout)
-
-                if response.status_code == 200:
-                    result = response.json()
-                    logger.info(f"LLM query successful with fallback model {fallback_model}")
-                    return result.get('response', '')
-                else:
-                    logger.error(f"LLM query with fallback model failed with status code {response.status_code}")
-            except Exception as e:
-                logger.error(f"Error querying LLM with fallback model: {e}")
+            payload["options"]["num_ctx"] = context_window(fallback_model)
+
+            text, done, call = self.stream_llm(payload, timeout, partial_path)
+            attempts.append(call)
+            if done:
+                logger.info(f"LLM query successful with fallback model {fallback_model}")
+                return self.record_llm_metrics(started, model, prompt, attempts, text, True)
+            if len(text) > len(best_partial):
+                best_partial = text
+            logger.error(f"LLM query with fallback model {fallback_model} did not complete")
+
+        # A partial response is never returned as if it were complete; the
+        # longest one is kept in the partial file for inspection only
+        if best_partial and partial_path:
+            self.save_output_file(os.path.dirname(partial_path), os.path.basename(partial_path), best_partial)
+            logger.error(f"All LLM query attempts failed, kept {len(best_partial)} characters of partial output in {partial_path}")
 
         # If everything fails, return empty string and let the caller handle it
         logger.error("All LLM query attempts failed, returning empty string")
+        self.record_llm_metrics(started, model, prompt, attempts, best_partial, False)
         return ""
 
+    def budget_prompt(self, model, build, sections, system_prompt=None, max_tokens=4000):
+        """
+        Build a prompt whose variable sections fit the call's token budget.
+
+        Args:
+            model: Model the prompt is for
+            build: Function rendering the prompt from the section texts by name
+            sections: PromptSection list; the lowest priorities are trimmed first
+            system_prompt: System prompt of the call
+            max_tokens: Output tokens the call will request
+
+        Returns:
+            str: The prompt
+        """
+        prompt_budget, _ = self.token_budget.allocate(model, system_prompt, max_tokens)
+        prompt, trimmed = fit_prompt(build, sections, model, prompt_budget)
+        for name, before, after in trimmed:
+            logger.info(f"Trimmed prompt section '{name}' from ~{before} to ~{after} tokens to fit {prompt_budget}")
+        return prompt
+
+    def record_llm_metrics(self, started, model, prompt, attempts, output, success):
+        """
+        Record the metrics span of one query_llm call and return its output.
+
+        Args:
+            started: time.monotonic() value when the call started
+            model: Model originally requested
+            prompt: Prompt that was sent
+            attempts: Per-attempt records returned by stream_llm
+            output: Text returned to the caller
+            success: Whether an attempt completed
+        """
+        for attempt in attempts:
+            self.token_budget.charge(attempt["prompt_tokens"], attempt["tokens"])
+
+        if self.metrics:
+            last = attempts[-1] if attempts else {}
+            self.metrics.record(
+                self.current_task_id,
+                "llm",
+                self.current_phase or "llm",
+                (time.monotonic() - started) * 1000,
+                model=model,
+                success=success,
+                queue_wait_ms=sum(a["queue_wait_seconds"] for a in attempts) * 1000,
+                first_byte_ms=last["first_token_seconds"] * 1000 if last.get("first_token_seconds") is not None else None,
+                load_ms=sum(a["load_seconds"] for a in attempts) * 1000,
+                prompt_chars=len(prompt),
+                output_chars=len(output),
+                tokens=sum(a["tokens"] for a in attempts),
+                tokens_per_second=last.get("tokens_per_second"),
+                retries=max(len(attempts) - 1, 0),
+                fallback=any(a["model"] != model for a in attempts)
+            )
+        return output
+
+    def stream_llm(self, payload, stall_timeout, partial_path=None):
+        """
+        Run one streaming Ollama generation and record its throughput.
+
+        Ollama answers with one JSON object per line, each carrying the next
+        piece of the response; the last one has "done": true and the token
+        counts. Every piece is appended to partial_path as it arrives.
+
+        Args:
+            payload: Generate request body (with "stream": True)
+            stall_timeout: Seconds without a new line before giving up
+            partial_path: Optional file the output is written to as it arrives
+
+        Returns:
+            tuple: (text received, True if the generation completed, attempt record)
+        """
+        # Wait for one of the endpoint's slots, shared by every task in the process
+        queued = time.monotonic()
+        slot = endpoint_slot(OLLAMA_ENDPOINT)
+        slot.acquire()
+        started = time.monotonic()
+
+        first_token_at = None
+        pieces = []
+        final = {}
+        partial_file = None
+
+        try:
+            if partial_path:
+                partial_file = open(partial_path, 'w', encoding='utf-8')
+
+            with requests.post(
+                OLLAMA_ENDPOINT,
+                json=payload,
+                stream=True,
+                timeout=(LLM_CONNECT_TIMEOUT, stall_timeout)
+            ) as response:
+                if response.status_code != 200:
+                    logger.warning(f"LLM query failed with status code {response.status_code}")
+                    return "", False, self.llm_call_record(payload, queued, started, None, [], {})
+
+                # chunk_size=None hands over each piece as soon as it arrives
+                for line in response.iter_lines(chunk_size=None):
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get('error'):
+                        logger.warning(f"LLM stream reported an error: {chunk['error']}")
+                        break
+
+                    piece = chunk.get('response', '')
+                    if piece:
+                        if first_token_at is None:
+                            first_token_at = time.monotonic()
+                        pieces.append(piece)
+                        if partial_file:
+                            partial_file.write(piece)
+                            partial_file.flush()
+
+                    if chunk.get('done'):
+                        final = chunk
+                        break
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            # A read timeout mid-stream surfaces as a ConnectionError
+            if isinstance(e, requests.exceptions.Timeout) or 'timed out' in str(e):
+                logger.warning(f"LLM stream stalled: no tokens for {stall_timeout} seconds")
+            else:
+                logger.warning(f"Error querying LLM: {e}")
+        except Exception as e:
+            logger.warning(f"Error querying LLM: {e}")
+        finally:
+            slot.release()
+            if partial_file:
+                partial_file.close()
+
+        text = ''.join(pieces)
+        done = bool(final)
+        call = self.llm_call_record(payload, queued, started, first_token_at, pieces, final)
+
+        if done and partial_path:
+            # The caller saves the finished output itself
+            try:
+                os.unlink(partial_path)
+            except OSError:
+                pass
+
+        return text, done, call
+
+    def llm_call_record(self, payload, queued, started, first_token_at, pieces, final):
+        """
+        Build, log and keep the throughput record of one LLM attempt.
+
+        Args:
+            payload: Generate request body
+            queued: time.monotonic() value when the attempt started waiting for a slot
+            started: time.monotonic() value when the request was sent
+            first_token_at: time.monotonic() value of the first token, if any
+            pieces: Response pieces received
+            final: Closing stream object ("done": true), or {} if none arrived
+        """
+        # Prefer Ollama's own counters; fall back to counting streamed pieces
+        tokens = final.get('eval_count', len(pieces))
+        prompt_chars = len(payload["prompt"]) + len(payload.get("system", ""))
+        prompt_tokens = final.get('prompt_eval_count')
+        if prompt_tokens:
+            estimator.calibrate(payload["model"], prompt_chars, prompt_tokens)
+        else:
+            prompt_tokens = estimator.estimate(payload["prompt"] + payload.get("system", ""), payload["model"])
+        eval_seconds = final.get('eval_duration', 0) / 1e9
+        if not eval_seconds and first_token_at is not None:
+            eval_seconds = time.monotonic() - first_token_at
+
+        call = {
+            "model": payload["model"],
+            "done": bool(final),
+            "prompt_tokens": prompt_tokens,
+            "tokens": tokens,
+            "queue_wait_seconds": round(started - queued, 3),
+            "seconds": round(time.monotonic() - started, 3),
+            "first_token_seconds": round(first_token_at - started, 3) if first_token_at else None,
+            # Time Ollama spent loading the model, part of first_token_seconds
+            "load_seconds": round(final.get('load_duration', 0) / 1e9, 3),
+            "tokens_per_second": round(tokens / eval_seconds, 2) if eval_seconds else 0.0,
+        }
+        self.llm_calls.append(call)
+        logger.info(
+            f"LLM call to {call['model']}: {call['prompt_tokens']} prompt tokens, {call['tokens']} tokens in {call['seconds']}s "
+            f"({call['tokens_per_second']} tokens/s, waited {call['queue_wait_seconds']}s, "
+            f"model load {call['load_seconds']}s, done={call['done']})"
+        )
+        return call
+
     def create_task_output_dir(self, task_id):
         """Create a directory for task outputs."""
         output_dir = os.path.join(OUTPUT_BASE_DIR, task_id)
@@ -409,6 +767,15 @@ class TaskProcessor:
             logger.error(f"Error saving output file: {e}")
             return None
 
+    def read_output_file(self, output_dir, filename):
+        """Read a file from the output directory, or None if it is missing."""
+        try:
+            with open(os.path.join(output_dir, filename), 'r', encoding='utf-8') as f:
+                return f.read()
+        except OSError as e:
+            logger.error(f"Error reading output file: {e}")
+            return None
+
     def generate_html_from_markdown(self, markdown_content):
         """Convert markdown to HTML."""
         try:
@@ -433,13 +800,15 @@ class TaskProcessor:
 
         logger.info(f"Starting planning phase for task {task_id}")
 
+        system_prompt = "You are an expert project planner and researcher. Your job is to create detailed, actionable plans for complex tasks. Be specific, thorough, and practical in your planning."
+
         # Create planning prompt
-        planning_prompt = f"""
+        planning_prompt = self.budget_prompt(model, lambda s: f"""
         # Task Planning
 
         ## Task Details
         - Title: {task['title']}
-        - Description: {task['description']}
+        - Description: {s['description']}
         - Complexity: {task['complexity']}
 
         ## Instructions
@@ -480,10 +849,9 @@ class TaskProcessor:
            - Any specific requirements from the task description
 
         Your plan should be detailed, specific, and actionable. It will guide all subsequent phases of the task execution.
-        """
+        """, [PromptSection("description", task['description'], priority=1, min_chars=2000)], system_prompt, max_tokens=2000)
 
         # Query LLM for planning
-        system_prompt = "You are an expert project planner and researcher. Your job is to create detailed, actionable plans for complex tasks. Be specific, thorough, and practical in your planning."
         plan_response = self.query_llm(model, planning_prompt, system_prompt, max_tokens=2000)
 
         if not plan_response:
@@ -520,12 +888,14 @@ class TaskProcessor:
 
         logger.info(f"Starting research phase for task {task_id}")
 
+        system_prompt = "You are an expert researcher with extensive experience in information gathering and synthesis. Your job is to formulate effective search queries that will yield comprehensive, relevant, and high-quality information."
+
         # Extract research questions
-        research_prompt = f"""
+        research_prompt = self.budget_prompt(model, lambda s: f"""
         # Research Planning
 
         ## Task Plan
-        {plan}
+        {s['plan']}
 
         ## Instructions
         Based on the task plan above, extract 5-8 specific search queries that would help gather the necessary information to complete this task.
@@ -543,10 +913,9 @@ class TaskProcessor:
         2. [Search query 2] - [Brief explanation of what information this query aims to find]
         3. [Search query 3] - [Brief explanation of what information this query aims to find]
         ...
-        """
+        """, [PromptSection("plan", plan, priority=1, min_chars=2000)], system_prompt, max_tokens=2000)
 
         # Query LLM for research questions
-        system_prompt = "You are an expert researcher with extensive experience in information gathering and synthesis. Your job is to formulate effective search queries that will yield comprehensive, relevant, and high-quality information."
         research_questions = self.query_llm(model, research_prompt, system_prompt, max_tokens=2000)
 
         if not research_questions:
@@ -575,45 +944,55 @@ class TaskProcessor:
         # Update progress
         self.update_task_status(task_id, "build", 20, "Generated research questions", agent_id)
 
-        # Perform searches and gather information
-        research_data = {}
-        for i, query in enumerate(queries[:8]):  # Allow up to 8 queries
-            logger.info(f"Searching for: {query}")
-            self.create_task_update(task_id, agent_id, "progress_update", f"Researching: {query}")
-
-            # Search the web
-            search_results = self.search_web(query, num_results=5)  # Increased to 5 results per query
-
-            # Update progress
-            progress = 20 + (i + 1) * 5  # Adjusted progress calculation
-            self.update_task_status(task_id, "build", min(progress, 60), f"Completed search {i+1}/{len(queries)}", agent_id)
+        # Perform searches and gather information. Searches and page fetches
+        # run in parallel on the shared fetcher; anything still outstanding at
+        # the phase deadline is dropped and falls back to its search snippet.
+        queries = queries[:8]  # Allow up to 8 queries
+        deadline = time.monotonic() + RESEARCH_PHASE_DEADLINE
+        cache_stats = CacheStats()
+
+        search_results = {}
+        with self.metrics.span(task_id, "step", "search"):
+            searches = self.fetcher.map(
+                lambda q: self.search_web(q, num_results=5, cache_stats=cache_stats), queries, deadline
+            )
+            for i, (query, results) in enumerate(searches):
+                search_results[query] = results
+                self.create_task_update(task_id, agent_id, "progress_update", f"Researching: {query} ({len(results)} results)")
+
+                # Update progress
+                progress = 20 + (i + 1) * 5  # Adjusted progress calculation
+                self.update_task_status(task_id, "build", min(progress, 60), f"Completed search {i+1}/{len(queries)}", agent_id)
+
+        # Fetch content from all top results at once, each URL only once
+        urls = {result['url'] for results in search_results.values() for result in results}
+        with self.metrics.span(task_id, "step", "page_fetch"):
+            page_contents = dict(self.fetcher.map(
+                lambda url: self.fetch_webpage_content(url, cache_stats=cache_stats), urls, deadline
+            ))
+        logger.info(f"Fetched {sum(1 for c in page_contents.values() if c)}/{len(urls)} pages for task {task_id}")
+
+        # Record how much of the research was served from the cache
+        stats = cache_stats.as_dict()
+        self.save_output_file(output_dir, "research_cache_stats.json", json.dumps(stats, indent=2))
+        self.create_task_update(
+            task_id,
+            agent_id,
+            "note",
+            f"Research cache: {stats['hits']} hits, {stats['revalidated']} revalidated, {stats['misses']} misses"
+        )
 
-            # Fetch content from top results
+        research_data = {}
+        for query in queries:
             query_data = []
-            for result in search_results:
-                try:
-                    content = self.fetch_webpage_content(result['url'])
-                    if content:
-                        query_data.append({
-                            'title': result['title'],
-                            'url': result['url'],
-                            'content': content[:8000]  # Increased content size limit
-                        })
-                    else:
-                        # If content fetch fails, use the snippet as content
-                        query_data.append({
-                            'title': result['title'],
-                            'url': result['url'],
-                            'content': result['snippet']
-                        })
-                except Exception as e:
-                    logger.error(f"Error fetching content from {result['url']}: {e}")
-                    # Add the result with just the snippet
-                    query_data.append({
-                        'title': result['title'],
-                        'url': result['url'],
-                        'content': result['snippet']
-                    })
+            for result in search_results.get(query, []):
+                content = page_contents.get(result['url'])
+                query_data.append({
+                    'title': result['title'],
+                    'url': result['url'],
+                    # If content fetch fails or is dropped, use the snippet as content
+                    'content': content[:8000] if content else result['snippet']
+                })
 
             research_data[query] = query_data
 
@@ -624,22 +1003,26 @@ class TaskProcessor:
         # Update progress
         self.update_task_status(task_id, "build", 70, "Completed web research", agent_id)
 
-        # Summarize research findings for each query
-        query_summaries = {}
-        for query, results in research_data.items():
-            # Skip if no results
-            if not results:
-                continue
+        # Summarize research findings. The per-query summaries run concurrently
+        # (map), then are merged into one comprehensive summary (reduce); long
+        # inputs are chunked so every prompt stays within the model's context.
+        summarizer = MapReduceSummarizer(
+            lambda prompt, system, tokens: self.query_llm(model, prompt, system, max_tokens=tokens),
+            model
+        )
 
-            # Create a summary prompt for this query
-            query_summary_prompt = f"""
-            # Research Summary for Query: "{query}"
+        query_excerpts = {
+            query: "\n\n".join(f"### {r['title']}\nURL: {r['url']}\n\n{r['content']}" for r in results)
+            for query, results in research_data.items()
+            if results
+        }
 
-            ## Sources
-            {json.dumps([{'title': r['title'], 'url': r['url']} for r in results], indent=2)}
+        def build_query_summary_prompt(query, excerpts):
+            return f"""
+            # Research Summary for Query: "{query}"
 
             ## Content Excerpts
-            {json.dumps([{'title': r['title'], 'content': r['content'][:1000] + '...' if len(r['content']) > 1000 else r['content']} for r in results], indent=2)}
+            {excerpts}
 
             ## Instructions
             Synthesize the key information from these sources related to the query "{query}".
@@ -658,31 +1041,35 @@ class TaskProcessor:
             - Citations to sources using [Source Title](URL) format
             """
 
-            # Query LLM for query summary
-            system_prompt = "You are an expert researcher and information synthesizer. Your job is to extract, organize, and summarize the most relevant information from multiple sources."
-            query_summary = self.query_llm(model, query_summary_prompt, system_prompt, max_tokens=2000)
+        system_prompt = "You are an expert researcher and information synthesizer. Your job is to extract, organize, and summarize the most relevant information from multiple sources."
+        with self.metrics.span(task_id, "step", "summarize_queries"):
+            query_summaries = summarizer.map(query_excerpts, build_query_summary_prompt, system_prompt, max_tokens=2000)
 
-            if query_summary:
-                query_summaries[query] = query_summary
-                # Save individual query summary
-                self.save_output_file(output_dir, f"research_summary_{query.replace(' ', '_')[:30]}.md", query_summary)
+        for query, query_summary in query_summaries.items():
+            # Save individual query summary
+            self.save_output_file(output_dir, f"research_summary_{query.replace(' ', '_')[:30]}.md", query_summary)
 
         # Update progress
         self.update_task_status(task_id, "build", 80, "Generated query summaries", agent_id)
 
-        # Create comprehensive research summary
-        comprehensive_summary_prompt = f"""
+        # Create comprehensive research summary. The summaries are already cut
+        # to the summarizer's content budget; the description and plan go
+        # through the prompt budget so a long plan cannot overflow the context.
+        system_prompt = "You are an expert researcher and academic writer. Your job is to synthesize complex information from multiple sources into a coherent, well-structured, and comprehensive summary."
+
+        def build_comprehensive_summary_prompt(summaries):
+            return self.budget_prompt(model, lambda s: f"""
         # Comprehensive Research Summary
 
         ## Task Details
         - Title: {task['title']}
-        - Description: {task['description']}
+        - Description: {s['description']}
 
         ## Research Plan
-        {plan}
+        {s['plan']}
 
         ## Query Summaries
-        {json.dumps(query_summaries, indent=2)}
+        {s['summaries']}
 
         ## Instructions
         Create a comprehensive research summary that synthesizes all the information gathered across different queries.
@@ -701,11 +1088,19 @@ class TaskProcessor:
         - Bullet points for key information
         - Citations to sources using [Source Title](URL) format
         - A bibliography section at the end listing all sources
-        """
-
-        # Query LLM for comprehensive summary
-        system_prompt = "You are an expert researcher and academic writer. Your job is to synthesize complex information from multiple sources into a coherent, well-structured, and comprehensive summary."
-        research_summary = self.query_llm(model, comprehensive_summary_prompt, system_prompt, max_tokens=4000)
+        """, [
+                PromptSection("summaries", summaries, priority=3),
+                PromptSection("description", task['description'], priority=2, min_chars=2000),
+                PromptSection("plan", plan, priority=1, min_chars=1000),
+            ], system_prompt, max_tokens=4000)
+
+        with self.metrics.span(task_id, "step", "summarize_research"):
+            research_summary = summarizer.reduce(
+                [f"### {query}\n{summary}" for query, summary in query_summaries.items()],
+                build_comprehensive_summary_prompt,
+                system_prompt,
+                max_tokens=4000
+            )
 
         if research_summary:
             self.save_output_file(output_dir, "research_summary.md", research_summary)
@@ -764,20 +1159,32 @@ class TaskProcessor:
         is_landing_page = "landing page" in task['title'].lower() or "landing page" in task['description'].lower()
         is_html_task = "html" in task['title'].lower() or "html" in task['description'].lower()
 
+        if is_landing_page or is_html_task:
+            system_prompt = "You are an expert web developer with extensive experience in creating modern, responsive, and interactive websites. You excel at writing clean, well-structured HTML, CSS, and JavaScript code that follows best practices and is fully functional without requiring any backend."
+        else:
+            system_prompt = "You are an expert content creator with extensive experience in producing high-quality, comprehensive outputs across various domains. Your writing is clear, well-structured, authoritative, and tailored to the specific requirements of each task."
+
+        # The research summary gives way first, then the plan
+        sections = [
+            PromptSection("description", task['description'], priority=3, min_chars=2000),
+            PromptSection("plan", plan_content, priority=2, min_chars=2000),
+            PromptSection("research_summary", research_summary, priority=1),
+        ]
+
         # Create execution prompt
         if is_landing_page or is_html_task:
-            execution_prompt = f"""
+            build_prompt = lambda s: f"""
             # Task Execution
 
             ## Task Details
             - Title: {task['title']}
-            - Description: {task['description']}
+            - Description: {s['description']}
 
             ## Task Plan
-            {plan_content}
+            {s['plan']}
 
             ## Research Summary
-            {research_summary[:10000]}  # Limit size to avoid token limits
+            {s['research_summary']}
 
             ## Instructions
             Based on the task details, plan, and research above, create a complete HTML landing page with CSS and JavaScript.
@@ -801,18 +1208,18 @@ class TaskProcessor:
             - The code should be fully functional without requiring any backend
             """
         else:
-            execution_prompt = f"""
+            build_prompt = lambda s: f"""
             # Task Execution
 
             ## Task Details
             - Title: {task['title']}
-            - Description: {task['description']}
+            - Description: {s['description']}
 
             ## Task Plan
-            {plan_content}
+            {s['plan']}
 
             ## Research Summary
-            {research_summary[:10000]}  # Limit size to avoid token limits
+            {s['research_summary']}
 
             ## Instructions
             Based on the task details, plan, and research above, create the complete output for this task.
@@ -835,13 +1242,13 @@ class TaskProcessor:
             - Logical flow between sections
             """
 
-        # Query LLM for primary output
-        if is_landing_page or is_html_task:
-            system_prompt = "You are an expert web developer with extensive experience in creating modern, responsive, and interactive websites. You excel at writing clean, well-structured HTML, CSS, and JavaScript code that follows best practices and is fully functional without requiring any backend."
-        else:
-            system_prompt = "You are an expert content creator with extensive experience in producing high-quality, comprehensive outputs across various domains. Your writing is clear, well-structured, authoritative, and tailored to the specific requirements of each task."
+        execution_prompt = self.budget_prompt(model, build_prompt, sections, system_prompt, max_tokens=8000)
 
-        primary_output = self.query_llm(model, execution_prompt, system_prompt, max_tokens=8000)
+        # Query LLM for primary output
+        primary_output = self.query_llm(
+            model, execution_prompt, system_prompt, max_tokens=8000,
+            partial_path=os.path.join(output_dir, "output.partial.md")
+        )
 
         if not primary_output:
             logger.error(f"Failed to generate primary output for task {task_id}")
@@ -917,19 +1324,21 @@ class TaskProcessor:
             with open(research_summary_path, 'r', encoding='utf-8') as f:
                 research_summary = f.read()
 
-        # Create review prompt
-        review_prompt = f"""
+        system_prompt = "You are an expert quality reviewer with extensive experience evaluating academic and professional content. Your reviews are thorough, critical, fair, and actionable. You have high standards but provide constructive feedback that helps improve the work."
+
+        # Create review prompt; the plan gives way before the output under review
+        review_prompt = self.budget_prompt(model, lambda s: f"""
         # Output Review
 
         ## Task Details
         - Title: {task['title']}
-        - Description: {task['description']}
+        - Description: {s['description']}
 
         ## Task Plan
-        {plan[:5000]}  # Truncate if too large
+        {s['plan']}
 
         ## Output to Review
-        {primary_output[:15000]}  # Truncate if too large
+        {s['output']}
 
         ## Instructions
         Conduct a thorough, critical review of the output against the task requirements and plan. Your review should be detailed, specific, and actionable.
@@ -966,10 +1375,13 @@ class TaskProcessor:
         4. Areas for Improvement: [List specific issues that need to be addressed, with clear recommendations]
 
         5. Final Verdict: [Clear statement on whether the output is acceptable as is, needs minor revisions, or needs major revisions]
-        """
+        """, [
+            PromptSection("description", task['description'], priority=3, min_chars=2000),
+            PromptSection("plan", plan, priority=1, min_chars=1000),
+            PromptSection("output", primary_output, priority=2),
+        ], system_prompt, max_tokens=4000)
 
         # Query LLM for review
-        system_prompt = "You are an expert quality reviewer with extensive experience evaluating academic and professional content. Your reviews are thorough, critical, fair, and actionable. You have high standards but provide constructive feedback that helps improve the work."
         review_response = self.query_llm(model, review_prompt, system_prompt, max_tokens=4000)
 
         if not review_response:
@@ -998,25 +1410,27 @@ class TaskProcessor:
         if needs_revision:
             logger.info(f"Output needs revision for task {task_id}")
 
-            # Create revision prompt
-            revision_prompt = f"""
+            system_prompt = "You are an expert content creator and editor with extensive experience revising academic and professional content. You excel at addressing feedback while maintaining the core strengths of the original work. Your revisions are thorough, thoughtful, and significantly improve the quality of the content."
+
+            # Create revision prompt; research, then plan, then output give way before the feedback
+            revision_prompt = self.budget_prompt(model, lambda s: f"""
             # Output Revision
 
             ## Task Details
             - Title: {task['title']}
-            - Description: {task['description']}
+            - Description: {s['description']}
 
             ## Task Plan
-            {plan[:3000]}  # Truncate if too large
+            {s['plan']}
 
             ## Research Summary
-            {research_summary[:5000]}  # Include part of the research summary
+            {s['research_summary']}
 
             ## Original Output
-            {primary_output[:10000]}  # Truncate if too large
+            {s['output']}
 
             ## Review Feedback
-            {review_response}
+            {s['review']}
 
             ## Instructions
             Revise the original output based on the review feedback. Address ALL issues and areas for improvement identified in the review.
@@ -1032,11 +1446,19 @@ class TaskProcessor:
 
             ## Output Format
             Provide the complete revised output in markdown format. Include all sections from the original output, with improvements as needed.
-            """
+            """, [
+                PromptSection("description", task['description'], priority=5, min_chars=2000),
+                PromptSection("review", review_response, priority=4, min_chars=2000),
+                PromptSection("output", primary_output, priority=3),
+                PromptSection("plan", plan, priority=2, min_chars=1000),
+                PromptSection("research_summary", research_summary, priority=1),
+            ], system_prompt, max_tokens=8000)
 
             # Query LLM for revised output
-            system_prompt = "You are an expert content creator and editor with extensive experience revising academic and professional content. You excel at addressing feedback while maintaining the core strengths of the original work. Your revisions are thorough, thoughtful, and significantly improve the quality of the content."
-            revised_output = self.query_llm(model, revision_prompt, system_prompt, max_tokens=8000)
+            revised_output = self.query_llm(
+                model, revision_prompt, system_prompt, max_tokens=8000,
+                partial_path=os.path.join(output_dir, "output_revised.partial.md")
+            )
 
             if revised_output:
                 # Save the revised output
@@ -1059,18 +1481,18 @@ class TaskProcessor:
                 )
 
                 # Perform a final review of the revised output
-                final_review_prompt = f"""
+                final_review_prompt = self.budget_prompt(model, lambda s: f"""
                 # Final Review
 
                 ## Task Details
                 - Title: {task['title']}
-                - Description: {task['description']}
+                - Description: {s['description']}
 
                 ## Original Review Issues
-                {review_response[:2000]}  # Include key parts of the original review
+                {s['review']}
 
                 ## Revised Output
-                {revised_output[:15000]}  # Truncate if too large
+                {s['output']}
 
                 ## Instructions
                 Perform a final review of the revised output. Verify that all issues identified in the original review have been addressed.
@@ -1082,7 +1504,11 @@ class TaskProcessor:
                 2. Issues Addressed: [List of issues from the original review that have been successfully addressed]
                 3. Remaining Issues (if any): [List of issues that still need attention]
                 4. Final Verdict: [Whether the revised output is now acceptable]
-                """
+                """, [
+                    PromptSection("description", task['description'], priority=3, min_chars=2000),
+                    PromptSection("review", review_response, priority=1, min_chars=2000),
+                    PromptSection("output", revised_output, priority=2),
+                ], system_prompt, max_tokens=2000)
 
                 # Query LLM for final review
                 final_review = self.query_llm(model, final_review_prompt, system_prompt, max_tokens=2000)
@@ -1112,6 +1538,16 @@ class TaskProcessor:
         logger.info(f"Review phase completed for task {task_id}")
         return primary_output
 
+    @contextmanager
+    def phase_span(self, task_id, phase):
+        """Time a task phase and attribute the LLM calls made in it to it."""
+        self.current_phase = phase
+        try:
+            with self.metrics.span(task_id, "phase", phase):
+                yield
+        finally:
+            self.current_phase = None
+
     def process_task(self, task, agent):
         """Process a task using the specified agent."""
         task_id = task['id']
@@ -1132,58 +1568,108 @@ class TaskProcessor:
             if pre_assigned_agent:
                 logger.info(f"Switching to pre-assigned agent {pre_assigned_agent['id']} - {pre_assigned_agent['name']}")
 
-                # Update the agent status to busy
-                self.cursor.execute(
-                    'UPDATE agents SET status = "busy", last_active = ? WHERE id = ?',
-                    (datetime.now().isoformat(), pre_assigned_agent['id'])
-                )
-                self.conn.commit()
-
-                # Update the agent that was originally assigned to available
-                self.cursor.execute(
-                    'UPDATE agents SET status = "available", last_active = ? WHERE id = ?',
-                    (datetime.now().isoformat(), agent_id)
-                )
-                self.conn.commit()
+                # Mark the pre-assigned agent busy and free the one originally assigned
+                now = datetime.now().isoformat()
+                self.writer.write_now([
+                    ("UPDATE agents SET status = 'busy', last_active = ? WHERE id = ?", (now, pre_assigned_agent['id'])),
+                    ("UPDATE agents SET status = 'available', last_active = ? WHERE id = ?", (now, agent_id)),
+                ])
 
                 agent = pre_assigned_agent
                 agent_id = agent['id']
                 model = agent['model']
 
         logger.info(f"Processing task {task_id} with agent {agent_id} using model {model}")
+        self.llm_calls = []
+        self.current_task_id = task_id
+        self.token_budget = TaskTokenBudget(task['max_token_usage'] if 'max_token_usage' in task.keys() else None)
 
         # Create output directory
         output_dir = self.create_task_output_dir(task_id)
 
-        # Update task status to design stage
-        self.update_task_status(task_id, "design", 0, "Starting design phase", agent_id)
+        try:
+            return self.run_phases(task, agent, output_dir)
+        except TokenBudgetExceeded as e:
+            # Requeueing would only spend the budget again; finish with what the phases wrote
+            logger.warning(f"Task {task_id} stopped: {e}")
+            self.create_task_update(task_id, agent_id, "note", f"Stopped early: {e}")
+            self.save_output_file(output_dir, "llm_calls.json", json.dumps(self.llm_calls, indent=2))
+            self.update_task_result_path(task_id, output_dir)
+            self.update_task_status(task_id, "complete", 100, "Task stopped after using its token budget", agent_id)
+            return True
+
+    def run_phases(self, task, agent, output_dir):
+        """Run the phases of a task, skipping those an earlier run checkpointed."""
+        task_id = task['id']
+        agent_id = agent['id']
+
+        # Phases completed by an earlier, interrupted run are not repeated
+        checkpoint = PhaseCheckpoint(output_dir)
+        resumed = checkpoint.completed_phases()
+        if resumed:
+            logger.info(f"Resuming task {task_id} after completed phase(s): {', '.join(resumed)}")
+            self.create_task_update(task_id, agent_id, "note", f"Resuming from checkpoint after phase(s): {', '.join(resumed)}")
 
         # 1. Planning Phase
-        plan = self.planning_phase(task, agent, output_dir)
-        if not plan:
-            self.update_task_status(task_id, "not_started", 0, "Planning phase failed", agent_id)
-            return False
+        if checkpoint.completed("planning"):
+            plan = self.read_output_file(output_dir, "plan.md")
+        else:
+            # Update task status to design stage
+            self.update_task_status(task_id, "design", 0, "Starting design phase", agent_id)
+
+            checkpoint.start("planning")
+            with self.phase_span(task_id, "planning"):
+                plan = self.planning_phase(task, agent, output_dir)
+            if not plan:
+                self.update_task_status(task_id, "not_started", 0, "Planning phase failed", agent_id)
+                return False
+            checkpoint.complete("planning", ["plan.md"])
 
         # Update progress
         self.update_task_status(task_id, "design", 100, "Design phase completed", agent_id)
 
         # 2. Research Phase (Build)
-        self.update_task_status(task_id, "build", 0, "Starting research and build phase", agent_id)
-        research_data = self.research_phase(task, agent, plan, output_dir)
+        if checkpoint.completed("research"):
+            research_data = json.loads(self.read_output_file(output_dir, "research_data.json") or "{}")
+        else:
+            self.update_task_status(task_id, "build", 0, "Starting research and build phase", agent_id)
+            checkpoint.start("research")
+            with self.phase_span(task_id, "research"):
+                research_data = self.research_phase(task, agent, plan, output_dir)
+            # Without its summary the phase is incomplete: later phases read it from disk
+            if research_data and os.path.exists(os.path.join(output_dir, "research_summary.md")):
+                checkpoint.complete("research", ["research_data.json", "research_summary.md"])
 
         # Update progress
         self.update_task_status(task_id, "build", 100, "Research and build phase completed", agent_id)
 
         # 3. Execution Phase (Test)
-        self.update_task_status(task_id, "test", 0, "Starting execution phase", agent_id)
-        output_files = self.execution_phase(task, agent, plan, research_data, output_dir)
+        execution_checkpoint = checkpoint.completed("execution")
+        if execution_checkpoint:
+            output_files = [os.path.join(output_dir, name) for name in execution_checkpoint.get("result", [])]
+        else:
+            self.update_task_status(task_id, "test", 0, "Starting execution phase", agent_id)
+            checkpoint.start("execution")
+            with self.phase_span(task_id, "execution"):
+                output_files = self.execution_phase(task, agent, plan, research_data, output_dir)
+            if output_files:
+                names = [os.path.basename(path) for path in output_files if path]
+                checkpoint.complete("execution", names, result=names)
 
         # Update progress
         self.update_task_status(task_id, "test", 100, "Execution phase completed", agent_id)
 
         # 4. Review Phase
-        self.update_task_status(task_id, "review", 0, "Starting review phase", agent_id)
-        final_output = self.review_phase(task, agent, output_files, output_dir)
+        if not checkpoint.completed("review"):
+            self.update_task_status(task_id, "review", 0, "Starting review phase", agent_id)
+            checkpoint.start("review")
+            with self.phase_span(task_id, "review"):
+                final_output = self.review_phase(task, agent, output_files, output_dir)
+            if final_output:
+                checkpoint.complete("review", ["output.md", "output.html", "review.md", "final_review.md"])
+
+        # Record the throughput of this task's LLM calls
+        self.save_output_file(output_dir, "llm_calls.json", json.dumps(self.llm_calls, indent=2))
 
         # Update task result path
         self.update_task_result_path(task_id, output_dir)
@@ -1191,17 +1677,56 @@ class TaskProcessor:
         # Mark task as complete
         self.update_task_status(task_id, "complete", 100, "Task completed successfully", agent_id)
 
-        logger.info(f"Task {task_id} completed successfully")
+        logger.info(f"Task {task_id} completed successfully ({self.token_budget.used} tokens used)")
         return True
 
+    def execute_claimed_task(self, task, agent):
+        """
+        Process a claimed task, resetting it to the queue if processing fails.
+
+        Args:
+            task: Claimed task row
+            agent: Agent row the task was claimed for
+
+        Returns:
+            bool: True if the task completed successfully
+        """
+        try:
+            # Set a timeout for task processing
+            max_processing_time = 1800  # 30 minutes
+            start_time = time.time()
+
+            # Process the task
+            completed = self.process_task(task, agent)
+
+            # Check if processing took too long
+            if time.time() - start_time > max_processing_time:
+                logger.warning(f"Task {task['id']} processing took too long, may be stuck")
+
+            return bool(completed)
+        except Exception as e:
+            logger.error(f"Error processing task {task['id']}: {e}")
+            # Reset the task, and free the agent unless it still has another task in flight
+            self.update_task_status(task['id'], "not_started", 0, f"Task processing failed: {str(e)}", agent['id'])
+            self.writer.write_now([
+                (RELEASE_AGENT_SQL, (datetime.now().isoformat(), agent['id'], agent['id'], task['id']))
+            ])
+            return False
+
     def run(self, interval=15):
         """
         Main loop to continuously process tasks.
 
+        Between queue checks the processor blocks on the task notifier, so a
+        newly inserted task wakes it immediately; the interval only bounds how
+        long it sleeps when no notification arrives.
+
         Args:
-            interval: Time in seconds to wait between checking for new tasks
+            interval: Maximum time in seconds to wait between checking for new tasks
         """
         logger.info("Starting task processor")
+        notifier = TaskNotifier()
+        notifier.open()
 
         try:
             while True:
@@ -1210,97 +1735,27 @@ class TaskProcessor:
                     if self.conn is None:
                         self.connect_db()
 
-                    # Get next task
-                    task = self.get_next_task()
+                    # Claim the next task together with an agent
+                    task, agent = self.claim_next_task()
 
                     if task:
                         logger.info(f"Found task: {task['id']} - {task['title']}")
 
-                        # Check if task already has an assigned agent
-                        if 'agent_id' in task and 'agent_name' in task:
-                            # Task has a pre-assigned agent that is available
-                            agent_id = task['agent_id']
-
-                            # Get the agent details
-                            self.cursor.execute(
-                                'SELECT * FROM agents WHERE id = ?',
-                                (agent_id,)
-                            )
-                            agent = self.cursor.fetchone()
-
-                            logger.info(f"Using pre-assigned agent: {agent['id']} - {agent['name']}")
-                        else:
-                            # Get available agent
-                            agent = self.get_available_agent(task['complexity'])
-
-                        if agent:
-                            if 'agent_id' not in task and 'agent_name' not in task:
-                                logger.info(f"Found available agent: {agent['id']} - {agent['name']}")
-
-                            # Assign task to agent
-                            if self.assign_task_to_agent(task['id'], agent['id']):
-                                # Process task with timeout
-                                try:
-                                    # Set a timeout for task processing
-                                    max_processing_time = 1800  # 30 minutes
-                                    start_time = time.time()
-
-                                    # Process the task
-                                    self.process_task(task, agent)
-
-                                    # Check if processing took too long
-                                    if time.time() - start_time > max_processing_time:
-                                        logger.warning(f"Task {task['id']} processing took too long, may be stuck")
-                                except Exception as e:
-                                    logger.error(f"Error processing task {task['id']}: {e}")
-                                    # Reset task and agent status
-                                    self.update_task_status(task['id'], "not_started", 0, f"Task processing failed: {str(e)}", agent['id'])
-                                    self.cursor.execute(
-                                        'UPDATE agents SET status = "available", last_active = ? WHERE id = ?',
-                                        (datetime.now().isoformat(), agent['id'])
-                                    )
-                                    self.conn.commit()
-                        else:
-                            logger.info(f"No available agent for task {task['id']} (complexity: {task['complexity']})")
-
-                            # Check if there are any stuck agents
-                            self.cursor.execute(
-                                'SELECT * FROM agents WHERE status = "busy"'
-                            )
-                            busy_agents = self.cursor.fetchall()
-
-                            for busy_agent in busy_agents:
-                                # Check when the agent was last active
-                                last_active = datetime.fromisoformat(busy_agent['last_active'])
-                                now = datetime.now()
-
-                                # If the agent has been busy for more than 30 minutes, reset it
-                                if (now - last_active).total_seconds() > 1800:  # 30 minutes
-                                    logger.warning(f"Agent {busy_agent['id']} has been busy for too long, resetting")
-
-                                    # Get the task assigned to this agent
-                                    self.cursor.execute(
-                                        'SELECT * FROM tasks WHERE assigned_agent_id = ?',
-                                        (busy_agent['id'],)
-                                    )
-                                    stuck_task = self.cursor.fetchone()
-
-                                    if stuck_task:
-                                        # Reset the task
-                                        self.update_task_status(stuck_task['id'], "not_started", 0, "Task reset due to timeout", busy_agent['id'])
-
-                                    # Reset the agent
-                                    self.cursor.execute(
-                                        'UPDATE agents SET status = "available", last_active = ? WHERE id = ?',
-                                        (datetime.now().isoformat(), busy_agent['id'])
-                                    )
-                                    self.conn.commit()
+                        # Look for more work straight away after a success
+                        if self.execute_claimed_task(task, agent):
+                            continue
+
+                    elif self.has_pending_tasks():
+                        logger.info("No available agent for queued tasks")
+
+                        # Check if there are any stuck agents
+                        self.reset_stuck_agents()
                     else:
                         logger.info("No tasks in queue")
 
-                    # Wait for next check
-                    logger.info(f"Waiting {interval} seconds before next check")
-                    time.sleep(interval)
+                    # Wait for a new task notification or the next check
+                    if notifier.wait(interval):
+                        logger.info("Woken by new task notification")
 
                 except sqlite3.Error as e:
                     logger.error(f"Database error: {e}")
@@ -1316,12 +1771,127 @@ class TaskProcessor:
             logger.info("Task processor stopped by user")
         except Exception as e:
             logger.error(f"Task processor error: {e}")
+        finally:
+            notifier.close()
+            self.close_db()
+            logger.info("Task processor stopped")
+
+    def run_concurrent(self, max_tasks=MAX_CONCURRENT_TASKS, max_per_agent=MAX_TASKS_PER_AGENT, interval=15):
+        """
+        Main loop that processes several tasks at the same time.
+
+        This connection only claims work; every claimed task runs as its own
+        asyncio task on a worker thread with a separate TaskProcessor and
+        database connection, so one slow task no longer holds up the agents
+        that are sitting idle.
+
+        Args:
+            max_tasks: Maximum number of tasks processed at the same time
+            max_per_agent: Maximum number of tasks one agent works on at the same time
+            interval: Maximum time in seconds to wait between checking for new tasks
+        """
+        logger.info(f"Starting task processor in concurrent mode ({max_tasks} tasks, {max_per_agent} per agent)")
+
+        try:
+            asyncio.run(self._run_concurrent(max_tasks, max_per_agent, interval))
+        except KeyboardInterrupt:
+            logger.info("Task processor stopped by user")
         finally:
             self.close_db()
             logger.info("Task processor stopped")
 
+    async def _run_concurrent(self, max_tasks, max_per_agent, interval):
+        """Claim tasks up to the configured limits and dispatch them to workers."""
+        loop = asyncio.get_running_loop()
+        # One thread per task in flight plus one for the notifier wait
+        executor = ThreadPoolExecutor(max_workers=max_tasks + 1, thread_name_prefix="task-worker")
+        notifier = TaskNotifier()
+        notifier.open()
+
+        # Worker future -> ID of the task it runs
+        running = {}
+        wakeup = None
+
+        try:
+            while True:
+                try:
+                    # Fill every free slot with a newly claimed task
+                    while len(running) < max_tasks:
+                        task, agent = self.claim_next_task(max_per_agent)
+                        if not task:
+                            break
+
+                        logger.info(f"Dispatching task {task['id']} - {task['title']} ({len(running) + 1}/{max_tasks} running)")
+                        future = asyncio.ensure_future(
+                            loop.run_in_executor(executor, process_claimed_task, task['id'], agent['id'])
+                        )
+                        running[future] = task['id']
+
+                    if len(running) < max_tasks and self.has_pending_tasks():
+                        # Check if there are any stuck agents, leaving our own workers' tasks alone
+                        self.reset_stuck_agents(running_task_ids=set(running.values()))
+                except sqlite3.Error as e:
+                    logger.error(f"Database error: {e}")
+                    # Try to reconnect to the database
+                    self.close_db()
+                    await asyncio.sleep(5)
+                    self.connect_db()
+                    continue
+                except Exception as e:
+                    # Keep dispatching; the running workers are not affected
+                    logger.error(f"Error in dispatch loop: {e}")
+                    await asyncio.sleep(interval)
+                    continue
+
+                # Sleep until a task is announced, a worker finishes or the interval expires
+                if wakeup is None or wakeup.done():
+                    wakeup = loop.run_in_executor(executor, notifier.wait, interval)
+                done, _ = await asyncio.wait(set(running) | {wakeup}, return_when=asyncio.FIRST_COMPLETED)
+
+                for finished in done - {wakeup}:
+                    running.pop(finished)
+                    if finished.exception():
+                        logger.error(f"Task worker failed: {finished.exception()}")
+        finally:
+            if running:
+                logger.info(f"Waiting for {len(running)} running task(s) to finish")
+                await asyncio.gather(*running, return_exceptions=True)
+            notifier.close()
+            executor.shutdown(wait=False)
+
+
+def process_claimed_task(task_id, agent_id):
+    """
+    Process a claimed task on its own TaskProcessor and database connection.
+
+    Used as the worker entry point by TaskProcessor.run_concurrent().
+
+    Args:
+        task_id: ID of the claimed task
+        agent_id: ID of the agent the task was claimed for
+
+    Returns:
+        bool: True if the task completed successfully
+    """
+    worker = TaskProcessor()
+    try:
+        task = worker.get_task_details(task_id)
+        worker.cursor.execute('SELECT * FROM agents WHERE id = ?', (agent_id,))
+        agent = worker.cursor.fetchone()
+
+        if not task or not agent:
+            logger.error(f"Claimed task {task_id} or agent {agent_id} no longer exists")
+            return False
+
+        return worker.execute_claimed_task(task, agent)
+    finally:
+        worker.close_db()
+
 
 if __name__ == "__main__":
     # Create and run task processor
     processor = TaskProcessor()
-    processor.run()
+    if MAX_CONCURRENT_TASKS > 1:
+        processor.run_concurrent()
+    else:
+        processor.run()
@@ -10,7 +10,7 @@ import asyncio
 import json
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -148,24 +148,12 @@ class DiscussionManager:
         if queue in self.active_listeners:
             self.active_listeners.remove(queue)
 
-    async def get_agent_response(self, agent_id: str, prompt: str, context: Optional[str] = None, question: Optional[str] = None) -> str:
-        """Get a response from an agent"""
-        participant = self.get_participant(agent_id)
-        if not participant:
-            raise ValueError(f"Participant {agent_id} not found")
-
-        # Mark as responding
-        async with self.lock:
-            participant.is_responding = True
-
-        try:
-            # Get model provider
-            provider = get_model_provider(participant.agent_model)
-
-            # Create system prompt
-            if len(self.participants) > 1:
-                # Multi-agent discussion prompt
-                system_prompt = f"""
+    def _build_prompts(self, participant: DiscussionParticipant, prompt: str, context: Optional[str] = None, question: Optional[str] = None) -> Tuple[str, str]:
+        """Build the system and user prompts of an agent's turn"""
+        # Create system prompt
+        if len(self.participants) > 1:
+            # Multi-agent discussion prompt
+            system_prompt = f"""
 {self.system_prompt}
 
 You are {participant.agent_name}, and your role is: {participant.agent_role}
@@ -187,9 +175,9 @@ Keep your response concise (2-3 paragraphs maximum) and focused on adding value.
 Discussion history:
 {self._format_history_for_prompt()}
 """
-            else:
-                # One-to-one feedback prompt
-                system_prompt = """
+        else:
+            # One-to-one feedback prompt
+            system_prompt = """
 You are an expert advisor providing feedback to another AI.
 Your goal is to help the other AI improve its reasoning and problem-solving.
 Provide clear, specific feedback that addresses the question or challenge presented.
@@ -206,13 +194,13 @@ SUGGESTED_APPROACH: Provide a clear suggestion for how to proceed
 ADDITIONAL_CONSIDERATIONS: Mention any other factors that should be considered
 """
 
-            # Create user prompt
-            if len(self.participants) > 1:
-                # Multi-agent discussion prompt
-                user_prompt = prompt
-            else:
-                # One-to-one feedback prompt
-                user_prompt = f"""
+        # Create user prompt
+        if len(self.participants) > 1:
+            # Multi-agent discussion prompt
+            user_prompt = prompt
+        else:
+            # One-to-one feedback prompt
+            user_prompt = f"""
 The assistant is working on a problem and has requested feedback. Here is their current reasoning:
 
 {context or prompt}
@@ -220,6 +208,24 @@ The assistant is working on a problem and has requested feedback. Here is their
 Specific feedback request: {question or "Please provide feedback on my approach."}
 """
 
+        return system_prompt, user_prompt
+
+    async def get_agent_response(self, agent_id: str, prompt: str, context: Optional[str] = None, question: Optional[str] = None) -> str:
+        """Get a response from an agent"""
+        participant = self.get_participant(agent_id)
+        if not participant:
+            raise ValueError(f"Participant {agent_id} not found")
+
+        # Mark as responding
+        async with self.lock:
+            participant.is_responding = True
+
+        try:
+            # Get model provider
+            provider = get_model_provider(participant.agent_model)
+
+            system_prompt, user_prompt = self._build_prompts(participant, prompt, context, question)
+
             # Get response
             response = await provider.generate_completion(system_prompt, user_prompt)
 
@@ -235,6 +241,46 @@ Specific feedback request: {question or "Please provide feedback on my approach.
             async with self.lock:
                 participant.is_responding = False
 
+    async def get_agent_responses(self, agent_ids: List[str], prompt: str, context: Optional[str] = None, question: Optional[str] = None) -> None:
+        """Get a response from each of several agents, batching the agents that share a model"""
+        participants = [self.get_participant(agent_id) for agent_id in agent_ids]
+        participants = [p for p in participants if p]
+
+        # Mark as responding
+        async with self.lock:
+            for participant in participants:
+                participant.is_responding = True
+
+        try:
+            by_model: Dict[str, List[DiscussionParticipant]] = {}
+            for participant in participants:
+                by_model.setdefault(participant.agent_model, []).append(participant)
+            await asyncio.gather(*(
+                self._get_batch_responses(model, group, prompt, context, question)
+                for model, group in by_model.items()
+            ))
+        finally:
+            # Mark as not responding
+            async with self.lock:
+                for participant in participants:
+                    participant.is_responding = False
+
+    async def _get_batch_responses(self, model: str, participants: List[DiscussionParticipant], prompt: str, context: Optional[str], question: Optional[str]) -> None:
+        """Get the responses of agents sharing a model, adding each as it finishes"""
+        provider = get_model_provider(model)
+        requests = [self._build_prompts(participant, prompt, context, question) for participant in participants]
+        async for index, response, error in provider.generate_many(requests):
+            participant = participants[index]
+            if error:
+                logger.error(f"Error getting response from {participant.agent_name}: {error}")
+                continue
+
+            # Update participant
+            participant.last_response_time = datetime.utcnow()
+
+            # Add the response to the discussion
+            self.add_message(participant.agent_id, response)
+
     def _format_history_for_prompt(self) -> str:
         """Format message history for inclusion in prompts"""
         formatted = []
@@ -368,12 +414,10 @@ async def send_message(
         else:
             participants = manager.get_all_participants()
 
-        # Create tasks for agent responses
-        for participant in participants:
-            # Create task for agent response
-            asyncio.create_task(
-                manager.get_agent_response(participant.agent_id, message, context, question)
-            )
+        # Get the agent responses in the background; agents sharing a model are batched
+        asyncio.create_task(
+            manager.get_agent_responses([p.agent_id for p in participants], message, context, question)
+        )
 
         # Return immediately, responses will be streamed
         return {
@@ -24,6 +24,8 @@ from sqlalchemy import or_, and_, func, desc, text
 
 from .database import Task, Agent, TaskContext, TaskUpdate, async_session, get_db
 from .providers.factory import get_model_provider
+from .providers.limiter import Priority, set_request_priority
+from .db.query_stats import set_query_caller
 from .tools.file_operations import FileOperations
 from .tools.shell_commands import ShellCommands
 from .task_management import ContextScaffold
@@ -87,14 +89,16 @@ class WorkerAgent:
 
     async def _task_loop(self):
         """Monitor tasks and process them"""
+        # Model calls from this loop queue behind interactive requests
+        set_request_priority(Priority.BACKGROUND)
+        # SQL statistics attribute its statements to this agent
+        set_query_caller(f"agent {self.name}")
         while self.running:
             try:
-                # Get database session
-                db_gen = get_db()
-                db = await anext(db_gen)
-
-                # Look for assigned tasks
-                await self._process_assigned_tasks(db)
+                # Get a database session for this pass; it is closed before sleeping
+                async with async_session() as db:
+                    # Look for assigned tasks
+                    await self._process_assigned_tasks(db)
 
                 # Sleep before next check
                 await asyncio.sleep(30)
@@ -0,0 +1,139 @@
+"""
+Write-behind buffer for task progress writes
+
+The task processor writes a task_updates row or a progress bump several
+times per research query. Committing each one separately costs an fsync
+and a write lock every time, which slows down API readers of the same
+database. This module queues those writes and commits them together:
+1. Buffered writes are committed in one transaction per flush interval
+2. Synchronous writes (status transitions) commit immediately, after any
+   buffered writes, so ordering is preserved and the transition is durable
+3. Every commit logs how many statements it batched
+
+Commits go through the process's shared writer connection, so the buffers
+of concurrent task workers take turns instead of contending for the lock.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, List, Sequence, Tuple
+
+from app.db.sqlite import get_pool
+
+logger = logging.getLogger("write-behind")
+
+# Seconds between flushes of buffered writes
+TASK_UPDATE_FLUSH_INTERVAL = float(os.getenv("TASK_UPDATE_FLUSH_INTERVAL", "2"))
+
+Statement = Tuple[str, Sequence[Any]]
+
+
+class WriteBehindBuffer:
+    """Batches task database writes on a dedicated connection"""
+
+    def __init__(self, db_path: str, flush_interval: float = TASK_UPDATE_FLUSH_INTERVAL):
+        """
+        Initialize the buffer and start its flusher thread
+
+        Args:
+            db_path: Path of the SQLite database
+            flush_interval: Seconds between flushes of buffered writes
+        """
+        self.flush_interval = flush_interval
+        self.pool = get_pool(db_path)
+
+        self.pending: List[Statement] = []
+        self.commits = 0
+        self.statements = 0
+        self.last_batch_size = 0
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def write(self, sql: str, params: Sequence[Any] = ()) -> None:
+        """
+        Queue a statement for the next batched commit
+
+        Args:
+            sql: SQL statement
+            params: Statement parameters
+        """
+        with self._lock:
+            self.pending.append((sql, params))
+
+    def write_now(self, statements: List[Statement]) -> bool:
+        """
+        Commit statements immediately, after everything already queued
+
+        Args:
+            statements: (sql, params) pairs to run in one transaction
+
+        Returns:
+            bool: True if the statements were committed
+        """
+        with self._lock:
+            self._commit_pending()
+            return self._commit(statements)
+
+    def flush(self) -> bool:
+        """
+        Commit all queued statements now
+
+        Returns:
+            bool: True if the queued statements were committed (or none were queued)
+        """
+        with self._lock:
+            return self._commit_pending()
+
+    def close(self) -> None:
+        """Stop the flusher thread and commit what is queued"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout=self.flush_interval + 5)
+        with self._lock:
+            self._commit_pending()
+
+    def _flush_loop(self) -> None:
+        """Periodically commit queued statements until closed"""
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing buffered task writes: {e}")
+
+    def _commit_pending(self) -> bool:
+        """Commit the queued statements; must be called with the lock held"""
+        if not self.pending:
+            return True
+        batch, self.pending = self.pending, []
+        return self._commit(batch)
+
+    def _commit(self, statements: List[Statement]) -> bool:
+        """Run statements in one transaction; must be called with the lock held"""
+        if not statements:
+            return True
+
+        started = time.monotonic()
+        try:
+            with self.pool.writer() as conn:
+                cursor = conn.cursor()
+                for sql, params in statements:
+                    cursor.execute(sql, params)
+        except sqlite3.Error as e:
+            logger.error(f"Error committing batch of {len(statements)} task writes: {e}")
+            return False
+
+        self.commits += 1
+        self.statements += len(statements)
+        self.last_batch_size = len(statements)
+        logger.info(
+            f"Committed {len(statements)} statement(s) in one transaction "
+            f"({(time.monotonic() - started) * 1000:.1f} ms, {self.statements} in {self.commits} commits so far)"
+        )
+        return True
@@ -19,8 +19,21 @@ CONFIG = {
     'model_providers': {
         'ollama': {
             'type': 'ollama',
-            'base_url': 'http://192.168.0.77:11434',
+            # One line per Ollama server; requests go to the least-loaded healthy one
+            'endpoints': [
+                'http://192.168.0.77:11434',
+            ],
+            'health_check_interval': 15,  # Seconds between /api/tags probes
+            'failure_threshold': 3,  # Consecutive failures before an endpoint is taken out
+            'circuit_reset_timeout': 30,  # Seconds before a failed endpoint gets a trial request
+            'preload_models': [  # Loaded at startup and kept loaded
+                'deepseek-coder-v2:16b'
+            ],
+            'pinned_keep_alive': '2h',  # keep_alive of pinned and frequently used models
+            'context_windows': {},  # num_ctx per model, e.g. {'deepseek-coder-v2:16b': 16384}; unlisted models use Ollama's default
             'timeout': 120,  # Increased timeout for larger model
+            'max_connections': 20,  # Pooled keep-alive connections
+            'keepalive_timeout': 60,
             'supported_models': [
                 'deepseek-coder-v2:16b'
             ]
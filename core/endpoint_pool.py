@@ -0,0 +1,318 @@
+"""
+Endpoint Pool
+
+This module manages the model server endpoints behind one provider: it
+probes each endpoint's health, model list and loaded models in the
+background, routes each request to the endpoint with the fewest
+outstanding requests (preferring endpoints that already have the model in
+memory), and takes failing endpoints out of rotation with a circuit
+breaker.
+"""
+
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one endpoint.
+
+    Closed: requests flow. After failure_threshold consecutive failures
+    it opens and rejects requests for reset_timeout seconds, then lets a
+    single trial request through (half-open); the trial closes the
+    breaker again on success or reopens it on failure.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the breaker
+            reset_timeout: Seconds the breaker stays open before a trial
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+    def allows_request(self) -> bool:
+        """
+        Check whether a request may be sent now.
+
+        Returns:
+            True if the breaker is closed or ready for a trial request
+        """
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self.trial_in_flight = False
+        return self.state == self.HALF_OPEN and not self.trial_in_flight
+
+    def on_request(self):
+        """
+        Record that a request was sent.
+        """
+        if self.state == self.HALF_OPEN:
+            self.trial_in_flight = True
+
+    def record_success(self):
+        """
+        Record a successful request.
+        """
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        """
+        Record a failed request.
+        """
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class Endpoint:
+    """
+    One model server and the provider instance that talks to it.
+    """
+
+    def __init__(self, base_url: str, provider: Any, breaker: CircuitBreaker):
+        """
+        Initialize the endpoint.
+
+        Args:
+            base_url: Endpoint base URL
+            provider: Provider instance bound to this endpoint
+            breaker: Circuit breaker of the endpoint
+        """
+        self.base_url = base_url
+        self.provider = provider
+        self.breaker = breaker
+        self.outstanding = 0
+        self.healthy = True
+        self.models: Optional[Set[str]] = None
+        self.loaded: Set[str] = set()
+        self.last_probe: Optional[float] = None
+        self.probe_latency: Optional[float] = None
+
+    def serves(self, model: str) -> bool:
+        """
+        Check whether the endpoint has a model.
+
+        Args:
+            model: Model identifier
+
+        Returns:
+            True if the model was listed, or the endpoint was not probed yet
+        """
+        return self.models is None or model in self.models
+
+    def resident(self, model: str) -> bool:
+        """
+        Check whether a model is loaded in the endpoint's memory.
+
+        Args:
+            model: Model identifier
+
+        Returns:
+            True if the last /api/ps probe or a recent request saw it loaded
+        """
+        return model in self.loaded
+
+    def available(self) -> bool:
+        """
+        Check whether the endpoint can take a request.
+
+        Returns:
+            True if healthy and the circuit breaker allows a request
+        """
+        return self.healthy and self.breaker.allows_request()
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Get the endpoint's routing state.
+
+        Returns:
+            Endpoint status
+        """
+        return {
+            'base_url': self.base_url,
+            'healthy': self.healthy,
+            'circuit': self.breaker.state,
+            'outstanding': self.outstanding,
+            'models': sorted(self.models) if self.models is not None else None,
+            'loaded': sorted(self.loaded),
+            'probe_latency': self.probe_latency,
+        }
+
+
+class EndpointPool:
+    """
+    Endpoints of one provider, with health probes and least-loaded routing.
+    """
+
+    def __init__(self,
+                 name: str,
+                 endpoints: List[Endpoint],
+                 health_check_interval: float = 15.0,
+                 probe_timeout: float = 5.0,
+                 load_penalty: float = 2.0):
+        """
+        Initialize the endpoint pool.
+
+        Args:
+            name: Provider name
+            endpoints: Endpoints in the pool
+            health_check_interval: Seconds between background probes
+            probe_timeout: Seconds before a probe counts as failed
+            load_penalty: Outstanding requests an endpoint that has to load
+                the model is charged, compared with one that has it loaded
+        """
+        self.name = name
+        self.endpoints = endpoints
+        self.health_check_interval = health_check_interval
+        self.probe_timeout = probe_timeout
+        self.load_penalty = load_penalty
+        self._health_task: Optional[asyncio.Task] = None
+
+    def candidates(self, model: str) -> List[Endpoint]:
+        """
+        Get the endpoints that can serve a model, least loaded first.
+
+        Endpoints known to have the model come before endpoints that were
+        not probed yet; if no endpoint lists the model, every available
+        endpoint is tried (Ollama may still pull it). An endpoint that would
+        have to load the model counts load_penalty extra requests.
+
+        Args:
+            model: Model identifier
+
+        Returns:
+            Available endpoints in routing order
+        """
+        available = [endpoint for endpoint in self.endpoints if endpoint.available()]
+        serving = [endpoint for endpoint in available if endpoint.serves(model)] or available
+        return sorted(serving, key=lambda endpoint: (
+            endpoint.models is None,
+            endpoint.outstanding + (0 if endpoint.resident(model) else self.load_penalty)
+        ))
+
+    @asynccontextmanager
+    async def track(self, endpoint: Endpoint) -> AsyncIterator[Endpoint]:
+        """
+        Count a request against an endpoint and feed its outcome to the breaker.
+
+        Args:
+            endpoint: Endpoint handling the request
+
+        Yields:
+            The endpoint
+        """
+        endpoint.outstanding += 1
+        endpoint.breaker.on_request()
+        try:
+            yield endpoint
+        except asyncio.CancelledError:
+            # No verdict on the endpoint; let another request be the trial
+            endpoint.breaker.trial_in_flight = False
+            raise
+        except Exception:
+            endpoint.breaker.record_failure()
+            raise
+        else:
+            endpoint.breaker.record_success()
+        finally:
+            endpoint.outstanding -= 1
+
+    async def probe(self, endpoint: Endpoint):
+        """
+        Probe an endpoint's health and model list.
+
+        Args:
+            endpoint: Endpoint to probe
+        """
+        started = time.monotonic()
+        try:
+            models = await asyncio.wait_for(endpoint.provider.list_models(), self.probe_timeout)
+        except Exception as e:
+            if endpoint.healthy:
+                logger.warning(f"Endpoint {endpoint.base_url} of {self.name} failed its health check: {e}")
+            endpoint.healthy = False
+        else:
+            if not endpoint.healthy:
+                logger.info(f"Endpoint {endpoint.base_url} of {self.name} is healthy again")
+            endpoint.healthy = True
+            endpoint.models = {model.get('name') or model.get('id') for model in models if isinstance(model, dict)}
+            if hasattr(endpoint.provider, 'list_running_models'):
+                try:
+                    running = await asyncio.wait_for(endpoint.provider.list_running_models(), self.probe_timeout)
+                    endpoint.loaded = {model.get('name') for model in running if isinstance(model, dict)}
+                except Exception as e:
+                    logger.warning(f"Could not list loaded models of {endpoint.base_url}: {e}")
+            endpoint.probe_latency = round(time.monotonic() - started, 4)
+        endpoint.last_probe = time.time()
+
+    async def probe_all(self):
+        """
+        Probe every endpoint concurrently.
+        """
+        await asyncio.gather(*(self.probe(endpoint) for endpoint in self.endpoints))
+
+    async def _health_loop(self):
+        """
+        Probe the endpoints until cancelled.
+        """
+        while True:
+            try:
+                await self.probe_all()
+            except Exception as e:
+                logger.error(f"Error probing endpoints of {self.name}: {e}")
+            await asyncio.sleep(self.health_check_interval)
+
+    def start(self):
+        """
+        Start the background health checks.
+        """
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def stop(self):
+        """
+        Stop the background health checks and close the endpoints' connections.
+        """
+        task, self._health_task = self._health_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        for endpoint in self.endpoints:
+            await endpoint.provider.close()
+
+    def get_status(self) -> List[Dict[str, Any]]:
+        """
+        Get the routing state of every endpoint.
+
+        Returns:
+            Endpoint statuses
+        """
+        return [endpoint.get_status() for endpoint in self.endpoints]
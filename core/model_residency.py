@@ -0,0 +1,168 @@
+"""
+Model Residency
+
+This module keeps models loaded on the Ollama endpoints of a pool, so
+requests do not pay for a multi-second model load every time routing
+switches models: configured models are preloaded at startup, pinned and
+frequently used models are kept in memory with keep_alive, and the time
+spent loading models is tracked apart from generation time.
+"""
+
+import time
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from core.endpoint_pool import Endpoint, EndpointPool
+
+logger = logging.getLogger(__name__)
+
+# A load_duration above this many seconds means the model was not resident
+LOAD_THRESHOLD = 0.5
+
+class ResidencyManager:
+    """
+    Residency manager for the endpoints of one pool.
+    """
+
+    def __init__(self,
+                 pool: EndpointPool,
+                 preload_models: Optional[List[str]] = None,
+                 pinned_models: Optional[List[str]] = None,
+                 keep_alive: Optional[str] = None,
+                 pinned_keep_alive: str = '2h',
+                 hot_threshold: int = 5,
+                 hot_window: float = 600.0):
+        """
+        Initialize the residency manager.
+
+        Args:
+            pool: Endpoint pool whose models are managed
+            preload_models: Models loaded at startup
+            pinned_models: Models always kept loaded for pinned_keep_alive
+            keep_alive: keep_alive of other requests (None for Ollama's default)
+            pinned_keep_alive: keep_alive of pinned and hot models
+            hot_threshold: Requests within hot_window that make a model hot
+            hot_window: Seconds of request history considered
+        """
+        self.pool = pool
+        self.preload_models = preload_models or []
+        self.pinned_models = set(pinned_models or []) | set(self.preload_models)
+        self.keep_alive = keep_alive
+        self.pinned_keep_alive = pinned_keep_alive
+        self.hot_threshold = hot_threshold
+        self.hot_window = hot_window
+        self._uses: Dict[str, Deque[float]] = {}
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def is_hot(self, model: str) -> bool:
+        """
+        Check whether a model is used often enough to keep loaded.
+
+        Args:
+            model: Model identifier
+
+        Returns:
+            True if the model had hot_threshold requests within hot_window
+        """
+        uses = self._uses.get(model)
+        if not uses:
+            return False
+        cutoff = time.monotonic() - self.hot_window
+        while uses and uses[0] < cutoff:
+            uses.popleft()
+        return len(uses) >= self.hot_threshold
+
+    def keep_alive_for(self, model: str) -> Optional[str]:
+        """
+        Record a request for a model and get the keep_alive to send with it.
+
+        Args:
+            model: Model identifier
+
+        Returns:
+            keep_alive value, or None for Ollama's default
+        """
+        self._uses.setdefault(model, deque()).append(time.monotonic())
+        if model in self.pinned_models or self.is_hot(model):
+            return self.pinned_keep_alive
+        return self.keep_alive
+
+    def record(self, endpoint: Endpoint, model: str, timings: Dict[str, float]):
+        """
+        Record the timings of a finished request.
+
+        Args:
+            endpoint: Endpoint that served the request
+            model: Model identifier
+            timings: Durations reported by Ollama, in seconds
+        """
+        endpoint.loaded.add(model)
+
+        stats = self.stats.setdefault(model, {
+            'requests': 0, 'loads': 0, 'load_seconds': 0.0, 'generation_seconds': 0.0,
+        })
+        stats['requests'] += 1
+        load_seconds = timings.get('load_seconds', 0.0)
+        if load_seconds > LOAD_THRESHOLD:
+            stats['loads'] += 1
+            stats['load_seconds'] += load_seconds
+            logger.info(f"Model {model} took {load_seconds:.1f}s to load on {endpoint.base_url}")
+        stats['generation_seconds'] += timings.get('prompt_eval_seconds', 0.0) + timings.get('eval_seconds', 0.0)
+
+    def _placement(self, model: str) -> Optional[Endpoint]:
+        """
+        Choose the endpoint a model is preloaded on.
+
+        Args:
+            model: Model identifier
+
+        Returns:
+            The endpoint that has it loaded already, or the one with the
+            fewest loaded models, or None if no endpoint can take it
+        """
+        endpoints = self.pool.candidates(model)
+        if not endpoints:
+            return None
+        for endpoint in endpoints:
+            if endpoint.resident(model):
+                return endpoint
+        return min(endpoints, key=lambda endpoint: len(endpoint.loaded))
+
+    async def warm_up(self):
+        """
+        Preload the configured models.
+        """
+        if not self.preload_models:
+            return
+
+        await self.pool.probe_all()
+
+        for model in self.preload_models:
+            endpoint = self._placement(model)
+            if endpoint is None:
+                logger.warning(f"No endpoint available to preload model {model}")
+                continue
+            if endpoint.resident(model):
+                logger.info(f"Model {model} is already loaded on {endpoint.base_url}")
+                continue
+
+            try:
+                timings = await endpoint.provider.load_model(model, keep_alive=self.pinned_keep_alive)
+                self.record(endpoint, model, timings)
+                logger.info(f"Preloaded model {model} on {endpoint.base_url}")
+            except Exception as e:
+                logger.error(f"Error preloading model {model} on {endpoint.base_url}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get model load and generation times per model.
+
+        Returns:
+            Residency statistics
+        """
+        return {
+            'pinned': sorted(self.pinned_models),
+            'hot': sorted(model for model in self._uses if self.is_hot(model)),
+            'models': {model: dict(stats) for model, stats in self.stats.items()},
+        }
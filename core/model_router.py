@@ -5,11 +5,15 @@ This module is responsible for routing requests to appropriate models
 based on task requirements and agent assignments.
 """
 
+import asyncio
 import logging
 import random
-from typing import Dict, List, Optional, Any
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
 
+from utils.concurrency import pipelined
 from models.agent import Agent
+from core.endpoint_pool import CircuitBreaker, Endpoint, EndpointPool
+from core.model_residency import ResidencyManager
 
 logger = logging.getLogger(__name__)
 
@@ -27,24 +31,146 @@ class ModelRouter:
         """
         self.model_providers_config = model_providers_config
         self.model_providers = {}
+        self.endpoint_pools: Dict[str, EndpointPool] = {}
+        self.residency: Dict[str, ResidencyManager] = {}
+        self._warm_up_tasks: List[asyncio.Task] = []
         self._initialize_model_providers()
         logger.info("Model Router initialized")
 
     def _initialize_model_providers(self):
         """
         Initialize model providers based on configuration.
+
+        A provider with an 'endpoints' list gets one provider instance per
+        endpoint, all in one endpoint pool; otherwise its 'base_url' is a
+        pool of one.
         """
         for provider_name, provider_config in self.model_providers_config.items():
             provider_type = provider_config.get('type')
 
             if provider_type == 'ollama':
-                from services.model_providers.ollama import OllamaProvider
-                self.model_providers[provider_name] = OllamaProvider(provider_config)
+                from services.model_providers.ollama import OllamaProvider as provider_class
             elif provider_type == 'openai':
-                from services.model_providers.openai import OpenAIProvider
-                self.model_providers[provider_name] = OpenAIProvider(provider_config)
+                from services.model_providers.openai import OpenAIProvider as provider_class
             else:
                 logger.warning(f"Unknown model provider type: {provider_type}")
+                continue
+
+            endpoints = []
+            for base_url in provider_config.get('endpoints') or [provider_config.get('base_url')]:
+                endpoint_config = dict(provider_config, base_url=base_url) if base_url else provider_config
+                provider = provider_class(endpoint_config)
+                breaker = CircuitBreaker(
+                    failure_threshold=provider_config.get('failure_threshold', 3),
+                    reset_timeout=provider_config.get('circuit_reset_timeout', 30)
+                )
+                endpoints.append(Endpoint(provider.base_url, provider, breaker))
+
+            self.model_providers[provider_name] = endpoints[0].provider
+            self.endpoint_pools[provider_name] = EndpointPool(
+                provider_name,
+                endpoints,
+                health_check_interval=provider_config.get('health_check_interval', 15),
+                probe_timeout=provider_config.get('probe_timeout', 5),
+                load_penalty=provider_config.get('load_penalty', 2)
+            )
+
+            if provider_type == 'ollama':
+                self.residency[provider_name] = ResidencyManager(
+                    self.endpoint_pools[provider_name],
+                    preload_models=provider_config.get('preload_models'),
+                    pinned_models=provider_config.get('pinned_models'),
+                    keep_alive=provider_config.get('keep_alive'),
+                    pinned_keep_alive=provider_config.get('pinned_keep_alive', '2h'),
+                    hot_threshold=provider_config.get('hot_threshold', 5),
+                    hot_window=provider_config.get('hot_window', 600)
+                )
+
+    async def start(self):
+        """
+        Start the background health checks of the endpoint pools and preload
+        the configured models.
+        """
+        for pool in self.endpoint_pools.values():
+            pool.start()
+
+        for residency in self.residency.values():
+            self._warm_up_tasks.append(asyncio.create_task(residency.warm_up()))
+
+    async def close(self):
+        """
+        Stop the health checks and close the model providers' pooled connections.
+        """
+        for task in self._warm_up_tasks:
+            task.cancel()
+        self._warm_up_tasks = []
+
+        for provider_name, pool in self.endpoint_pools.items():
+            try:
+                await pool.stop()
+            except Exception as e:
+                logger.error(f"Error closing model provider {provider_name}: {e}")
+
+    def get_endpoint_status(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the routing state of every endpoint.
+
+        Returns:
+            Endpoint statuses per provider
+        """
+        return {name: pool.get_status() for name, pool in self.endpoint_pools.items()}
+
+    def get_residency_stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get model load and generation times per provider and model.
+
+        Returns:
+            Residency statistics per provider
+        """
+        return {name: residency.get_stats() for name, residency in self.residency.items()}
+
+    async def _generate(self, provider_name: str, model: str, **kwargs) -> str:
+        """
+        Generate text on the least-loaded available endpoint of a provider.
+
+        If the endpoint fails, the request moves on to the next one. Ollama
+        requests carry the keep_alive chosen by the residency manager, which
+        also records how long the model took to load.
+
+        Args:
+            provider_name: Provider name
+            model: Model identifier
+            **kwargs: Generation arguments
+
+        Returns:
+            Model response
+        """
+        pool = self.endpoint_pools[provider_name]
+        endpoints = pool.candidates(model)
+
+        if not endpoints:
+            raise RuntimeError(f"No available endpoint for model {model} via provider {provider_name}")
+
+        residency = self.residency.get(provider_name)
+        if residency:
+            kwargs['keep_alive'] = residency.keep_alive_for(model)
+
+        last_error = None
+        for endpoint in endpoints:
+            try:
+                async with pool.track(endpoint):
+                    if not residency:
+                        return await endpoint.provider.generate(model=model, **kwargs)
+
+                    timings: Dict[str, float] = {}
+                    response = await endpoint.provider.generate(model=model, timings=timings, **kwargs)
+                    residency.record(endpoint, model, timings)
+                    return response
+            except Exception as e:
+                logger.warning(f"Endpoint {endpoint.base_url} failed for model {model}: {e}")
+                last_error = e
+
+        raise last_error
 
     async def route_request(self,
                            prompt: str,
@@ -80,12 +206,11 @@ class ModelRouter:
             logger.error(f"No provider found for model: {model}")
             raise ValueError(f"No provider found for model: {model}")
 
-        provider = self.model_providers[provider_name]
-
         logger.info(f"Routing request to model {model} via provider {provider_name}")
 
         try:
-            response = await provider.generate(
+            response = await self._generate(
+                provider_name,
                 model=model,
                 prompt=prompt,
                 system_prompt=system_prompt,
@@ -119,6 +244,35 @@ class ModelRouter:
 
             raise
 
+    async def generate_many(self,
+                            requests: List[Dict[str, Any]],
+                            max_concurrency: Optional[int] = None
+                            ) -> AsyncGenerator[Tuple[int, Optional[str], Optional[Exception]], None]:
+        """
+        Route many independent requests, pipelined across the endpoint pools.
+
+        Up to max_concurrency requests are in flight at once; each is routed
+        like route_request, so they spread over the least-loaded endpoints.
+        Results are yielded as they finish rather than in request order, and
+        a failed request yields its error instead of failing the batch.
+
+        Args:
+            requests: Keyword arguments of route_request for each request
+            max_concurrency: Requests in flight at once (defaults to two per
+                endpoint)
+
+        Yields:
+            Index of the request, and its response or its error
+        """
+        if max_concurrency is None:
+            max_concurrency = 2 * sum(len(pool.endpoints) for pool in self.endpoint_pools.values())
+        results = pipelined(lambda request: self.route_request(**request), requests, max_concurrency)
+        try:
+            async for result in results:
+                yield result
+        finally:
+            await results.aclose()
+
     def _get_provider_for_model(self, model: str) -> Optional[str]:
         """
         Get the provider for a model.
@@ -182,12 +336,11 @@ class ModelRouter:
                 logger.warning(f"No provider found for fallback model: {fallback_model}")
                 continue
 
-            provider = self.model_providers[provider_name]
-
             logger.info(f"Trying fallback model {fallback_model} via provider {provider_name}")
 
             try:
-                response = await provider.generate(
+                response = await self._generate(
+                    provider_name,
                     model=fallback_model,
                     prompt=prompt,
                     system_prompt=system_prompt,
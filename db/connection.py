@@ -9,6 +9,8 @@ import sqlite3
 import aiosqlite
 from typing import Optional
 
+from app.db.sqlite import tune_async_connection
+
 logger = logging.getLogger(__name__)
 
 class DatabaseConnection:
@@ -34,6 +36,7 @@ class DatabaseConnection:
         try:
             self.connection = await aiosqlite.connect(self.database_url)
             self.connection.row_factory = sqlite3.Row
+            await tune_async_connection(self.connection)
             logger.info(f"Connected to database: {self.database_url}")
         except Exception as e:
             logger.error(f"Error connecting to database: {e}")
@@ -23,7 +23,7 @@ from core.output_processor import OutputProcessor
 from db.connection import get_db_connection
 
 # Import API routes
-from api.routes import tasks, agents, discussions, outputs
+from api.routes import tasks, agents, discussions, outputs, models
 
 # Import utilities
 from utils.logging import setup_logging
@@ -54,6 +54,7 @@ async def lifespan(app: FastAPI):
     task_manager = TaskManager(db_connection)
     agent_manager = AgentManager(db_connection)
     model_router = ModelRouter(config.model_providers)
+    await model_router.start()
     prompt_manager = PromptManager(config.prompt_templates)
     output_processor = OutputProcessor(db_connection)
     
@@ -70,6 +71,7 @@ async def lifespan(app: FastAPI):
     
     # Cleanup on shutdown
     logger.info("Shutting down application...")
+    await model_router.close()
     db_connection.close()
     logger.info("Application shutdown complete")
 
@@ -85,6 +87,7 @@ app.include_router(tasks.router, prefix="/api/tasks", tags=["tasks"])
 app.include_router(agents.router, prefix="/api/agents", tags=["agents"])
 app.include_router(discussions.router, prefix="/api/discussions", tags=["discussions"])
 app.include_router(outputs.router, prefix="/api/outputs", tags=["outputs"])
+app.include_router(models.router, prefix="/api/models", tags=["models"])
 
 # Add health check endpoint
 @app.get("/health")
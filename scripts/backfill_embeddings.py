@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Embedding Backfill Script
+
+This script fills in the missing embeddings of memories, code snippets and
+references, using Ollama's batch embeddings endpoint.
+"""
+
+import os
+import sys
+import asyncio
+import logging
+import argparse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import async_session, backfill_embeddings
+from app.providers.embeddings import EMBEDDING_MODEL, embedding_cache
+from app.providers.ollama import OllamaProvider
+
+# Setup logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+async def run(endpoint, model, batch_size):
+    """
+    Backfill the embeddings.
+
+    Args:
+        endpoint: Ollama endpoint
+        model: Embedding model
+        batch_size: Rows embedded per batch
+    """
+    provider = OllamaProvider(endpoint=endpoint)
+    try:
+        async with async_session() as db:
+            counts = await backfill_embeddings(db, provider, model=model, batch_size=batch_size)
+    finally:
+        await provider.aclose()
+
+    for table, count in counts.items():
+        logger.info(f"Embedded {count} rows of {table}")
+    logger.info(f"Embedding cache: {embedding_cache.get_stats()}")
+
+def main():
+    """
+    Main function.
+    """
+    parser = argparse.ArgumentParser(description='Backfill missing embeddings')
+    parser.add_argument('--endpoint', help='Ollama endpoint (defaults to OLLAMA_ENDPOINT)')
+    parser.add_argument('--model', default=EMBEDDING_MODEL, help='Embedding model')
+    parser.add_argument('--batch-size', type=int, default=256, help='Rows embedded per batch')
+    args = parser.parse_args()
+
+    asyncio.run(run(args.endpoint, args.model, args.batch_size))
+
+if __name__ == '__main__':
+    main()
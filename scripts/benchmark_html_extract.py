@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+HTML Extraction Benchmark
+
+This script times the research page text extractors on the saved HTML
+fixtures in tests/fixtures/html, next to the original BeautifulSoup
+html.parser extraction they replace.
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+import statistics
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.html_extractor import EXTRACTORS, HTML_EXTRACT_MAX_CHARS, get_extractor
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "fixtures", "html")
+
+
+def baseline_extract(html):
+    """Original extraction: full html.parser soup, then line-by-line cleanup"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.extract()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return '\n'.join(chunk for chunk in chunks if chunk)[:HTML_EXTRACT_MAX_CHARS]
+
+
+def time_extractor(extract, html, repeat):
+    """Run an extractor repeatedly and return (median ms, output chars)"""
+    timings = []
+    text = ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = extract(html)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), len(text)
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark HTML text extraction")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Directory of .html fixtures")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per extractor and fixture")
+    parser.add_argument("--no-baseline", action="store_true", help="Skip the BeautifulSoup baseline")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, "*.html")))
+    if not paths:
+        print(f"No HTML fixtures found in {args.fixtures}")
+        return 1
+
+    extractors = {}
+    if not args.no_baseline:
+        extractors["bs4 (baseline)"] = baseline_extract
+    for name in EXTRACTORS:
+        extractors[name] = get_extractor(name).extract
+
+    print(f"{'fixture':<24} {'size':>9} {'extractor':<16} {'median ms':>10} {'chars':>7} {'speedup':>8}")
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+
+        baseline_ms = None
+        for name, extract in extractors.items():
+            median_ms, chars = time_extractor(extract, html, args.repeat)
+            if baseline_ms is None:
+                baseline_ms = median_ms
+            print(
+                f"{os.path.basename(path):<24} {len(html):>9} {name:<16} "
+                f"{median_ms:>10.2f} {chars:>7} {baseline_ms / median_ms:>7.1f}x"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Provider HTTP Benchmark
+
+This script measures the per-request HTTP overhead of the model providers:
+a fresh httpx.AsyncClient per request (the old behaviour) against the
+provider's pooled client. By default it runs against a local stub of the
+Ollama generate endpoint, so only connection handling is measured; pass
+--endpoint to measure a real Ollama server instead.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.providers.ollama import OllamaProvider
+
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """Minimal keep-alive capable stand-in for /api/generate"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; like Go's net/http (and
+    # so Ollama), send them immediately instead of waiting on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"response": "ok", "done": True}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server():
+    """Start the stub server on a free port and return its base URL"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+
+async def fresh_client_request(provider):
+    """One request the old way: a new client, and connection, per call"""
+    async with httpx.AsyncClient(timeout=provider.request_timeout) as client:
+        response = await client.post(
+            f"{provider.endpoint}/api/generate",
+            json={"model": provider.model, "prompt": "ping", "stream": False}
+        )
+        response.raise_for_status()
+
+
+async def pooled_client_request(provider):
+    """One request on the provider's pooled client"""
+    response = await provider.get_client().post(
+        f"{provider.endpoint}/api/generate",
+        json={"model": provider.model, "prompt": "ping", "stream": False}
+    )
+    response.raise_for_status()
+
+
+async def measure(request, provider, count):
+    """Time count sequential requests, returning per-request milliseconds"""
+    timings = []
+    for _ in range(count):
+        started = time.perf_counter()
+        await request(provider)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def run(endpoint, model, count):
+    """Run both variants and print a summary"""
+    provider = OllamaProvider(endpoint=endpoint, model=model)
+    try:
+        # Warm up DNS, imports and the server before timing anything
+        await fresh_client_request(provider)
+        await pooled_client_request(provider)
+
+        print(f"{'client':<10} {'requests':>8} {'mean ms':>9} {'median ms':>10} {'p95 ms':>8}")
+        for name, request in (("fresh", fresh_client_request), ("pooled", pooled_client_request)):
+            timings = sorted(await measure(request, provider, count))
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"{name:<10} {count:>8} {statistics.mean(timings):>9.2f} {statistics.median(timings):>10.2f} {p95:>8.2f}")
+    finally:
+        await provider.aclose()
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark provider HTTP client overhead")
+    parser.add_argument("--endpoint", help="Ollama base URL (defaults to a local stub server)")
+    parser.add_argument("--model", default="gemma3:1b", help="Model name sent with each request")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per variant")
+    args = parser.parse_args()
+
+    endpoint = args.endpoint or start_stub_server()
+    asyncio.run(run(endpoint, args.model, args.requests))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
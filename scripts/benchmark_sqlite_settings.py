@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+SQLite Read Throughput Benchmark
+
+This script measures how many reads per second API-style readers get while
+a task-processor-style writer commits progress updates continuously: with
+sqlite3's default settings (rollback journal, full sync) against the
+shared factory in app/db/sqlite.py (WAL, synchronous=NORMAL, busy_timeout).
+Each variant opens a connection per read, as API requests do, and runs on
+its own scratch copy of a tasks table.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.sqlite import connect
+
+SCHEMA = """
+CREATE TABLE tasks (
+    id INTEGER PRIMARY KEY,
+    status TEXT,
+    progress INTEGER,
+    updated_at REAL
+)
+"""
+
+
+def create_database(path, rows):
+    """Create a scratch tasks table with rows tasks"""
+    conn = sqlite3.connect(path)
+    conn.execute(SCHEMA)
+    conn.executemany(
+        "INSERT INTO tasks (id, status, progress, updated_at) VALUES (?, 'in_progress', 0, ?)",
+        ((i, time.time()) for i in range(rows))
+    )
+    conn.commit()
+    conn.close()
+
+
+class DefaultAccess:
+    """sqlite3 defaults: a fresh connection per read, one writer connection"""
+
+    def __init__(self, path):
+        self.path = path
+        self.write_conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+
+    def read(self, task_id):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            return conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        finally:
+            conn.close()
+
+    def write(self, task_id):
+        self.write_conn.execute(
+            "UPDATE tasks SET progress = progress + 1, updated_at = ? WHERE id = ?", (time.time(), task_id)
+        )
+        self.write_conn.commit()
+
+    def close(self):
+        self.write_conn.close()
+
+
+class TunedAccess:
+    """The shared factory: tuned connections in WAL mode"""
+
+    def __init__(self, path):
+        self.path = path
+        self.write_conn = connect(path, check_same_thread=False)
+
+    def read(self, task_id):
+        conn = connect(self.path, read_only=True)
+        try:
+            return conn.execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        finally:
+            conn.close()
+
+    def write(self, task_id):
+        self.write_conn.execute(
+            "UPDATE tasks SET progress = progress + 1, updated_at = ? WHERE id = ?", (time.time(), task_id)
+        )
+        self.write_conn.commit()
+
+    def close(self):
+        self.write_conn.close()
+
+
+def measure(access, rows, readers, duration):
+    """Run readers and one writer for duration seconds, returning (reads/s, writes/s, read errors)"""
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def reader(offset):
+        reads = errors = 0
+        task_id = offset
+        while not stop.is_set():
+            try:
+                access.read(task_id % rows)
+                reads += 1
+            except sqlite3.OperationalError:
+                errors += 1
+            task_id += 7
+        with lock:
+            counts["reads"] += reads
+            counts["errors"] += errors
+
+    def writer():
+        task_id = 0
+        while not stop.is_set():
+            access.write(task_id % rows)
+            counts["writes"] += 1
+            task_id += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return counts["reads"] / duration, counts["writes"] / duration, counts["errors"]
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark SQLite reads under concurrent writes")
+    parser.add_argument("--rows", type=int, default=10000, help="Rows in the scratch tasks table")
+    parser.add_argument("--readers", type=int, default=4, help="Concurrent reader threads")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per variant")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'access':<10} {'reads/s':>10} {'writes/s':>10} {'read errors':>12}")
+        for name in ("default", "tuned"):
+            path = os.path.join(directory, f"{name}.db")
+            create_database(path, args.rows)
+            access = DefaultAccess(path) if name == "default" else TunedAccess(path)
+            try:
+                reads, writes, errors = measure(access, args.rows, args.readers, args.duration)
+            finally:
+                access.close()
+            print(f"{name:<10} {reads:>10.0f} {writes:>10.0f} {errors:>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
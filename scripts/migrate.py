@@ -23,6 +23,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Indexes of the hot queries: (name, table, columns). The tables differ
+# between schemas, so an index is only created where its columns exist.
+HOT_QUERY_INDEXES = [
+    # Task queue: WHERE status = ? ORDER BY priority DESC, created_at
+    ('idx_tasks_status_priority_created', 'tasks', ('status', 'priority DESC', 'created_at')),
+    # Agent capacity and pre-assigned tasks: WHERE assigned_agent_id = ? AND status ...
+    ('idx_tasks_assigned_agent_status', 'tasks', ('assigned_agent_id', 'status')),
+    # Agent loops: WHERE assigned_to = ? AND status = ?
+    ('idx_tasks_assigned_to_status', 'tasks', ('assigned_to', 'status')),
+    # Task list pages: WHERE (updated_at, id) < cursor ORDER BY updated_at DESC, id DESC
+    ('idx_tasks_updated_id', 'tasks', ('updated_at', 'id')),
+    # Project tasks: WHERE project_id IN (...) ORDER BY updated_at DESC, id DESC
+    ('idx_tasks_project_updated', 'tasks', ('project_id', 'updated_at', 'id')),
+    # Subtasks of a task's context: WHERE parent_task_id = ?
+    ('idx_tasks_parent_task_id', 'tasks', ('parent_task_id',)),
+    # Task context: WHERE task_id = ? ORDER BY timestamp
+    ('idx_task_updates_task_timestamp', 'task_updates', ('task_id', 'timestamp')),
+    # Session history: WHERE session_id = ? ORDER BY timestamp
+    ('idx_messages_session_timestamp', 'messages', ('session_id', 'timestamp')),
+]
+
+# Single-column indexes made redundant by the composite ones above
+SUPERSEDED_INDEXES = ['idx_tasks_status', 'idx_tasks_assigned_agent_id']
+
 def table_exists(cursor, table_name):
     """
     Check if a table exists in the database.
@@ -40,6 +64,53 @@ def table_exists(cursor, table_name):
     )
     return cursor.fetchone() is not None
 
+def table_columns(cursor, table_name):
+    """
+    Get the column names of a table.
+
+    Args:
+        cursor: Database cursor
+        table_name: Table name
+
+    Returns:
+        Set of column names (empty if the table does not exist)
+    """
+    cursor.execute(f'PRAGMA table_info("{table_name}")')
+    return {row[1] for row in cursor.fetchall()}
+
+def create_hot_query_indexes(conn):
+    """
+    Create the indexes of the hot task, update and message queries.
+
+    Safe to run on a live database: existing indexes are kept, and an index
+    whose table or columns do not exist in this schema is skipped.
+
+    Args:
+        conn: Database connection
+
+    Returns:
+        Names of the indexes that apply to this schema
+    """
+    cursor = conn.cursor()
+    created = []
+
+    for name, table, columns in HOT_QUERY_INDEXES:
+        existing = table_columns(cursor, table)
+        if not all(column.split()[0] in existing for column in columns):
+            logger.info(f"Skipping index {name}: {table} has no column(s) {', '.join(columns)}")
+            continue
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({", ".join(columns)})')
+        created.append(name)
+
+    for name in SUPERSEDED_INDEXES:
+        cursor.execute(f'DROP INDEX IF EXISTS {name}')
+
+    # Give the query planner statistics for the new indexes
+    cursor.execute('ANALYZE')
+    conn.commit()
+    logger.info(f"Hot query indexes in place: {', '.join(created)}")
+    return created
+
 def create_tables(conn):
     """
     Create database tables.
@@ -130,9 +201,7 @@ def create_tables(conn):
     ''')
 
     # Create indexes
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority)')
-    cursor.execute('CREATE INDEX IF NOT EXISTS idx_tasks_assigned_agent_id ON tasks (assigned_agent_id)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_agents_status ON agents (status)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_agents_model ON agents (model)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_outputs_task_id ON outputs (task_id)')
@@ -151,10 +220,14 @@ def create_tables(conn):
     conn.commit()
     logger.info("Created database tables")
 
+    create_hot_query_indexes(conn)
+
 def main():
     """Main function."""
     parser = argparse.ArgumentParser(description='Database Migration Script')
     parser.add_argument('--config', type=str, default='default', help='Configuration to use')
+    parser.add_argument('--indexes-only', action='store_true',
+                        help='Only add the hot query indexes to the existing database, keeping its data')
     args = parser.parse_args()
 
     # Load configuration
@@ -164,8 +237,11 @@ def main():
     conn = sqlite3.connect(config.database_url)
 
     try:
-        # Create tables
-        create_tables(conn)
+        if args.indexes_only:
+            create_hot_query_indexes(conn)
+        else:
+            # Create tables
+            create_tables(conn)
         logger.info(f"Migration completed successfully: {config.database_url}")
     except Exception as e:
         logger.error(f"Error during migration: {e}")
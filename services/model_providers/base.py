@@ -0,0 +1,72 @@
+"""
+Pooled Provider Base
+
+This module provides the shared, long-lived HTTP session used by the model
+providers, so consecutive requests reuse keep-alive connections.
+"""
+
+import asyncio
+import logging
+import aiohttp
+from typing import Dict, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+class PooledProvider:
+    """Base class for providers that talk HTTP through one pooled session per event loop."""
+
+    def _init_pool(self, config: Dict[str, Any]):
+        """
+        Read the connection pool settings.
+
+        Args:
+            config: Provider configuration
+        """
+        self.max_connections = config.get('max_connections', 20)
+        self.max_connections_per_host = config.get('max_connections_per_host', 10)
+        self.keepalive_timeout = config.get('keepalive_timeout', 60)
+        # Pooled session of each event loop the provider is used from
+        self._sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the provider's pooled session, creating it on first use.
+
+        A session is tied to the event loop it was created on, so each loop
+        gets its own; sessions of loops that have since closed are dropped.
+
+        Returns:
+            Pooled client session
+        """
+        loop = asyncio.get_running_loop()
+        for closed_loop in [other for other in self._sessions if other.is_closed()]:
+            # Its connections went with the loop; nothing is left to close
+            del self._sessions[closed_loop]
+
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            session = self._sessions[loop] = aiohttp.ClientSession(connector=connector)
+        return session
+
+    async def close(self):
+        """
+        Close the pooled sessions and their connections.
+
+        The current loop's session is closed directly and a session of
+        another running loop is closed on that loop. A session of a stopped
+        loop cannot be closed from here and is dropped.
+        """
+        sessions, self._sessions = self._sessions, {}
+        loop = asyncio.get_running_loop()
+        for session_loop, session in sessions.items():
+            if session.closed:
+                continue
+            if session_loop is loop:
+                await session.close()
+            elif session_loop.is_running():
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), session_loop))
@@ -9,9 +9,11 @@ import json
 import aiohttp
 from typing import Dict, List, Optional, Any
 
+from services.model_providers.base import PooledProvider
+
 logger = logging.getLogger(__name__)
 
-class OllamaProvider:
+class OllamaProvider(PooledProvider):
     """Ollama provider class."""
     
     def __init__(self, config: Dict[str, Any]):
@@ -23,7 +25,11 @@ class OllamaProvider:
         """
         self.base_url = config.get('base_url', 'http://localhost:11434')
         self.timeout = config.get('timeout', 60)
+        self._init_pool(config)
         self.supported_models = config.get('supported_models', [])
+        # num_ctx per model; Ollama reloads a model whenever num_ctx changes,
+        # so a listed model is loaded and run with the same window
+        self.context_windows = config.get('context_windows', {})
         logger.info(f"Initialized Ollama provider with base URL: {self.base_url}")
     
     def supports_model(self, model: str) -> bool:
@@ -51,7 +57,9 @@ class OllamaProvider:
                       top_p: float = 1.0,
                       frequency_penalty: float = 0.0,
                       presence_penalty: float = 0.0,
-                      stop_sequences: Optional[List[str]] = None) -> str:
+                      stop_sequences: Optional[List[str]] = None,
+                      keep_alive: Optional[str] = None,
+                      timings: Optional[Dict[str, float]] = None) -> str:
         """
         Generate text using the model.
         
@@ -65,6 +73,9 @@ class OllamaProvider:
             frequency_penalty: Frequency penalty
             presence_penalty: Presence penalty
             stop_sequences: Optional stop sequences
+            keep_alive: How long Ollama keeps the model loaded afterwards (e.g. "30m", "-1")
+            timings: Optional dictionary that receives the load, prompt and
+                generation durations reported by Ollama, in seconds
             
         Returns:
             Generated text
@@ -89,23 +100,95 @@ class OllamaProvider:
         
         if stop_sequences:
             payload["options"]["stop"] = stop_sequences
+
+        if model in self.context_windows:
+            payload["options"]["num_ctx"] = self.context_windows[model]
+
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
         
         logger.info(f"Generating text with model {model}")
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, timeout=self.timeout) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"Error generating text: {error_text}")
-                        raise Exception(f"Error generating text: {error_text}")
-                    
-                    result = await response.json()
-                    return result.get('response', '')
+            session = self._get_session()
+            async with session.post(url, json=payload, timeout=self.timeout) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error(f"Error generating text: {error_text}")
+                    raise Exception(f"Error generating text: {error_text}")
+                
+                result = await response.json()
+                if timings is not None:
+                    timings.update(self._timings(result))
+                return result.get('response', '')
         except Exception as e:
             logger.error(f"Error generating text: {e}")
             raise
     
+    @staticmethod
+    def _timings(result: Dict[str, Any]) -> Dict[str, float]:
+        """
+        Convert Ollama's nanosecond durations to seconds.
+
+        Args:
+            result: Final generate response
+
+        Returns:
+            Load, prompt evaluation, generation and total durations
+        """
+        return {
+            'load_seconds': result.get('load_duration', 0) / 1e9,
+            'prompt_eval_seconds': result.get('prompt_eval_duration', 0) / 1e9,
+            'eval_seconds': result.get('eval_duration', 0) / 1e9,
+            'total_seconds': result.get('total_duration', 0) / 1e9,
+        }
+
+    async def load_model(self, model: str, keep_alive: Optional[str] = None) -> Dict[str, float]:
+        """
+        Load a model into memory without generating anything.
+
+        Args:
+            model: Model identifier
+            keep_alive: How long Ollama keeps the model loaded
+
+        Returns:
+            Durations reported by Ollama, in seconds
+        """
+        url = f"{self.base_url}/api/generate"
+
+        payload = {"model": model, "prompt": "", "stream": False}
+        if model in self.context_windows:
+            # Loaded with the window later requests send, or the first one reloads it
+            payload["options"] = {"num_ctx": self.context_windows[model]}
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+
+        session = self._get_session()
+        async with session.post(url, json=payload, timeout=self.timeout) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Error loading model {model}: {error_text}")
+
+            return self._timings(await response.json())
+
+    async def list_running_models(self) -> List[Dict[str, Any]]:
+        """
+        List the models currently loaded in memory.
+
+        Returns:
+            List of loaded models
+        """
+        url = f"{self.base_url}/api/ps"
+
+        session = self._get_session()
+        async with session.get(url, timeout=self.timeout) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Error listing running models: {error_text}")
+
+            result = await response.json()
+            return result.get('models', [])
+
     async def list_models(self) -> List[Dict[str, Any]]:
         """
         List available models.
@@ -116,15 +199,15 @@ class OllamaProvider:
         url = f"{self.base_url}/api/tags"
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=self.timeout) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"Error listing models: {error_text}")
-                        raise Exception(f"Error listing models: {error_text}")
-                    
-                    result = await response.json()
-                    return result.get('models', [])
+            session = self._get_session()
+            async with session.get(url, timeout=self.timeout) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error(f"Error listing models: {error_text}")
+                    raise Exception(f"Error listing models: {error_text}")
+                
+                result = await response.json()
+                return result.get('models', [])
         except Exception as e:
             logger.error(f"Error listing models: {e}")
             raise
@@ -9,9 +9,11 @@ import json
 import aiohttp
 from typing import Dict, List, Optional, Any
 
+from services.model_providers.base import PooledProvider
+
 logger = logging.getLogger(__name__)
 
-class OpenAIProvider:
+class OpenAIProvider(PooledProvider):
     """OpenAI provider class."""
     
     def __init__(self, config: Dict[str, Any]):
@@ -24,6 +26,7 @@ class OpenAIProvider:
         self.api_key = config.get('api_key')
         self.base_url = config.get('base_url', 'https://api.openai.com/v1')
         self.timeout = config.get('timeout', 60)
+        self._init_pool(config)
         self.supported_models = config.get('supported_models', [])
         
         if not self.api_key:
@@ -110,15 +113,15 @@ class OpenAIProvider:
         logger.info(f"Generating text with model {model}")
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, json=payload, timeout=self.timeout) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"Error generating text: {error_text}")
-                        raise Exception(f"Error generating text: {error_text}")
-                    
-                    result = await response.json()
-                    return result['choices'][0]['message']['content']
+            session = self._get_session()
+            async with session.post(url, headers=headers, json=payload, timeout=self.timeout) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error(f"Error generating text: {error_text}")
+                    raise Exception(f"Error generating text: {error_text}")
+                
+                result = await response.json()
+                return result['choices'][0]['message']['content']
         except Exception as e:
             logger.error(f"Error generating text: {e}")
             raise
@@ -137,15 +140,15 @@ class OpenAIProvider:
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, timeout=self.timeout) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"Error listing models: {error_text}")
-                        raise Exception(f"Error listing models: {error_text}")
-                    
-                    result = await response.json()
-                    return result.get('data', [])
+            session = self._get_session()
+            async with session.get(url, headers=headers, timeout=self.timeout) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    logger.error(f"Error listing models: {error_text}")
+                    raise Exception(f"Error listing models: {error_text}")
+                
+                result = await response.json()
+                return result.get('data', [])
         except Exception as e:
             logger.error(f"Error listing models: {e}")
             raise
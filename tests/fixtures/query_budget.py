@@ -0,0 +1,68 @@
+"""
+Query budget fixture.
+
+Counts the SQL statements an engine executes inside a block and fails the
+test when a listing needs more than its fixed budget. A listing that
+queries per row passes with one row and fails with many, so tests check
+the budget with several row counts.
+"""
+
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import pytest
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """Statements executed on an engine while the counter is attached."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@contextmanager
+def count_queries(engine) -> Iterator[QueryCounter]:
+    """
+    Count the statements an engine executes inside the block.
+
+    Args:
+        engine: Engine or AsyncEngine
+
+    Yields:
+        QueryCounter: Counter of the block's statements
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    counter = QueryCounter()
+    event.listen(sync_engine, "before_cursor_execute", counter)
+    try:
+        yield counter
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", counter)
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Assert that a block stays within a number of SQL statements.
+
+    Usage:
+        with query_budget(engine, 2):
+            ...
+    """
+    @contextmanager
+    def check(engine, max_queries: int):
+        with count_queries(engine) as counter:
+            yield counter
+        assert counter.count <= max_queries, (
+            f"{counter.count} queries over a budget of {max_queries}:\n" + "\n".join(counter.statements)
+        )
+
+    return check
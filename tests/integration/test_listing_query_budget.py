@@ -0,0 +1,173 @@
+"""
+Query budget tests for the listings.
+
+Each listing runs against a small and a large data set and must stay within
+the same fixed number of SQL statements, so a per-row query fails the test.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from tests.fixtures.query_budget import query_budget  # noqa: F401 - pytest fixture
+
+ROW_COUNTS = [1, 25]
+
+
+@pytest.fixture
+def processor_session(tmp_path):
+    """Session factory on a scratch database with the app/db/models schema."""
+    from app.db.base import Base
+    import app.db.models  # noqa: F401 - registers the models on Base
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'processor.db'}")
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create())
+    yield engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def api_session(tmp_path):
+    """Session factory on a scratch database with the app/database.py schema."""
+    from app.database import Base
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'api.db'}")
+
+    async def create():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create())
+    yield engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+def seed_processor(session_factory, rows):
+    """Add rows busy agents, each with an assigned task."""
+    from app.db.models import Agent, Task
+
+    async def seed():
+        async with session_factory() as db:
+            for i in range(rows):
+                db.add(Agent(
+                    id=f"agent-{i}", name=f"Agent {i}", model="gemma3:1b", endpoint="http://localhost:11434",
+                    status="busy", min_complexity=1, max_complexity=10, workspace_path=f"/tmp/agent-{i}"
+                ))
+                db.add(Task(
+                    id=f"task-{i}", title=f"Task {i}", description="Description", complexity=5,
+                    status="build", assigned_agent_id=f"agent-{i}"
+                ))
+            await db.commit()
+
+    asyncio.run(seed())
+
+
+def seed_api(session_factory, rows):
+    """Add a project and a multi-agent session with rows tasks, updates and agents."""
+    from app.database import Agent, Session, Task, TaskUpdate
+
+    async def seed():
+        async with session_factory() as db:
+            started = datetime(2026, 1, 1)
+            db.add(Session(id="session", is_multi_agent=True))
+            db.add(Task(
+                id="project", title="Project", description="Description", status="pending",
+                created_by="user", task_type="project", updated_at=started
+            ))
+            for i in range(rows):
+                db.add(Agent(session_id="session", agent_index=i, name=f"Agent {i}", agent_id=f"agent-{i}"))
+                db.add(Task(
+                    id=f"task-{i}", title=f"Task {i}", description="Description", status="completed",
+                    created_by="user", task_type="development", project_id="project", session_id="session",
+                    assigned_to=f"agent_{i}", result="Result", completed_at=started,
+                    updated_at=started + timedelta(seconds=i)
+                ))
+                db.add(TaskUpdate(task_id=f"task-{i}", agent_id=f"agent-{i}", content="Update", timestamp=started))
+            await db.commit()
+
+    asyncio.run(seed())
+
+
+def api_client(session_factory):
+    """Test client of the job manager, project and multi-agent routers."""
+    from app.database import get_db
+    from app.job_manager_api import router as job_manager_router
+    from app.multi_agent import router as multi_agent_router
+    from app.project_api import router as project_router
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(job_manager_router)
+    app.include_router(project_router, prefix="/projects")
+    app.include_router(multi_agent_router)
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+
+@pytest.mark.parametrize('rows', ROW_COUNTS)
+def test_list_tasks_query_budget(processor_session, query_budget, rows):
+    from app.services.task_service import TaskService
+
+    engine, session_factory = processor_session
+    seed_processor(session_factory, rows)
+
+    async def list_tasks():
+        async with session_factory() as db:
+            return await TaskService(db).list_tasks(limit=50)
+
+    with query_budget(engine, 2):
+        tasks, total = asyncio.run(list_tasks())
+
+    assert total == rows
+    assert all(task["assigned_agent_name"] for task in tasks)
+
+
+@pytest.mark.parametrize('rows', ROW_COUNTS)
+def test_list_agents_query_budget(processor_session, query_budget, rows):
+    from app.services.agent_service import AgentService
+
+    engine, session_factory = processor_session
+    seed_processor(session_factory, rows)
+
+    async def list_agents():
+        async with session_factory() as db:
+            return await AgentService(db).list_agents(limit=50)
+
+    with query_budget(engine, 3):
+        agents, total = asyncio.run(list_agents())
+
+    assert total == rows
+    assert all(agent["current_task"] for agent in agents)
+
+
+@pytest.mark.parametrize('path, budget', [
+    ('/api/tasks', 1),
+    ('/api/projects', 1),
+    ('/api/agents', 1),
+    ('/projects/project/tasks', 2),
+    ('/projects/project/updates', 2),
+    ('/multi-agent/responses/session', 3),
+])
+@pytest.mark.parametrize('rows', ROW_COUNTS)
+def test_api_listing_query_budget(api_session, query_budget, rows, path, budget):
+    engine, session_factory = api_session
+    seed_api(session_factory, rows)
+    client = api_client(session_factory)
+
+    with query_budget(engine, budget):
+        response = client.get(path)
+
+    assert response.status_code == 200
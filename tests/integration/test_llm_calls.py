@@ -0,0 +1,134 @@
+"""
+Tests of the task processor's streaming LLM calls against a stub Ollama server.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import app.task_processor as task_processor
+from app import prompt_budget
+
+
+class StubOllama:
+    """Ollama /api/generate stub answering each request with a scripted chunked stream"""
+
+    def __init__(self, script):
+        """
+        Args:
+            script: Function (request body) -> list of lines, or of seconds to stall
+        """
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Like Ollama, each line is sent as its own HTTP chunk
+            protocol_version = 'HTTP/1.1'
+
+            def write_chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b'\r\n')
+                self.wfile.flush()
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                stub.requests.append(body)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/x-ndjson')
+                self.send_header('Transfer-Encoding', 'chunked')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                try:
+                    for item in script(body):
+                        if isinstance(item, (int, float)):
+                            time.sleep(item)
+                        else:
+                            self.write_chunk(json.dumps(item).encode() + b'\n')
+                    self.write_chunk(b'')
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}/api/generate"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    monkeypatch.setattr(task_processor, 'DB_PATH', str(tmp_path / 'tasks.db'))
+    processor = task_processor.TaskProcessor()
+    yield processor
+    processor.close_db()
+
+
+def run_stub(monkeypatch, script):
+    stub = StubOllama(script)
+    monkeypatch.setattr(task_processor, 'OLLAMA_ENDPOINT', stub.url)
+    return stub
+
+
+def test_fallback_model_is_sent_its_own_context_window(processor, monkeypatch):
+    monkeypatch.setattr(prompt_budget, 'LLM_MODEL_CONTEXT_TOKENS', {'gemma3:4b': 16384, 'gemma3:1b': 8192})
+
+    def script(body):
+        if body['model'] == 'gemma3:4b':
+            return [{'error': 'model too large'}]
+        return [{'response': 'ok'}, {'response': '', 'done': True, 'eval_count': 1}]
+
+    stub = run_stub(monkeypatch, script)
+    try:
+        assert processor.query_llm('gemma3:4b', 'prompt', retries=1) == 'ok'
+    finally:
+        stub.close()
+
+    assert [(body['model'], body['options']['num_ctx']) for body in stub.requests] == [
+        ('gemma3:4b', 16384),
+        ('gemma3:1b', 8192),
+    ]
+
+
+def stalls_after_partial(body):
+    return [{'response': 'partial answer'}, 1.0, {'response': ' never sent', 'done': True}]
+
+
+def test_stalled_stream_is_abandoned_not_returned_as_complete(processor, monkeypatch, tmp_path):
+    partial_path = str(tmp_path / 'partial.md')
+    stub = run_stub(monkeypatch, stalls_after_partial)
+    try:
+        started = time.monotonic()
+        text, done, _ = processor.stream_llm({'model': 'other', 'prompt': 'prompt', 'stream': True}, 0.2, partial_path)
+        assert time.monotonic() - started < 1.0
+
+        assert (text, done) == ('partial answer', False)
+        assert processor.query_llm('other', 'prompt', timeout=0.2, retries=1, partial_path=partial_path) == ''
+    finally:
+        stub.close()
+
+    # The partial output is only kept on disk for inspection
+    with open(partial_path, encoding='utf-8') as f:
+        assert f.read() == 'partial answer'
+
+
+def test_stalled_stream_falls_back_to_the_smaller_model(processor, monkeypatch):
+    def script(body):
+        if body['model'] == 'gemma3:4b':
+            return stalls_after_partial(body)
+        return [{'response': 'fallback answer'}, {'response': '', 'done': True, 'eval_count': 2}]
+
+    stub = run_stub(monkeypatch, script)
+    try:
+        assert processor.query_llm('gemma3:4b', 'prompt', timeout=0.2, retries=1) == 'fallback answer'
+    finally:
+        stub.close()
+
+    assert [body['model'] for body in stub.requests] == ['gemma3:4b', 'gemma3:1b']
@@ -0,0 +1,152 @@
+"""
+Tests of model preloading, keep_alive pinning and load-aware routing
+against stub Ollama servers.
+"""
+
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from core.model_router import ModelRouter
+
+
+class StubOllama:
+    """Ollama stand-in serving /api/tags, /api/ps and /api/generate"""
+
+    def __init__(self, models, loaded=()):
+        self.models = list(models)
+        self.loaded = set(loaded)
+        self.generate_requests = []
+        self.app = web.Application()
+        self.app.router.add_get('/api/tags', self.tags)
+        self.app.router.add_get('/api/ps', self.ps)
+        self.app.router.add_post('/api/generate', self.generate)
+
+    async def tags(self, request):
+        return web.json_response({'models': [{'name': model} for model in self.models]})
+
+    async def ps(self, request):
+        return web.json_response({'models': [{'name': model} for model in sorted(self.loaded)]})
+
+    async def generate(self, request):
+        body = await request.json()
+        self.generate_requests.append(body)
+        model = body['model']
+        # A model that is not resident pays a two second load
+        load_duration = 0 if model in self.loaded else 2_000_000_000
+        self.loaded.add(model)
+        return web.json_response({
+            'model': model,
+            'response': 'ok' if body.get('prompt') else '',
+            'done': True,
+            'load_duration': load_duration,
+            'prompt_eval_duration': 100_000_000,
+            'eval_duration': 300_000_000,
+            'total_duration': load_duration + 400_000_000,
+        })
+
+
+def run_with_servers(stubs, config, scenario):
+    """Start the stub servers, build a router over them and run the scenario"""
+    async def run():
+        servers = [TestServer(stub.app) for stub in stubs]
+        for server in servers:
+            await server.start_server()
+        urls = [str(server.make_url('')).rstrip('/') for server in servers]
+        router = ModelRouter({'local': dict(config, type='ollama', endpoints=urls)})
+        try:
+            return await scenario(router, urls)
+        finally:
+            await router.close()
+            for server in servers:
+                await server.close()
+
+    return asyncio.run(run())
+
+
+def test_warm_up_preloads_on_the_endpoint_with_fewest_loaded_models():
+    busy = StubOllama(['m', 'other'], loaded=['other'])
+    idle = StubOllama(['m', 'other'])
+
+    async def scenario(router, urls):
+        await router.residency['local'].warm_up()
+        return router.get_residency_stats()['local']
+
+    stats = run_with_servers([busy, idle], {'preload_models': ['m'], 'pinned_keep_alive': '3h'}, scenario)
+
+    assert busy.generate_requests == []
+    [load] = idle.generate_requests
+    assert load['model'] == 'm'
+    assert load['prompt'] == ''
+    assert load['keep_alive'] == '3h'
+    assert 'num_ctx' not in load.get('options', {})
+    assert stats['pinned'] == ['m']
+    assert stats['models']['m']['loads'] == 1
+
+
+def test_configured_context_window_is_sent_on_load_and_generate():
+    stub = StubOllama(['m', 'other'])
+
+    async def scenario(router, urls):
+        await router.residency['local'].warm_up()
+        provider = router.endpoint_pools['local'].endpoints[0].provider
+        await provider.generate(model='m', prompt='hello')
+        await provider.generate(model='other', prompt='hello')
+
+    run_with_servers([stub], {'preload_models': ['m'], 'context_windows': {'m': 8192}}, scenario)
+
+    load, generate, other = stub.generate_requests
+    assert load['options']['num_ctx'] == generate['options']['num_ctx'] == 8192
+    assert 'num_ctx' not in other['options']
+
+
+def test_warm_up_skips_models_already_resident():
+    warm = StubOllama(['m'], loaded=['m'])
+    cold = StubOllama(['m'])
+
+    async def scenario(router, urls):
+        await router.residency['local'].warm_up()
+
+    run_with_servers([warm, cold], {'preload_models': ['m']}, scenario)
+    assert warm.generate_requests == []
+    assert cold.generate_requests == []
+
+
+def test_pinned_and_hot_models_get_the_pinned_keep_alive():
+    stub = StubOllama(['pinned', 'casual'], loaded=['pinned', 'casual'])
+    config = {'pinned_models': ['pinned'], 'keep_alive': '5m', 'pinned_keep_alive': '2h', 'hot_threshold': 3}
+
+    async def scenario(router, urls):
+        await router.endpoint_pools['local'].probe_all()
+        await router._generate('local', 'pinned', prompt='hi')
+        for _ in range(3):
+            await router._generate('local', 'casual', prompt='hi')
+        return router.get_residency_stats()['local']
+
+    stats = run_with_servers([stub], config, scenario)
+    keep_alives = [(body['model'], body['keep_alive']) for body in stub.generate_requests]
+    assert keep_alives == [('pinned', '2h'), ('casual', '5m'), ('casual', '5m'), ('casual', '2h')]
+    assert stats['hot'] == ['casual']
+
+
+def test_requests_go_to_the_endpoint_with_the_model_loaded():
+    cold = StubOllama(['m', 'n'])
+    warm = StubOllama(['m', 'n'], loaded=['m'])
+
+    async def scenario(router, urls):
+        await router.endpoint_pools['local'].probe_all()
+        await router._generate('local', 'm', prompt='hi')
+        await router._generate('local', 'n', prompt='hi')
+        # The load just seen makes the endpoint resident for n as well
+        await router._generate('local', 'n', prompt='hi')
+        return router.get_residency_stats()['local'], router.get_endpoint_status()['local']
+
+    stats, endpoints = run_with_servers([cold, warm], {'load_penalty': 2}, scenario)
+
+    assert [body['model'] for body in warm.generate_requests] == ['m']
+    assert [body['model'] for body in cold.generate_requests] == ['n', 'n']
+    assert stats['models']['m'] == {'requests': 1, 'loads': 0, 'load_seconds': 0.0, 'generation_seconds': 0.4}
+    assert stats['models']['n']['loads'] == 1
+    assert stats['models']['n']['load_seconds'] == 2.0
+    assert endpoints[0]['loaded'] == ['n']
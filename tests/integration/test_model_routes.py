@@ -0,0 +1,20 @@
+"""
+Tests of the model endpoint and residency routes.
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.routes import models
+from core.model_router import ModelRouter
+
+
+def test_model_routes_report_router_state():
+    app = FastAPI()
+    app.include_router(models.router, prefix="/api/models")
+    app.state.model_router = ModelRouter({"local": {"type": "ollama", "endpoints": ["http://a:11434", "http://b:11434"]}})
+    client = TestClient(app)
+
+    endpoints = client.get("/api/models/endpoints").json()
+    assert [endpoint["base_url"] for endpoint in endpoints["local"]] == ["http://a:11434", "http://b:11434"]
+    assert client.get("/api/models/residency").json() == {"local": {"pinned": [], "hot": [], "models": {}}}
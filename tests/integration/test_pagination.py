@@ -0,0 +1,128 @@
+"""
+Keyset pagination tests of the task list and project update endpoints.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+
+STARTED = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def client(tmp_path):
+    """Test client of the job manager and project routers on a seeded database.
+
+    Every third task and update has a NULL timestamp.
+    """
+    from app.database import Base, Task, TaskUpdate, get_db
+    from app.job_manager_api import router as job_manager_router
+    from app.project_api import router as project_router
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'api.db'}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def seed():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as db:
+            db.add(Task(
+                id="project", title="Project", description="Description", status="pending",
+                created_by="user", task_type="project", updated_at=STARTED
+            ))
+            for i in range(10):
+                timestamp = None if i % 3 == 0 else STARTED + timedelta(minutes=i)
+                db.add(Task(
+                    id=f"task-{i}", title=f"Task {i}", description="Description", status="pending",
+                    created_by="user", project_id="project", task_type=None if i == 1 else "development",
+                    updated_at=timestamp
+                ))
+                db.add(TaskUpdate(
+                    id=i + 1, task_id=f"task-{i}", agent_id="agent", content=f"Update {i}", timestamp=timestamp
+                ))
+            await db.commit()
+
+            # Column defaults replace None on insert; clear the timestamps afterwards
+            nulls = [f"task-{i}" for i in range(10) if i % 3 == 0]
+            await db.execute(update(Task).where(Task.id.in_(nulls)).values(updated_at=None))
+            await db.execute(update(TaskUpdate).where(TaskUpdate.task_id.in_(nulls)).values(timestamp=None))
+            await db.commit()
+
+    asyncio.run(seed())
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(job_manager_router)
+    app.include_router(project_router, prefix="/projects")
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    asyncio.run(engine.dispose())
+
+
+def walk(client, path, limit):
+    """Follow X-Next-Cursor from the first page, returning the pages."""
+    pages = []
+    response = client.get(f"{path}?limit={limit}")
+    while True:
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor or not pages[-1]:
+            return pages
+        response = client.get(path, params={"limit": limit, "cursor": cursor})
+
+
+def test_cursor_without_timestamp_round_trips():
+    assert decode_cursor(encode_cursor(None, "task-3")) == (None, "task-3")
+
+
+def test_task_pages_reach_every_task(client):
+    everything = client.get("/api/tasks").json()
+    # Includes the task without a task_type, never the project
+    assert len(everything) == 10
+    assert "priority" in everything[0]
+    assert NEXT_CURSOR_HEADER not in client.get("/api/tasks").headers
+
+    pages = walk(client, "/api/tasks", 3)
+    paged = [task["id"] for page in pages for task in page]
+    assert paged == [task["id"] for task in everything]
+    # Newest first, tasks without updated_at last
+    assert paged[-4:] == ["task-9", "task-6", "task-3", "task-0"]
+
+
+def test_update_pages_reach_every_update(client):
+    everything = client.get("/projects/project/updates").json()
+    assert len(everything) == 10
+
+    pages = walk(client, "/projects/project/updates", 4)
+    paged = [update["content"] for page in pages for update in page]
+    assert paged == [update["content"] for update in everything]
+    # Oldest first, updates without timestamp first
+    assert paged[:4] == ["Update 0", "Update 3", "Update 6", "Update 9"]
+
+
+def test_update_feed_keeps_cursor_when_nothing_is_new(client):
+    response = client.get("/projects/project/updates", params={"limit": 20})
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+
+    response = client.get("/projects/project/updates", params={"cursor": cursor})
+    assert response.json() == []
+    assert response.headers[NEXT_CURSOR_HEADER] == cursor
+
+
+def test_task_list_filters_projects_and_fields(client):
+    response = client.get("/api/tasks", params={"project_id": "project", "fields": "id,project_id", "limit": 500})
+    assert [set(task) for task in response.json()] == [{"id", "project_id"}] * 10
+
+    assert client.get("/api/tasks", params=[("project_id", "other"), ("project_id", "missing")]).json() == []
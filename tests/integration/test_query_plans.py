@@ -0,0 +1,242 @@
+"""
+Query plan regression tests.
+
+Builds both database schemas, applies the hot query index migration from
+scripts/migrate.py, runs the code issuing each hot query and checks with
+EXPLAIN QUERY PLAN that none of the statements it ran scans the tasks,
+task_updates or messages table, or sorts rows the index should already
+deliver in order. The statements are captured as they execute, so the
+plans are those of the SQL the code really sends.
+"""
+
+import os
+import sys
+import asyncio
+import sqlite3
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'scripts'))
+
+from migrate import create_hot_query_indexes
+import app.task_processor as task_processor
+from app.pagination import encode_cursor
+
+# Tables a hot query must reach through an index
+HOT_TABLES = ('tasks', 'task_updates', 'messages')
+
+
+def build_database(path, metadata):
+    """Create a schema from SQLAlchemy metadata and migrate its indexes."""
+    engine = create_engine(f"sqlite:///{path}")
+    metadata.create_all(engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(path)
+    create_hot_query_indexes(conn)
+    return conn
+
+
+def plan_problems(conn, statements, ordered):
+    """Get the steps of the statements' plans that scan a hot table, or sort when the index should."""
+    problems = []
+    for sql, params in statements:
+        for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params):
+            detail = row[3]
+            words = detail.split()
+            # A covering index scan still reads every entry of the index
+            if words[0] == 'SCAN' and words[1] in HOT_TABLES:
+                problems.append(detail)
+            if ordered and 'TEMP B-TREE' in detail and 'ORDER BY' in detail:
+                problems.append(detail)
+    return problems
+
+
+def hot_statements(statements):
+    """Keep the SELECT statements that read a hot table."""
+    return [
+        (sql, params) for sql, params in statements
+        if sql.lstrip().upper().startswith('SELECT') and any(table in sql for table in HOT_TABLES)
+    ]
+
+
+@pytest.fixture
+def processor_db(tmp_path, monkeypatch):
+    """Path of a migrated database with the task processor schema (app/db/models)."""
+    from app.db.base import Base
+    import app.db.models  # noqa: F401 - registers the models on Base
+
+    path = str(tmp_path / "processor.db")
+    build_database(path, Base.metadata).close()
+    monkeypatch.setattr(task_processor, 'DB_PATH', path)
+    return path
+
+
+@pytest.fixture
+def api_db(tmp_path):
+    """Session factory and statement log of a migrated database with the API schema (app/database.py)."""
+    from app.database import Base, Session, Task
+
+    path = tmp_path / "api.db"
+    build_database(path, Base.metadata).close()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def seed():
+        async with session_factory() as db:
+            db.add(Session(id="session"))
+            db.add(Task(id="task", title="Task", description="Description", status="pending", created_by="user"))
+            await db.commit()
+
+    asyncio.run(seed())
+
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    yield session_factory, statements
+    asyncio.run(engine.dispose())
+
+
+def run_processor(processor_db, call):
+    """Run a TaskProcessor method, returning the statements it executed."""
+    statements = []
+    processor = task_processor.TaskProcessor()
+    try:
+        processor.conn.set_trace_callback(lambda sql: statements.append((sql, ())))
+        call(processor)
+    finally:
+        processor.close_db()
+    return statements
+
+
+def run_api(api_db, call):
+    """Run a coroutine function on an API database session, returning the statements it executed."""
+    session_factory, statements = api_db
+
+    async def run():
+        async with session_factory() as db:
+            await call(db)
+
+    del statements[:]
+    asyncio.run(run())
+    return hot_statements(statements)
+
+
+def test_claim_candidate_uses_indexes(processor_db):
+    conn = sqlite3.connect(processor_db)
+    try:
+        # Sorted on agent columns too; only the not_started candidates reach the sort
+        assert plan_problems(conn, [(task_processor.CLAIM_CANDIDATE_SQL, {'agent_limit': 1})], False) == []
+    finally:
+        conn.close()
+
+
+def test_has_pending_tasks_uses_indexes(processor_db):
+    statements = run_processor(processor_db, lambda processor: processor.has_pending_tasks())
+    conn = sqlite3.connect(processor_db)
+    try:
+        assert statements and plan_problems(conn, statements, True) == []
+    finally:
+        conn.close()
+
+
+def test_get_next_task_uses_indexes(processor_db):
+    from core.task_manager import TaskManager
+    from db.connection import DatabaseConnection
+
+    statements = []
+
+    async def run():
+        db = DatabaseConnection(processor_db)
+        await db.connect()
+        await db.connection.set_trace_callback(lambda sql: statements.append((sql, ())))
+        try:
+            await TaskManager(db).get_next_task()
+        finally:
+            await db.close()
+
+    asyncio.run(run())
+    conn = sqlite3.connect(processor_db)
+    try:
+        assert hot_statements(statements) and plan_problems(conn, hot_statements(statements), True) == []
+    finally:
+        conn.close()
+
+
+def test_agent_tasks_use_indexes(api_db, tmp_path):
+    from app.task_management import ContextRefresher
+
+    statements = run_api(api_db, lambda db: ContextRefresher.get_agent_tasks(db, "agent"))
+    conn = sqlite3.connect(tmp_path / "api.db")
+    try:
+        # Ordered by updated_at across two statuses, so only the lookup must use the index
+        assert statements and plan_problems(conn, statements, False) == []
+    finally:
+        conn.close()
+
+
+def test_task_context_updates_use_indexes(api_db, tmp_path):
+    from app.task_management import ContextScaffold
+
+    statements = run_api(api_db, lambda db: ContextScaffold.get_task_context(db, "task"))
+    conn = sqlite3.connect(tmp_path / "api.db")
+    try:
+        assert any('task_updates' in sql for sql, _ in statements)
+        assert plan_problems(conn, statements, True) == []
+    finally:
+        conn.close()
+
+
+def test_session_messages_use_indexes(api_db, tmp_path):
+    from app.database import get_session
+
+    statements = run_api(api_db, lambda db: get_session(db, "session"))
+    conn = sqlite3.connect(tmp_path / "api.db")
+    try:
+        assert any('messages' in sql for sql, _ in statements)
+        assert plan_problems(conn, statements, True) == []
+    finally:
+        conn.close()
+
+
+def test_task_list_page_uses_indexes(api_db, tmp_path):
+    from app.database import get_db
+    from app.job_manager_api import router as job_manager_router
+
+    session_factory, statements = api_db
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(job_manager_router)
+    app.dependency_overrides[get_db] = override_get_db
+
+    del statements[:]
+    cursor = encode_cursor(datetime(2026, 1, 1), "task")
+    response = TestClient(app).get("/api/tasks", params={"limit": 100, "cursor": cursor})
+    assert response.status_code == 200
+
+    conn = sqlite3.connect(tmp_path / "api.db")
+    try:
+        assert hot_statements(statements) and plan_problems(conn, hot_statements(statements), True) == []
+    finally:
+        conn.close()
+
+
+def test_migration_is_idempotent(processor_db):
+    conn = sqlite3.connect(processor_db)
+    try:
+        assert create_hot_query_indexes(conn) == create_hot_query_indexes(conn)
+    finally:
+        conn.close()
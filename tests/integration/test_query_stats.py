@@ -0,0 +1,83 @@
+"""
+Tests of the SQL statement statistics hooked into the async engines.
+"""
+
+import asyncio
+import importlib
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.query_stats import QueryStats, fingerprint, instrument_engine, set_query_caller
+
+
+def run_statements(engine, statements):
+    async def run():
+        set_query_caller("agent test")
+        async with engine.begin() as conn:
+            for statement in statements:
+                await conn.execute(text(statement))
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_fingerprint_groups_values():
+    assert fingerprint("SELECT * FROM tasks WHERE id = 'a' AND priority > 3") == \
+        fingerprint("SELECT *  FROM tasks\nWHERE id = 'b''c' AND priority > 10") == \
+        "SELECT * FROM tasks WHERE id = ? AND priority > ?"
+    assert fingerprint("SELECT * FROM tasks_1 WHERE id IN (?, ?, ?)") == \
+        fingerprint("SELECT * FROM tasks_1 WHERE id IN (?, ?)") == \
+        "SELECT * FROM tasks_1 WHERE id IN (?...)"
+
+
+def test_records_statements(tmp_path, caplog):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}")
+    stats = QueryStats(slow_query_ms=0)
+    instrument_engine(engine, stats, enabled=True)
+
+    with caplog.at_level(logging.WARNING, logger="slow-query"):
+        run_statements(engine, [
+            "CREATE TABLE tasks (id INTEGER PRIMARY KEY, status TEXT)",
+            "INSERT INTO tasks (status) VALUES ('pending'), ('pending'), ('complete')",
+            "SELECT * FROM tasks WHERE status = 'pending'",
+            "SELECT * FROM tasks WHERE status = 'complete'",
+            "UPDATE tasks SET status = 'complete' WHERE status = 'pending'",
+        ])
+
+    result = stats.get_stats()
+    by_fingerprint = {item["fingerprint"]: item for item in result["fingerprints"]}
+    select = by_fingerprint["SELECT * FROM tasks WHERE status = ?"]
+    assert select["calls"] == 2
+    assert select["callers"] == {"agent test": 2}
+    assert by_fingerprint["INSERT INTO tasks (status) VALUES (?), (?), (?)"]["rows"] == 3
+    assert by_fingerprint["UPDATE tasks SET status = ? WHERE status = ?"]["rows"] == 2
+    assert result["statements"] == 5
+    assert any("agent test" in record.getMessage() for record in caplog.records)
+
+
+def test_disabled_adds_no_hooks(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}")
+    stats = QueryStats()
+    instrument_engine(engine, stats, enabled=False)
+
+    run_statements(engine, ["SELECT 1"])
+
+    assert not engine.sync_engine.dispatch.before_cursor_execute
+    assert stats.get_stats()["statements"] == 0
+
+
+def debug_paths(enabled, monkeypatch):
+    import app.api.routes
+    import app.db.query_stats
+
+    monkeypatch.setattr(app.db.query_stats, "SQL_STATS_ENABLED", enabled)
+    routes = importlib.reload(app.api.routes)
+    return [(route.path, method) for route in routes.api_router.routes for method in route.methods
+            if route.path == "/debug/sql"]
+
+
+def test_debug_routes_only_registered_when_enabled(monkeypatch):
+    assert sorted(debug_paths(True, monkeypatch)) == [("/debug/sql", "DELETE"), ("/debug/sql", "GET")]
+    assert debug_paths(False, monkeypatch) == []
@@ -0,0 +1,118 @@
+"""
+Tests of the engines and pools created by the shared SQLite factory.
+"""
+
+import asyncio
+import threading
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.db.sqlite import SQLitePool, create_engine, create_session_factory, create_writer_engine
+
+
+def test_sessions_beyond_pool_size_do_not_wait(tmp_path):
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'engine.db'}", pool_size=2, pool_timeout=1)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def run():
+        # Long-lived sessions (e.g. agent loops) hold more connections than the pool keeps
+        held = [session_factory() for _ in range(4)]
+        for session in held:
+            await session.execute(text("SELECT 1"))
+
+        async with session_factory() as session:
+            value = (await session.execute(text("PRAGMA journal_mode"))).scalar()
+
+        for session in held:
+            await session.close()
+        await engine.dispose()
+        return value
+
+    assert asyncio.run(run()) == "wal"
+
+
+def test_overflow_is_bounded(tmp_path):
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'engine.db'}",
+                           pool_size=1, max_overflow=1, pool_timeout=0.2)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def run():
+        held = [session_factory() for _ in range(2)]
+        for session in held:
+            await session.execute(text("SELECT 1"))
+        try:
+            async with session_factory() as session:
+                await session.execute(text("SELECT 1"))
+        finally:
+            for session in held:
+                await session.close()
+            await engine.dispose()
+
+    with pytest.raises(PoolTimeoutError):
+        asyncio.run(run())
+
+
+def test_writes_are_serialized_through_the_writer(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'engine.db'}"
+    engine = create_engine(url)
+    writer_engine = create_writer_engine(url)
+    session_factory = create_session_factory(engine, writer_engine)
+    active = []
+    overlaps = []
+
+    async def write(value):
+        async with session_factory() as session:
+            await session.execute(text("INSERT INTO items (value) VALUES (:value)"), {"value": value})
+            active.append(value)
+            overlaps.append(len(active))
+            # The transaction stays on the writer and sees its own row
+            seen = (await session.execute(text("SELECT COUNT(*) FROM items WHERE value = :value"),
+                                          {"value": value})).scalar()
+            await asyncio.sleep(0.01)
+            active.remove(value)
+            await session.commit()
+            return seen
+
+    async def run():
+        async with writer_engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE items (value INTEGER)"))
+        seen = await asyncio.gather(*(write(i) for i in range(5)))
+        async with session_factory() as session:
+            total = (await session.execute(text("SELECT COUNT(*) FROM items"))).scalar()
+        await engine.dispose()
+        await writer_engine.dispose()
+        return seen, total
+
+    seen, total = asyncio.run(run())
+    assert seen == [1] * 5
+    assert total == 5
+    assert max(overlaps) == 1
+
+
+def test_pool_serializes_writers_and_bounds_readers(tmp_path):
+    pool = SQLitePool(str(tmp_path / "pool.db"), readers=2)
+    with pool.writer() as conn:
+        conn.execute("CREATE TABLE items (value INTEGER)")
+
+    def insert(value):
+        with pool.writer() as conn:
+            conn.execute("INSERT INTO items (value) VALUES (?)", (value,))
+
+    threads = [threading.Thread(target=insert, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for _ in range(5):
+        with pool.reader() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 8
+
+    stats = pool.get_stats()
+    pool.close()
+    assert stats["writes"] == 9
+    assert stats["readers_open"] <= 2
@@ -0,0 +1,276 @@
+"""
+Tests of the concurrent task dispatcher, stuck agent recovery and phase resumption.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import app.task_processor as task_processor
+from app.task_processor import TaskProcessor
+
+STALE = datetime.now() - timedelta(hours=2)
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Scratch database with the task processor schema (app/db/models)."""
+    from app.db.base import Base
+    import app.db.models  # noqa: F401 - registers the models on Base
+
+    path = str(tmp_path / 'tasks.db')
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    monkeypatch.setattr(task_processor, 'DB_PATH', path)
+    return path
+
+
+def seed(path, agents, tasks):
+    """Insert (id, status, last_active) agents and (id, status, agent id) tasks."""
+    from app.db.models import Agent, Task
+
+    engine = create_engine(f"sqlite:///{path}")
+    with Session(engine) as session:
+        for agent_id, status, last_active in agents:
+            session.add(Agent(
+                id=agent_id, name=agent_id, model="gemma3:1b", endpoint="http://localhost:11434", status=status,
+                min_complexity=1, max_complexity=10, workspace_path="/tmp", last_active=last_active
+            ))
+        for task_id, status, agent_id in tasks:
+            session.add(Task(
+                id=task_id, title=task_id, description="Description", complexity=5, status=status,
+                assigned_agent_id=agent_id
+            ))
+        session.commit()
+    engine.dispose()
+
+
+def statuses(path, table):
+    conn = sqlite3.connect(path)
+    try:
+        return dict(conn.execute(f"SELECT id, status FROM {table}").fetchall())
+    finally:
+        conn.close()
+
+
+def test_reset_stuck_agents_skips_running_tasks(db_path):
+    seed(db_path, [('agent', 'busy', STALE)], [('running', 'build', 'agent'), ('stuck', 'build', 'agent')])
+
+    processor = TaskProcessor()
+    try:
+        processor.reset_stuck_agents(running_task_ids={'running'})
+    finally:
+        processor.close_db()
+
+    assert statuses(db_path, 'tasks') == {'running': 'build', 'stuck': 'not_started'}
+    assert statuses(db_path, 'agents') == {'agent': 'busy'}
+
+
+def test_reset_stuck_agents_requeues_every_task(db_path):
+    seed(db_path, [('agent', 'busy', STALE)], [('first', 'build', 'agent'), ('second', 'review', 'agent')])
+
+    processor = TaskProcessor()
+    try:
+        processor.reset_stuck_agents()
+    finally:
+        processor.close_db()
+
+    assert statuses(db_path, 'tasks') == {'first': 'not_started', 'second': 'not_started'}
+    assert statuses(db_path, 'agents') == {'agent': 'available'}
+
+
+def test_dispatcher_runs_each_task_once(db_path, monkeypatch):
+    seed(db_path, [('agent', 'available', datetime.now())], [(f'task-{i}', 'not_started', None) for i in range(3)])
+
+    runs = Counter()
+    in_flight = []
+    lock = threading.Lock()
+
+    def fake_worker(task_id, agent_id):
+        """Run longer than max_busy_seconds without reporting, then complete"""
+        with lock:
+            runs[task_id] += 1
+            in_flight.append(task_id)
+        worker = sqlite3.connect(db_path, timeout=30)
+        try:
+            worker.execute("UPDATE agents SET last_active = ? WHERE id = ?", (STALE.isoformat(), agent_id))
+            worker.commit()
+            time.sleep(0.3)
+            worker.execute("UPDATE tasks SET status = 'complete' WHERE id = ?", (task_id,))
+            worker.execute("UPDATE agents SET status = 'available' WHERE id = ?", (agent_id,))
+            worker.commit()
+        finally:
+            worker.close()
+            with lock:
+                in_flight.remove(task_id)
+        return True
+
+    monkeypatch.setattr(task_processor, 'process_claimed_task', fake_worker)
+
+    processor = TaskProcessor()
+
+    async def dispatch():
+        # One agent, one task at a time: a slot stays free while tasks are queued,
+        # so the dispatcher checks for stuck agents while the worker is running
+        dispatcher = asyncio.ensure_future(processor._run_concurrent(max_tasks=2, max_per_agent=1, interval=0.05))
+        deadline = time.monotonic() + 10
+        while set(statuses(db_path, 'tasks').values()) != {'complete'} and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        dispatcher.cancel()
+        await asyncio.gather(dispatcher, return_exceptions=True)
+
+    try:
+        asyncio.run(dispatch())
+    finally:
+        processor.close_db()
+
+    assert set(statuses(db_path, 'tasks').values()) == {'complete'}
+    assert runs == Counter({'task-0': 1, 'task-1': 1, 'task-2': 1})
+
+
+@pytest.mark.parametrize('other_status, agent_status', [('build', 'busy'), ('complete', 'available')])
+def test_failed_task_frees_agent_only_without_other_tasks_in_flight(db_path, monkeypatch, other_status, agent_status):
+    seed(db_path, [('agent', 'busy', datetime.now())], [('failing', 'design', 'agent'), ('other', other_status, 'agent')])
+
+    def fail(task, agent):
+        raise RuntimeError("model unavailable")
+
+    processor = TaskProcessor()
+    monkeypatch.setattr(processor, 'process_task', fail)
+    try:
+        task = processor.get_task_details('failing')
+        processor.cursor.execute('SELECT * FROM agents WHERE id = ?', ('agent',))
+        assert not processor.execute_claimed_task(task, processor.cursor.fetchone())
+    finally:
+        processor.close_db()
+
+    assert statuses(db_path, 'tasks') == {'failing': 'not_started', 'other': other_status}
+    assert statuses(db_path, 'agents') == {'agent': agent_status}
+
+
+def test_processor_writes_queue_on_the_shared_writer(db_path):
+    from app.db.sqlite import get_pool
+
+    seed(db_path, [('agent', 'available', datetime.now())], [('task', 'not_started', None)])
+
+    processor = TaskProcessor()
+    pool = get_pool(db_path)
+    claimed = []
+    try:
+        # The processor's own connection cannot take the write lock
+        with pytest.raises(sqlite3.OperationalError):
+            processor.conn.execute("UPDATE agents SET status = 'busy'")
+
+        with pool.writer():
+            claimer = threading.Thread(target=lambda: claimed.append(processor.claim_next_task()))
+            claimer.start()
+            claimer.join(0.2)
+            # The claim waits for the writer another thread holds
+            assert claimer.is_alive()
+        claimer.join(5)
+
+        task, agent = claimed[0]
+        writes = pool.writes
+        processor.update_task_status(task['id'], "build", 10, "Building", agent['id'])
+        assert pool.writes > writes
+    finally:
+        processor.close_db()
+
+    assert statuses(db_path, 'tasks') == {'task': 'build'}
+    assert statuses(db_path, 'agents') == {'agent': 'busy'}
+
+
+def test_dispatcher_survives_unexpected_errors(db_path, monkeypatch):
+    seed(db_path, [('agent', 'available', datetime.now())], [('task', 'not_started', None)])
+
+    def fake_worker(task_id, agent_id):
+        worker = sqlite3.connect(db_path, timeout=30)
+        try:
+            worker.execute("UPDATE tasks SET status = 'complete' WHERE id = ?", (task_id,))
+            worker.execute("UPDATE agents SET status = 'available' WHERE id = ?", (agent_id,))
+            worker.commit()
+        finally:
+            worker.close()
+        return True
+
+    monkeypatch.setattr(task_processor, 'process_claimed_task', fake_worker)
+
+    processor = TaskProcessor()
+    claim = processor.claim_next_task
+    failures = []
+
+    def flaky_claim(max_per_agent=1):
+        if not failures:
+            failures.append(1)
+            raise RuntimeError("unexpected")
+        return claim(max_per_agent)
+
+    monkeypatch.setattr(processor, 'claim_next_task', flaky_claim)
+
+    async def dispatch():
+        dispatcher = asyncio.ensure_future(processor._run_concurrent(max_tasks=1, max_per_agent=1, interval=0.05))
+        deadline = time.monotonic() + 10
+        while statuses(db_path, 'tasks') != {'task': 'complete'} and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        alive = not dispatcher.done()
+        dispatcher.cancel()
+        await asyncio.gather(dispatcher, return_exceptions=True)
+        return alive
+
+    try:
+        assert asyncio.run(dispatch())
+    finally:
+        processor.close_db()
+
+    assert failures == [1]
+    assert statuses(db_path, 'tasks') == {'task': 'complete'}
+
+
+@pytest.mark.parametrize("summary_written, research_runs", [(True, 1), (False, 2)])
+def test_research_phase_is_resumed_only_with_its_summary(db_path, tmp_path, monkeypatch, summary_written, research_runs):
+    output_dir = str(tmp_path / 'task_outputs')
+    os.makedirs(output_dir)
+    calls = Counter()
+
+    def phases(processor):
+        def planning_phase(task, agent, output_dir):
+            calls['planning'] += 1
+            processor.save_output_file(output_dir, 'plan.md', 'plan')
+            return 'plan'
+
+        def research_phase(task, agent, plan, output_dir):
+            calls['research'] += 1
+            processor.save_output_file(output_dir, 'research_data.json', '{"query": []}')
+            if summary_written:
+                processor.save_output_file(output_dir, 'research_summary.md', 'summary')
+            return {'query': []}
+
+        def execution_phase(task, agent, plan, research_data, output_dir):
+            calls['execution'] += 1
+            return []
+
+        def review_phase(task, agent, output_files, output_dir):
+            return None
+
+        for phase in (planning_phase, research_phase, execution_phase, review_phase):
+            monkeypatch.setattr(processor, phase.__name__, phase)
+
+    # The second run stands in for a task restarted after an interruption
+    for _ in range(2):
+        processor = TaskProcessor()
+        phases(processor)
+        try:
+            assert processor.run_phases({'id': 'task'}, {'id': 'agent'}, output_dir)
+        finally:
+            processor.close_db()
+
+    assert calls == Counter(planning=1, research=research_runs, execution=2)
@@ -0,0 +1,57 @@
+"""
+Tests of the task pipeline metrics recorder and its Prometheus page.
+"""
+
+from datetime import datetime, timedelta
+
+from app.db.sqlite import get_pool
+from app.task_metrics import TaskMetrics, ensure_metrics_table, render_prometheus
+from app.write_behind import WriteBehindBuffer
+
+
+def record_spans(db_path):
+    with get_pool(db_path).writer() as conn:
+        ensure_metrics_table(conn)
+    writer = WriteBehindBuffer(db_path, flush_interval=60)
+    metrics = TaskMetrics(writer)
+    metrics.record("t1", "phase", "research", 2000)
+    metrics.record("t1", "phase", "research", 40000, success=False)
+    metrics.record("t1", "llm", "query", 1500, model="gemma3:1b", tokens=30, tokens_per_second=20.0, retries=1)
+    metrics.record("t1", "llm", "query", 500, model="gemma3:1b", tokens=10, tokens_per_second=40.0)
+    writer.close()
+
+
+def test_metrics_page_is_rendered_from_the_rollup(tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+    record_spans(db_path)
+
+    with get_pool(db_path).reader() as conn:
+        body = render_prometheus(conn)
+        series = conn.execute("SELECT COUNT(*) FROM task_metrics_rollup").fetchone()[0]
+
+    assert series == 2
+    assert 'ai2ai_task_span_duration_seconds_bucket{kind="phase",name="research",le="2.5"} 1' in body
+    assert 'ai2ai_task_span_duration_seconds_bucket{kind="phase",name="research",le="60"} 2' in body
+    assert 'ai2ai_task_span_duration_seconds_count{kind="phase",name="research"} 2' in body
+    assert 'ai2ai_task_span_failures_total{kind="phase",name="research"} 1' in body
+    assert 'ai2ai_llm_tokens_total{model="gemma3:1b"} 40' in body
+    assert 'ai2ai_llm_retries_total{model="gemma3:1b"} 1' in body
+    assert 'ai2ai_llm_tokens_per_second{model="gemma3:1b"} 30' in body
+
+
+def test_expired_spans_are_pruned_but_stay_counted(tmp_path):
+    db_path = str(tmp_path / "tasks.db")
+    record_spans(db_path)
+
+    expired = (datetime.now() - timedelta(days=30)).isoformat()
+    with get_pool(db_path).writer() as conn:
+        conn.execute("UPDATE task_metrics SET created_at = ? WHERE kind = 'phase'", (expired,))
+        conn.commit()
+        ensure_metrics_table(conn)
+
+    with get_pool(db_path).reader() as conn:
+        kinds = [row[0] for row in conn.execute("SELECT DISTINCT kind FROM task_metrics")]
+        body = render_prometheus(conn)
+
+    assert kinds == ["llm"]
+    assert 'ai2ai_task_span_duration_seconds_count{kind="phase",name="research"} 2' in body
@@ -0,0 +1,83 @@
+"""
+Tests of the write-behind buffer for task progress writes.
+"""
+
+import sqlite3
+import time
+
+import pytest
+
+from app.write_behind import WriteBehindBuffer
+
+LOG_SQL = 'INSERT INTO log (entry) VALUES (?)'
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'tasks.db')
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE log (seq INTEGER PRIMARY KEY AUTOINCREMENT, entry TEXT)')
+    conn.commit()
+    conn.close()
+    return path
+
+
+def entries(path):
+    conn = sqlite3.connect(path)
+    try:
+        return [row[0] for row in conn.execute('SELECT entry FROM log ORDER BY seq')]
+    finally:
+        conn.close()
+
+
+def test_progress_writes_are_committed_together(db_path):
+    buffer = WriteBehindBuffer(db_path, flush_interval=60)
+    try:
+        for i in range(10):
+            buffer.write(LOG_SQL, (f"progress {i}",))
+        assert entries(db_path) == []
+
+        assert buffer.flush()
+        assert (buffer.commits, buffer.last_batch_size) == (1, 10)
+        assert entries(db_path) == [f"progress {i}" for i in range(10)]
+    finally:
+        buffer.close()
+
+
+def test_writes_are_flushed_on_the_interval(db_path):
+    buffer = WriteBehindBuffer(db_path, flush_interval=0.05)
+    try:
+        buffer.write(LOG_SQL, ("progress",))
+        deadline = time.monotonic() + 5
+        while not entries(db_path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert entries(db_path) == ["progress"]
+    finally:
+        buffer.close()
+
+
+def test_close_commits_what_is_queued(db_path):
+    buffer = WriteBehindBuffer(db_path, flush_interval=60)
+    buffer.write(LOG_SQL, ("progress",))
+    buffer.close()
+
+    assert entries(db_path) == ["progress"]
+    assert buffer.commits == 1
+    # Closing again does nothing
+    buffer.close()
+
+
+def test_transitions_are_committed_after_buffered_progress(db_path):
+    buffer = WriteBehindBuffer(db_path, flush_interval=60)
+    try:
+        buffer.write(LOG_SQL, ("progress 1",))
+        buffer.write(LOG_SQL, ("progress 2",))
+        assert buffer.write_now([(LOG_SQL, ("complete",))])
+
+        # Committed at once, and never ahead of the progress queued before it
+        assert entries(db_path) == ["progress 1", "progress 2", "complete"]
+        buffer.write(LOG_SQL, ("late progress",))
+    finally:
+        buffer.close()
+
+    assert entries(db_path) == ["progress 1", "progress 2", "complete", "late progress"]
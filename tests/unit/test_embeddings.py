@@ -0,0 +1,169 @@
+"""
+Tests of batched embeddings, the embedding cache and the dimension check.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.providers.ollama as ollama
+from app.providers.base import ModelProvider
+from app.providers.completion_cache import CachedProvider, CompletionCache
+from app.providers.embeddings import EmbeddingCache
+from app.providers.limiter import LimitedProvider, get_limiter
+from app.providers.ollama import OllamaProvider
+from app.providers.single_flight import SingleFlightProvider
+
+
+class StubEmbedEndpoint:
+    """Answers /api/embed with a vector derived from each input text"""
+
+    def __init__(self, dimension=3):
+        self.dimension = dimension
+        self.batches = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.batches.append(body["input"])
+        embeddings = [[float(len(text))] * self.dimension for text in body["input"]]
+        return httpx.Response(200, json={"embeddings": embeddings})
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    cache = EmbeddingCache()
+    monkeypatch.setattr(ollama, "embedding_cache", cache)
+    return cache
+
+
+def embed_with(endpoint, calls, provider=None):
+    """Run embed calls against the stub endpoint on one event loop"""
+    inner = OllamaProvider(endpoint="http://stub:11434", model="gemma3:1b")
+    provider = provider(inner) if provider else inner
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        inner._clients = {loop: httpx.AsyncClient(transport=httpx.MockTransport(endpoint))}
+        try:
+            return [await provider.embed(texts, **kwargs) for texts, kwargs in calls]
+        finally:
+            await inner.aclose()
+
+    return asyncio.run(run())
+
+
+def test_texts_are_sent_in_batches_and_returned_in_order():
+    endpoint = StubEmbedEndpoint()
+    [vectors] = embed_with(endpoint, [(["a", "bb", "ccc", "bb", "dddd", "eeeee"], {"batch_size": 2})])
+
+    assert vectors == [[1.0] * 3, [2.0] * 3, [3.0] * 3, [2.0] * 3, [4.0] * 3, [5.0] * 3]
+    # The duplicate is embedded once
+    assert endpoint.batches == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+
+
+def test_cached_embeddings_are_not_requested_again(fresh_cache):
+    endpoint = StubEmbedEndpoint()
+    first, second = embed_with(endpoint, [(["a", "bb"], {}), (["bb", "ccc", "a"], {})])
+
+    assert second == [[2.0] * 3, [3.0] * 3, [1.0] * 3]
+    assert endpoint.batches == [["a", "bb"], ["ccc"]]
+    assert fresh_cache.get_stats()["hits"] == 2
+
+
+def test_cache_is_keyed_by_model():
+    endpoint = StubEmbedEndpoint()
+    embed_with(endpoint, [(["a"], {"model": "one"}), (["a"], {"model": "two"})])
+    assert endpoint.batches == [["a"], ["a"]]
+
+
+def test_vectors_of_another_dimension_are_rejected(fresh_cache):
+    endpoint = StubEmbedEndpoint(dimension=3)
+    embed_with(endpoint, [(["a"], {})])
+    endpoint.dimension = 4
+
+    with pytest.raises(ValueError, match="4 dimensions, expected 3"):
+        embed_with(endpoint, [(["b"], {})])
+    assert fresh_cache.dimension(ollama.EMBEDDING_MODEL) == 3
+
+
+def test_missing_embeddings_are_an_error():
+    def endpoint(request):
+        return httpx.Response(200, json={"embeddings": [[1.0]]})
+
+    with pytest.raises(ValueError, match="1 embeddings for 2 texts"):
+        embed_with(endpoint, [(["a", "b"], {})])
+
+
+def test_wrapped_provider_embeds_through_the_limiter():
+    endpoint = StubEmbedEndpoint()
+    stack = lambda provider: CachedProvider(SingleFlightProvider(LimitedProvider(provider)), CompletionCache(db_path=None))
+    limiter = get_limiter("http://stub:11434", "limited-embedder")
+    completed = limiter.completed
+
+    [vectors] = embed_with(endpoint, [(["a", "bb"], {"model": "limited-embedder"})], provider=stack)
+
+    assert vectors == [[1.0] * 3, [2.0] * 3]
+    assert limiter.completed == completed + 1
+    assert limiter.in_flight == 0
+
+
+class TextOnlyProvider(ModelProvider):
+    """Provider without an embeddings endpoint"""
+
+    def get_provider_name(self) -> str:
+        return "text-only"
+
+    def get_model_name(self) -> str:
+        return "text-model"
+
+    async def generate_completion(self, system_prompt: str, user_prompt: str) -> str:
+        return user_prompt
+
+    async def generate_completion_stream(self, system_prompt: str, user_prompt: str):
+        yield user_prompt
+
+
+def test_providers_without_embeddings_say_so():
+    async def run(provider):
+        await provider.embed(["a"])
+
+    for provider in (TextOnlyProvider(), SingleFlightProvider(LimitedProvider(TextOnlyProvider()))):
+        with pytest.raises(NotImplementedError, match="text-only provider does not support embeddings"):
+            asyncio.run(run(provider))
+
+
+def test_backfill_embeds_rows_without_an_embedding(tmp_path):
+    from app.database import Base, Memory, backfill_embeddings
+
+    class Embedder:
+        def __init__(self):
+            self.batches = []
+
+        async def embed(self, texts, model=None):
+            self.batches.append(texts)
+            return [[float(len(text))] for text in texts]
+
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'embed.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as db:
+            db.add_all([Memory(content=content) for content in ("a", "bb", "ccc")])
+            db.add(Memory(content="done", embedding="[9.0]"))
+            await db.commit()
+
+            embedder = Embedder()
+            counts = await backfill_embeddings(db, embedder, batch_size=2)
+            again = await backfill_embeddings(db, embedder, batch_size=2)
+        await engine.dispose()
+        return embedder.batches, counts, again
+
+    batches, counts, again = asyncio.run(run())
+    assert batches == [["a", "bb"], ["ccc"]]
+    assert counts["memories"] == 3
+    assert again["memories"] == 0
@@ -0,0 +1,217 @@
+"""
+Tests of endpoint selection, the circuit breaker and health probes.
+"""
+
+import asyncio
+
+import pytest
+
+import core.endpoint_pool as endpoint_pool
+from core.endpoint_pool import CircuitBreaker, Endpoint, EndpointPool
+
+
+class Clock:
+    """Stand-in for the time module that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+
+class FakeProvider:
+    """Provider answering the probes from settable model lists"""
+
+    def __init__(self, models=(), running=()):
+        self.models = [{'name': model} for model in models]
+        self.running = [{'name': model} for model in running]
+        self.down = False
+        self.closed = False
+
+    async def list_models(self):
+        if self.down:
+            raise ConnectionError("endpoint is down")
+        return self.models
+
+    async def list_running_models(self):
+        return self.running
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(endpoint_pool, 'time', clock)
+    return clock
+
+
+def make_endpoint(url, models=None, loaded=(), outstanding=0, provider=None):
+    endpoint = Endpoint(url, provider or FakeProvider(), CircuitBreaker(failure_threshold=2, reset_timeout=30))
+    endpoint.models = set(models) if models is not None else None
+    endpoint.loaded = set(loaded)
+    endpoint.outstanding = outstanding
+    return endpoint
+
+
+def urls(endpoints):
+    return [endpoint.base_url for endpoint in endpoints]
+
+
+def test_least_loaded_endpoint_is_picked_first():
+    pool = EndpointPool('ollama', [
+        make_endpoint('a', models=['m'], loaded=['m'], outstanding=3),
+        make_endpoint('b', models=['m'], loaded=['m'], outstanding=1),
+    ])
+    assert urls(pool.candidates('m')) == ['b', 'a']
+
+
+def test_endpoint_with_the_model_loaded_is_preferred():
+    pool = EndpointPool('ollama', [
+        make_endpoint('cold', models=['m'], outstanding=0),
+        make_endpoint('warm', models=['m'], loaded=['m'], outstanding=1),
+    ], load_penalty=2)
+    assert urls(pool.candidates('m')) == ['warm', 'cold']
+
+
+def test_endpoints_without_the_model_are_skipped_unless_none_has_it():
+    pool = EndpointPool('ollama', [
+        make_endpoint('other', models=['x']),
+        make_endpoint('unprobed'),
+        make_endpoint('listed', models=['m'], outstanding=5),
+    ])
+    assert urls(pool.candidates('m')) == ['listed', 'unprobed']
+
+    # No endpoint lists the model: every available one is tried
+    pool = EndpointPool('ollama', [make_endpoint('x', models=['x']), make_endpoint('y', models=['y'])])
+    assert set(urls(pool.candidates('m'))) == {'x', 'y'}
+
+
+def test_unhealthy_and_open_endpoints_are_not_candidates():
+    sick = make_endpoint('sick', models=['m'])
+    sick.healthy = False
+    tripped = make_endpoint('tripped', models=['m'])
+    tripped.breaker.record_failure()
+    tripped.breaker.record_failure()
+    pool = EndpointPool('ollama', [sick, tripped, make_endpoint('ok', models=['m'])])
+    assert urls(pool.candidates('m')) == ['ok']
+
+
+def test_breaker_opens_half_opens_and_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allows_request()
+
+    clock.now += 30
+    assert breaker.allows_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.on_request()
+    # Only one trial request at a time
+    assert not breaker.allows_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_failed_trial_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allows_request()
+    breaker.on_request()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allows_request()
+    clock.now += 30
+    assert breaker.allows_request()
+
+
+def test_track_counts_requests_and_feeds_the_breaker(clock):
+    endpoint = make_endpoint('a', models=['m'])
+    pool = EndpointPool('ollama', [endpoint])
+
+    async def fail():
+        async with pool.track(endpoint):
+            assert endpoint.outstanding == 1
+            raise RuntimeError("boom")
+
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            asyncio.run(fail())
+    assert endpoint.outstanding == 0
+    assert endpoint.breaker.state == CircuitBreaker.OPEN
+
+    async def succeed():
+        async with pool.track(endpoint):
+            pass
+
+    clock.now += 30
+    assert pool.candidates('m') == [endpoint]
+    asyncio.run(succeed())
+    assert endpoint.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_cancelled_trial_frees_the_trial_slot(clock):
+    endpoint = make_endpoint('a', models=['m'])
+    endpoint.breaker.record_failure()
+    endpoint.breaker.record_failure()
+    clock.now += 30
+    assert endpoint.available()
+    pool = EndpointPool('ollama', [endpoint])
+
+    async def cancelled():
+        async with pool.track(endpoint):
+            raise asyncio.CancelledError()
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(cancelled())
+    assert endpoint.breaker.state == CircuitBreaker.HALF_OPEN
+    assert endpoint.available()
+
+
+def test_health_probe_marks_endpoint_down_and_recovers(clock):
+    provider = FakeProvider(models=['m', 'n'], running=['m'])
+    endpoint = make_endpoint('a', provider=provider)
+    pool = EndpointPool('ollama', [endpoint])
+
+    asyncio.run(pool.probe_all())
+    assert endpoint.healthy
+    assert endpoint.models == {'m', 'n'}
+    assert endpoint.loaded == {'m'}
+
+    provider.down = True
+    asyncio.run(pool.probe_all())
+    assert not endpoint.healthy
+    assert pool.candidates('m') == []
+
+    provider.down = False
+    provider.running = []
+    asyncio.run(pool.probe_all())
+    assert endpoint.healthy
+    assert endpoint.loaded == set()
+    assert pool.candidates('m') == [endpoint]
+
+
+def test_stop_cancels_health_loop_and_closes_providers():
+    provider = FakeProvider(models=['m'])
+    pool = EndpointPool('ollama', [make_endpoint('a', provider=provider)], health_check_interval=0.01)
+
+    async def run():
+        pool.start()
+        await asyncio.sleep(0.03)
+        await pool.stop()
+
+    asyncio.run(run())
+    assert provider.closed
+    assert pool.endpoints[0].last_probe is not None
@@ -0,0 +1,87 @@
+"""
+Tests of pipelined batch generation and the discussion turns that use it.
+"""
+
+import asyncio
+
+from app.providers.base import ModelProvider
+from utils.concurrency import pipelined
+
+
+class FakeProvider(ModelProvider):
+    """Provider answering with the user prompt, recording its peak concurrency"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+
+    def get_provider_name(self) -> str:
+        return "fake"
+
+    def get_model_name(self) -> str:
+        return "fake-model"
+
+    async def generate_completion(self, system_prompt: str, user_prompt: str) -> str:
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if user_prompt == "fail":
+                raise RuntimeError("model error")
+            return f"answer to {user_prompt}"
+        finally:
+            self.in_flight -= 1
+
+    async def generate_completion_stream(self, system_prompt: str, user_prompt: str):
+        yield await self.generate_completion(system_prompt, user_prompt)
+
+
+def test_pipelined_bounds_concurrency_and_yields_errors():
+    provider = FakeProvider()
+    requests = [("system", str(i)) for i in range(10)] + [("system", "fail")]
+
+    async def run():
+        return [result async for result in provider.generate_many(requests, max_concurrency=3)]
+
+    results = asyncio.run(run())
+    assert provider.peak == 3
+    assert sorted(index for index, _, _ in results) == list(range(11))
+    by_index = {index: (text, error) for index, text, error in results}
+    assert by_index[4] == ("answer to 4", None)
+    assert isinstance(by_index[10][1], RuntimeError)
+
+
+def test_pipelined_cancels_unread_requests():
+    provider = FakeProvider()
+
+    async def run():
+        results = pipelined(lambda i: provider.generate_completion("system", str(i)), range(10), 2)
+        async for _ in results:
+            break
+        await results.aclose()
+        # The cancelled calls have unwound by the time aclose returns
+        return provider.in_flight, [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    in_flight, leftover = asyncio.run(run())
+    assert provider.calls < 10
+    assert in_flight == 0
+    assert leftover == []
+
+
+def test_discussion_turns_batch_agents_sharing_a_model(monkeypatch):
+    import app.unified_discussion as unified_discussion
+
+    providers = {}
+    monkeypatch.setattr(unified_discussion, "get_model_provider", lambda model: providers.setdefault(model, FakeProvider()))
+
+    manager = unified_discussion.DiscussionManager("session", "Discuss the design.")
+    for i, model in enumerate(["model-a", "model-a", "model-b"]):
+        manager.add_participant(f"agent-{i}", f"Agent {i}", "Reviewer", model)
+
+    asyncio.run(manager.get_agent_responses(["agent-0", "agent-1", "agent-2"], "hello"))
+
+    assert sorted(message["sender_id"] for message in manager.message_history) == ["agent-0", "agent-1", "agent-2"]
+    assert providers["model-a"].calls == 2 and providers["model-b"].calls == 1
+    assert not any(p.is_responding for p in manager.get_all_participants())
@@ -0,0 +1,52 @@
+"""
+Text extraction tests of both HTML extractor backends.
+"""
+
+import pytest
+
+from app.html_extractor import HTMLExtractor, get_extractor
+
+PAGE = """<html><body>
+<header class="site-header"><a href="/">Home</a> Site navigation</header>
+<main><article>
+<header class="entry-header"><h1>Article Title</h1></header>
+<p>Body   text
+continues here.</p>
+<pre><code>def f():
+    return 1
+</code></pre>
+<p>After the code.</p>
+</article></main>
+<footer>Footer links</footer>
+</body></html>"""
+
+
+@pytest.fixture(params=["lxml", "html.parser"])
+def extractor(request):
+    """Extractor of each backend"""
+    return get_extractor(request.param)
+
+
+def test_keeps_article_header(extractor):
+    text = extractor.extract(PAGE)
+    assert text.splitlines()[0] == "Article Title"
+
+
+def test_drops_page_header_and_footer(extractor):
+    text = extractor.extract(PAGE)
+    assert "Site navigation" not in text
+    assert "Footer links" not in text
+
+
+def test_collapses_whitespace_outside_pre(extractor):
+    assert "Body text continues here." in extractor.extract(PAGE).splitlines()
+
+
+def test_keeps_preformatted_lines(extractor):
+    text = extractor.extract(PAGE)
+    assert "def f():\n    return 1\nAfter the code." in text
+
+
+def test_extract_is_abstract():
+    with pytest.raises(TypeError):
+        HTMLExtractor()
@@ -0,0 +1,140 @@
+"""
+Tests of the adaptive concurrency limiter and its priority lanes.
+"""
+
+import asyncio
+
+import pytest
+
+import app.providers.limiter as limiter_module
+from app.providers.limiter import AdaptiveLimiter, Priority, request_priority
+
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(limiter_module, "time", clock)
+    return clock
+
+
+def run_round(limiter, latency, success=True):
+    """Fill every slot of the limiter, then finish the calls"""
+    async def fill():
+        for _ in range(max(1, int(limiter.limit))):
+            await limiter.acquire(Priority.NORMAL)
+
+    slots = max(1, int(limiter.limit))
+    asyncio.run(fill())
+    for _ in range(slots):
+        limiter.release(latency, success)
+
+
+def test_limit_grows_while_latency_stays_at_baseline(clock):
+    limiter = AdaptiveLimiter("test", initial_limit=2, max_limit=6)
+    for _ in range(40):
+        run_round(limiter, 1.0)
+        clock.now += 1
+
+    assert limiter.limit == 6
+    assert limiter.decreases == 0
+
+
+def test_limit_does_not_grow_when_it_is_not_the_bottleneck(clock):
+    limiter = AdaptiveLimiter("test", initial_limit=4)
+
+    async def one_call():
+        await limiter.acquire(Priority.NORMAL)
+
+    for _ in range(20):
+        asyncio.run(one_call())
+        limiter.release(1.0, True)
+
+    assert limiter.limit == 4
+
+
+def test_rising_latency_cuts_the_limit_multiplicatively(clock):
+    limiter = AdaptiveLimiter("test", initial_limit=8, backoff=0.5, latency_tolerance=2.0)
+    run_round(limiter, 1.0)
+    limit = limiter.limit
+
+    clock.now += 10
+    run_round(limiter, 1.5)
+    assert limiter.limit >= limit
+
+    clock.now += 10
+    limit = limiter.limit
+    run_round(limiter, 5.0)
+    # Calls that overlapped the cut report the same overload and do not cut again
+    assert limiter.limit == pytest.approx(limit * 0.5)
+    assert limiter.decreases == 1
+
+    clock.now += 10
+    run_round(limiter, 5.0)
+    assert limiter.limit == pytest.approx(limit * 0.25)
+    assert limiter.decreases == 2
+
+
+def test_errors_cut_the_limit_down_to_the_minimum(clock):
+    limiter = AdaptiveLimiter("test", initial_limit=8, min_limit=1, backoff=0.5)
+    for _ in range(10):
+        run_round(limiter, None, success=False)
+        clock.now += 10
+
+    assert limiter.limit == 1
+    assert limiter.errors >= 10
+
+
+def test_interactive_requests_are_admitted_before_background():
+    limiter = AdaptiveLimiter("test", initial_limit=1)
+    order = []
+
+    async def call(name, priority):
+        with request_priority(priority):
+            async with limiter.slot():
+                order.append(name)
+                await asyncio.sleep(0)
+
+    async def run():
+        await limiter.acquire(Priority.NORMAL)
+        waiters = [
+            asyncio.create_task(call("background-1", Priority.BACKGROUND)),
+            asyncio.create_task(call("background-2", Priority.BACKGROUND)),
+        ]
+        await asyncio.sleep(0)
+        waiters.append(asyncio.create_task(call("interactive", Priority.INTERACTIVE)))
+        await asyncio.sleep(0)
+        assert limiter.get_stats()["lanes"]["background"]["queued"] == 2
+
+        limiter.release(None, True)
+        await asyncio.gather(*waiters)
+
+    asyncio.run(run())
+    assert order == ["interactive", "background-1", "background-2"]
+    assert limiter.in_flight == 0
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    limiter = AdaptiveLimiter("test", initial_limit=1)
+
+    async def run():
+        await limiter.acquire(Priority.NORMAL)
+        waiter = asyncio.create_task(limiter.acquire(Priority.BACKGROUND))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release(None, True)
+
+    asyncio.run(run())
+    assert limiter.in_flight == 0
+    assert limiter.queued[Priority.BACKGROUND] == 0
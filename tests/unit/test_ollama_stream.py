@@ -0,0 +1,100 @@
+"""
+Tests of the Ollama provider's NDJSON streaming parse over a mocked transport.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.providers.ollama import OllamaProvider
+
+
+class ChunkedStream(httpx.AsyncByteStream):
+    """Response body sent in the given chunks, recording whether it was closed"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+        self.closed = False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            self.sent += 1
+            yield chunk
+
+    async def aclose(self):
+        self.closed = True
+
+
+def frame(**data):
+    return json.dumps(data).encode() + b"\n"
+
+
+def stream(body, status=200, consume=None, chunks=None):
+    """Run generate_completion_stream against a body and return its chunks"""
+    chunks = [] if chunks is None else chunks
+    provider = OllamaProvider(endpoint="http://stub:11434", model="gemma3:1b")
+
+    def endpoint(request):
+        return httpx.Response(status, stream=body)
+
+    async def run():
+        provider._clients = {asyncio.get_running_loop(): httpx.AsyncClient(transport=httpx.MockTransport(endpoint))}
+        try:
+            async for chunk in provider.generate_completion_stream("system", "hello"):
+                chunks.append(chunk)
+                if consume is not None and len(chunks) == consume:
+                    break
+            return chunks
+        finally:
+            await provider.aclose()
+
+    return asyncio.run(run())
+
+
+def test_lines_split_across_chunks_are_reassembled():
+    data = frame(response="Hel") + frame(response="lo") + frame(response=" world")
+    body = ChunkedStream([data[:7], data[7:20], data[20:21], data[21:]])
+
+    assert stream(body) == ["Hel", "lo", " world"]
+
+
+def test_blank_and_malformed_lines_are_skipped():
+    body = ChunkedStream([b"\n", frame(response="a"), b"not json\n", b"  \n", frame(response="b")])
+
+    assert stream(body) == ["a", "b"]
+
+
+def test_done_frame_ends_the_stream():
+    body = ChunkedStream([
+        frame(response="last", done=False),
+        frame(response="", done=True, eval_count=2),
+        frame(response="after done"),
+    ])
+
+    assert stream(body) == ["last"]
+    assert body.closed
+
+
+def test_error_frame_raises_after_the_text_before_it():
+    body = ChunkedStream([frame(response="partial"), frame(error="model 'gemma3:1b' not found")])
+    chunks = []
+
+    with pytest.raises(ValueError, match="not found"):
+        stream(body, chunks=chunks)
+    assert chunks == ["partial"]
+
+
+def test_http_error_status_raises():
+    with pytest.raises(httpx.HTTPStatusError):
+        stream(ChunkedStream([b'{"error": "overloaded"}']), status=503)
+
+
+def test_consumer_stopping_early_closes_the_response():
+    body = ChunkedStream([frame(response=str(i)) for i in range(100)])
+
+    assert stream(body, consume=2) == ["0", "1"]
+    assert body.closed
+    assert body.sent < 100
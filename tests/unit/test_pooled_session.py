@@ -0,0 +1,68 @@
+"""
+Tests of the per-event-loop pooled sessions of the router's model providers.
+"""
+
+import asyncio
+import threading
+
+from services.model_providers.base import PooledProvider
+
+
+class SessionProvider(PooledProvider):
+    """Provider that only uses the pooled session"""
+
+    def __init__(self):
+        self._init_pool({})
+
+
+async def get_session(provider):
+    return provider._get_session()
+
+
+def test_session_is_reused_within_a_loop():
+    provider = SessionProvider()
+
+    async def run():
+        session = provider._get_session()
+        reused = session is provider._get_session()
+        await provider.close()
+        return reused, session.closed
+
+    assert asyncio.run(run()) == (True, True)
+
+
+def test_each_loop_gets_its_own_session_and_closed_loops_are_dropped():
+    provider = SessionProvider()
+    first = asyncio.run(get_session(provider))
+
+    async def run():
+        second = provider._get_session()
+        sessions = list(provider._sessions.values())
+        await provider.close()
+        return second, sessions
+
+    second, sessions = asyncio.run(run())
+    assert first is not second
+    assert sessions == [second]
+
+
+def test_close_closes_the_session_of_another_running_loop():
+    provider = SessionProvider()
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever)
+    thread.start()
+    try:
+        other = asyncio.run_coroutine_threadsafe(get_session(provider), other_loop).result()
+
+        async def run():
+            own = provider._get_session()
+            await provider.close()
+            return own
+
+        own = asyncio.run(run())
+        assert own.closed and other.closed
+        assert provider._sessions == {}
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
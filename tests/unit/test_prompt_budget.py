@@ -0,0 +1,96 @@
+"""
+Context sizing, prompt trimming and token accounting tests of the prompt budget.
+"""
+
+import threading
+
+import pytest
+
+from app import prompt_budget
+from app.prompt_budget import (
+    LLM_CONTEXT_TOKENS, PromptSection, TaskTokenBudget, TokenBudgetExceeded, context_window, estimator,
+    fit_prompt, parse_model_sizes
+)
+
+MODEL = "test-model"
+
+
+def build(texts):
+    return f"Plan:\n{texts['plan']}\n\nResearch:\n{texts['research']}"
+
+
+def sections(plan_chars=4000, research_chars=4000, **kwargs):
+    return [
+        PromptSection("research", "r" * research_chars, priority=1, **kwargs),
+        PromptSection("plan", "p" * plan_chars, priority=2),
+    ]
+
+
+def test_context_window_is_capped_at_model_maximum():
+    assert context_window("gemma3:4b") == LLM_CONTEXT_TOKENS
+    assert context_window("unknown-model") == LLM_CONTEXT_TOKENS
+
+
+def test_context_window_per_model_setting(monkeypatch):
+    monkeypatch.setattr(prompt_budget, "LLM_MODEL_CONTEXT_TOKENS", parse_model_sizes("gemma3:1b=8192, bad, x=y"))
+    assert context_window("gemma3:1b") == 8192
+    assert context_window("gemma3:4b") == LLM_CONTEXT_TOKENS
+
+
+def test_concurrent_charges_are_all_counted():
+    budget = TaskTokenBudget(None)
+
+    def charge():
+        for _ in range(10000):
+            budget.charge(1, 2)
+
+    threads = [threading.Thread(target=charge) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert (budget.prompt_tokens, budget.output_tokens) == (80000, 160000)
+
+
+def test_prompt_that_fits_is_left_alone():
+    prompt, trimmed = fit_prompt(build, sections(), MODEL, 10000)
+    assert prompt == build({"plan": "p" * 4000, "research": "r" * 4000})
+    assert trimmed == []
+
+
+def test_lowest_priority_section_is_trimmed_first():
+    prompt, trimmed = fit_prompt(build, sections(), MODEL, 1500)
+
+    assert estimator.estimate(prompt, MODEL) <= 1500
+    # The plan fits once the research is cut, so it is kept whole
+    assert "p" * 4000 in prompt
+    assert prompt.count("r") < 4000
+    assert "characters trimmed to fit the token budget" in prompt
+    assert [name for name, _, _ in trimmed] == ["research"]
+
+
+def test_min_chars_floor_moves_trimming_to_the_next_section():
+    prompt, trimmed = fit_prompt(build, sections(min_chars=3000), MODEL, 1000)
+
+    assert "r" * 3000 in prompt
+    assert estimator.estimate(prompt, MODEL) <= 1000
+    assert [name for name, _, _ in trimmed] == ["research", "plan"]
+
+
+def test_trimmed_report_gives_tokens_before_and_after():
+    _, trimmed = fit_prompt(build, sections(), MODEL, 1000)
+
+    for name, before, after in trimmed:
+        assert before == estimator.estimate("r" * 4000 if name == "research" else "p" * 4000, MODEL)
+        assert 0 < after < before
+
+
+def test_allocate_raises_once_the_task_budget_is_used_up():
+    budget = TaskTokenBudget(1000)
+    prompt_tokens, output_tokens = budget.allocate(MODEL, "system", 4000)
+    # The call is clamped to what is left of the task budget
+    assert prompt_tokens + output_tokens < 1000
+
+    budget.charge(900, 90)
+    with pytest.raises(TokenBudgetExceeded):
+        budget.allocate(MODEL, "system", 4000)
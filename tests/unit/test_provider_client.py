@@ -0,0 +1,67 @@
+"""
+Tests of the per-event-loop pooled HTTP clients of model providers.
+"""
+
+import asyncio
+import threading
+
+from app.providers.base import ModelProvider
+
+
+class ClientProvider(ModelProvider):
+    """Provider that only uses the pooled client"""
+
+    def get_provider_name(self) -> str:
+        return "client"
+
+    def get_model_name(self) -> str:
+        return "client-model"
+
+    async def generate_completion(self, system_prompt: str, user_prompt: str) -> str:
+        return ""
+
+    async def generate_completion_stream(self, system_prompt: str, user_prompt: str):
+        yield ""
+
+
+async def get_client(provider):
+    return provider.get_client()
+
+
+def test_client_is_reused_within_a_loop():
+    provider = ClientProvider()
+
+    async def run():
+        return provider.get_client() is provider.get_client()
+
+    assert asyncio.run(run())
+
+
+def test_each_loop_gets_its_own_client_and_closed_loops_are_dropped():
+    provider = ClientProvider()
+    first = asyncio.run(get_client(provider))
+    second = asyncio.run(get_client(provider))
+
+    assert first is not second
+    assert list(provider._clients.values()) == [second]
+
+
+def test_aclose_closes_the_client_of_another_running_loop():
+    provider = ClientProvider()
+    other_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=other_loop.run_forever)
+    thread.start()
+    try:
+        other = asyncio.run_coroutine_threadsafe(get_client(provider), other_loop).result()
+
+        async def run():
+            own = provider.get_client()
+            await provider.aclose()
+            return own
+
+        own = asyncio.run(run())
+        assert own.is_closed and other.is_closed
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
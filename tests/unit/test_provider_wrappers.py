@@ -0,0 +1,112 @@
+"""
+Tests of the provider wrappers stacked by the provider factory.
+"""
+
+import asyncio
+
+from app.providers.base import ModelProvider, ProviderWrapper
+from app.providers.completion_cache import CachedProvider, CompletionCache
+from app.providers.limiter import LimitedProvider
+from app.providers.single_flight import SingleFlightProvider
+
+
+class EchoProvider(ModelProvider):
+    """Provider answering with the user prompt"""
+
+    endpoint = "http://echo"
+
+    def __init__(self):
+        self.calls = 0
+
+    def get_provider_name(self) -> str:
+        return "echo"
+
+    def get_model_name(self) -> str:
+        return "echo-model"
+
+    async def generate_completion(self, system_prompt: str, user_prompt: str) -> str:
+        self.calls += 1
+        return f"echo: {user_prompt}"
+
+    async def generate_completion_stream(self, system_prompt: str, user_prompt: str):
+        yield await self.generate_completion(system_prompt, user_prompt)
+
+
+def stack(provider):
+    return CachedProvider(SingleFlightProvider(LimitedProvider(provider)), CompletionCache(db_path=None))
+
+
+def test_wrappers_delegate_to_the_wrapped_provider():
+    provider = stack(EchoProvider())
+
+    assert all(isinstance(wrapper, ProviderWrapper) for wrapper in (provider, provider.provider, provider.provider.provider))
+    assert provider.get_provider_name() == "echo"
+    assert provider.get_model_name() == "echo-model"
+    assert provider.get_sampling_params() == {"temperature": 0.3}
+    assert provider.endpoint == "http://echo"
+
+
+def test_generate_text_goes_through_every_wrapper():
+    inner = EchoProvider()
+    provider = stack(inner)
+
+    async def run():
+        return [await provider.generate_text("hello") for _ in range(2)]
+
+    assert asyncio.run(run()) == ["echo: hello", "echo: hello"]
+    # The second call is served by the cache
+    assert inner.calls == 1
+
+
+def test_factory_sets_the_provider_temperature(monkeypatch):
+    from app.providers import factory
+
+    monkeypatch.setattr(factory, "provider_cache", {})
+    monkeypatch.setenv("OLLAMA_TEMPERATURE", "0.7")
+
+    assert factory.get_model_provider("ollama", "gemma3:1b", cache=False).get_sampling_params() == {"temperature": 0.7}
+    assert factory.get_model_provider("ollama", "gemma3:1b", cache=False, temperature=0.1).temperature == 0.1
+
+
+def test_high_temperature_completions_bypass_the_cache():
+    inner = EchoProvider()
+    inner.temperature = 0.9
+    cache = CompletionCache(db_path=None, max_temperature=0.5)
+    provider = CachedProvider(inner, cache)
+
+    async def run():
+        return [await provider.generate_text("hello") for _ in range(2)]
+
+    asyncio.run(run())
+    assert inner.calls == 2
+    assert cache.get_stats()["bypasses"] == 2
+
+
+def test_ollama_sends_the_temperature_as_an_option():
+    import httpx
+    import json
+    from app.providers.ollama import OllamaProvider
+
+    bodies = []
+
+    def endpoint(request):
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json={"response": "ok", "done": True})
+
+    provider = OllamaProvider(endpoint="http://stub:11434", model="gemma3:1b")
+    provider.temperature = 0.7
+
+    async def run():
+        provider._clients = {asyncio.get_running_loop(): httpx.AsyncClient(transport=httpx.MockTransport(endpoint))}
+        try:
+            await provider.generate_completion("system", "hello")
+            return [chunk async for chunk in provider.generate_completion_stream("system", "hello")]
+        finally:
+            await provider.aclose()
+
+    assert asyncio.run(run()) == ["ok"]
+    for body in bodies:
+        assert "temperature" not in body
+        assert body["options"]["temperature"] == 0.7
+        # Interactive calls leave the context window to Ollama's default
+        assert "num_ctx" not in body["options"]
@@ -0,0 +1,107 @@
+"""
+Tests of the research cache: size accounting, TTL expiry, ETag
+revalidation and LRU eviction.
+"""
+
+import os
+
+import pytest
+
+from app import research_cache
+from app.research_cache import CacheStats, ResearchCache
+from app.research_fetcher import ResearchFetcher
+
+
+class Clock:
+    """Stand-in for the time module that only moves when told to"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(research_cache, "time", clock)
+    return clock
+
+
+def entry_size(cache, url):
+    row = cache.conn.execute('SELECT size FROM entries WHERE key = ?', (cache.make_key(url),)).fetchone()
+    return row["size"]
+
+
+def test_size_counts_raw_and_text(tmp_path):
+    cache = ResearchCache(str(tmp_path))
+    cache.store("https://example.com", "x" * 100, ttl=60)
+    cache.store_text("https://example.com", "y" * 30)
+    assert entry_size(cache, "https://example.com") == 130
+
+
+def test_storing_text_again_replaces_its_size(tmp_path):
+    cache = ResearchCache(str(tmp_path))
+    cache.store("https://example.com", "x" * 100, ttl=60)
+    for _ in range(3):
+        cache.store_text("https://example.com", "y" * 30)
+    assert entry_size(cache, "https://example.com") == 130
+
+
+def test_entries_expire_after_their_ttl(tmp_path, clock):
+    cache = ResearchCache(str(tmp_path))
+    cache.store("https://example.com", "raw", ttl=60)
+    cache.store_text("https://example.com", "text")
+    assert cache.lookup("https://example.com")["fresh"]
+    assert cache.get_text("https://example.com") == "text"
+
+    clock.now += 61
+    entry = cache.lookup("https://example.com")
+    # An expired entry is kept for revalidation but is no longer fresh
+    assert entry["raw"] == "raw"
+    assert not entry["fresh"]
+    assert cache.get_text("https://example.com") is None
+
+
+def test_not_modified_response_keeps_the_entry(tmp_path, clock):
+    cache = ResearchCache(str(tmp_path))
+    cache.store("https://example.com", "raw", ttl=60, etag='"v1"')
+    clock.now += 61
+
+    fetcher = ResearchFetcher(max_workers=1, cache=cache)
+    sent_headers = []
+
+    def not_modified(url, params=None, headers=None):
+        sent_headers.append(headers)
+        return 304, None, {}
+
+    fetcher._get = not_modified
+    stats = CacheStats()
+    try:
+        assert fetcher.fetch_text("https://example.com", ttl=60, stats=stats) == "raw"
+    finally:
+        fetcher.executor.shutdown()
+
+    assert sent_headers == [{"If-None-Match": '"v1"'}]
+    assert stats.as_dict()["revalidated"] == 1
+    entry = cache.lookup("https://example.com")
+    assert entry["fresh"]
+    assert entry["etag"] == '"v1"'
+
+
+def test_least_recently_used_entries_are_evicted_over_the_byte_cap(tmp_path, clock):
+    cache = ResearchCache(str(tmp_path), max_bytes=250)
+    cache.store("https://a.example", "a" * 100, ttl=60)
+    clock.now += 1
+    cache.store("https://b.example", "b" * 100, ttl=60)
+    clock.now += 1
+    # Reading a makes b the least recently used entry
+    cache.lookup("https://a.example")
+    clock.now += 1
+    cache.store("https://c.example", "c" * 100, ttl=60)
+
+    assert cache.lookup("https://b.example") is None
+    assert not os.path.exists(cache._path(cache.make_key("https://b.example"), "html"))
+    assert cache.lookup("https://a.example")["raw"] == "a" * 100
+    assert cache.lookup("https://c.example")["raw"] == "c" * 100
@@ -0,0 +1,144 @@
+"""
+Tests of the research fetcher's parallel fetches and shared pooled session.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app import research_fetcher
+from app.research_fetcher import ResearchFetcher, get_research_fetcher
+
+
+class StubSite:
+    """HTTP/1.1 site recording its peak concurrency and client connections"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+        self.client_ports = set()
+        self._lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with site._lock:
+                    site.in_flight += 1
+                    site.peak = max(site.peak, site.in_flight)
+                    site.client_ports.add(self.client_address[1])
+                try:
+                    if self.path.startswith("/slow"):
+                        time.sleep(0.2)
+                    else:
+                        time.sleep(0.05)
+                    status = 500 if self.path.startswith("/fail") else 200
+                    body = f"page {self.path}".encode()
+                    self.send_response(status)
+                    self.send_header("Content-Type", "text/html; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                finally:
+                    with site._lock:
+                        site.in_flight -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def site():
+    site = StubSite()
+    yield site
+    site.close()
+
+
+def test_results_are_paired_with_their_items_in_completion_order(site):
+    fetcher = ResearchFetcher(max_workers=4, per_host_limit=4)
+    urls = [f"{site.url}/slow", f"{site.url}/a", f"{site.url}/b"]
+
+    results = list(fetcher.map(fetcher.fetch_text, urls))
+
+    assert dict(results) == {url: f"page {url[len(site.url):]}" for url in urls}
+    # The slow page finishes last instead of holding up the others
+    assert results[-1][0] == f"{site.url}/slow"
+
+
+def test_a_failing_page_does_not_fail_the_others(site):
+    fetcher = ResearchFetcher(max_workers=4, per_host_limit=4)
+
+    def fetch(path):
+        if path == "/raises":
+            raise RuntimeError("parser error")
+        return fetcher.fetch_text(site.url + path)
+
+    results = dict(fetcher.map(fetch, ["/a", "/fail", "/raises", "/b"]))
+
+    # A non-200 page yields None; an exception drops only its own item
+    assert results == {"/a": "page /a", "/fail": None, "/b": "page /b"}
+
+
+def test_requests_to_one_host_stay_within_the_per_host_limit(site):
+    fetcher = ResearchFetcher(max_workers=8, per_host_limit=2)
+
+    results = dict(fetcher.map(fetcher.fetch_text, [f"{site.url}/{i}" for i in range(8)]))
+
+    assert len(results) == 8
+    assert site.peak == 2
+
+
+def test_calls_in_flight_stay_within_max_workers():
+    fetcher = ResearchFetcher(max_workers=3)
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def call(item):
+        with lock:
+            in_flight.append(item)
+            peak.append(len(in_flight))
+        time.sleep(0.02)
+        with lock:
+            in_flight.remove(item)
+        return item
+
+    assert sorted(result for _, result in fetcher.map(call, range(12))) == list(range(12))
+    assert max(peak) == 3
+
+
+def test_unfinished_requests_are_dropped_at_the_deadline(site):
+    fetcher = ResearchFetcher(max_workers=4, per_host_limit=4)
+    urls = [f"{site.url}/a", f"{site.url}/slow"]
+
+    results = dict(fetcher.map(fetcher.fetch_text, urls, deadline=time.monotonic() + 0.12))
+
+    assert results == {f"{site.url}/a": "page /a"}
+
+
+def test_sequential_fetches_reuse_one_pooled_connection(site):
+    fetcher = ResearchFetcher(max_workers=2, per_host_limit=2)
+
+    for i in range(5):
+        assert fetcher.fetch_text(f"{site.url}/{i}") == f"page /{i}"
+
+    assert len(site.client_ports) == 1
+
+
+def test_processors_share_one_fetcher(monkeypatch):
+    monkeypatch.setattr(research_fetcher, "_shared_fetcher", None)
+    monkeypatch.setattr(research_fetcher, "ResearchCache", lambda: None)
+
+    assert get_research_fetcher() is get_research_fetcher()
@@ -0,0 +1,129 @@
+"""
+Tests of the map-reduce research summarizer against a stub LLM.
+"""
+
+import threading
+import time
+
+import pytest
+
+from app import prompt_budget
+from app.prompt_budget import PROMPT_OVERHEAD_TOKENS, context_window, estimator
+from app.research_summarizer import MERGE_SYSTEM_PROMPT, MapReduceSummarizer
+
+MODEL = "small-model"
+WINDOW = 4096
+
+
+class StubLLM:
+    """LLM answering every prompt with a short summary and recording the calls"""
+
+    def __init__(self, delay=0.0):
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self, prompt, system_prompt, max_tokens):
+        with self._lock:
+            self.calls.append((prompt, system_prompt, max_tokens))
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if "fail" in prompt:
+                return None
+            if system_prompt == MERGE_SYSTEM_PROMPT:
+                return f"merged {len(prompt)}"
+            return f"summary {len(prompt)}"
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def fits(self):
+        """Whether every recorded call fit the model's context window"""
+        return all(
+            estimator.estimate(prompt, MODEL) + estimator.estimate(system or "", MODEL) + max_tokens
+            + PROMPT_OVERHEAD_TOKENS <= context_window(MODEL)
+            for prompt, system, max_tokens in self.calls
+        )
+
+
+@pytest.fixture(autouse=True)
+def small_window(monkeypatch):
+    monkeypatch.setattr(prompt_budget, "LLM_MODEL_CONTEXT_TOKENS", {MODEL: WINDOW})
+
+
+def build(key, content):
+    return f"# Summarize {key}\n\n{content}\n\n## Instructions\nSummarize the content above."
+
+
+def test_content_budget_follows_the_model_context_window():
+    llm = StubLLM()
+    small = MapReduceSummarizer(llm, MODEL).content_chars("system", 1000)
+    large = MapReduceSummarizer(llm, "gemma3:4b").content_chars("system", 1000)
+
+    assert small < large
+    # A longer response leaves less room for the prompt
+    assert MapReduceSummarizer(llm, MODEL).content_chars("system", 2000) < small
+
+
+def test_short_inputs_are_summarized_in_one_call_each():
+    llm = StubLLM()
+    summarizer = MapReduceSummarizer(llm, MODEL)
+
+    summaries = summarizer.map({"a": "alpha", "b": "beta", "fail": "gamma"}, build, "system", max_tokens=500)
+
+    # Failed calls are dropped; the others keep their input order
+    assert list(summaries) == ["a", "b"]
+    assert len(llm.calls) == 3
+
+
+def test_long_input_is_chunked_to_fit_and_merged():
+    llm = StubLLM()
+    summarizer = MapReduceSummarizer(llm, MODEL)
+    paragraphs = "\n\n".join("p" * 1500 for _ in range(40))
+
+    summaries = summarizer.map({"long": paragraphs}, build, "system", max_tokens=1000)
+
+    map_calls = [call for call in llm.calls if call[1] == "system"]
+    merge_calls = [call for call in llm.calls if call[1] == MERGE_SYSTEM_PROMPT]
+    assert len(map_calls) > 1
+    assert len(merge_calls) == 1
+    assert summaries["long"].startswith("merged ")
+    assert llm.fits()
+
+
+def test_parts_that_do_not_fit_are_merged_in_batches():
+    llm = StubLLM()
+    summarizer = MapReduceSummarizer(llm, MODEL)
+    parts = ["s" * 3000 for _ in range(12)]
+
+    result = summarizer.reduce(parts, lambda content: f"# Report\n\n{content}", "final", max_tokens=1000)
+
+    merge_calls = [call for call in llm.calls if call[1] == MERGE_SYSTEM_PROMPT]
+    final_calls = [call for call in llm.calls if call[1] == "final"]
+    assert len(merge_calls) > 1
+    assert len(final_calls) == 1
+    assert result.startswith("summary ")
+    assert llm.fits()
+
+
+def test_parts_that_fit_go_straight_to_the_final_call():
+    llm = StubLLM()
+    summarizer = MapReduceSummarizer(llm, MODEL)
+
+    summarizer.reduce(["one", "", "two"], lambda content: content, "final", max_tokens=1000)
+
+    assert llm.calls == [("one\n\ntwo", "final", 1000)]
+
+
+def test_map_calls_stay_within_max_concurrency():
+    llm = StubLLM(delay=0.02)
+    summarizer = MapReduceSummarizer(llm, MODEL, max_concurrency=2)
+
+    summaries = summarizer.map({str(i): "text" for i in range(8)}, build, "system", max_tokens=500)
+
+    assert len(summaries) == 8
+    assert llm.peak == 2
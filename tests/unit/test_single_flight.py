@@ -0,0 +1,150 @@
+"""
+Tests of single-flight coalescing of identical in-flight requests.
+"""
+
+import asyncio
+
+import pytest
+
+from app.providers.base import ModelProvider
+from app.providers.single_flight import SingleFlightProvider
+
+
+class GatedProvider(ModelProvider):
+    """Provider whose calls block until the test opens the gate"""
+
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.calls = 0
+        self.streams = 0
+        self.cancelled = 0
+
+    def get_provider_name(self) -> str:
+        return "gated"
+
+    def get_model_name(self) -> str:
+        return "gated-model"
+
+    async def generate_completion(self, system_prompt: str, user_prompt: str) -> str:
+        self.calls += 1
+        try:
+            await self.gate.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"answer to {user_prompt}"
+
+    async def generate_completion_stream(self, system_prompt: str, user_prompt: str):
+        self.streams += 1
+        try:
+            yield "a"
+            await self.gate.wait()
+            yield "b"
+            yield "c"
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled += 1
+            raise
+
+
+async def settle():
+    """Let the scheduled tasks run until they block"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_concurrent_identical_completions_make_one_upstream_call():
+    async def run():
+        inner = GatedProvider()
+        provider = SingleFlightProvider(inner)
+        calls = [asyncio.create_task(provider.generate_completion("system", "question")) for _ in range(3)]
+        other = asyncio.create_task(provider.generate_completion("system", "other question"))
+        await settle()
+        inner.gate.set()
+        return inner, await asyncio.gather(*calls), await other
+
+    inner, answers, other = asyncio.run(run())
+    assert answers == ["answer to question"] * 3
+    assert other == "answer to other question"
+    assert inner.calls == 2
+
+
+def test_finished_requests_are_not_shared():
+    async def run():
+        inner = GatedProvider()
+        inner.gate.set()
+        provider = SingleFlightProvider(inner)
+        await provider.generate_completion("system", "question")
+        await provider.generate_completion("system", "question")
+        return inner
+
+    assert asyncio.run(run()).calls == 2
+
+
+def test_late_stream_subscriber_replays_earlier_chunks():
+    async def run():
+        inner = GatedProvider()
+        provider = SingleFlightProvider(inner)
+
+        first = provider.generate_completion_stream("system", "question")
+        assert await first.__anext__() == "a"
+
+        async def collect(stream):
+            return [chunk async for chunk in stream]
+
+        late = asyncio.create_task(collect(provider.generate_completion_stream("system", "question")))
+        rest = asyncio.create_task(collect(first))
+        await settle()
+        inner.gate.set()
+        return inner, ["a"] + await rest, await late
+
+    inner, first_chunks, late_chunks = asyncio.run(run())
+    assert first_chunks == ["a", "b", "c"]
+    assert late_chunks == ["a", "b", "c"]
+    assert inner.streams == 1
+
+
+def test_upstream_call_is_cancelled_only_when_the_last_caller_leaves():
+    async def run():
+        inner = GatedProvider()
+        provider = SingleFlightProvider(inner)
+        calls = [asyncio.create_task(provider.generate_completion("system", "question")) for _ in range(2)]
+        await settle()
+
+        calls[0].cancel()
+        await settle()
+        still_running = inner.cancelled == 0
+
+        calls[1].cancel()
+        await settle()
+        for call in calls:
+            with pytest.raises(asyncio.CancelledError):
+                await call
+        return inner, still_running, provider
+
+    inner, still_running, provider = asyncio.run(run())
+    assert still_running
+    assert inner.cancelled == 1
+    assert provider._calls == {}
+
+
+def test_upstream_stream_is_cancelled_when_every_subscriber_leaves():
+    async def run():
+        inner = GatedProvider()
+        provider = SingleFlightProvider(inner)
+        first = provider.generate_completion_stream("system", "question")
+        second = provider.generate_completion_stream("system", "question")
+        assert await first.__anext__() == "a"
+        assert await second.__anext__() == "a"
+
+        await first.aclose()
+        await settle()
+        still_running = inner.cancelled == 0
+
+        await second.aclose()
+        await settle()
+        return inner, still_running, provider
+
+    inner, still_running, provider = asyncio.run(run())
+    assert still_running
+    assert inner.cancelled == 1
+    assert provider._streams == {}
@@ -0,0 +1,95 @@
+"""
+Tests of the phase checkpoints a restarted task resumes from.
+"""
+
+import json
+import os
+
+import pytest
+
+from app.task_checkpoint import MANIFEST_FILE, PhaseCheckpoint
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    return str(tmp_path)
+
+
+def write(output_dir, name, content):
+    with open(os.path.join(output_dir, name), 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def run_phase(output_dir, phase, files, result=None):
+    checkpoint = PhaseCheckpoint(output_dir)
+    checkpoint.start(phase)
+    for name, content in files.items():
+        write(output_dir, name, content)
+    checkpoint.complete(phase, list(files), result=result)
+
+
+def test_completed_phases_are_resumed_from_a_new_checkpoint(output_dir):
+    run_phase(output_dir, "planning", {"plan.md": "plan"})
+    run_phase(output_dir, "research", {"research_data.json": "{}", "research_summary.md": "summary"})
+    run_phase(output_dir, "execution", {"output.md": "output"}, result=["output.md"])
+
+    checkpoint = PhaseCheckpoint(output_dir)
+    assert checkpoint.completed_phases() == ["planning", "research", "execution"]
+    assert checkpoint.completed("execution")["result"] == ["output.md"]
+    assert checkpoint.completed("review") is None
+
+
+def test_phase_left_in_progress_is_not_resumed(output_dir):
+    run_phase(output_dir, "planning", {"plan.md": "plan"})
+    PhaseCheckpoint(output_dir).start("research")
+
+    assert PhaseCheckpoint(output_dir).completed_phases() == ["planning"]
+
+
+def test_changed_file_invalidates_its_phase_and_every_later_one(output_dir):
+    run_phase(output_dir, "planning", {"plan.md": "plan"})
+    run_phase(output_dir, "research", {"research_data.json": "{}"})
+    write(output_dir, "plan.md", "edited plan")
+
+    checkpoint = PhaseCheckpoint(output_dir)
+    assert checkpoint.completed("planning") is None
+    # Research's own files are intact, but its input plan changed
+    assert checkpoint.completed("research") is None
+    assert checkpoint.completed_phases() == []
+
+
+def test_missing_file_invalidates_its_phase(output_dir):
+    run_phase(output_dir, "planning", {"plan.md": "plan"})
+    run_phase(output_dir, "research", {"research_data.json": "{}", "research_summary.md": "summary"})
+    os.remove(os.path.join(output_dir, "research_summary.md"))
+
+    assert PhaseCheckpoint(output_dir).completed_phases() == ["planning"]
+
+
+def test_restarting_a_phase_drops_later_checkpoints(output_dir):
+    run_phase(output_dir, "planning", {"plan.md": "plan"})
+    run_phase(output_dir, "research", {"research_data.json": "{}"})
+
+    PhaseCheckpoint(output_dir).start("planning")
+
+    with open(os.path.join(output_dir, MANIFEST_FILE), encoding='utf-8') as f:
+        assert list(json.load(f)["phases"]) == ["planning"]
+    assert PhaseCheckpoint(output_dir).completed_phases() == []
+
+
+def test_rewrite_by_a_later_phase_updates_the_earlier_hash(output_dir):
+    run_phase(output_dir, "planning", {"plan.md": "plan"})
+    run_phase(output_dir, "research", {"research_data.json": "{}"})
+    run_phase(output_dir, "execution", {"output.md": "draft"})
+    # Review revises execution's output
+    run_phase(output_dir, "review", {"output.md": "revised", "review.md": "review"})
+
+    assert PhaseCheckpoint(output_dir).completed_phases() == ["planning", "research", "execution", "review"]
+
+
+def test_damaged_manifest_is_treated_as_empty(output_dir):
+    write(output_dir, MANIFEST_FILE, "{not json")
+
+    checkpoint = PhaseCheckpoint(output_dir)
+    assert checkpoint.completed_phases() == []
+    checkpoint.start("planning")
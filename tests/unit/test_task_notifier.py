@@ -0,0 +1,72 @@
+"""
+Tests of the wake-on-insert channel between task producers and processors.
+"""
+
+import os
+import socket
+import threading
+import time
+
+import pytest
+
+from app import task_notifier
+from app.task_notifier import TaskNotifier, notify_new_task
+
+
+@pytest.fixture
+def notify_dir(tmp_path, monkeypatch):
+    path = str(tmp_path / "notify")
+    monkeypatch.setattr(task_notifier, "NOTIFY_DIR", path)
+    task_notifier._local_event.clear()
+    yield path
+    task_notifier._local_event.clear()
+
+
+def test_notify_wakes_a_waiting_processor_before_its_timeout(notify_dir):
+    with TaskNotifier() as notifier:
+        threading.Timer(0.1, notify_new_task, args=("task",)).start()
+        started = time.monotonic()
+        assert notifier.wait(5)
+        assert time.monotonic() - started < 2
+        # The notification was consumed, so the next wait times out
+        assert not notifier.wait(0.05)
+
+
+def test_listener_socket_is_signalled_across_processes(notify_dir):
+    with TaskNotifier() as notifier:
+        # Another process only sees the socket files, not this process's event
+        task_notifier._local_sock_paths.discard(notifier.sock_path)
+        assert os.listdir(notify_dir) == [os.path.basename(notifier.sock_path)]
+        assert notify_new_task("task") == 1
+        task_notifier._local_event.clear()
+        assert notifier.wait(1)
+
+
+def test_notify_without_listeners_is_a_no_op(notify_dir):
+    assert not os.path.exists(notify_dir)
+    assert notify_new_task("task") == 0
+
+
+def test_stale_socket_file_is_removed(notify_dir):
+    os.makedirs(notify_dir)
+    stale_path = os.path.join(notify_dir, "gone.sock")
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    listener.bind(stale_path)
+    # The listener exited without removing its socket file
+    listener.close()
+
+    assert notify_new_task("task") == 0
+    assert not os.path.exists(stale_path)
+
+
+def test_closed_notifier_is_a_no_op(notify_dir):
+    notifier = TaskNotifier()
+    notifier.open()
+    notifier.close()
+    notifier.close()
+
+    assert os.listdir(notify_dir) == []
+    assert notify_new_task("task") == 0
+    # Without a socket the in-process event still wakes the wait
+    assert notifier.wait(1)
+    assert not notifier.wait(0.05)
@@ -0,0 +1,60 @@
+"""
+Concurrency Utilities
+
+This module provides the request pipelining helper shared by the app
+providers and the core model router.
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncGenerator, Awaitable, Callable, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+async def pipelined(call: Callable[[Any], Awaitable[T]],
+                    requests: Sequence[Any],
+                    max_concurrency: int,
+                    label: str = "a batch"
+                    ) -> AsyncGenerator[Tuple[int, Optional[T], Optional[Exception]], None]:
+    """
+    Run a coroutine function over many independent requests
+
+    Up to max_concurrency calls are in flight at once, and results are
+    yielded as they finish rather than in request order. A failed call
+    yields its error instead of failing the batch. When the caller stops
+    reading, the calls still queued or in flight are cancelled.
+
+    Args:
+        call: Coroutine function run on each request
+        requests: Requests to run
+        max_concurrency: Calls in flight at once
+        label: Name of the batch in failure logs
+
+    Yields:
+        Tuple[int, Optional[T], Optional[Exception]]: Index of the request,
+        and its result or its error
+    """
+    semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+
+    async def run(index: int, request: Any):
+        async with semaphore:
+            try:
+                return index, await call(request), None
+            except Exception as e:
+                logger.warning(f"Request {index} of {label} failed: {e}")
+                return index, None, e
+
+    tasks = [asyncio.ensure_future(run(index, request)) for index, request in enumerate(requests)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        # The caller stopped reading: drop the requests still queued or in flight
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        # Wait for them to unwind so none is destroyed while still pending
+        await asyncio.gather(*pending, return_exceptions=True)